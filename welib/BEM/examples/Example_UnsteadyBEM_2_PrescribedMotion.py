@@ -32,6 +32,7 @@ def main(test=False):
     tmax     = 70
     BEM.timeStepInit(0,tmax,dt) # Allocate memory for time storage
     xdBEM = BEM.getInitStates() # Initial discrete states 
+    motion.precompute(BEM.time) # Kinematics at all time steps, motion.update(t) then only indexes them
     for it,t in enumerate(BEM.time):
         motion.update(t)
         u,v,w = windFunction(motion.pos_gl[:,:,0], motion.pos_gl[:,:,1], motion.pos_gl[:,:,2], t)  
@@ -3,6 +3,11 @@ Set of high thrust corrections
 
 NOTE: ac=0.4 -> Ctc = (1-(1-2*ac)**2) = 0.96
 
+The inverse relations a(Ct,F) are also available as precomputed tables (see InverseCtTable), 
+built once at first use, with a vectorized lookup:
+
+    a = a_Ct_tabulated(Ct, F, method='AeroDyn')
+
 """
 import numpy as np
 
@@ -63,7 +68,7 @@ def a_Ct(Ct, a=None, F=None, method='AeroDyn'):
         ac    = 0.34
         Ic    = a>ac
         fgs   = ac/a[Ic]*(2-ac/a[Ic])
-        a[Ic] = Ct[Ic]/(4*F[Ic]*(1-fgs*a[Iac]))
+        a[Ic] = Ct[Ic]/(4*F[Ic]*(1-fgs*a[Ic]))
         #In = np.logical_not(Ic) # Normal
     elif method=='Shen_CTa':
         ac    = 1/3
@@ -98,6 +103,164 @@ def Ct_a(a, F=None, method='Glauert', ac=None):
         raise NotImplementedError('High correcton method '+method)
     return Ct
 
+
+# --------------------------------------------------------------------------------}
+# --- Tabulated inverse relations a(Ct,F) 
+# --------------------------------------------------------------------------------{
+def _a_momentum(x):
+    """ Momentum theory induction, x=Ct/F """
+    return 0.5*(1-np.sqrt(1-x))
+
+class InverseCtTable(object):
+    """ 
+    Tabulated inverse of a high thrust correction: a = a(Ct, F)
+
+    Each correction is made of two smooth branches (typically momentum theory and the correction), 
+    separated by the threshold of the method. Each branch is tabulated on a uniform grid of one 
+    variable, v=Ct/F or v=Ct, such that a = y(v) or a = y(v)/F. The dependency in F is therefore exact.
+    When both branches are functions of Ct/F, they are stored in one table that has a grid point at
+    the threshold. Otherwise, the branch is selected with the exact threshold.
+    The lookup is done with index arithmetic and linear interpolation, which preserves the 
+    monotonicity of the tabulated relation.
+
+    Methods:
+      - 'AeroDyn', 'GlauertEmpirical', 'WEHandbook', 'HAWC2': see a_Ct
+      - 'Glauert', 'Spera': inverse of Ct_a (ac=1/3)
+
+    Accuracy:
+      The attribute `maxError` is the maximum absolute error on `a` with respect to the exact formula,
+      evaluated at the quarter and mid-points of the grid cells (where the error of the linear interpolation
+      is the largest, for smooth functions and square root singularities respectively).
+      For branches scaled by 1/F, the error on `a` is maxError/F.
+      For smooth branches, the error scales with 1/n**2: for the default n=2001, maxError is below 3e-4
+      for 'AeroDyn', 'HAWC2', 'Glauert' and 'Spera'. The error is larger, and scales with 1/n**0.5, for the
+      branches that have an infinite slope at their bound: about 1e-2 for 'GlauertEmpirical' and 'WEHandbook'.
+      Outside of the domain of the tables (Ct/F in [x_min, x_max], Ct in [., Ct_max]) or where the exact
+      formula is undefined (NaN), the values at the bounds of the tables are returned. 
+      The default domain covers the range a in [-1, 1.5] used by the BEM solvers.
+    """
+    def __init__(self, method='AeroDyn', n=2001, x_min=-8, x_max=5, Ct_max=4):
+        """ 
+        INPUTS:
+          - method: high thrust correction, see class documentation
+          - n     : number of grid points of each branch
+          - x_min, x_max: domain of the Ct/F tables
+          - Ct_max: upper bound of the Ct tables
+        """
+        self.method = method
+        # Branch: (variable 'x' (Ct/F) or 'Ct', scaled by 1/F, vmin, vmax, function)
+        low   = ('x', False, x_min, 0.96, _a_momentum)
+        Ct_c0 = 0.889-0.0203/0.6427 # lowest Ct for which the empirical formula is defined
+        fEmp  = lambda Ct: 0.143+np.sqrt(np.maximum(0.0203-0.6427*(0.889-Ct), 0)) # NOTE: exact at Ct_c0
+        if method=='AeroDyn':
+            self._threshold = ('x', 0.96)
+            high = ('x', False, 0.96, x_max, lambda x: 0.1432+np.sqrt(-0.55106+0.6427*x))
+        elif method=='GlauertEmpirical':
+            self._threshold = ('x', 0.96)
+            high = ('Ct', True, Ct_c0, Ct_max, fEmp)
+        elif method=='WEHandbook':
+            self._threshold = ('Ct', 0.96)
+            low  = ('x', False, x_min, 1, _a_momentum) # Ct/F may be above 0.96 when Ct<0.96
+            high = ('Ct', True, 0.96, Ct_max, fEmp)
+        elif method=='HAWC2':
+            self._threshold = None
+            k = [0.0, 0.2460, 0.0586, 0.0883]
+            low  = ('x', False, x_min, x_max, lambda x: k[3]*x**3+k[2]*x**2+k[1]*x+k[0])
+            high = None
+        elif method in ['Glauert','Spera']:
+            xc = 8/9 # Ct_a(ac=1/3)
+            self._threshold = ('x', xc)
+            low  = ('x', False, x_min, xc, _a_momentum)
+            # Inverse of the monotonic relation Ct_a(a) for F=1
+            a_ = np.linspace(1/3, 2, 20*n)
+            x_ = Ct_a(a_, method=method)
+            high = ('x', False, xc, x_max, lambda x: np.interp(x, x_, a_))
+        else:
+            raise NotImplementedError('Tabulated inverse for high thrust correction method '+method)
+        if high is None or (high[0]=='x' and not high[1]):
+            # Single table in Ct/F, with a grid point at the threshold (low branch at the threshold)
+            self._threshold = None
+            if high is None:
+                high = low
+            dv = (low[3]-low[2])/(n-1)
+            nh = int(np.ceil((high[3]-low[3])/dv - 1e-8))
+            v  = low[2] + dv*np.arange(n+nh)
+            with np.errstate(invalid='ignore'):
+                y = np.where(v<=low[3], low[-1](v), high[-1](v))
+            self.branches = [self._tabulate('x', False, v, y)]
+            funs = [lambda v: np.where(v<=low[3], low[-1](v), high[-1](v))]
+        else:
+            self.branches = [self._tabulate(b[0], b[1], np.linspace(b[2], b[3], n), b[-1]) for b in [low, high]]
+            funs = [low[-1], high[-1]]
+
+        # --- Accuracy, at the quarter and mid-points of the grids
+        self.maxError = 0
+        for (var, bInvF, v0, dv, y, slope), fun in zip(self.branches, funs):
+            vm = v0 + dv*(np.arange(len(y)-1)[:,None]+np.array([0.25,0.5,0.75])).ravel()
+            with np.errstate(invalid='ignore'):
+                err = np.abs(self._lookup(vm, v0, dv, y, slope) - fun(vm))
+            self.maxError = max(self.maxError, np.nanmax(err))
+
+    @staticmethod
+    def _tabulate(var, bInvF, v, y):
+        """ Table on the uniform grid v, y are the values or a function """
+        if callable(y):
+            with np.errstate(invalid='ignore'):
+                y = y(v)
+        # Values at the bounds where the formula is undefined
+        bOK = ~np.isnan(y)
+        y[~bOK] = np.interp(v[~bOK], v[bOK], y[bOK])
+        dv = v[1]-v[0]
+        slope = np.zeros(len(v))
+        slope[:-1] = np.diff(y)/dv
+        return var, bInvF, v[0], dv, y, slope
+
+    @staticmethod
+    def _lookup(v, v0, dv, y, slope):
+        u = np.clip((v-v0)/dv, 0, len(y)-1)
+        i = np.minimum(u.astype(int), len(y)-2)
+        return y[i] + slope[i]*(u-i)*dv
+
+    def __call__(self, Ct, F=None):
+        """ 
+        Returns the axial induction factor
+
+        INPUTS:
+          - Ct: local thrust coefficient, array of any shape
+          - F : tip-loss factor, array of same shape as Ct, or None
+        OUTPUTS:
+          - a: axial induction factor, array of same shape as Ct
+        """
+        Ct = np.asarray(Ct, dtype=float)
+        if self.method=='AeroDyn':
+            Ct = np.clip(Ct, -2, 2)
+        if F is None:
+            F = np.ones(Ct.shape)
+        x = Ct/F
+        vals = {'x':x, 'Ct':Ct}
+        A = []
+        for var, bInvF, v0, dv, y, slope in self.branches:
+            a = self._lookup(vals[var], v0, dv, y, slope)
+            if bInvF:
+                a /= F
+            A.append(a)
+        if self._threshold is None:
+            return A[0]
+        var, vc = self._threshold
+        return np.where(vals[var]>vc, A[1], A[0])
+
+
+_INVERSE_CT_TABLES={}
+def a_Ct_tabulated(Ct, F=None, method='AeroDyn'):
+    """ 
+    Tabulated high thrust correction a=a(Ct,F), see InverseCtTable.
+    The table of a given method is built once, at the first call.
+    """
+    if method not in _INVERSE_CT_TABLES:
+        _INVERSE_CT_TABLES[method] = InverseCtTable(method)
+    return _INVERSE_CT_TABLES[method](Ct, F)
+
+
 def main_plot():
     import matplotlib.pyplot as plt
     Ct=np.linspace(0,2,50)
@@ -57,6 +57,97 @@ def planform_wakerot(r, R, TSR_design, Cl_design, B=3):
     return chord, phi
 
 
+def planform_designspace(TSR_design, Cl_design, B, polar, alpha_design=None, R=1, r_hub=0.1, nr=30, 
+        wakeRot=True, TSR=None, V0=10, rho=1.225, **kwargs):
+    """ 
+    Evaluates the ideal planforms of a grid of design points (TSR_design, Cl_design, B) with the 
+    steady BEM, for all designs at once (see SteadyBEMBatch), and returns a trade-off table.
+
+    The twist is such that the angle of attack at the design point is `alpha_design` (no pitch),
+    the same airfoil is used along the span.
+
+    INPUTS:
+     - TSR_design: design tip-speed ratios (array-like)
+     - Cl_design : design lift coefficients (array-like)
+     - B         : numbers of blades (array-like)
+     - polar     : airfoil polar, array with columns alpha [deg], Cl, Cd (, Cm)
+     - alpha_design: design angle of attack [deg], scalar or array (nCl). Default: angle on the 
+                   attached part of the polar (between minimum and maximum lift) at which Cl=Cl_design. Designs with Cl_design 
+                   above the maximum lift coefficient are not evaluated (NaN).
+     - R, r_hub  : rotor radius and hub radius (relative to R if r_hub<1)
+     - nr        : number of radial stations
+     - wakeRot   : if True, planform with wake rotation (planform_wakerot), otherwise planform_nowakerot
+     - TSR       : tip-speed ratios at which the designs are evaluated (array-like). Default: TSR_design.
+     - V0, rho   : wind speed and air density used for the evaluation
+     - kwargs    : options passed to SteadyBEMBatch (e.g. bTipLoss, nItMax). The default solver is 'Phi', 
+                   since the fixed point iterations may not converge at the root of ideal rotors (a=1/3)
+    OUTPUTS:
+     - df: dataframe with one row per design (and per TSR if provided), with columns:
+           TSR_design, Cl_design, B, alpha_design, TSR, CP, CT, CQ, 
+           CFlap     : blade root flap moment coefficient Flap/(0.5 rho V0^2 pi R^3)
+           solidity  : rotor solidity B int c dr / (pi R^2)
+           chordMass : blade mass proxy, B int (c/R)^2 d(r/R) (mass of blades with thickness proportional to chord)
+           cmax_R    : maximum chord over radius
+           converged : convergence of the BEM
+    """
+    from welib.BEM.steadyBEM import SteadyBEMBatch
+    from welib.airfoils.PolarTable import PolarTable
+    polar = np.asarray(polar)
+    TSR_u, Cl_u, B_u = [np.atleast_1d(v).astype(float) for v in (TSR_design, Cl_design, B)]
+    TSR_d, Cl_d, B_d = [v.flatten() for v in np.meshgrid(TSR_u, Cl_u, B_u, indexing='ij')]
+    nD = len(TSR_d)
+    # --- Design angle of attack
+    if alpha_design is None:
+        # Attached part of the polar, from the minimum to the maximum lift within +/-30deg
+        b = (polar[:,0]>=-30) & (polar[:,0]<=30)
+        al, cl = polar[b,0], polar[b,1]
+        iMax = np.argmax(cl)
+        iMin = np.argmin(cl[:iMax+1])
+        al, cl = al[iMin:iMax+1], np.maximum.accumulate(cl[iMin:iMax+1])
+        alpha_d = np.interp(Cl_d, cl, al, right=np.nan)
+    else:
+        alpha_u = np.broadcast_to(np.asarray(alpha_design, dtype=float), Cl_u.shape)
+        alpha_d = np.meshgrid(TSR_u, alpha_u, B_u, indexing='ij')[1].flatten()
+    # --- Planforms of all designs, (nD x nr)
+    if r_hub<1:
+        r_hub = r_hub*R
+    r = np.linspace(r_hub, R, nr)
+    fPlanform = planform_wakerot if wakeRot else planform_nowakerot
+    chord, phi = fPlanform(r[None,:], R, TSR_d[:,None], Cl_d[:,None], B_d[:,None])
+    twist = phi*180/np.pi - alpha_d[:,None]
+    # --- Evaluation of the feasible designs with the batched BEM
+    if TSR is None:
+        TSR_e = TSR_d[:,None] # nD x 1
+    else:
+        TSR_e = np.broadcast_to(np.atleast_1d(TSR).astype(float)[None,:], (nD, len(np.atleast_1d(TSR))))
+    nE = TSR_e.shape[1]
+    IOK = np.where(~np.isnan(alpha_d))[0]
+    out = {k:np.full((nD,nE), np.nan) for k in ['CP','CT','CQ','CFlap']}
+    out['converged'] = np.zeros((nD,nE), dtype=bool)
+    kwargs.setdefault('solver', 'Phi')
+    if len(IOK)>0:
+        Omega = TSR_e[IOK]*V0/R *60/(2*np.pi) # [rpm]
+        tab = PolarTable([polar]*nr)
+        BEM = SteadyBEMBatch(Omega, 0, V0, 0, 0, B_d[IOK][:,None], 0, r, chord[IOK][:,None,:], twist[IOK][:,None,:], tab, 
+                rho=rho, **kwargs)
+        out['CP'][IOK], out['CT'][IOK], out['CQ'][IOK] = BEM.CP, BEM.CT, BEM.CQ
+        out['CFlap'][IOK] = BEM.Flap/(0.5*rho*V0**2*np.pi*R**3)
+        out['converged'][IOK] = BEM.converged
+    # --- Trade-off table
+    rep = lambda v: np.repeat(v, nE)
+    df = pd.DataFrame()
+    df['TSR_design']   = rep(TSR_d)
+    df['Cl_design']    = rep(Cl_d)
+    df['B']            = rep(B_d).astype(int)
+    df['alpha_design'] = rep(alpha_d)
+    df['TSR']          = TSR_e.flatten()
+    for k in ['CP','CT','CQ','CFlap','converged']:
+        df[k] = out[k].flatten()
+    df['solidity']  = rep(B_d*np.trapz(chord, r, axis=1)/(np.pi*R**2))
+    df['chordMass'] = rep(B_d*np.trapz((chord/R)**2, r/R, axis=1))
+    df['cmax_R']    = rep(np.max(chord, axis=1)/R)
+    return df
+
 
 
 if __name__ == '__main__':
@@ -9,15 +9,17 @@ from numpy import pi, cos, exp, sqrt, sin, arctan2, arccos
 from scipy.interpolate import interp1d
 import pandas as pd
 import matplotlib.pyplot as plt
+from welib.airfoils.PolarTable import PolarTable
+from welib.BEM.highthrust import a_Ct_tabulated
 
 
 def _fAeroCoeffWrap(fPolars, alpha, phi, bAIDrag=True, bTIDrag=True):
     """Tabulated airfoil data interpolation
         Inputs
         ----------
-        Polars: interpolant function for each alpha
-        alpha: Angle Of Attack [rad]
-        phi  : flow angle  [rad]
+        Polars: interpolant function for each alpha, or PolarTable (or function of alpha, for all stations)
+        alpha: Angle Of Attack [rad], array of shape (nr) or (nOP x nr)
+        phi  : flow angle  [rad], same shape as alpha
 
         Outputs
         ----------
@@ -26,11 +28,17 @@ def _fAeroCoeffWrap(fPolars, alpha, phi, bAIDrag=True, bTIDrag=True):
     """
     alpha[alpha<-pi] += 2*pi
     alpha[alpha> pi] -= 2*pi
-    Cl = np.zeros(alpha.shape)
-    Cd = np.zeros(alpha.shape)
-    for i,(fPolar,alph) in enumerate(zip(fPolars,alpha)):
-        ClCdCm = fPolar(alph)
-        Cl[i], Cd[i] = ClCdCm[0], ClCdCm[1]
+    if callable(fPolars):
+        # Packed table (or function of alpha), all stations at once
+        ClCdCm = fPolars(alpha)
+        Cl, Cd = ClCdCm[...,0], ClCdCm[...,1]
+    else:
+        Cl = np.zeros(alpha.shape)
+        Cd = np.zeros(alpha.shape)
+        # NOTE: radial stations are along the last dimension of alpha
+        for i,fPolar in enumerate(fPolars):
+            ClCdCm = fPolar(alpha[...,i])
+            Cl[...,i], Cd[...,i] = ClCdCm[...,0], ClCdCm[...,1]
     # --- Normal and tangential
     cn = Cl * cos(phi) + Cd * sin(phi)
     ct = Cl * sin(phi) - Cd * cos(phi)
@@ -45,7 +53,7 @@ def _fAeroCoeffWrap(fPolars, alpha, phi, bAIDrag=True, bTIDrag=True):
     return Cl, Cd, cnForAI, ctForTI
 
 def _fInductionCoefficients(a_last, Vrel_norm, V0, F, cnForAI, ctForTI,
-        lambda_r, sigma, phi, relaxation=0.4,bSwirl=True):
+        lambda_r, sigma, phi, relaxation=0.4,bSwirl=True, CTcorrection=None):
     """Compute the induction coefficients
 
         Inputs
@@ -61,6 +69,7 @@ def _fInductionCoefficients(a_last, Vrel_norm, V0, F, cnForAI, ctForTI,
         phi       : flow angle [deg]
         relaxation: relaxation factor in axial induction factor
         bSwirl    : swirl flow model enabled / disabled
+        CTcorrection: None for the Glauert correction below, or a method of the tabulated inverse a(Ct,F)
 
         Outputs
         ----------
@@ -73,12 +82,16 @@ def _fInductionCoefficients(a_last, Vrel_norm, V0, F, cnForAI, ctForTI,
     # CT=(1-a_last).^2.*sigma.*CnForAI./((sind(phi)).^2)
     Ct = Vrel_norm**2 * sigma * cnForAI/(V0**2)  # that's a CT loc
     # --- Hight thrust correction
-    # Glauert correction
-    #>>> NOTE this is:  a = a_Ct_a(Ct, a, method='Glauert') from HighThrust
-    ac = 0.3
-    bHigh = a > ac
-    fg = 0.25*(5.-3.*a[bHigh])
-    a[bHigh] = Ct[bHigh]/(4.*F[bHigh]*(1.-fg*a[bHigh]))
+    if CTcorrection is not None:
+        # Tabulated inverse, see highthrust.InverseCtTable
+        a = a_Ct_tabulated(Ct, F, method=CTcorrection)
+    else:
+        # Glauert correction
+        #>>> NOTE this is:  a = a_Ct_a(Ct, a, method='Glauert') from HighThrust
+        ac = 0.3
+        bHigh = a > ac
+        fg = 0.25*(5.-3.*a[bHigh])
+        a[bHigh] = Ct[bHigh]/(4.*F[bHigh]*(1.-fg*a[bHigh]))
     #a_high=0.5*(2+K*(1-2*ac)-sqrt((K*(1-2*ac)+2)^2+4*(K*ac^2-1)));
     # --- Relaxation
     a = a*relaxation + (1.-relaxation)*a_last
@@ -97,6 +110,226 @@ def _fInductionCoefficients(a_last, Vrel_norm, V0, F, cnForAI, ctForTI,
     return a, aprime, Ct
 
 
+def _fInductionCoefficientsPhi(phi, F, cnForAI, ctForTI, lambda_r, sigma, delta, bSwirl=True):
+    """Induction coefficients as function of the flow angle only.
+    Same relations as _fInductionCoefficients once converged (no relaxation), where the
+    relative velocity is eliminated using Vrel sin(phi) = Un = V0 (1-a+delta).
+
+        Inputs
+        ----------
+        phi       : flow angle [rad], array of shape (nr) or (n x nr)
+        F, cnForAI, ctForTI, lambda_r, sigma: see _fInductionCoefficients, same shape as phi
+        delta     : (u_turb-xdot)/V0, same shape as phi
+
+        Outputs
+        ----------
+        a: axial induction factor
+        aprime: tangential induction factor
+    """
+    s2 = sin(phi)**2
+    # --- Default a
+    a = 1. / ((4.*F*s2)/(sigma*(cnForAI+10**-8))+1) # NOTE simgularity avoided
+    # --- Hight thrust correction
+    # Glauert correction, with Ct=(1-a+delta)^2 sigma cn/sin^2 phi, a = K (1+delta-a)^2
+    # The root of the quadratic is such that Un=V0(1-a+delta) has the sign of phi
+    ac = 0.3
+    bHigh = a > ac
+    fg = 0.25*(5.-3.*a[bHigh])
+    K  = sigma[bHigh]*cnForAI[bHigh]/(4.*F[bHigh]*s2[bHigh]*(1.-fg*a[bHigh]))
+    d1 = 1.+delta[bHigh]
+    sD = sqrt(np.maximum(1+4*K*d1,0))
+    a[bHigh] = d1 - np.where(phi[bHigh]>=0, 2*d1/(1+sD), -(1+sD)/(2*K))
+    a = np.clip(a,-1,1.5)
+    # --- Swirl
+    if bSwirl is True:
+        # HAWC2 method, with Vrel^2 = Un^2/sin^2 phi
+        aprime = ((1.-a+delta)**2*ctForTI*sigma)/(4.*(1.-a)*lambda_r*s2)
+    else:
+        aprime = a * 0.
+    # Bounding values for safety
+    aprime = np.clip(aprime,-1,1.5) 
+    return a, aprime
+
+
+def _fPhiResidual(phi, r, R, rhub, nB, fulltwist, Omega, V0, delta, lambda_r, sigma, fPolars, 
+        bTipLoss=True, bHubLoss=False, bAIDrag=True, bTIDrag=True, bSwirl=True):
+    """ Residual of the BEM equations expressed in the flow angle, for each station:
+          R(phi) = sin(phi)/Un - cos(phi)/Ut   (velocities normalized by V0)
+    where Un and Ut are obtained from the inductions a(phi) and aprime(phi).
+    This form (see Ning 2014) has no spurious root at phi=0, where Un and sin(phi) both vanish.
+
+        Inputs
+        ----------
+        phi: flow angle [rad], array of shape (nr) or (n x nr)
+        other inputs: see SteadyBEM, radial arrays of shape (nr) (or same shape as phi)
+
+        Outputs
+        ----------
+        res, a, aprime, F, Cl, Cd: arrays of same shape as phi
+    """
+    shp = phi.shape
+    r, fulltwist, delta, lambda_r, sigma, nB = np.broadcast_arrays(r, fulltwist, delta, lambda_r, sigma*np.ones(shp), nB)
+    # --- Tip loss
+    Ftip = np.ones(shp)
+    Fhub = np.ones(shp)
+    IOK=sin(phi)>0.01
+    if bTipLoss:
+        # Glauert tip correction
+        Ftip[IOK] = 2/pi*arccos(exp(-nB[IOK]/2*(R-r[IOK])/(r[IOK]*sin(phi[IOK]))))
+    if bHubLoss:
+        # Prandtl hub loss correction
+        Fhub[IOK] = 2/pi*arccos(exp(-nB[IOK]/2*(r[IOK]-rhub)/(rhub*sin(phi[IOK]))));
+    F=Ftip*Fhub;
+    F[F<=0]=0.5 # To avoid singularities
+    # --- Angle of attack and profile data
+    alpha = phi - fulltwist # [rad], contains pitch
+    Cl, Cd, cnForAI, ctForTI = _fAeroCoeffWrap(fPolars, alpha, phi, bAIDrag, bTIDrag)
+    # --- Induction coefficients and residual
+    a, aprime = _fInductionCoefficientsPhi(phi, F, cnForAI, ctForTI, lambda_r, sigma, delta, bSwirl)
+    Un = 1. - a + delta                 # Un/V0
+    Ut = Omega * r * (1. + aprime) / V0 # Ut/V0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        res = sin(phi)/Un - cos(phi)/Ut
+    return res, a, aprime, F, Cl, Cd
+
+
+def _fBracketedRoot(fRes, lo, hi, flo, fhi, xTol=10**-8, fTol=10**-6, nItMax=100):
+    """ Vectorized bracketed root finding of independent scalar equations fRes(x)=0.
+    Secant steps (Newton with a secant slope) are taken when they fall within the bracket
+    and are smaller than half the step before last, bisection steps otherwise (as in Brent).
+    The bracket always contains a sign change, the method always converges.
+    Only the equations not yet converged are evaluated at each iteration.
+
+        Inputs
+        ----------
+        fRes   : function fRes(x, I) returning the residuals of the equations I (indices) at x, shape (len(I))
+        lo, hi : bracket, arrays of shape (n), with lo<hi and flo*fhi<=0
+        flo,fhi: residuals at lo and hi
+        xTol   : tolerance on x
+        fTol   : tolerance on the residual, to reject sign changes that are not roots (discontinuities)
+
+        Outputs
+        ----------
+        x        : roots, shape (n)
+        nIt      : number of iterations (residual evaluations) per equation
+        converged: True if the tolerances were reached
+    """
+    lo, hi, flo, fhi = [np.array(v, dtype=float) for v in (lo, hi, flo, fhi)]
+    # Two last iterates, for the secant step, the best point is x1
+    bHi = np.abs(fhi)<np.abs(flo)
+    x1, f1 = np.where(bHi, hi, lo), np.where(bHi, fhi, flo)
+    x0, f0 = np.where(bHi, lo, hi), np.where(bHi, flo, fhi)
+    n   = len(lo)
+    d1  = hi-lo                # last step
+    d2  = np.full(n, np.inf)   # step before last
+    nIt = np.zeros(n, dtype=int)
+    done = (f1==0) | (hi-lo<xTol)
+    for i in np.arange(nItMax):
+        I = np.where(~done)[0]
+        if len(I)==0:
+            break
+        # --- Secant step, or bisection
+        loI, hiI, x1I, f1I = lo[I], hi[I], x1[I], f1[I]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xs = x1I - f1I*(x1I-x0[I])/(f1I-f0[I])
+        bSecant = np.isfinite(xs) & (xs>loI) & (xs<hiI) & (np.abs(xs-x1I)<0.5*d2[I])
+        x = np.where(bSecant, xs, 0.5*(loI+hiI))
+        f = fRes(x, I)
+        nIt[I] += 1
+        # --- Updating bracket
+        bLo = np.sign(f)==np.sign(flo[I])
+        lo[I[bLo]],  flo[I[bLo]]  = x[bLo],  f[bLo]
+        hi[I[~bLo]], fhi[I[~bLo]] = x[~bLo], f[~bLo]
+        # --- Convergence
+        step = np.abs(x-x1I)
+        done[I] = (f==0) | (hi[I]-lo[I]<xTol) | (bSecant & (step<xTol))
+        d2[I], d1[I] = d1[I], step
+        x0[I], f0[I] = x1I, f1I
+        x1[I], f1[I] = x, f
+    converged = done & (np.abs(f1)<fTol)
+    return x1, nIt, converged
+
+
+def _fSolvePhi(fRes, phi_guess, phi_init=None, dphi=0.5*pi/180, xTol=10**-8, nItMax=100, nBracketMax=5, nMax=10**6):
+    """ Solves the BEM residual in flow angle for each station.
+    The roots are bracketed by scanning the flow angle, the sign change closest to `phi_guess` is used.
+    If it is not a root (e.g. discontinuity of the high thrust correction), the next closest is tried.
+    If `phi_init` is provided (warm start, e.g. solution of the previous operating point), 
+    narrow brackets within phi_init +/- 4 dphi are tried first, and the full scan is only done 
+    for the stations where no root was found.
+    The scans are evaluated by blocks of flow angles, with at most `nMax` residuals per evaluation, 
+    to bound the memory used by the residual function when there are many stations.
+    Only the stations not yet converged are evaluated, both in the scans and in the root finding.
+
+        Inputs
+        ----------
+        fRes     : function fRes(phi, I) returning the residuals of the stations I (indices) at the
+                   flow angles phi, of shape (len(I)) or (n x len(I))
+
+        Outputs
+        ----------
+        phi      : flow angle [rad], shape (nr)
+        nIt      : number of iterations per station (excluding the bracketing)
+        converged: True if a root was found
+        nEval    : total number of residual evaluations of the stations (an evaluation of the residual for
+                   an array of flow angles counts as its size), including the bracketing scans
+    """
+    nEval = [0]
+    def fResC(x, I):
+        """ Residual function of the stations I, counting the evaluations """
+        nEval[0] += np.size(x)
+        return fRes(x, I)
+    nr  = len(phi_guess)
+    phi = np.array(phi_guess, dtype=float)*np.ones(nr)
+    nIt = np.zeros(nr, dtype=int)
+    converged = np.zeros(nr, dtype=bool)
+    iS  = np.arange(nr)
+    def solve(IB, lo, hi, flo, fhi):
+        """ Solve for stations IB """
+        fResB = lambda x, J: fResC(x, IB[J])
+        phiB, nItB, convB = _fBracketedRoot(fResB, lo, hi, flo, fhi, xTol=xTol, nItMax=nItMax)
+        phi[IB] = phiB
+        nIt[IB] += nItB
+        converged[IB] = convB
+    def scanSolve(phiS, phi_ref, nTry):
+        """ Evaluate the residual at the flow angles phiS (nScan x nr) and solve using the 
+        brackets sorted by distance to phi_ref. Converged stations are not evaluated (NaN residuals) """
+        resS = np.full(phiS.shape, np.nan)
+        IS = np.where(~converged)[0]
+        if len(IS)==0:
+            return resS
+        nRows = max(1, int(nMax//len(IS)))
+        for i0 in np.arange(0, len(phiS), nRows):
+            resS[i0:i0+nRows, IS] = fResC(phiS[i0:i0+nRows, IS], IS)
+        bChange = resS[:-1]*resS[1:]<=0
+        dist = np.abs(0.5*(phiS[:-1]+phiS[1:]) - phi_ref)
+        dist[~bChange] = np.inf # infinite distance if no sign change
+        kSorted = np.argsort(dist, axis=0)
+        for ib in np.arange(min(nTry, len(phiS)-1)):
+            k  = kSorted[ib]
+            IB = np.where(~converged & np.isfinite(dist[k, iS]))[0]
+            if len(IB)==0:
+                break
+            solve(IB, phiS[k[IB],IB], phiS[k[IB]+1,IB], resS[k[IB],IB], resS[k[IB]+1,IB])
+        return resS
+    if phi_init is not None:
+        # --- Warm start, narrow brackets around the previous solution
+        phi_init = np.asarray(phi_init, dtype=float)*np.ones(nr)
+        phi_guess = phi_init
+        phi[:] = phi_init
+        phiW = phi_init + dphi*np.array([-4,-2,-1,0,1,2,4])[:,None]
+        scanSolve(phiW, phi_init, 2)
+    if not np.all(converged):
+        # --- Scanning the flow angle, Ut>0 so phi is within ]-pi/2, pi/2]
+        phiG = np.concatenate((np.linspace(-pi/4, -0.5*pi/180, 12), np.linspace(0.5*pi/180, pi/2, 45)))
+        phiG = np.tile(phiG[:,None], (1,nr))
+        resG = scanSolve(phiG, phi_guess, nBracketMax)
+        # No root found, using the flow angle that minimizes the residual
+        bNoRoot = ~converged & ~np.any(resG[:-1]*resG[1:]<=0, axis=0)
+        phi[bNoRoot] = phiG[np.argmin(np.abs(resG), axis=0), iS][bNoRoot]
+    return phi, nIt, converged, nEval[0]
+
+
 class SteadyBEM_Outputs:
     def WriteRadialFile(BEM,filename):
         header='r_[m] a_[-] a_prime_[-] Ct_[-] Cq_[-] Cp_[-] cn_[-] ct_[-] phi_[deg] alpha_[deg] Cl_[-] Cd_[-] Pn_[N/m] Pt_[N/m] Vrel_[m/s] Un_[m/s] Ut_[m/s] F_[-] Re_[-] Gamma_[m^2/s] uia_[m/s] uit_[m/s] u_turb_[m/s]'
@@ -125,7 +358,8 @@ class SteadyBEM_Outputs:
 def SteadyBEM(Omega,pitch,V0,xdot,u_turb,
         nB, cone, r, chord, twist, polars, # Rotor
         rho=1.225,KinVisc=15.68*10**-6,    # Environment
-        nItMax=100, aTol=10**-6, bTipLoss=True, bHubLoss=False, bAIDrag=True, bTIDrag=True, bSwirl=True, relaxation=0.4, a_init=None, ap_init=None):
+        nItMax=100, aTol=10**-6, bTipLoss=True, bHubLoss=False, bAIDrag=True, bTIDrag=True, bSwirl=True, relaxation=0.4, a_init=None, ap_init=None,
+        solver='FixedPoint', phi_init=None, phiTol=10**-8, perf=None, CTcorrection=None):
     """ Run the BEM main loop
         Inputs:
         -------
@@ -135,12 +369,30 @@ def SteadyBEM(Omega,pitch,V0,xdot,u_turb,
         cone  [deg]:
         r     [m]  : from rhub to R
         chord [m]  :
-        polars     : nSpan matrices  
+        polars     : nSpan matrices, or PolarTable (packed table, faster lookup)
+        solver     : 'FixedPoint': iterations on the inductions, with relaxation
+                     'Phi': the residual in flow angle is solved for each station with a 
+                            vectorized bracketed secant/bisection method (always converges)
+        phi_init [deg]: for solver 'Phi', warm start, typically BEM.phi of the previous operating point
+        phiTol   [rad]: for solver 'Phi', tolerance on the flow angle
+        perf       : None, or welib.tools.tictoc.PerfCounters, to accumulate (over calls) the time spent 
+                     in each phase, the histogram of the number of iterations ('nIt') and the number of
+                     non-converged operating points
+        CTcorrection: high thrust correction. None: Glauert correction a(Ct,a) with ac=0.3 (default).
+                     Otherwise, a method of the tabulated inverse a(Ct,F) (see highthrust.InverseCtTable), 
+                     e.g. 'AeroDyn'. Only for the solver 'FixedPoint'.
 
         Outputs
         ----------
         BEM : class with attributes, such as BEM.r, BEM.a, BEM.Power
+              BEM.nItStations: number of iterations per station (excluding the bracketing for the solver 'Phi')
+              BEM.nEval      : total number of evaluations of the residual (or of the induction update) 
+                               at the stations, including the bracketing scans for the solver 'Phi'
+              BEM.converged  : convergence flag per station
+              BEM.perf       : the perf input
     """
+    if perf is not None:
+        perf.tic()
     VHubHeight = V0
     # --- Converting units
     fulltwist = (twist+pitch) *pi/180    # [rad]
@@ -156,74 +408,128 @@ def SteadyBEM(Omega,pitch,V0,xdot,u_turb,
     sigma    = chord * nB / (2.0 * pi * r * cCone)
     lambda_r = Omega * r * cCone/ V0
     # Creating interpolation functions for each polar, now in rad!
-    fPolars = [interp1d(p[:,0]*pi/180,p[:,1:],axis=0) for p in polars]
+    if isinstance(polars, PolarTable):
+        fPolars = polars
+    else:
+        fPolars = [interp1d(p[:,0]*pi/180,p[:,1:],axis=0) for p in polars]
     # Initializing outputs
     if a_init is None:
         a_init = np.ones((len(r)))*0.2
     if ap_init is None:
         ap_init = np.ones(len(r))*0.01
-    # --- Vectorized BEM algorithm
-    # Radial inputs: a_init,ap_init,r,chord,fulltwist,sigma,lambda_r,fPolars
-    a, aprime  = a_init, ap_init
-    for i in np.arange(nItMax):
-        # --------------------------------------------------------------------------------
-        # --- Step 0: Relative wind
-        # --------------------------------------------------------------------------------
-        # --------------------------------------------------------------------------------
-        # --- Step 1: Wind Components
-        # --------------------------------------------------------------------------------
+    if perf is not None:
+        perf.toc('setup')
+    if solver.lower()=='phi' and CTcorrection is not None:
+        raise NotImplementedError('CTcorrection is only available for the solver `FixedPoint`')
+    if solver.lower()=='phi':
+        # --- Solving the residual in flow angle, per station
+        delta = np.broadcast_to((u_turb-xdot)/V0, r.shape)
+        def fRes(phi_, I):
+            """ Residual of the stations I """
+            if callable(fPolars):
+                fPolarsI = lambda alpha: fPolars(alpha, stations=np.broadcast_to(I, alpha.shape))
+            else:
+                fPolarsI = [fPolars[i] for i in I]
+            return _fPhiResidual(phi_, r[I], R, rhub, nB, fulltwist[I], Omega, V0, delta[I], lambda_r[I], sigma[I], fPolarsI,
+                                 bTipLoss, bHubLoss, bAIDrag, bTIDrag, bSwirl)[0]
+        phi_guess = arctan2(V0 * (1. - a_init) - xdot + u_turb, Omega * r * (1. + ap_init))
+        if phi_init is not None:
+            phi_init = np.asarray(phi_init)*pi/180
+        phi, nItStations, converged, nEval = _fSolvePhi(fRes, phi_guess, phi_init=phi_init, xTol=phiTol, nItMax=nItMax)
+        nIt = np.max(nItStations)
+        if not np.all(converged):
+            print('Not converged for {}/{} stations : Omega={:.2f} V0={:.2f}'.format(np.sum(~converged), len(r), Omega, V0))
+        _, a, aprime, F, Cl, Cd = _fPhiResidual(phi, r, R, rhub, nB, fulltwist, Omega, V0, delta, lambda_r, sigma, fPolars,
+                                          bTipLoss, bHubLoss, bAIDrag, bTIDrag, bSwirl)
         Ut = Omega * r * (1. + aprime)
         Un = V0 * (1. - a) - xdot + u_turb
         Vrel_norm = np.sqrt(Un** 2 + Ut** 2)
-        # --------------------------------------------------------------------------------
-        # --- Step 2: Flow Angle
-        # --------------------------------------------------------------------------------
-        phi = arctan2(Un, Ut) # flow angle [rad]
-        # --------------------------------------------------------------------------------
-        # --- Tip loss
-        # --------------------------------------------------------------------------------
-        Ftip = np.ones((len(r)))
-        Fhub = np.ones((len(r)))
-        IOK=sin(phi)>0.01
-        try:
-            if bTipLoss:
-                # Glauert tip correction
-                Ftip[IOK] = 2/pi*arccos(exp(-nB/2*(R-r[IOK])/(r[IOK]*sin(phi[IOK]))))
-            if bHubLoss:
-                # Prandtl hub loss correction
-                Fhub[IOK] = 2/pi*arccos(exp(-nB/2*(r[IOK]-rhub)/(rhub*sin(phi[IOK]))));
-        except:
-            raise
-        F=Ftip*Fhub;
-        F[F<=0]=0.5 # To avoid singularities
-        # --------------------------------------------------------------------------------
-        # --- Step 3: Angle of attack
-        # --------------------------------------------------------------------------------
-        alpha = phi - fulltwist # [rad], contains pitch
-        # --------------------------------------------------------------------------------
-        # --- Step 4: Profile Data
-        # --------------------------------------------------------------------------------
-        Cl, Cd, cnForAI, ctForTI = _fAeroCoeffWrap(fPolars, alpha, phi, bAIDrag, bTIDrag)
-        # --------------------------------------------------------------------------------
-        # --- Step 5: Induction Coefficients
-        # --------------------------------------------------------------------------------
-        # Storing last values
-        a_last      = a
-        aprime_last = aprime
-        a, aprime, CT_loc = _fInductionCoefficients(a_last,Vrel_norm,V0, F, cnForAI, ctForTI,
-                                               lambda_r, sigma, phi, relaxation, bSwirl)
-
-        if (i > 3 and (np.mean(np.abs(a-a_last)) + np.mean(np.abs(aprime - aprime_last))) < aTol):  # used to be on alpha
-            break
-    nIt = i + 1
-    if i == nItMax-1:
-        print('Maximum iterations reached : Omega=%.2f V0=%.2f' % (Omega,V0))
+        if perf is not None:
+            perf.toc('solve')
+            perf.hist('nItStations', nItStations)
+            perf.count('residualEvaluations', nEval)
+            perf.count('nonConvergedStations', np.sum(~converged))
+    elif solver.lower()=='fixedpoint':
+        # --- Vectorized BEM algorithm
+        # Radial inputs: a_init,ap_init,r,chord,fulltwist,sigma,lambda_r,fPolars
+        a, aprime  = a_init, ap_init
+        for i in np.arange(nItMax):
+            # --------------------------------------------------------------------------------
+            # --- Step 0: Relative wind
+            # --------------------------------------------------------------------------------
+            # --------------------------------------------------------------------------------
+            # --- Step 1: Wind Components
+            # --------------------------------------------------------------------------------
+            Ut = Omega * r * (1. + aprime)
+            Un = V0 * (1. - a) - xdot + u_turb
+            Vrel_norm = np.sqrt(Un** 2 + Ut** 2)
+            # --------------------------------------------------------------------------------
+            # --- Step 2: Flow Angle
+            # --------------------------------------------------------------------------------
+            phi = arctan2(Un, Ut) # flow angle [rad]
+            if perf is not None:
+                perf.toc('velocity')
+            # --------------------------------------------------------------------------------
+            # --- Tip loss
+            # --------------------------------------------------------------------------------
+            Ftip = np.ones((len(r)))
+            Fhub = np.ones((len(r)))
+            IOK=sin(phi)>0.01
+            try:
+                if bTipLoss:
+                    # Glauert tip correction
+                    Ftip[IOK] = 2/pi*arccos(exp(-nB/2*(R-r[IOK])/(r[IOK]*sin(phi[IOK]))))
+                if bHubLoss:
+                    # Prandtl hub loss correction
+                    Fhub[IOK] = 2/pi*arccos(exp(-nB/2*(r[IOK]-rhub)/(rhub*sin(phi[IOK]))));
+            except:
+                raise
+            F=Ftip*Fhub;
+            F[F<=0]=0.5 # To avoid singularities
+            if perf is not None:
+                perf.toc('tiploss')
+            # --------------------------------------------------------------------------------
+            # --- Step 3: Angle of attack
+            # --------------------------------------------------------------------------------
+            alpha = phi - fulltwist # [rad], contains pitch
+            # --------------------------------------------------------------------------------
+            # --- Step 4: Profile Data
+            # --------------------------------------------------------------------------------
+            Cl, Cd, cnForAI, ctForTI = _fAeroCoeffWrap(fPolars, alpha, phi, bAIDrag, bTIDrag)
+            if perf is not None:
+                perf.toc('polars')
+            # --------------------------------------------------------------------------------
+            # --- Step 5: Induction Coefficients
+            # --------------------------------------------------------------------------------
+            # Storing last values
+            a_last      = a
+            aprime_last = aprime
+            a, aprime, CT_loc = _fInductionCoefficients(a_last,Vrel_norm,V0, F, cnForAI, ctForTI,
+                                                   lambda_r, sigma, phi, relaxation, bSwirl, CTcorrection)
+            if perf is not None:
+                perf.toc('induction')
+
+            if (i > 3 and (np.mean(np.abs(a-a_last)) + np.mean(np.abs(aprime - aprime_last))) < aTol):  # used to be on alpha
+                break
+        nIt = i + 1
+        if i == nItMax-1:
+            print('Maximum iterations reached : Omega=%.2f V0=%.2f' % (Omega,V0))
+        nItStations = np.ones(len(r), dtype=int)*nIt
+        converged   = np.ones(len(r), dtype=bool)*(i < nItMax-1)
+        nEval       = nIt*len(r)
+    else:
+        raise NotImplementedError('BEM solver '+solver)
+    if perf is not None:
+        perf.hist('nIt', nIt)
+        perf.count('operatingPoints')
+        perf.count('nonConverged', not np.all(converged))
     #print('Converged: V0=%2.f om=%5.2f pit=%3.1f nIt=%d' % (V0,Omega,pitch, nIt))
     # --------------------------------------------------------------------------------
     # --- Step 6: Outputs
     # --------------------------------------------------------------------------------
     BEM=SteadyBEM_Outputs();
     BEM.a,BEM.aprime,BEM.phi,BEM.Cl,BEM.Cd,BEM.Un,BEM.Ut,BEM.Vrel,BEM.F,BEM.nIt = a,aprime,phi,Cl,Cd,Un,Ut,Vrel_norm,F,nIt
+    BEM.nItStations, BEM.converged, BEM.nEval = nItStations, converged, nEval
     # L = 0.5 * rho * Vrel_norm ** 2 * chord[e] * Cl
     # D = 0.5 * rho * Vrel_norm ** 2 * chord[e] * Cd
     # Radial quantities (recomputed since thought as derived outputs)
@@ -260,6 +566,358 @@ def SteadyBEM(Omega,pitch,V0,xdot,u_turb,
     BEM.Omega = Omega
     BEM.Pitch = pitch
     BEM.V0 = V0
+    BEM.perf = perf
+    if perf is not None:
+        perf.toc('outputs')
+    return BEM
+
+
+def SteadyBEMBatch(Omega,pitch,V0,xdot,u_turb,
+        nB, cone, r, chord, twist, polars, # Rotor
+        rho=1.225,KinVisc=15.68*10**-6,    # Environment
+        nItMax=100, aTol=10**-6, bTipLoss=True, bHubLoss=False, bAIDrag=True, bTIDrag=True, bSwirl=True, relaxation=0.4, a_init=None, ap_init=None,
+        bRadialOutputs=False, perf=None, CTcorrection=None, solver='FixedPoint', phi_init=None, phiTol=10**-8, nMax=10**6):
+    """ Run the BEM main loop for a set of operating points at once
+    The operating points are iterated simultaneously as (nOP x nr) arrays, points that 
+    have converged are no longer updated.
+    Same algorithm and convergence criteria as SteadyBEM, applied per operating point.
+
+        Inputs:
+        -------
+        Omega [rpm]: scalar or array of operating points
+        pitch [deg]: scalar or array of operating points
+        V0    [m/s]: scalar or array of operating points
+        xdot, u_turb [m/s]: scalar or array of operating points
+        NOTE: the operating point inputs are broadcasted together, to a shape `shp`
+        nB         : scalar, or array of shape `shp` (e.g. one rotor design per operating point)
+        twist [deg]: array of shape (nr) or (shp x nr)
+        cone  [deg]:
+        r     [m]  : from rhub to R
+        chord [m]  : array of shape (nr) or (shp x nr)
+        polars     : nSpan matrices, or PolarTable (packed table, faster lookup)
+        a_init, ap_init: initial inductions, arrays of shape (nr) or (shp x nr)
+        bRadialOutputs: if True, radial quantities are returned as arrays of shape (shp x nr)
+        perf       : None, or welib.tools.tictoc.PerfCounters, see SteadyBEM
+        CTcorrection: high thrust correction, see SteadyBEM
+        solver     : 'FixedPoint': iterations on the inductions, with relaxation
+                     'Phi': the residual in flow angle is solved for all stations of all operating points 
+                            at once (see SteadyBEM). The polars are converted to a PolarTable if needed.
+        phi_init [deg]: for solver 'Phi', warm start, array of shape (nr) or (shp x nr), e.g. BEM.phi of a 
+                     previous batch (with bRadialOutputs)
+        phiTol   [rad]: for solver 'Phi', tolerance on the flow angle
+        nMax       : for solver 'Phi', maximum number of residuals evaluated at once when scanning the flow angle
+
+        Outputs
+        ----------
+        BEM : class with attributes of shape `shp`, such as BEM.Power, BEM.Thrust, BEM.CP, BEM.nIt
+              and the radial quantities (e.g. BEM.a) if bRadialOutputs is True
+              BEM.nEval: total number of evaluations of the residual (or of the induction update) at the stations
+    """
+    if perf is not None:
+        perf.tic()
+    # --- Operating points, flattened
+    Omega, pitch, V0, xdot, u_turb = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in (Omega, pitch, V0, xdot, u_turb)])
+    shp = Omega.shape
+    Omega, pitch, V0, xdot, u_turb = [v.flatten()[:,None] for v in (Omega, pitch, V0, xdot, u_turb)] # nOP x 1
+    nOP = Omega.shape[0]
+    nr  = len(r)
+    # --- Rotor definition, per operating point
+    nB    = np.broadcast_to(np.asarray(nB, dtype=float), shp).flatten()[:,None] # nOP x 1
+    nBr   = np.broadcast_to(nB, (nOP,nr))
+    chord = np.broadcast_to(chord, shp+(nr,)).reshape((nOP,nr))
+    twist = np.broadcast_to(twist, shp+(nr,)).reshape((nOP,nr))
+    # --- Converting units
+    fulltwist = (twist+pitch) *pi/180    # [rad] nOP x nr
+    Omega    = Omega*2*pi/60 # [rad/s]
+    # --- Derived params
+    rhub, R  = r[0], r[-1]
+    # Computing a dr, such that sum(dr)=R-rhub
+    dr    = np.diff(r) 
+    MidPointAfter = np.concatenate((  r[0:-1]+dr/2 , [R] ))
+    MidPointBefore= np.concatenate(( [r[0]] ,  r[1:]-dr/2))
+    dr    = MidPointAfter-MidPointBefore
+    cCone    = cos(cone*pi/180.)
+    rr       = np.tile(r, (nOP,1))  # nOP x nr
+    sigma    = chord * nB / (2.0 * pi * r * cCone) # nOP x nr
+    lambda_r = Omega * rr * cCone/ V0
+    # Creating interpolation functions for each polar, now in rad!
+    if isinstance(polars, PolarTable):
+        fPolars = polars
+    else:
+        fPolars = [interp1d(p[:,0]*pi/180,p[:,1:],axis=0) for p in polars]
+    # Initializing outputs
+    if a_init is None:
+        a_init = 0.2
+    if ap_init is None:
+        ap_init = 0.01
+    a      = np.broadcast_to(a_init , (nOP,nr)).astype(float) # NOTE: astype returns a copy
+    aprime = np.broadcast_to(ap_init, (nOP,nr)).astype(float)
+    Un        = np.zeros((nOP,nr))
+    Ut        = np.zeros((nOP,nr))
+    Vrel_norm = np.zeros((nOP,nr))
+    phi       = np.zeros((nOP,nr))
+    F         = np.zeros((nOP,nr))
+    Cl        = np.zeros((nOP,nr))
+    Cd        = np.zeros((nOP,nr))
+    nIt       = np.zeros(nOP, dtype=int)
+    converged = np.zeros(nOP, dtype=bool)
+    if perf is not None:
+        perf.toc('setup')
+    if solver.lower()=='phi':
+        if CTcorrection is not None:
+            raise NotImplementedError('CTcorrection is only available for the solver `FixedPoint`')
+        # --- Solving the residual in flow angle, for all the stations of all operating points at once
+        if not isinstance(polars, PolarTable):
+            polars = PolarTable(polars)
+        iS = np.tile(np.arange(nr), nOP)
+        fPolarsF = lambda alpha: polars(alpha, stations=np.broadcast_to(iS, alpha.shape))
+        flat  = lambda v: np.broadcast_to(v, (nOP,nr)).flatten()
+        rF, fulltwistF, lambda_rF, sigmaF, nBF = [flat(v) for v in (rr, fulltwist, lambda_r, sigma, nB)]
+        OmegaF, V0F, deltaF = flat(Omega), flat(V0), flat((u_turb-xdot)/V0)
+        def fRes(phi_, I):
+            """ Residual of the flattened stations I """
+            fPolarsI = lambda alpha: polars(alpha, stations=np.broadcast_to(iS[I], alpha.shape))
+            return _fPhiResidual(phi_, rF[I], R, rhub, nBF[I], fulltwistF[I], OmegaF[I], V0F[I], deltaF[I], lambda_rF[I], sigmaF[I], fPolarsI,
+                                 bTipLoss, bHubLoss, bAIDrag, bTIDrag, bSwirl)[0]
+        phi_guess = arctan2(V0 * (1. - a) - xdot + u_turb, Omega * rr * (1. + aprime)).flatten()
+        if phi_init is not None:
+            phi_init = np.broadcast_to(np.asarray(phi_init, dtype=float), shp+(nr,)).flatten()*pi/180
+        phiF, nItStations, convStations, nEval = _fSolvePhi(fRes, phi_guess, phi_init=phi_init, xTol=phiTol, nItMax=nItMax, nMax=nMax)
+        _, a, aprime, F, Cl, Cd = [v.reshape((nOP,nr)) for v in _fPhiResidual(phiF, rF, R, rhub, nBF, fulltwistF, OmegaF, V0F, deltaF, 
+                                          lambda_rF, sigmaF, fPolarsF, bTipLoss, bHubLoss, bAIDrag, bTIDrag, bSwirl)]
+        phi = phiF.reshape((nOP,nr))
+        Ut = Omega * rr * (1. + aprime)
+        Un = V0 * (1. - a) - xdot + u_turb
+        Vrel_norm = np.sqrt(Un** 2 + Ut** 2)
+        nIt       = np.max(nItStations.reshape((nOP,nr)), axis=1)
+        converged = np.all(convStations.reshape((nOP,nr)), axis=1)
+        I = np.where(~converged)[0]
+        if len(I)>0:
+            print('Not converged for {}/{} operating points'.format(len(I), nOP))
+        if perf is not None:
+            perf.toc('solve')
+            perf.count('residualEvaluations', nEval)
+    elif solver.lower()=='fixedpoint':
+        # --- Vectorized BEM algorithm, I: indices of operating points still iterating
+        I = np.arange(nOP)
+        for i in np.arange(nItMax):
+            # --------------------------------------------------------------------------------
+            # --- Step 1: Wind Components
+            # --------------------------------------------------------------------------------
+            a_last      = a[I]
+            aprime_last = aprime[I]
+            Ut[I] = Omega[I] * rr[I] * (1. + aprime_last)
+            Un[I] = V0[I] * (1. - a_last) - xdot[I] + u_turb[I]
+            Vrel_norm[I] = np.sqrt(Un[I]** 2 + Ut[I]** 2)
+            # --------------------------------------------------------------------------------
+            # --- Step 2: Flow Angle
+            # --------------------------------------------------------------------------------
+            phi[I] = arctan2(Un[I], Ut[I]) # flow angle [rad]
+            if perf is not None:
+                perf.toc('velocity')
+            # --------------------------------------------------------------------------------
+            # --- Tip loss
+            # --------------------------------------------------------------------------------
+            phiI  = phi[I]
+            rI    = rr[I]
+            nBI   = nBr[I]
+            Ftip  = np.ones(phiI.shape)
+            Fhub  = np.ones(phiI.shape)
+            IOK=sin(phiI)>0.01
+            if bTipLoss:
+                # Glauert tip correction
+                Ftip[IOK] = 2/pi*arccos(exp(-nBI[IOK]/2*(R-rI[IOK])/(rI[IOK]*sin(phiI[IOK]))))
+            if bHubLoss:
+                # Prandtl hub loss correction
+                Fhub[IOK] = 2/pi*arccos(exp(-nBI[IOK]/2*(rI[IOK]-rhub)/(rhub*sin(phiI[IOK]))));
+            FI=Ftip*Fhub;
+            FI[FI<=0]=0.5 # To avoid singularities
+            F[I] = FI
+            if perf is not None:
+                perf.toc('tiploss')
+            # --------------------------------------------------------------------------------
+            # --- Step 3: Angle of attack
+            # --------------------------------------------------------------------------------
+            alpha = phiI - fulltwist[I] # [rad], contains pitch
+            # --------------------------------------------------------------------------------
+            # --- Step 4: Profile Data
+            # --------------------------------------------------------------------------------
+            Cl[I], Cd[I], cnForAI, ctForTI = _fAeroCoeffWrap(fPolars, alpha, phiI, bAIDrag, bTIDrag)
+            if perf is not None:
+                perf.toc('polars')
+            # --------------------------------------------------------------------------------
+            # --- Step 5: Induction Coefficients
+            # --------------------------------------------------------------------------------
+            a[I], aprime[I], _ = _fInductionCoefficients(a_last,Vrel_norm[I],V0[I], FI, cnForAI, ctForTI,
+                                                   lambda_r[I], sigma[I], phiI, relaxation, bSwirl, CTcorrection)
+            nIt[I] = i + 1
+            # --- Convergence, per operating point
+            if i > 3:
+                bConv = (np.mean(np.abs(a[I]-a_last),axis=1) + np.mean(np.abs(aprime[I] - aprime_last),axis=1)) < aTol
+                converged[I[bConv]] = True
+                I = I[~bConv]
+            if perf is not None:
+                perf.toc('induction')
+            if len(I)==0:
+                break
+        if len(I)>0:
+            print('Maximum iterations reached for {}/{} operating points'.format(len(I), nOP))
+        nEval = np.sum(nIt)*nr
+    else:
+        raise NotImplementedError('BEM solver '+solver)
+    if perf is not None:
+        perf.hist('nIt', nIt)
+        perf.count('operatingPoints', nOP)
+        perf.count('nonConverged', len(I))
+    # --------------------------------------------------------------------------------
+    # --- Step 6: Outputs
+    # --------------------------------------------------------------------------------
+    cn = Cl * cos(phi) + Cd * sin(phi)
+    ct = Cl * sin(phi) - Cd * cos(phi)
+    Pn = 0.5 * rho * Vrel_norm**2 * chord * cn   # [N/m]
+    Pt = 0.5 * rho * Vrel_norm**2 * chord * ct   # [N/m] 
+    BEM=SteadyBEM_Outputs();
+    # --- Integral quantities
+    Torque = nB[:,0] * np.trapz(r * (Pt * cCone), r, axis=1)  # Rotor shaft torque [N]
+    Thrust = nB[:,0] * np.trapz(     Pn * cCone, r, axis=1)   # Rotor shaft thrust [N]
+    Flap   = np.trapz( (Pn * cCone) * (r - rhub), r, axis=1)      # Flap moment at blade root [Nm]
+    Edge   = np.trapz(  Pt * (r * cCone) * (r - rhub), r, axis=1) # Edge moment at blade root [Nm]
+    Power  = Omega[:,0] * Torque
+    V0_    = V0[:,0]
+    BEM.Torque = Torque.reshape(shp)
+    BEM.Thrust = Thrust.reshape(shp)
+    BEM.Flap   = Flap.reshape(shp)
+    BEM.Edge   = Edge.reshape(shp)
+    BEM.Power  = Power.reshape(shp)
+    BEM.CP     = (Power  / (0.5 * rho * V0_**3 * pi * R**2)).reshape(shp)
+    BEM.CT     = (Thrust / (0.5 * rho * V0_**2 * pi * R**2)).reshape(shp)
+    BEM.CQ     = (Torque / (0.5 * rho * V0_**2 * pi * R**3)).reshape(shp)
+    BEM.nIt       = nIt.reshape(shp)
+    BEM.nEval     = nEval
+    BEM.converged = converged.reshape(shp)
+    BEM.Omega = Omega[:,0].reshape(shp)
+    BEM.Pitch = pitch[:,0].reshape(shp)
+    BEM.V0    = V0_.reshape(shp)
+    BEM.r=r
+    BEM.R=R
+    if bRadialOutputs:
+        rshp = shp+(nr,)
+        BEM.a      = a.reshape(rshp)
+        BEM.aprime = aprime.reshape(rshp)
+        BEM.phi    = (phi*180/pi).reshape(rshp)             # [deg]
+        BEM.alpha  = ((phi - fulltwist)*180/pi).reshape(rshp)  # [deg]
+        BEM.Cl     = Cl.reshape(rshp)
+        BEM.Cd     = Cd.reshape(rshp)
+        BEM.cn     = cn.reshape(rshp)
+        BEM.ct     = ct.reshape(rshp)
+        BEM.Pn     = Pn.reshape(rshp)
+        BEM.Pt     = Pt.reshape(rshp)
+        BEM.Un     = Un.reshape(rshp)
+        BEM.Ut     = Ut.reshape(rshp)
+        BEM.Vrel   = Vrel_norm.reshape(rshp)
+        BEM.F      = F.reshape(rshp)
+        BEM.Re     = (Vrel_norm * chord / KinVisc / 10**6).reshape(rshp)  # Reynolds number in Millions
+        BEM.Gamma  = (0.5 * Vrel_norm * chord * Cl).reshape(rshp)   # Circulation [m^2/s]
+        BEM.uia    = (V0 * a).reshape(rshp)
+        BEM.uit    = (Omega * rr * aprime).reshape(rshp)
+    BEM.perf = perf
+    if perf is not None:
+        perf.toc('outputs')
+    return BEM
+
+
+def SteadyBEMJacobian(Omega,pitch,V0,xdot,u_turb,
+        nB, cone, r, chord, twist, polars, # Rotor
+        rho=1.225,KinVisc=15.68*10**-6,    # Environment
+        bTipLoss=True, bHubLoss=False, bAIDrag=True, bTIDrag=True, bSwirl=True, 
+        delta=None, **kwargs):
+    """ Run the BEM and compute the sensitivities of the integral loads with respect to the 
+    operating point inputs (Omega, pitch, V0, xdot, u_turb).
+
+    The BEM is solved with the flow angle residual (solver 'Phi' of SteadyBEM). At convergence, 
+    R_i(phi_i, p) = 0 at each station, so that, by implicit differentiation:
+        dphi_i/dp = - (dR_i/dp) / (dR_i/dphi_i)
+    and the loads L(phi,p) have the total derivatives dL/dp = dL/dp|_phi + sum_i dL/dphi_i dphi_i/dp.
+    The partial derivatives are evaluated with central differences of the residual and of the 
+    radial loads, for all stations and inputs at once (no additional BEM solve).
+
+        Inputs:
+        -------
+        See SteadyBEM. 
+        delta : perturbation sizes of the inputs (Omega, pitch, V0, xdot, u_turb) and of phi [rad]
+        kwargs: additional arguments passed to SteadyBEM, e.g. phi_init, phiTol
+
+        Outputs
+        ----------
+        BEM : outputs of SteadyBEM, with the additional attributes:
+            BEM.J      : Jacobian, DataFrame with index the loads (Thrust, Torque, Power, Flap, Edge, CT, CP, CQ)
+                         and columns the inputs (Omega, pitch, V0, xdot, u_turb), in the units of the inputs
+                         e.g. BEM.J.loc['Thrust','V0'] [N/(m/s)], BEM.J.loc['Torque','Omega'] [Nm/rpm]
+            BEM.dphi_dp: derivatives of the flow angle [rad] per station, DataFrame (nr x nInputs)
+    """
+    if delta is None:
+        delta = [10**-4, 10**-4, 10**-4, 10**-4, 10**-4, 10**-6]
+    inputNames = ['Omega','pitch','V0','xdot','u_turb']
+    loadNames  = ['Thrust','Torque','Power','Flap','Edge','CT','CP','CQ']
+    kwargs['solver'] = 'Phi'
+    BEM = SteadyBEM(Omega,pitch,V0,xdot,u_turb, nB, cone, r, chord, twist, polars, rho=rho, KinVisc=KinVisc,
+            bTipLoss=bTipLoss, bHubLoss=bHubLoss, bAIDrag=bAIDrag, bTIDrag=bTIDrag, bSwirl=bSwirl, **kwargs)
+    nr  = len(r)
+    nIn = len(inputNames)
+    # --- Perturbations: (p+h_k, p-h_k) for each input k, then (phi+h, phi-h), as (nPert x 1) arrays
+    p0   = np.array([Omega, pitch, V0, xdot, u_turb], dtype=float)
+    dP   = np.zeros((2*nIn+2, nIn))
+    for k in np.arange(nIn):
+        dP[2*k  , k] =  delta[k]
+        dP[2*k+1, k] = -delta[k]
+    P    = p0 + dP
+    phi0 = BEM.phi*pi/180
+    phi  = np.tile(phi0, (2*nIn+2, 1))
+    phi[-2] += delta[-1]
+    phi[-1] -= delta[-1]
+    Omega_, pitch_, V0_, xdot_, u_turb_ = [P[:,[k]] for k in np.arange(nIn)]
+    # --- Residual and radial loads at fixed flow angle
+    Omega_   = Omega_*2*pi/60 # [rad/s]
+    rhub, R  = r[0], r[-1]
+    cCone    = cos(cone*pi/180.)
+    sigma    = chord * nB / (2.0 * pi * r * cCone)
+    lambda_r = Omega_ * r * cCone/ V0_
+    fulltwist = (twist+pitch_) *pi/180
+    if isinstance(polars, PolarTable):
+        fPolars = polars
+    else:
+        fPolars = [interp1d(p[:,0]*pi/180,p[:,1:],axis=0) for p in polars]
+    res, a, aprime, F, Cl, Cd = _fPhiResidual(phi, r, R, rhub, nB, fulltwist, Omega_, V0_, (u_turb_-xdot_)/V0_, lambda_r, sigma, fPolars,
+                                              bTipLoss, bHubLoss, bAIDrag, bTIDrag, bSwirl)
+    Un = V0_ * (1. - a) - xdot_ + u_turb_
+    Ut = Omega_ * r * (1. + aprime)
+    Vrel2 = Un**2 + Ut**2
+    Pn = 0.5 * rho * Vrel2 * chord * (Cl * cos(phi) + Cd * sin(phi))
+    Pt = 0.5 * rho * Vrel2 * chord * (Cl * sin(phi) - Cd * cos(phi))
+    # Radial loads, such that the integral loads are trapz(dens, r), shape (nLoads x nPert x nr)
+    dens = np.array([
+        nB * Pn * cCone,                           # Thrust
+        nB * r * Pt * cCone,                       # Torque
+        nB * r * Pt * cCone * Omega_,              # Power
+        Pn * cCone * (r - rhub),                   # Flap
+        Pt * r * cCone * (r - rhub),               # Edge
+        nB * Pn * cCone / (0.5 * rho * V0_**2 * pi * R**2),                  # CT
+        nB * r * Pt * cCone * Omega_ / (0.5 * rho * V0_**3 * pi * R**2),     # CP
+        nB * r * Pt * cCone / (0.5 * rho * V0_**2 * pi * R**3),              # CQ
+        ])
+    # --- Partial derivatives, central differences
+    dR_dp    = np.array([(res[2*k]-res[2*k+1])/(2*delta[k]) for k in np.arange(nIn)]).T           # nr x nIn
+    dR_dphi  = (res[-2]-res[-1])/(2*delta[-1])                                                     # nr
+    dD_dp    = np.moveaxis([(dens[:,2*k]-dens[:,2*k+1])/(2*delta[k]) for k in np.arange(nIn)], 0, -1) # nLoads x nr x nIn
+    dD_dphi  = (dens[:,-2]-dens[:,-1])/(2*delta[-1])                                               # nLoads x nr
+    # --- Implicit differentiation
+    bOK = BEM.converged & (dR_dphi!=0)
+    dphi_dp = np.zeros((nr, nIn))
+    dphi_dp[bOK] = - dR_dp[bOK] / dR_dphi[bOK,None]
+    dD = dD_dp + dD_dphi[:,:,None] * dphi_dp[None,:,:]
+    J  = np.trapz(dD, r, axis=1) # nLoads x nIn
+    BEM.J       = pd.DataFrame(J, index=loadNames, columns=inputNames)
+    BEM.dphi_dp = pd.DataFrame(dphi_dp, columns=inputNames)
     return BEM
 
 
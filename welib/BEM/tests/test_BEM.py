@@ -34,5 +34,145 @@ class Test(unittest.TestCase):
 
         np.seterr(**old_settings)
 
+    def test_BEM_batch(self):
+        # Batched BEM should match the single operating point BEM
+        nB,cone,r,chord,twist,polars,rho,KinVisc = FASTFile2SteadyBEM(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        V0    = np.array([[5, 10], [8, 12]])
+        Omega = np.array([[7, 12], [9, 12.1]])
+        pitch = np.array([[2,  0], [0, 5]])
+        BEMB=SteadyBEMBatch(Omega,pitch,V0,0,0,
+                    nB,cone,r,chord,twist,polars,
+                    rho=rho,KinVisc=KinVisc,bTIDrag=False,bAIDrag=True, bRadialOutputs=True)
+        self.assertEqual(BEMB.Power.shape, (2,2))
+        self.assertEqual(BEMB.a.shape, (2,2,len(r)))
+        np.testing.assert_almost_equal(BEMB.Power[0,0] ,445183.13,1)
+        np.testing.assert_almost_equal(BEMB.Thrust[0,0],140978.66,1)
+        for i in range(2):
+            for j in range(2):
+                BEM=SteadyBEM(Omega[i,j],pitch[i,j],V0[i,j],0,0,
+                            nB,cone,r,chord,twist,polars,
+                            rho=rho,KinVisc=KinVisc,bTIDrag=False,bAIDrag=True)
+                np.testing.assert_allclose(BEMB.Power[i,j], BEM.Power, rtol=1e-10)
+                np.testing.assert_allclose(BEMB.CT[i,j]   , BEM.CT   , rtol=1e-10)
+                np.testing.assert_allclose(BEMB.a[i,j]    , BEM.a    , rtol=1e-10)
+                self.assertEqual(BEMB.nIt[i,j], BEM.nIt)
+
+
+    def test_BEM_polartable(self):
+        # BEM with packed polar table should be close to the BEM with interpolants
+        from welib.airfoils.PolarTable import PolarTable
+        nB,cone,r,chord,twist,polars,rho,KinVisc = FASTFile2SteadyBEM(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        BEM=SteadyBEM(7,2,5,0,0, nB,cone,r,chord,twist,PolarTable(polars),
+                    rho=rho,KinVisc=KinVisc,bTIDrag=False,bAIDrag=True)
+        np.testing.assert_allclose(BEM.Power ,445183.13,rtol=1e-5)
+        np.testing.assert_allclose(BEM.Thrust,140978.66,rtol=1e-5)
+
+    def test_BEM_phi(self):
+        # Solver on the flow angle residual should match the fixed point iterations
+        nB,cone,r,chord,twist,polars,rho,KinVisc = FASTFile2SteadyBEM(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        kw = dict(rho=rho,KinVisc=KinVisc,bTIDrag=False,bAIDrag=True)
+        BEM=SteadyBEM(7,2,5,0,0, nB,cone,r,chord,twist,polars, solver='Phi', **kw)
+        np.testing.assert_allclose(BEM.Power ,445183.13,rtol=1e-4)
+        np.testing.assert_allclose(BEM.Thrust,140978.66,rtol=1e-4)
+        self.assertTrue(np.all(BEM.converged))
+        self.assertEqual(BEM.nItStations.shape, r.shape)
+        # Scan of all stations, then only the stations not converged are evaluated
+        self.assertEqual(BEM.nEval, 57*len(r) + np.sum(BEM.nItStations))
+        # High induction, several roots, the one of the fixed point iterations is found
+        BEM0=SteadyBEM(12,0,3,0,0, nB,cone,r,chord,twist,polars, **kw)
+        BEM =SteadyBEM(12,0,3,0,0, nB,cone,r,chord,twist,polars, solver='Phi', **kw)
+        np.testing.assert_allclose(BEM.a, BEM0.a, atol=1e-4)
+        # Sweep with warm start
+        WS  = np.arange(4,25,1.)
+        RPM = np.clip(WS*1.6, 6.9, 12.1)
+        Pitch = np.clip((WS-11.4)*1.5, 0, None)
+        nCold, nWarm, phi0 = 0, 0, None
+        for ws,rpm,pitch in zip(WS, RPM, Pitch):
+            BEMc=SteadyBEM(rpm,pitch,ws,0,0, nB,cone,r,chord,twist,polars, solver='Phi', **kw)
+            BEMw=SteadyBEM(rpm,pitch,ws,0,0, nB,cone,r,chord,twist,polars, solver='Phi', phi_init=phi0, **kw)
+            phi0 = BEMw.phi
+            self.assertTrue(np.all(BEMw.converged))
+            np.testing.assert_allclose(BEMw.Power, BEMc.Power, rtol=1e-6)
+            nCold += BEMc.nEval # all residual evaluations, including the bracketing
+            nWarm += BEMw.nEval
+        self.assertLess(nWarm, nCold)
+
+    def test_BEM_jacobian(self):
+        # Jacobian from implicit differentiation should match finite differences of the BEM
+        nB,cone,r,chord,twist,polars,rho,KinVisc = FASTFile2SteadyBEM(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        kw = dict(rho=rho,KinVisc=KinVisc,bTIDrag=False,bAIDrag=True, phiTol=1e-12)
+        op = [12.1, 10, 16, 0.5, 0]
+        BEM = SteadyBEMJacobian(*op, nB,cone,r,chord,twist,polars, **kw)
+        self.assertEqual(BEM.J.shape, (8,5))
+        np.testing.assert_allclose(BEM.J.loc['Thrust','xdot'], -BEM.J.loc['Thrust','u_turb'], rtol=1e-8)
+        np.testing.assert_allclose(BEM.J.loc['Power','Omega'], BEM.Power/op[0] + BEM.Omega*BEM.J.loc['Torque','Omega'], rtol=1e-6)
+        h = 1e-3
+        for k,c in enumerate(['Omega','pitch','V0','xdot']):
+            opp, opm = list(op), list(op)
+            opp[k] += h
+            opm[k] -= h
+            BEMp = SteadyBEM(*opp, nB,cone,r,chord,twist,polars, solver='Phi', **kw)
+            BEMm = SteadyBEM(*opm, nB,cone,r,chord,twist,polars, solver='Phi', **kw)
+            for l in ['Thrust','Torque','CP']:
+                np.testing.assert_allclose(BEM.J.loc[l,c], (getattr(BEMp,l)-getattr(BEMm,l))/(2*h), rtol=1e-4)
+
+    def test_BEM_perf(self):
+        # Performance counters, accumulated over calls, results unchanged
+        from welib.tools.tictoc import PerfCounters
+        nB,cone,r,chord,twist,polars,rho,KinVisc = FASTFile2SteadyBEM(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        perf = PerfCounters()
+        BEM0 = SteadyBEM(7, 2, 5, 0, 0, nB,cone,r,chord,twist,polars, rho=rho,KinVisc=KinVisc)
+        BEM1 = SteadyBEM(7, 2, 5, 0, 0, nB,cone,r,chord,twist,polars, rho=rho,KinVisc=KinVisc, perf=perf)
+        BEM2 = SteadyBEM(7, 2, 5, 0, 0, nB,cone,r,chord,twist,polars, rho=rho,KinVisc=KinVisc, perf=perf, nItMax=5)
+        BEMB = SteadyBEMBatch(7, 2, [5,10], 0, 0, nB,cone,r,chord,twist,polars, rho=rho,KinVisc=KinVisc, perf=perf)
+        np.testing.assert_equal(BEM1.Power, BEM0.Power)
+        self.assertIs(BEM1.perf, perf)
+        rep = perf.report()
+        self.assertEqual(rep['counters']['operatingPoints'], 4)
+        self.assertEqual(rep['counters']['nonConverged'], 1)
+        self.assertEqual(np.sum(rep['histograms']['nIt']), 4)
+        self.assertGreaterEqual(rep['histograms']['nIt'][BEM1.nIt], 1)
+        self.assertEqual(rep['histograms']['nIt'][5], 1)
+        self.assertEqual(rep['phases'].loc['polars','Calls_[-]'], BEM1.nIt+5+np.max(BEMB.nIt))
+        self.assertEqual(rep['phases'].loc['outputs','Calls_[-]'], 3)
+
+
+    def test_BEM_batch_designs(self):
+        # Batched BEM with one rotor design per operating point, and flow angle solver
+        from welib.airfoils.PolarTable import PolarTable
+        from welib.BEM.idealrotors import planform_wakerot, planform_designspace
+        polar = np.array([[-180,0,0.5,0],[-10,-0.8,0.02,0],[10,1.3,0.02,0],[20,1.0,0.3,0],[180,0,0.5,0]])
+        r   = np.linspace(0.1,1,20)
+        TSR = np.array([6,8])
+        B   = np.array([2,3])
+        chord, phi = planform_wakerot(r[None,:], 1, TSR[:,None], 1.0, B[:,None])
+        twist = phi*180/np.pi - (1.0+0.8)/2.1*20+10 # alpha at Cl=1
+        tab   = PolarTable([polar]*len(r))
+        Omega = TSR*10*60/(2*np.pi)
+        BEMB = SteadyBEMBatch(Omega, 0, 10, 0, 0, B, 0, r, chord, twist, tab, solver='Phi')
+        for i in range(2):
+            BEM = SteadyBEM(Omega[i], 0, 10, 0, 0, B[i], 0, r, chord[i], twist[i], tab, solver='Phi')
+            np.testing.assert_allclose(BEMB.CP[i], BEM.CP, rtol=1e-10)
+            np.testing.assert_allclose(BEMB.CT[i], BEM.CT, rtol=1e-10)
+        self.assertTrue(np.all(BEMB.converged))
+        # Tolerance, warm start and scan by blocks are forwarded to the flow angle solver
+        BEM  = SteadyBEM(Omega[0], 0, 10, 0, 0, B[0], 0, r, chord[0], twist[0], tab, solver='Phi', phiTol=1e-3)
+        BEMT = SteadyBEMBatch(Omega, 0, 10, 0, 0, B, 0, r, chord, twist, tab, solver='Phi', phiTol=1e-3, bRadialOutputs=True, nMax=100)
+        np.testing.assert_allclose(BEMT.CP[0], BEM.CP, rtol=1e-10)
+        self.assertLess(BEMT.nEval, BEMB.nEval)
+        BEMW = SteadyBEMBatch(Omega, 0, 10.5, 0, 0, B, 0, r, chord, twist, tab, solver='Phi', phi_init=BEMT.phi)
+        BEMC = SteadyBEMBatch(Omega, 0, 10.5, 0, 0, B, 0, r, chord, twist, tab, solver='Phi')
+        np.testing.assert_allclose(BEMW.CP, BEMC.CP, rtol=1e-8)
+        self.assertLess(BEMW.nEval, BEMC.nEval)
+
+        # --- Design space, same values
+        df = planform_designspace(TSR, [1.0, 1.5], B, polar, R=1, r_hub=0.1, nr=20)
+        self.assertEqual(len(df), 8)
+        self.assertTrue(df['CP'][df['Cl_design']>1.3].isnull().all()) # above Cl_max
+        dfOK = df[df['Cl_design']==1.0]
+        self.assertTrue(dfOK['converged'].all())
+        np.testing.assert_allclose(dfOK['CP'].values[[0,3]], BEMB.CP, rtol=1e-10)
+        np.testing.assert_allclose(dfOK['alpha_design'], (1.0+0.8)/2.1*20-10)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+import os
+import shutil
+import tempfile
+from welib.BEM.unsteadyBEMSweep import *
+
+MyDir=os.path.dirname(__file__)
+
+class Test(unittest.TestCase):
+
+    def test_sweep(self):
+        fstFile = os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst')
+        outDir  = tempfile.mkdtemp()
+        try:
+            cases = sweepCases(WS=[8,10], RPM=10, yaw=[0,20], seed=[None,1], TI=0.1)
+            self.assertEqual(len(cases), 8)
+            time = np.arange(0,0.5,0.1)
+            dfSum = runSweep(fstFile, cases, time, outDir, nCores=1, verbose=False)
+            self.assertEqual(len(dfSum), 8)
+            self.assertTrue(os.path.exists(os.path.join(outDir,'summary.csv')))
+            self.assertFalse(dfSum['RtAeroPwr_[W]_mean'].isnull().any())
+            # Yaw and turbulence change the results
+            P = dfSum['RtAeroPwr_[W]_mean'].values
+            self.assertLess(P[2], P[0])
+            self.assertNotAlmostEqual(P[1], P[0])
+
+            # --- Same results as a direct simulation, for a steady case
+            from welib.BEM.unsteadyBEM import AeroBEM
+            BEM = AeroBEM()
+            BEM.init_from_FAST(fstFile)
+            df = BEM.simulationConstantRPM(time, 10, windSpeed=10)
+            np.testing.assert_allclose(dfSum['RtAeroPwr_[W]_mean'][4], df['RtAeroPwr_[W]'].mean(), rtol=1e-8)
+
+            # --- Resume: only the missing cases are run
+            files = {f:os.path.getmtime(os.path.join(outDir,f)) for f in os.listdir(outDir) if f.endswith('.csv') and f!='summary.csv'}
+            os.remove(os.path.join(outDir, dfSum['hash'][3]+'.csv'))
+            dfSum2 = runSweep(fstFile, cases, time, outDir, nCores=1, verbose=False)
+            for f,t in files.items():
+                if not f.startswith(dfSum['hash'][3]):
+                    self.assertEqual(os.path.getmtime(os.path.join(outDir,f)), t)
+            np.testing.assert_allclose(dfSum2['RtAeroPwr_[W]_mean'], dfSum['RtAeroPwr_[W]_mean'])
+        finally:
+            shutil.rmtree(outDir)
+
+    def test_caseHash(self):
+        # The hash depends on all the input files read by AeroBEM, and accepts non-json options
+        tmpDir = tempfile.mkdtemp()
+        try:
+            shutil.copytree(os.path.join(MyDir,'../../../data/NREL5MW'), os.path.join(tmpDir,'NREL5MW'))
+            fstFile = os.path.join(tmpDir,'NREL5MW','Main_Onshore_OF2.fst')
+            files = fastInputFiles(fstFile)
+            self.assertEqual(len(files), 4+8) # main, ED, AD, AD blade, 8 airfoils
+            case = sweepCases(WS=8, RPM=10).loc[0]
+            time = np.arange(0,1,0.1)
+            options = {'bDynaStall':True, 'twist':np.array([1.,2.]), 'pitch':np.float64(2)}
+            h0 = caseHash(case, time, fstFile, options=options)
+            self.assertEqual(h0, caseHash(case, time, fstFile, options=options, inputFiles=files))
+            self.assertNotEqual(h0, caseHash(case, time, fstFile, options={'bDynaStall':True, 'twist':np.array([1.,3.])}))
+            for filename in [f for f in files if f.find('blade')>0 or f.find('Airfoils')>0][:2]:
+                with open(filename, 'a') as f:
+                    f.write('\n')
+                h1 = caseHash(case, time, fstFile, options=options)
+                self.assertNotEqual(h1, h0)
+                h0 = h1
+        finally:
+            shutil.rmtree(tmpDir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@ import numpy as np
 from welib.BEM.unsteadyBEM import *
 from numpy import cos, sin, arctan2, pi, arccos, exp, abs, min, sqrt
 import os
+import copy
 from welib.BEM.unsteadyBEM import _fInductionCoefficients
 
 MyDir=os.path.dirname(__file__)
@@ -162,6 +163,256 @@ class Test(unittest.TestCase):
         #plt.show()
 
 
+    def test_vectorized_timeStep(self):
+        # Regression test of the vectorized time step against the former loop implementation
+        # Yawed and sheared inflow, with tilt and cone, to exercise all the coordinate transformations
+        BEM = AeroBEM()
+        BEM.init_from_FAST(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        time=np.arange(0,1.0+0.05,0.1)
+        yaw=20*np.pi/180
+        windFunction = lambda x,y,z,t : (10*np.cos(yaw)*(z/90)**0.2, 10*np.sin(yaw)*(z/90)**0.2, np.zeros(x.shape))
+        BEM.simulationConstantRPM(time, 10, windFunction=windFunction, tilt=5, cone=-2.5, firstCallEquilibrium=True)
+
+        # Reference values obtained with the loop implementation
+        Thrust_ref = np.array([509176.3695113061 , 506236.4211921535 , 506896.83031603857,
+            507182.43455379765, 507085.6352396819 , 506850.16143478884,
+            506622.17921938957, 506416.1574079349 , 506305.9032607443 ,
+            506330.44797618233, 506495.12646516593])
+        Torque_ref = np.array([2934410.35529372  , 2918880.9857091946, 2923756.562046789 ,
+            2924963.446200339 , 2922146.5198932425, 2918508.954697236 ,
+            2915543.52116343  , 2913413.418684818 , 2912691.3334124675,
+            2913600.15750596  , 2916089.508825414 ])
+        AxInd_ref = np.array([0.11384291358078415, 0.02254070820197232, 0.22826237785015208,
+            0.2594462548004857 , 0.3064041681377148 , 0.4010231844822473 ,
+            1.186168443849984  ])
+        Fx_ref = np.array([  81.7108960949544 ,  118.59006816528128, 1757.979963448975  ,
+            3080.4810512538124 , 4409.127577211065  , 5420.646763946605  ,
+            1129.887301594355  ])
+        np.testing.assert_allclose(BEM.Thrust, Thrust_ref, rtol=1e-10)
+        np.testing.assert_allclose(BEM.Torque, Torque_ref, rtol=1e-10)
+        np.testing.assert_allclose(BEM.AxInd[-1,1,::3], AxInd_ref, rtol=1e-10)
+        np.testing.assert_allclose(BEM.F_s[-1,2,::3,0], Fx_ref, rtol=1e-10)
+
+
+    def test_dynaWakeOye(self):
+        # Opt-in: time constant from Oye and exact discretization of the dynamic inflow
+        BEM = AeroBEM()
+        BEM.init_from_FAST(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        BEM.tau1Mod        = 'oye'
+        BEM.bDynaWakeExact = True
+        time=np.arange(0,1.0+0.05,0.1)
+        yaw=20*np.pi/180
+        windFunction = lambda x,y,z,t : (10*np.cos(yaw)*(z/90)**0.2, 10*np.sin(yaw)*(z/90)**0.2, np.zeros(x.shape))
+        BEM.simulationConstantRPM(time, 10, windFunction=windFunction, tilt=5, cone=-2.5, firstCallEquilibrium=True)
+
+        Thrust_ref = np.array([509176.36951130605, 506236.4211921535 , 506388.35433826694,
+            506517.84539408784, 506375.4232243572 , 506115.18116546574,
+            505875.7986728373 , 505668.8309387444 , 505549.2807425575 ,
+            505563.1714573066 , 505707.5503632752 ])
+        Torque_ref = np.array([2934410.3552937196, 2918880.9857091946, 2918297.67585329  ,
+            2917873.435442051 , 2914570.6657450497, 2910589.78647836  ,
+            2907490.0315630008, 2905424.4032055475, 2904802.310435678 ,
+            2905857.722773683 , 2908552.555528461 ])
+        AxInd_ref = np.array([0.11428059813482105, 0.02291510413164823, 0.23181914662806813,
+            0.26326126214304435, 0.3102957393506011 , 0.4045414338985088 ,
+            1.231226026621791  ])
+        Fx_ref = np.array([  82.03667861880548,  118.77580306381364, 1751.2214310246038 ,
+            3068.8187543982635 , 4374.745936595903  , 5334.724287621401  ,
+            1270.198841400802  ])
+        np.testing.assert_allclose(BEM.Thrust, Thrust_ref, rtol=1e-10)
+        np.testing.assert_allclose(BEM.Torque, Torque_ref, rtol=1e-10)
+        np.testing.assert_allclose(BEM.AxInd[-1,1,::3], AxInd_ref, rtol=1e-10)
+        np.testing.assert_allclose(BEM.F_s[-1,2,::3,0], Fx_ref, rtol=1e-10)
+
+    def test_statesBuffer(self):
+        # States at t-1 and t are swapped in place, external states are copied
+        BEM = AeroBEM()
+        BEM.init_from_FAST(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        motion = PrescribedRotorMotion()
+        motion.init_from_BEM(BEM, tilt=0, cone=0)
+        motion.setType('constantRPM', RPM=10)
+        dt=0.1
+        BEM.timeStepInit(0,1,dt)
+        xd0 = BEM.getInitStates()
+        Vwnd_g = np.zeros(motion.pos_gl.shape)
+        Vwnd_g[:,:,0] = 10
+        def timeStep(it, xd):
+            return BEM.timeStep(BEM.time[it], dt, xd, motion.psi, motion.psi_B0,
+                    motion.origin_pos_gl, motion.omega_gl, motion.R_b2g, 
+                    motion.R_ntr2g, motion.R_bld2b,
+                    motion.pos_gl, motion.vel_gl, motion.R_s2g, motion.R_a2g,
+                    Vwnd_g, firstCallEquilibrium=it==0)
+        def step(it, xd):
+            motion.update(BEM.time[it])
+            return timeStep(it, xd)
+        xd1 = step(0, xd0)
+        xd2 = step(1, xd1)
+        self.assertIsNot(xd1, xd0)
+        self.assertIs(xd2, xd0)
+        self.assertEqual(xd2.it, 1)
+        # External states (not from the buffer) are not modified
+        xdc = copy.deepcopy(xd2)
+        a2  = xdc.a.copy()
+        xd3 = step(2, xdc)
+        self.assertIsNot(xd3, xdc)
+        np.testing.assert_equal(xdc.a, a2)
+        xd = step(2, xd2)
+        np.testing.assert_allclose(xd3.a, xd.a)
+        # A time step with the buffer states does not allocate arrays (it used to trace about 22kB)
+        # NOTE: numpy still uses small internal iteration buffers
+        import tracemalloc
+        xd = step(3, xd)
+        motion.update(BEM.time[4])
+        tracemalloc.start()
+        xd = timeStep(4, xd)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.assertEqual(xd.it, 4)
+        self.assertLess(peak, 8000)
+
+    def test_outputSink(self):
+        # Output sink records the same values as the full storage, with decimation and chunks on disk
+        import tempfile
+        BEM = AeroBEM()
+        BEM.init_from_FAST(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        time = np.arange(0,2,0.1)
+        BEM.simulationConstantRPM(time, 10, windSpeed=10, tilt=0, cone=0)
+        Thrust = BEM.Thrust.copy()
+        AxInd  = BEM.AxInd.copy()
+        with tempfile.TemporaryDirectory() as folder:
+            sink = BEMOutputSink(channels=['Thrust','BladeTorque'], radialChannels=['AxInd'], nodes=[3,8], radialEvery=4, chunkSize=6, folder=folder)
+            df = BEM.simulationConstantRPM(time, 10, windSpeed=10, tilt=0, cone=0, outputSink=sink)
+            rad = sink.getRadial()
+            nFiles = len(os.listdir(folder))
+        self.assertEqual(BEM.Thrust.shape, (1,))
+        self.assertEqual(list(df.columns), ['Time','Thrust','BladeTorque_1','BladeTorque_2','BladeTorque_3'])
+        np.testing.assert_allclose(df['Time'].values, time)
+        np.testing.assert_allclose(df['Thrust'].values, Thrust)
+        np.testing.assert_allclose(rad['Time'], time[::4])
+        np.testing.assert_allclose(rad['AxInd'], AxInd[::4][:,:,[3,8]])
+        self.assertEqual(nFiles, 4+3) # 20 steps by chunks of 6, 5 radial records by chunks of 2
+        # The sink is not used by the next simulations, its files are not removed
+        with tempfile.TemporaryDirectory() as folder:
+            sink = BEMOutputSink(channels=['Thrust'], folder=folder)
+            BEM.simulationConstantRPM(time, 10, windSpeed=10, tilt=0, cone=0, outputSink=sink)
+            nFiles = len(os.listdir(folder))
+            df = BEM.simulationConstantRPM(time, 10, windSpeed=10, tilt=0, cone=0)
+            self.assertEqual(len(os.listdir(folder)), nFiles)
+        self.assertIsNone(BEM.outputSink)
+        np.testing.assert_allclose(BEM.Thrust, Thrust)
+        self.assertIn('RtAeroPwr_[W]', df.columns)
+
+    def test_perfCounters(self):
+        # Phase timers of timeStep, disabled by default
+        BEM = AeroBEM()
+        BEM.init_from_FAST(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        time = np.arange(0,1,0.1)
+        BEM.simulationConstantRPM(time, 10, windSpeed=10, tilt=0, cone=0)
+        self.assertIsNone(BEM.perfReport())
+        Thrust = BEM.Thrust.copy()
+        BEM.enablePerfCounters()
+        BEM.simulationConstantRPM(time, 10, windSpeed=10, tilt=0, cone=0)
+        np.testing.assert_allclose(BEM.Thrust, Thrust)
+        rep = BEM.perfReport()
+        df  = rep['phases']
+        self.assertEqual(list(df.index), ['geometry','velocity','tiploss','polars','induction','dynwake','skew','outputs'])
+        np.testing.assert_equal(df.loc['outputs','Calls_[-]'], len(time))
+        np.testing.assert_equal(df.loc['polars','Calls_[-]'], len(time)-1+50) # first call is an equilibrium
+        self.assertEqual(rep['counters']['iterations'], len(time)-1+50)
+        np.testing.assert_almost_equal(df['Fraction_[%]'].sum(), 100)
+
+    def test_ensemble(self):
+        # Cases simulated together match independent simulations
+        BEM = AeroBEM()
+        BEM.init_from_FAST(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        time = np.arange(0,1,0.1)
+        shear = lambda x,y,z,t: (8*(z/90)**0.2, 1+0*x, 0*x)
+        dfs = BEM.simulationEnsemble(time, RPM=[10,12], pitch=[0,3], windSpeed=10, windFunction=[None,shear], tilt=[0,5], cone=0)
+        Thrust = BEM.Thrust.copy()
+        self.assertEqual(len(dfs), 2)
+        self.assertEqual(Thrust.shape, (len(time),2))
+        # Case 1
+        df = BEM.simulationConstantRPM(time, 10, windSpeed=10, tilt=0, cone=0)
+        np.testing.assert_allclose(BEM.Thrust, Thrust[:,0], rtol=1e-10)
+        np.testing.assert_allclose(df['RtAeroPwr_[W]'].values, dfs[0]['RtAeroPwr_[W]'].values, rtol=1e-10)
+        # Case 2, pitch is equivalent to a change of twist
+        BEM.twist += 3*np.pi/180
+        df = BEM.simulationConstantRPM(time, 12, windFunction=shear, tilt=5, cone=0)
+        np.testing.assert_allclose(BEM.Thrust, Thrust[:,1], rtol=1e-10)
+        np.testing.assert_allclose(df['AB2N010Alpha_[deg]'].values, dfs[1]['AB2N010Alpha_[deg]'].values, rtol=1e-10)
+
+    def test_ensembleOutputSink(self):
+        # Output sink in ensemble mode, nodes are selected on the radial axis
+        BEM = AeroBEM()
+        BEM.init_from_FAST(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        time = np.arange(0,1,0.1)
+        BEM.simulationEnsemble(time, RPM=[10,12], windSpeed=10)
+        Thrust, AxInd, F_s = BEM.Thrust.copy(), BEM.AxInd.copy(), BEM.F_s.copy()
+        sink = BEMOutputSink(channels=['Thrust'], radialChannels=['AxInd','F_s'], nodes=[3,8], radialEvery=2)
+        df = BEM.simulationEnsemble(time, RPM=[10,12], windSpeed=10, outputSink=sink)
+        rad = sink.getRadial()
+        self.assertEqual(rad['AxInd'].shape, (5, 2, BEM.nB, 2))
+        self.assertEqual(rad['F_s'].shape  , (5, 2, BEM.nB, 2, 3))
+        np.testing.assert_allclose(rad['AxInd'], AxInd[::2][:,:,:,[3,8]])
+        np.testing.assert_allclose(rad['F_s']  , F_s[::2][:,:,:,[3,8]])
+        np.testing.assert_allclose(df[['Thrust_1','Thrust_2']].values, Thrust)
+
+    def test_dynamicStall(self):
+        # Dynamic stall states are at equilibrium for steady conditions, and active otherwise
+        BEM = AeroBEM()
+        BEM.init_from_FAST(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        BEM.bDynaStall = True
+        time = np.arange(0,1,0.1)
+        wind = lambda x,y,z,t: (10+2*np.sin(2*t)+0*x, 3+0*x, 0*x)
+        for model in ['MHH','Oye']:
+            BEM.DynaStallMod = model
+            BEM.simulationConstantRPM(time, 10, windSpeed=10, tilt=0, cone=0)
+            np.testing.assert_allclose(BEM.Cl, BEM.Cl_qs, atol=1e-6)
+            df = BEM.simulationConstantRPM(time, 10, windFunction=wind, tilt=5, cone=0)
+            self.assertFalse(np.any(np.isnan(df.values)))
+            self.assertTrue(np.max(np.abs(BEM.Cl-BEM.Cl_qs))>1e-3)
+
+    def test_precomputedMotion(self):
+        # Precomputed kinematics (in memory or memory-mapped) match the step by step update
+        import tempfile
+        BEM = AeroBEM()
+        BEM.init_from_FAST(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        time = np.arange(0,3,0.1)
+        m1 = PrescribedRotorMotion()
+        m1.init_from_BEM(BEM)
+        m1.setType('constantRPM x-oscillation', RPM=12.1, frequency=0.3, amplitude=3)
+        m2 = copy.deepcopy(m1)
+        with tempfile.TemporaryDirectory() as folder:
+            kin = m2.precompute(time, folder=folder, chunkSize=7)
+            self.assertEqual(kin['R_a2g'].shape, (len(time), BEM.nB, len(BEM.r), 3, 3))
+            for it,t in enumerate(time):
+                m1.update(t)
+                m2.update(t)
+                for k in ['origin_pos_gl','omega_gl','R_b2g','pos_gl','vel_gl','R_s2g','R_a2g']:
+                    np.testing.assert_allclose(getattr(m2,k), getattr(m1,k), atol=1e-10)
+                np.testing.assert_allclose(m2.R_ntr2g, np.array(m1.R_ntr2g), atol=1e-10)
+            # Time not precomputed, the precomputed arrays are not modified
+            pos_last = kin['pos_gl'][-1].copy()
+            m1.update(0.123)
+            m2.update(0.123)
+            np.testing.assert_allclose(m2.pos_gl, m1.pos_gl, atol=1e-10)
+            np.testing.assert_equal(kin['pos_gl'][-1], pos_last)
+            del m2, kin
+
+    def test_precomputedMotionSimulation(self):
+        # Opt-in precomputation by blocks gives the same results as the step by step update
+        BEM = AeroBEM()
+        BEM.init_from_FAST(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        time = np.arange(0,2,0.1)
+        BEM.simulationConstantRPM(time, 10, windSpeed=10, tilt=5, cone=-2.5)
+        Thrust = BEM.Thrust.copy()
+        BEM.simulationConstantRPM(time, 10, windSpeed=10, tilt=5, cone=-2.5, precomputeMotion=True, motionBlockSize=7)
+        np.testing.assert_allclose(BEM.Thrust, Thrust, rtol=1e-10)
+        BEM.simulationEnsemble(time, [8,10], windSpeed=10)
+        Thrust = BEM.Thrust.copy()
+        BEM.simulationEnsemble(time, [8,10], windSpeed=10, precomputeMotion=True, motionBlockSize=7)
+        np.testing.assert_allclose(BEM.Thrust, Thrust, rtol=1e-10)
+
 
 if __name__ == '__main__':
     unittest.main()
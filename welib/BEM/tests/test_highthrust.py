@@ -0,0 +1,63 @@
+import unittest
+import numpy as np
+import os
+from welib.BEM.highthrust import *
+
+MyDir=os.path.dirname(__file__)
+
+class Test(unittest.TestCase):
+
+    def test_table(self):
+        # --- Tabulated inverse vs exact formula, within the accuracy bound
+        np.random.seed(0)
+        Ct = np.random.uniform(-1, 2.5, 10000)
+        F  = np.random.uniform(0.2, 1, 10000)
+        for method in ['AeroDyn','GlauertEmpirical','WEHandbook','HAWC2']:
+            tab = InverseCtTable(method)
+            with np.errstate(invalid='ignore'):
+                a_ref = a_Ct(Ct.copy(), F=F, method=method)
+            b = ~np.isnan(a_ref) & (a_ref<1.5)
+            bInvF = any([br[1] for br in tab.branches])
+            tol = tab.maxError/F[b] if bInvF else tab.maxError
+            self.assertTrue(np.all(np.abs(tab(Ct, F)[b]-a_ref[b]) <= tol*(1+1e-6)))
+            np.testing.assert_allclose(a_Ct_tabulated(Ct, F, method=method), tab(Ct, F))
+        self.assertLess(InverseCtTable('AeroDyn').maxError, 1e-4)
+
+        # --- Inverse of Ct_a, monotonic
+        for method in ['Glauert','Spera']:
+            tab = InverseCtTable(method)
+            a = np.linspace(-0.5, 1.4, 1000)
+            np.testing.assert_allclose(tab(Ct_a(a, method=method)), a, atol=1e-4)
+            x = np.linspace(-8, 5, 10000)
+            self.assertTrue(np.all(np.diff(tab(x))>=0))
+
+    def test_CTa(self):
+        # --- a(Ct,a) form
+        a  = np.array([0.2, 0.5])
+        Ct = np.array([0.64, 1.2])
+        a2 = a_Ct(Ct, a.copy(), method='Spera_CTa')
+        fgs = 0.34/0.5*(2-0.34/0.5)
+        np.testing.assert_allclose(a2, [0.2, 1.2/(4*(1-fgs*0.5))])
+
+    def test_BEM(self):
+        # --- Tabulated correction selected in the BEM codes
+        from welib.BEM.steadyBEM import SteadyBEM, FASTFile2SteadyBEM
+        from welib.BEM.unsteadyBEM import AeroBEM
+        nB,cone,r,chord,twist,polars,rho,KinVisc = FASTFile2SteadyBEM(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        BEM0 = SteadyBEM(7, 2, 5, 0, 0, nB,cone,r,chord,twist,polars, rho=rho,KinVisc=KinVisc)
+        BEM1 = SteadyBEM(7, 2, 5, 0, 0, nB,cone,r,chord,twist,polars, rho=rho,KinVisc=KinVisc, CTcorrection='Glauert')
+        np.testing.assert_allclose(BEM1.Power, BEM0.Power, rtol=5e-3) # ac=1/3 instead of 0.3
+        with self.assertRaises(NotImplementedError):
+            SteadyBEM(7, 2, 5, 0, 0, nB,cone,r,chord,twist,polars, solver='Phi', CTcorrection='AeroDyn')
+
+        BEM = AeroBEM()
+        BEM.init_from_FAST(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        time = np.arange(0,1,0.1)
+        BEM.simulationConstantRPM(time, 10, windSpeed=10, tilt=0, cone=0)
+        Thrust = BEM.Thrust.copy()
+        BEM.bCTTable = True
+        BEM.simulationConstantRPM(time, 10, windSpeed=10, tilt=0, cone=0)
+        np.testing.assert_allclose(BEM.Thrust, Thrust, rtol=1e-4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,7 @@ Reference:
    [1]: Branlard, 2017, Wind Turbines Aerodynamics and Vorticity Based Methods: Fundamentals and recent applications, Springer
 
 """
+import os
 import numpy as np
 from numpy import cos, sin, arctan2, pi, arccos, exp, abs, min, sqrt
 from scipy.interpolate import interp1d
@@ -16,13 +17,53 @@ import pandas as pd
 
 # Load more models
 # try:
-from welib.BEM.highthrust import a_Ct
+from welib.BEM.highthrust import a_Ct, a_Ct_tabulated
+from welib.airfoils.PolarTable import PolarTable, PackedPolars
+from welib.airfoils.Polar import Polar
+from welib.airfoils.DynamicStall import dynstall_mhh_param_table, dynstall_mhh_discrete_steady, dynstall_mhh_discrete_step, dynstall_mhh_discrete_outputs
+from welib.airfoils.DynamicStall import dynstall_oye_param_table, dynstall_oye_discrete_steady, dynstall_oye_discrete_step, dynstall_oye_discrete_outputs
+from welib.dyninflow.DynamicInflowDiscrete import tau1_oye, tau1_dbemt, dyninflow_oye_discrete_step
 # except: 
 #     pass
 
 
+def _rotate(R, V, out, inverse=False):
+    """ Rotation of vectors, written in `out` (np.matmul does not allocate, unlike np.einsum)
+      out = R.V  (or R^T.V if inverse), with either:
+        - one matrix per vector: R of shape V.shape+(3,), e.g. R_a2g and V [nCases x] nB x nr x 3
+        - one matrix per blade : R of shape [nCases x] nB x 3 x 3 and V [nCases x] nB x nr x 3
+    """
+    M = R if inverse else np.swapaxes(R, -1, -2) # out_i = V_j M_ji
+    if R.ndim==V.ndim+1:
+        np.matmul(V[...,None,:], M, out=out[...,None,:])
+    else:
+        np.matmul(V, M, out=out)
+    return out
+
+def _dot(u, v, out):
+    """ Dot product of vectors along the last dimension, written in `out` """
+    np.matmul(u[...,None,:], v[...,:,None], out=out[...,None,None])
+    return out
+
+def _cross(u, v, out, tmp):
+    """ Cross product of vectors along the last dimension, as np.cross, written in `out` (tmp: work array of shape out.shape[:-1]) """
+    for i in range(3):
+        j, k = (i+1)%3, (i+2)%3
+        np.multiply(u[...,j], v[...,k], out=out[...,i])
+        out[...,i] -= np.multiply(u[...,k], v[...,j], out=tmp)
+    return out
+
+def _trapz(f, dx, work, out):
+    """ Trapezoidal integration along the last dimension, as np.trapz, 
+    with dx=np.diff(x) and a work array of the same shape """
+    np.add(f[...,1:], f[...,:-1], out=work)
+    work *= dx
+    work /= 2.0
+    return np.sum(work, axis=-1, out=out)
+
 def _fInductionCoefficients(Vrel_norm, V0, F, cnForAI, ctForTI,
-        lambda_r, sigma, phi, relaxation=0.4, a_last=None, bSwirl=True, CTcorrection='AeroDyn', swirlMethod='AeroDyn'):
+        lambda_r, sigma, phi, relaxation=0.4, a_last=None, bSwirl=True, CTcorrection='AeroDyn', swirlMethod='AeroDyn', bCTTable=False,
+        out=None, work=None):
     """Compute the induction coefficients
 
         Inputs
@@ -38,6 +79,10 @@ def _fInductionCoefficients(Vrel_norm, V0, F, cnForAI, ctForTI,
         phi       : flow angle [deg]
         relaxation: relaxation factor in axial induction factor
         bSwirl    : swirl flow model enabled / disabled
+        bCTTable  : use the tabulated inverse of the high thrust correction (see highthrust.InverseCtTable)
+        out       : tuple of arrays (a, aprime, Ct) where the outputs are written, allocated if None
+        work      : tuple of work arrays (float, float, bool, bool) of the same shape, allocated if None
+                    NOTE: with `out` and `work`, no array is allocated for the default models
 
         Outputs
         ----------
@@ -45,10 +90,30 @@ def _fInductionCoefficients(Vrel_norm, V0, F, cnForAI, ctForTI,
         aprime: tangential induction factor
         Ct: local thrust coefficient
     """
+    if out is None:
+        shp = np.broadcast(Vrel_norm, V0, F, cnForAI, ctForTI, sigma, phi).shape
+        out  = (np.zeros(shp), np.zeros(shp), np.zeros(shp))
+    if work is None:
+        shp = out[0].shape
+        work = (np.zeros(shp), np.zeros(shp), np.zeros(shp, dtype=bool), np.zeros(shp, dtype=bool))
+    a, aprime, Ct = out
+    t1, t2, b, b2 = work # work arrays
     # --- Default a and CT
-    a = 1. / ((4.*F*sin(phi)**2)/(sigma*(cnForAI+10**-8))+1) # NOTE singularity avoided
+    # a = 1. / ((4.*F*sin(phi)**2)/(sigma*(cnForAI+10**-8))+1) # NOTE singularity avoided
+    np.multiply(4., F, out=t1)
+    np.sin(phi, out=t2)
+    t1 *= np.square(t2, out=t2)
+    np.add(cnForAI, 10**-8, out=t2)
+    t2 *= sigma
+    t1 /= t2
+    t1 += 1
+    np.divide(1., t1, out=a)
     # CT=(1-a_last).^2.*sigma.*CnForAI./((sind(phi)).^2)
-    Ct = Vrel_norm**2 * sigma * cnForAI/(V0**2)  # that's a CT loc
+    # Ct = Vrel_norm**2 * sigma * cnForAI/(V0**2)  # that's a CT loc
+    np.square(Vrel_norm, out=Ct)
+    Ct *= sigma
+    Ct *= cnForAI
+    Ct /= np.square(V0, out=t1)
     # AeroDyn
     #k = sigma*cn/4.0_ReKi/F/sphi/sphi
     #if (k <= 2/3) then  ! momentum state for a < 0.4
@@ -59,47 +124,86 @@ def _fInductionCoefficients(Vrel_norm, V0, F, cnForAI, ctForTI,
         # Glauert correction as default
         #>>> NOTE this is:  a = a_Ct(Ct, a, method='Glauert') from highthrust
         ac = 0.3 
-        bHigh = a > ac
-        fg = 0.25*(5.-3.*a[bHigh])
-        a[bHigh] = Ct[bHigh]/(4.*F[bHigh]*(1.-fg*a[bHigh]))
+        bHigh = np.greater(a, ac, out=b)
+        # fg = 0.25*(5.-3.*a);  a = Ct/(4.*F*(1.-fg*a)) where bHigh
+        np.multiply(3., a, out=t1)
+        np.subtract(5., t1, out=t1)
+        t1 *= 0.25
+        t1 *= a
+        np.subtract(1., t1, out=t1)
+        np.multiply(4., F, out=t2)
+        t2 *= t1
+        np.divide(Ct, t2, out=a, where=bHigh)
+    elif bCTTable:
+        np.copyto(a, a_Ct_tabulated(Ct, F, method=CTcorrection))
+        if CTcorrection=='AeroDyn':
+            np.clip(Ct, -2, 2, out=Ct) # as done by a_Ct
+    elif CTcorrection=='AeroDyn':
+        # NOTE this is: a = a_Ct(Ct, a, F, method='AeroDyn') from highthrust, without allocation
+        np.clip(Ct, -2, 2, out=Ct)
+        np.divide(Ct, F, out=t1)
+        Ic = np.greater(t1, 0.96, out=b) # Correction
+        In = np.logical_not(Ic, out=b2)  # Normal
+        # a = 0.5*(1-np.sqrt(1-Ct/F)) where In
+        np.subtract(1., t1, out=t1)
+        np.sqrt(t1, out=t1, where=In)
+        np.subtract(1., t1, out=t1)
+        np.multiply(0.5, t1, out=a, where=In)
+        # a = 0.1432+np.sqrt(-0.55106+0.6427*Ct/F) where Ic
+        np.multiply(0.6427, Ct, out=t1)
+        t1 /= F
+        t1 += -0.55106
+        np.sqrt(t1, out=t1, where=Ic)
+        np.add(0.1432, t1, out=a, where=Ic)
     else:
-        a = a_Ct(Ct, a, F, method=CTcorrection)
+        np.copyto(a, a_Ct(Ct, a, F, method=CTcorrection))
 
-    a[F<0.01]=1 # HACK to match aerodyn # TODO make that an option
+    np.copyto(a, 1, where=np.less(F, 0.01, out=b)) # HACK to match aerodyn # TODO make that an option
 
     # --- Relaxation for high Ct
     if a_last is not None:
-        bHigh = a>0.3
-        a[bHigh] = a[bHigh]*relaxation + (1.-relaxation)*a_last[bHigh]
+        bHigh = np.greater(a, 0.3, out=b)
+        # a = a*relaxation + (1.-relaxation)*a_last where bHigh
+        np.multiply(a, relaxation, out=t1)
+        t1 += np.multiply(1.-relaxation, a_last, out=t2)
+        np.copyto(a, t1, where=bHigh)
 
     # --- Swirl
     if bSwirl is True:
         if swirlMethod=='AeroDynOld':
-            aprime=0.5*(sqrt(1+4*a*F*(1-a)/lambda_r**2)-1);
+            np.copyto(aprime, 0.5*(sqrt(1+4*a*F*(1-a)/lambda_r**2)-1))
 
         elif swirlMethod=='AeroDyn':
             # NOTE: AeroDyn has more tests (e.g. if cos(phi)=0)
-            aprime=np.zeros(a.shape)
-            b0 = np.logical_or(np.abs(a-1)<1e-5, np.abs(phi)<1e-5)
-            b1 = np.logical_not(b0)
-            aprime[b0] = 0 
-            kp         = sigma[b1]*ctForTI[b1]/(4*F[b1]*sin(phi[b1])*cos(phi[b1]))
-            aprime[b1] = kp/(1-kp)
+            # b0 = |a-1|<1e-5 or |phi|<1e-5
+            np.subtract(a, 1, out=t1)
+            b0 = np.less(np.abs(t1, out=t1), 1e-5, out=b)
+            b0 |= np.less(np.abs(phi, out=t1), 1e-5, out=b2)
+            b1 = np.logical_not(b0, out=b2)
+            # kp = sigma*ctForTI/(4*F*sin(phi)*cos(phi)),  aprime = kp/(1-kp) where b1, 0 where b0
+            np.multiply(sigma, ctForTI, out=t1)
+            np.multiply(4, F, out=t2)
+            t2 *= np.sin(phi, out=aprime)
+            t2 *= np.cos(phi, out=aprime)
+            np.divide(t1, t2, out=t1, where=b1)
+            np.subtract(1, t1, out=t2)
+            np.divide(t1, t2, out=aprime, where=b1)
+            np.copyto(aprime, 0, where=b0)
         elif swirlMethod=='HAWC2':
-            aprime = (Vrel_norm**2*ctForTI*sigma)/(4.*(1.-a)*V0**2*lambda_r)
+            np.copyto(aprime, (Vrel_norm**2*ctForTI*sigma)/(4.*(1.-a)*V0**2*lambda_r))
         elif swirlMethod=='Default': # Need a better name
-            aprime=1/((4*F*sin(phi)*cos(phi)) /(sigma*ctForTI)  -1 );
+            np.copyto(aprime, 1/((4*F*sin(phi)*cos(phi)) /(sigma*ctForTI)  -1 ))
         else:
             raise NotImplementedError()
     else:
-        aprime = a * 0.
+        aprime.fill(0.)
 
     # Bounding values for safety
-    a     [np.isnan(a)]      = 0
-    aprime[np.isnan(aprime)] = 0
-    aprime = np.clip(aprime,-1,1.0) 
-    a      = np.clip(a     ,-1,1.5)
-    Ct     = np.clip(Ct    ,-1,3)
+    np.copyto(a     , 0, where=np.isnan(a     , out=b))
+    np.copyto(aprime, 0, where=np.isnan(aprime, out=b))
+    np.clip(aprime,-1,1.0, out=aprime)
+    np.clip(a     ,-1,1.5, out=a)
+    np.clip(Ct    ,-1,3  , out=Ct)
     return a, aprime, Ct
 
 
@@ -111,21 +215,120 @@ class BEMStates:
         # Dynamic stall
 
 class BEMDiscreteStates:
-    def __init__(self, nB, nr):
+    def __init__(self, nB, nr, nCases=None):
+        """ If nCases is provided, all states have an extra leading dimension (ensemble of cases) """
         self.t = None
         self.it=-1
+        shp = (nB,nr) if nCases is None else (nCases,nB,nr)
         # Induction
-        self.Vind_g  = np.zeros((nB,nr,3)) # Dynamic induced velocity with skew and dyn wake, global coordinates
-        self.Vind_p  = np.zeros((nB,nr,3)) # Dynamic induced velocity with skew and dyn wake, polar coordinates
-        self.a       = np.zeros((nB,nr)) # axial induction
+        self.Vind_g  = np.zeros(shp+(3,)) # Dynamic induced velocity with skew and dyn wake, global coordinates
+        self.Vind_p  = np.zeros(shp+(3,)) # Dynamic induced velocity with skew and dyn wake, polar coordinates
+        self.a       = np.zeros(shp) # axial induction
         # Dynamic wake
-        self.Vind_qs_p  = np.zeros((nB,nr,3)) # Quasi-steady velocity, polar coordinates
-        self.Vind_qs_g  = np.zeros((nB,nr,3)) # Quasi-steady velocity
-        self.Vind_int_p = np.zeros((nB,nr,3)) # Intermediate velocity, polar coordinates
-        self.Vind_dyn_p = np.zeros((nB,nr,3)) # Dynamic induced velocity (before skew/yaw), polar coordinates
-        self.Vind_dyn_g = np.zeros((nB,nr,3)) # Dynamic induced velocity (before skew/yaw), global coordinates
+        self.Vind_qs_p  = np.zeros(shp+(3,)) # Quasi-steady velocity, polar coordinates
+        self.Vind_qs_g  = np.zeros(shp+(3,)) # Quasi-steady velocity
+        self.Vind_int_p = np.zeros(shp+(3,)) # Intermediate velocity, polar coordinates
+        self.Vind_dyn_p = np.zeros(shp+(3,)) # Dynamic induced velocity (before skew/yaw), polar coordinates
+        self.Vind_dyn_g = np.zeros(shp+(3,)) # Dynamic induced velocity (before skew/yaw), global coordinates
         # Dynamic stall
-        self.fs = np.zeros((nB,nr)) # Separation 
+        self.x_ds     = np.zeros(shp+(4,)) # Dynamic stall states, MHH: x1, x2, x3, x4 (=f''), Oye: fs (first state)
+        self.alpha_ds = np.zeros(shp) # Angle of attack, used for alpha_dot
+        self.U_ds     = np.zeros(shp) # Relative velocity, used for U_dot
+
+    def copyFrom(self, xd):
+        """ Copy the states of `xd` in place (no allocation) """
+        self.t  = xd.t
+        self.it = xd.it
+        for k,v in self.__dict__.items():
+            if isinstance(v, np.ndarray):
+                np.copyto(v, getattr(xd, k))
+
+class BEMWorkspace:
+    """ 
+    Preallocated work arrays used by AeroBEM.timeStep, such that a time step does not 
+    allocate arrays (polars, inductions, disk averaged quantities and loads), at least with
+    the default models (dynamic stall and some of the other induction models still allocate).
+    """
+    def __init__(self, nB, nr, nCases=None, nCoeff=3):
+        lead = () if nCases is None else (nCases,)
+        self.shape = lead+(nB, nr)
+        shp = self.shape
+        # Geometry
+        self.R_p2g     = np.zeros(lead+(nB,3,3)) # "polar grid to global" for each blade
+        self.r         = np.zeros(shp)  # radial position in polar grid
+        # Velocities
+        self.Vind_g    = np.zeros(shp+(3,))
+        self.Vrel_g    = np.zeros(shp+(3,))
+        self.Vrel_a    = np.zeros(shp+(3,))
+        self.Vrel_p    = np.zeros(shp+(3,))
+        self.Vstr_p    = np.zeros(shp+(3,))
+        self.Vwnd_p    = np.zeros(shp+(3,))
+        self.Vflw_p    = np.zeros(shp+(3,))
+        self.Vflw_g    = np.zeros(shp+(3,))
+        self.Vrel_norm = np.zeros(shp)
+        self.Re        = np.zeros(shp)
+        self.V0        = np.zeros(shp)
+        self.lambda_r  = np.zeros(shp)
+        self.sigma     = np.zeros(shp)
+        # Angles and losses
+        self.phi_p     = np.zeros(shp)
+        self.sinphi    = np.zeros(shp)
+        self.alpha     = np.zeros(shp)
+        self.cosa      = np.zeros(shp)
+        self.sina      = np.zeros(shp)
+        self.F         = np.zeros(shp)
+        self.b         = np.zeros(shp, dtype=bool)
+        # Coefficients (the third component is always zero in airfoil coordinates)
+        self.C_a        = np.zeros(shp+(3,))
+        self.C_a_noDrag = np.zeros(shp+(3,))
+        self.C_g        = np.zeros(shp+(3,))
+        self.C_p        = np.zeros(shp+(3,))
+        self.C_p_noDrag = np.zeros(shp+(3,))
+        self.ClCdCm     = np.zeros(shp+(nCoeff,))
+        # Inductions
+        self.a0         = np.zeros(shp) # (when WakeMod==0)
+        self.a          = np.zeros(shp)
+        self.aprime     = np.zeros(shp)
+        self.Ct         = np.zeros(shp)
+        # Loads
+        self.q_dyn      = np.zeros(shp)
+        # Temporary arrays
+        self.tmp        = np.zeros(shp)
+        self.tmp2       = np.zeros(shp)
+        self.tmp3       = np.zeros(shp+(3,))
+        self.b2         = np.zeros(shp, dtype=bool)
+        self.dr         = np.zeros(shp[:-1]+(nr-1,)) # for the trapezoidal integration
+        self.dF         = np.zeros(shp[:-1]+(nr-1,))
+        # Rotor and disk averaged quantities, per case
+        self.R          = np.zeros(lead)
+        self.omega_r    = np.zeros(lead+(3,))
+        self.tau1       = np.zeros(lead)
+        self.Vwnd_avg_g = np.zeros(lead+(3,))
+        self.Vwnd_avg_r = np.zeros(lead+(3,))
+        self.Vflw_avg_g = np.zeros(lead+(3,))
+        self.Vind_avg_g = np.zeros(lead+(3,))
+        self.Vind_avg_r = np.zeros(lead+(3,))
+        self.V_r        = np.zeros(lead+(3,))
+        self.Vw_r       = np.zeros(lead+(3,))
+        self.y_hat_disk = np.zeros(lead+(3,))
+        self.z_hat_disk = np.zeros(lead+(3,))
+        self.chi        = np.zeros(lead)
+        self.chi0       = np.zeros(lead)
+        self.c1         = np.zeros(lead)
+        self.c2         = np.zeros(lead)
+        self.c3         = np.zeros(lead)
+        self.cb         = np.zeros(lead, dtype=bool)
+        # Skew azimuth and induction averaging, per blade and per radial position
+        self.SkewAzimuth = np.zeros(lead+(nB,))
+        self.sz_y       = np.zeros(lead+(nB,))
+        self.sz         = np.zeros(lead+(nB,))
+        self.sz_tmp     = np.zeros(lead+(nB,))
+        self.sz_b       = np.zeros(lead+(nB,), dtype=bool)
+        self.sz_b2      = np.zeros(lead+(nB,), dtype=bool)
+        self.Vind_b     = np.zeros(lead+(nB,1,3))
+        self.Ir         = np.zeros(lead+(nr,))
+        self.Ir_b       = np.zeros(lead+(nr,), dtype=bool)
+        self.Ir_b2      = np.zeros(lead+(nr,), dtype=bool)
 
 class AeroBEM:
     """ 
@@ -146,14 +349,38 @@ class AeroBEM:
         #self.twist  = None
         self.nB     = None
         self.r      = None # radial stations
+        self.nCases = None # number of cases simulated together (ensemble), None for a single case
+
+        # Preallocated states (t-1 and t) and work arrays for the time integration
+        self._xdBuffer = None
+        self.workspace = None
+        # Output sink (see BEMOutputSink), if None, all outputs are stored for all time steps
+        self.outputSink = None
+        # Performance counters (see enablePerfCounters), None when disabled
+        self.perf = None
 
         self.setDefaultOptions()
 
+    def enablePerfCounters(self, enable=True):
+        """ Enable (or disable) the phase timers and counters of `timeStep`, reported by `perfReport` """
+        if enable:
+            from welib.tools.tictoc import PerfCounters
+            self.perf = PerfCounters()
+        else:
+            self.perf = None
+
+    def perfReport(self):
+        """ Returns the report of the performance counters (see PerfCounters.report), or None if disabled"""
+        if self.perf is None:
+            return None
+        return self.perf.report()
+
     def setDefaultOptions(self):
         self.nbIt = 200  # maximum number of iterations in BEM
         self.aTol = 10 ** -6 # tolerance for axial induction factor convergence
         self.relaxation = 0.5  # relaxation factor in axial induction factor
         self.CTcorrection = 'AeroDyn'  #  type of CT correction more model implementated in the future like 'spera'
+        self.bCTTable = False # use the tabulated inverse a(Ct,F) of the CT correction (see highthrust.InverseCtTable)
         self.swirlMethod  = 'AeroDyn' # type of swirl model
         self.Ngrid = 1.0
         self.bSwirl = True  # swirl flow model enabled / disabled
@@ -161,10 +388,12 @@ class AeroBEM:
         self.bHubLoss = False # enable / disable hub loss model
         self.bTipLossCl = False # enable / disable Cl loss model
         self.TipLossMethod = 'Glauert'  # type of tip loss model
-        self.bDynaStall = True # dynamic stall model
-        self.bDynaWake = True # dynamic stall model
-#           1   DBEMT_Mod          - Type of dynamic BEMT (DBEMT) model {1=constant tau1, 2=time-dependent tau1} (-) [used only when WakeMod=2]
-#           4   tau1_const         - Time constant for DBEMT (s) [used only when WakeMod=2 and DBEMT_Mod=1]
+        self.bDynaStall = False # dynamic stall model
+        self.DynaStallMod = 'MHH' # type of dynamic stall model 'MHH' or 'Oye'
+        self.bDynaWake = True # dynamic inflow model (Oye)
+        self.tau1Mod = 'constant' # time constant of the dynamic inflow model: 'constant' (tau1_const), 'oye' (mean wind speed), 'dbemt' (as AeroDyn DBEMT_Mod=2)
+        self.tau1_const = 4 # time constant [s], used when tau1Mod is 'constant'
+        self.bDynaWakeExact = False # exact discrete integration of the dynamic inflow for a linear quasi-steady input (see DynamicInflowDiscrete), otherwise inputs constant over the time step
 
         self.bYawModel = True # Yaw correction
         self.bAIDrag = True # influence on drag coefficient on normal force coefficient
@@ -173,6 +402,7 @@ class AeroBEM:
         self.bThicknessInterp = True # interpolate the input tabulated airfoil data for thickness variation
         self.WakeMod=1 # 0: no inductions, 1: BEM inductions
         self.bRoughProfiles = False # use rough profiles for input airfoil data
+        self.bPolarTable = False # use the packed polar table (uniform alpha grid) for the polar lookup
 
     def init_from_FAST(self, FASTFileName):
         from welib.weio.fast_input_deck import FASTInputDeck
@@ -206,161 +436,231 @@ class AeroBEM:
     def _init(self):
         # Creating interpolation functions for each polar, now in rad!
         self.fPolars = [interp1d(p[:,0]*np.pi/180,p[:,1:],axis=0) for p in self.polars]
+        # Polars of all stations packed together, used for the lookup (same values as fPolars)
+        self.packedPolars = PackedPolars(self.polars)
+        # Packed table of all polars, used if bPolarTable is True
+        self.polarTable = PolarTable(self.polars)
+        # Dynamic stall parameters, computed when needed (see _initDynaStall)
+        self.dsParams = None
+
+    def _initDynaStall(self):
+        """ Dynamic stall parameters for all stations, computed once from the polars """
+        if self.dsParams is not None and self.dsParams['model']==self.DynaStallMod:
+            return
+        polars = {}
+        for pol in self.polars:
+            if id(pol) not in polars:
+                cm = pol[:,3] if pol.shape[1]>3 else None
+                polars[id(pol)] = Polar(None, pol[:,0]*np.pi/180, pol[:,1], pol[:,2], cm, compute_params=True, radians=True)
+        polars = [polars[id(pol)] for pol in self.polars]
+        if self.DynaStallMod=='MHH':
+            self.dsParams = dynstall_mhh_param_table(polars, self.chord[0])
+        elif self.DynaStallMod=='Oye':
+            self.dsParams = dynstall_oye_param_table(polars, self.chord[0])
+        else:
+            raise NotImplementedError('Dynamic stall model: {}'.format(self.DynaStallMod))
+        self.dsParams['model'] = self.DynaStallMod
+
+    def getInitStates(self, nCases=None):
+        """ Returns initial states, stored in a two-slot buffer (states at t-1 and t) 
+        which is swapped in place by timeStep 
+        If nCases is provided, the states have an extra leading dimension (ensemble of cases)
+        """
+        nr = len(self.r)
+        if self.bDynaStall:
+            self._initDynaStall()
+        self._xdBuffer = (BEMDiscreteStates(self.nB, nr, nCases), BEMDiscreteStates(self.nB, nr, nCases))
+        self.workspace = BEMWorkspace(self.nB, nr, nCases, self.packedPolars.nCoeff)
+        return self._xdBuffer[0]
+
+    def _nextStates(self, xd0):
+        """ Returns the states at t, initialized with the states at t-1 (xd0)
+        If xd0 is one of the slot of the state buffer, the other slot is used, otherwise a copy is returned
+        """
+        buf = self._xdBuffer
+        if buf is not None and xd0 is buf[0]:
+            xd1 = buf[1]
+        elif buf is not None and xd0 is buf[1]:
+            xd1 = buf[0]
+        else:
+            return copy.deepcopy(xd0)
+        xd1.copyFrom(xd0)
+        return xd1
 
-    def getInitStates(self):
-        return BEMDiscreteStates(self.nB, len(self.r))
+    def _getWorkspace(self, shape):
+        if self.workspace is None or self.workspace.shape!=shape:
+            self.workspace = BEMWorkspace(shape[-2], shape[-1], None if len(shape)==2 else shape[0], self.packedPolars.nCoeff)
+        return self.workspace
 
-    def timeStepInit(self, t0, tmax, dt):
-        """ Allocate storage for tiem step values"""
+    def timeStepInit(self, t0, tmax, dt, nCases=None):
+        """ Allocate storage for tiem step values
+        If an output sink is set (self.outputSink), only the storage for one time step 
+        is allocated, and the sink records the selected outputs at each time step.
+        If nCases is provided, the storage has an extra dimension after the time (ensemble of cases)
+        """
+        self.nCases = nCases
         self.time=np.arange(t0,tmax+dt/2,dt)
-        nt = len(self.time)
+        if self.outputSink is not None:
+            self.outputSink.reset()
+            nt = 1
+        else:
+            nt = len(self.time)
         nB = self.nB
         nr = len(self.r)
+        lead = (nt,) if nCases is None else (nt, nCases) # leading dimensions of all outputs
         # --- Spanwise data
         # Coeffients
-        self.Cl_qs  = np.zeros((nt,nB,nr))
-        self.Cd_qs  = np.zeros((nt,nB,nr))
-        self.Cl     = np.zeros((nt,nB,nr))
-        self.Cd     = np.zeros((nt,nB,nr))
-        self.cn     = np.zeros((nt,nB,nr))
-        self.ct     = np.zeros((nt,nB,nr))
-        self.Cx_a   = np.zeros((nt,nB,nr))
-        self.Cy_a   = np.zeros((nt,nB,nr))
-        self.Ct     = np.zeros((nt,nB,nr))
-        self.Cq     = np.zeros((nt,nB,nr))
+        self.Cl_qs  = np.zeros(lead+(nB,nr))
+        self.Cd_qs  = np.zeros(lead+(nB,nr))
+        self.Cl     = np.zeros(lead+(nB,nr))
+        self.Cd     = np.zeros(lead+(nB,nr))
+        self.cn     = np.zeros(lead+(nB,nr))
+        self.ct     = np.zeros(lead+(nB,nr))
+        self.Cx_a   = np.zeros(lead+(nB,nr))
+        self.Cy_a   = np.zeros(lead+(nB,nr))
+        self.Ct     = np.zeros(lead+(nB,nr))
+        self.Cq     = np.zeros(lead+(nB,nr))
         # Velocities
-        self.Vrel_p = np.zeros((nt,nB,nr,3)) # Un,Ut,Ur
-        self.Vrel_xa = np.zeros((nt,nB,nr)) # 
-        self.Vrel_ya = np.zeros((nt,nB,nr)) # 
-        self.Vrel_za = np.zeros((nt,nB,nr)) # 
-        self.Vind_p = np.zeros((nt,nB,nr,3))
-        self.Vind_s = np.zeros((nt,nB,nr,3))
-        self.Vind_qs_p = np.zeros((nt,nB,nr,3))
-        self.Vflw_p = np.zeros((nt,nB,nr,3)) # Vwnd-Vstr
-        self.Vflw_s = np.zeros((nt,nB,nr,3)) # Vwnd-Vstr
-        self.Vwnd_p = np.zeros((nt,nB,nr,3))
-        self.Vwnd_s = np.zeros((nt,nB,nr,3))
-        self.Vwnd_a = np.zeros((nt,nB,nr,3))
-        self.Vstr_p = np.zeros((nt,nB,nr,3))
-        self.Vstr_s = np.zeros((nt,nB,nr,3))
-        self.Vstr_xa = np.zeros((nt,nB,nr))
-        self.Vstr_ya = np.zeros((nt,nB,nr))
-        self.Vrel   = np.zeros((nt,nB,nr))
-        self.AxInd  = np.zeros((nt,nB,nr))
-        self.TnInd  = np.zeros((nt,nB,nr))
+        self.Vrel_p = np.zeros(lead+(nB,nr,3)) # Un,Ut,Ur
+        self.Vrel_xa = np.zeros(lead+(nB,nr)) # 
+        self.Vrel_ya = np.zeros(lead+(nB,nr)) # 
+        self.Vrel_za = np.zeros(lead+(nB,nr)) # 
+        self.Vind_p = np.zeros(lead+(nB,nr,3))
+        self.Vind_s = np.zeros(lead+(nB,nr,3))
+        self.Vind_qs_p = np.zeros(lead+(nB,nr,3))
+        self.Vflw_p = np.zeros(lead+(nB,nr,3)) # Vwnd-Vstr
+        self.Vflw_s = np.zeros(lead+(nB,nr,3)) # Vwnd-Vstr
+        self.Vwnd_p = np.zeros(lead+(nB,nr,3))
+        self.Vwnd_s = np.zeros(lead+(nB,nr,3))
+        self.Vwnd_a = np.zeros(lead+(nB,nr,3))
+        self.Vstr_p = np.zeros(lead+(nB,nr,3))
+        self.Vstr_s = np.zeros(lead+(nB,nr,3))
+        self.Vstr_xa = np.zeros(lead+(nB,nr))
+        self.Vstr_ya = np.zeros(lead+(nB,nr))
+        self.Vrel   = np.zeros(lead+(nB,nr))
+        self.AxInd  = np.zeros(lead+(nB,nr))
+        self.TnInd  = np.zeros(lead+(nB,nr))
         # Loads per span
-        self.L      = np.zeros((nt,nB,nr))
-        self.D      = np.zeros((nt,nB,nr))
-        self.Fn     = np.zeros((nt,nB,nr))
-        self.Ft     = np.zeros((nt,nB,nr))
-        self.F_a   = np.zeros((nt,nB,nr,3))
-        self.F_s    = np.zeros((nt,nB,nr,3))
-        self.Gamma  = np.zeros((nt,nB,nr))
-        self.alpha  = np.zeros((nt,nB,nr))
-        self.phi    = np.zeros((nt,nB,nr))
-        self.Re     = np.zeros((nt,nB,nr))
+        self.L      = np.zeros(lead+(nB,nr))
+        self.D      = np.zeros(lead+(nB,nr))
+        self.Fn     = np.zeros(lead+(nB,nr))
+        self.Ft     = np.zeros(lead+(nB,nr))
+        self.F_a   = np.zeros(lead+(nB,nr,3))
+        self.F_s    = np.zeros(lead+(nB,nr,3))
+        self.Gamma  = np.zeros(lead+(nB,nr))
+        self.alpha  = np.zeros(lead+(nB,nr))
+        self.phi    = np.zeros(lead+(nB,nr))
+        self.Re     = np.zeros(lead+(nB,nr))
         # Integrated values
-        self.Thrust   = np.zeros(nt)
-        self.Torque   = np.zeros(nt)
-        self.Power    = np.zeros(nt)
-        self.chi      = np.zeros(nt)
-        self.chi0     = np.zeros(nt)
-        self.RtVAvg   = np.zeros((nt,3))
-        self.psi      = np.zeros(nt)
-        self.RtArea   = np.zeros(nt)
-        self.SkewAzimuth  = np.zeros((nt,nB))
+        self.Thrust   = np.zeros(lead)
+        self.Torque   = np.zeros(lead)
+        self.Power    = np.zeros(lead)
+        self.chi      = np.zeros(lead)
+        self.chi0     = np.zeros(lead)
+        self.RtVAvg   = np.zeros(lead+(3,))
+        self.psi      = np.zeros(lead)
+        self.RtArea   = np.zeros(lead)
+        self.SkewAzimuth  = np.zeros(lead+(nB,))
         # Blade blades
-        self.BladeTorque = np.zeros((nt,nB))
-        self.BladeThrust = np.zeros((nt,nB))
-        self.BladeEdge   = np.zeros((nt,nB))
-        self.BladeFlap   = np.zeros((nt,nB))
+        self.BladeTorque = np.zeros(lead+(nB,))
+        self.BladeThrust = np.zeros(lead+(nB,))
+        self.BladeEdge   = np.zeros(lead+(nB,))
+        self.BladeFlap   = np.zeros(lead+(nB,))
 
 
 
     def calcOutput(self):
         R = np.sqrt(self.RtArea/pi)
-        q = 0.5*self.rho*self.RtArea*self.RtVAvg[:,0]**2
+        q = 0.5*self.rho*self.RtArea*self.RtVAvg[...,0]**2
         self.CT=self.Thrust/(q)
         self.CQ=self.Torque/(q*R)
-        self.CP=self.Power /(q*self.RtVAvg[:,0])
+        self.CP=self.Power /(q*self.RtVAvg[...,0])
 
 
-    def toDataFrame(self):
+    def toDataFrame(self, iCase=None):
         """ Export time series to a pandas dataframe
         Column names are set to match OpenFAST outputs
+        For an ensemble of cases (see simulationEnsemble), a list of dataframes (one per case)
+        is returned, unless the case index `iCase` is provided.
         """
         columns=['Time_[s]']
         columns+=['Thrust_[N]']
         columns+=['Torque_[N/m]']
 
+        if self.outputSink is not None:
+            return self.outputSink.toDataFrame()
+        if self.nCases is not None and iCase is None:
+            return [self.toDataFrame(iCase=i) for i in np.arange(self.nCases)]
         #if not hasattr(self,'CP'):
         self.calcOutput()
+        # Selection of one case for an ensemble
+        sel = lambda v: v if iCase is None else v[:,iCase]
 
         df = pd.DataFrame()
         df['Time_[s]']        = self.time
-        df['Azimuth_[deg]']   = np.mod(self.psi,360)
-        df['RtAeroFxh_[N]']   = self.Thrust
-        df['RtAeroMxh_[N-m]'] = self.Torque
-        df['RtAeroPwr_[W]']   = self.Power
-        df['RtAeroCt_[-]']    = self.CT
-        df['RtAeroCq_[-]']    = self.CQ
-        df['RtAeroCp_[-]']    = self.CP
-
-        df['RtVAvgxh_[m/s]']  = self.RtVAvg[:,0]
-        df['RtVAvgyh_[m/s]']  = self.RtVAvg[:,1]
-        df['RtVAvgzh_[m/s]']  = self.RtVAvg[:,2]
-        df['RtArea_[m^2]']    = self.RtArea
-        df['RtSkew_[deg]']    = self.chi0
+        df['Azimuth_[deg]']   = np.mod(sel(self.psi),360)
+        df['RtAeroFxh_[N]']   = sel(self.Thrust)
+        df['RtAeroMxh_[N-m]'] = sel(self.Torque)
+        df['RtAeroPwr_[W]']   = sel(self.Power)
+        df['RtAeroCt_[-]']    = sel(self.CT)
+        df['RtAeroCq_[-]']    = sel(self.CQ)
+        df['RtAeroCp_[-]']    = sel(self.CP)
+
+        df['RtVAvgxh_[m/s]']  = sel(self.RtVAvg)[:,0]
+        df['RtVAvgyh_[m/s]']  = sel(self.RtVAvg)[:,1]
+        df['RtVAvgzh_[m/s]']  = sel(self.RtVAvg)[:,2]
+        df['RtArea_[m^2]']    = sel(self.RtArea)
+        df['RtSkew_[deg]']    = sel(self.chi0)
         for iB in np.arange(self.nB):
-            df['B'+str(iB+1)+'Azimuth_[deg]']  = np.mod(self.SkewAzimuth[:,iB],360)
+            df['B'+str(iB+1)+'Azimuth_[deg]']  = np.mod(sel(self.SkewAzimuth)[:,iB],360)
 
-        Vflw_s = self.Vwnd_s-self.Vstr_s
+        Vflw_s = sel(self.Vwnd_s)-sel(self.Vstr_s)
 
         # AeroDyn x-y is "section coord" s
         # AeroDyn n-t is "airfoil coord" a
         # AeroDyn doesn't have polar coord..
         for iB in np.arange(self.nB):
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Fx_[N/m]'] = self.F_s[:,iB,ir,0]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Fx_[N/m]'] = sel(self.F_s)[:,iB,ir,0]
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Fy_[N/m]'] =-self.F_s[:,iB,ir,1] # NOTE: weird sign
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Fy_[N/m]'] =-sel(self.F_s)[:,iB,ir,1] # NOTE: weird sign
             for ir in np.arange(len(self.r)):
                 df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Vx_[m/s]'] =      Vflw_s[:,iB,ir,0]
             for ir in np.arange(len(self.r)):
                 df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Vy_[m/s]'] =      Vflw_s[:,iB,ir,1]
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'VDisx_[m/s]'] = self.Vwnd_s[:,iB,ir,0]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'VDisx_[m/s]'] = sel(self.Vwnd_s)[:,iB,ir,0]
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'VDisy_[m/s]'] = self.Vwnd_s[:,iB,ir,1]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'VDisy_[m/s]'] = sel(self.Vwnd_s)[:,iB,ir,1]
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'STVx_[m/s]'] = self.Vstr_s[:,iB,ir,0]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'STVx_[m/s]'] = sel(self.Vstr_s)[:,iB,ir,0]
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'STVy_[m/s]'] = self.Vstr_s[:,iB,ir,1]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'STVy_[m/s]'] = sel(self.Vstr_s)[:,iB,ir,1]
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'STVz_[m/s]'] = self.Vstr_s[:,iB,ir,2]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'STVz_[m/s]'] = sel(self.Vstr_s)[:,iB,ir,2]
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Vrel_[m/s]'] = self.Vrel[:,iB,ir]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Vrel_[m/s]'] = sel(self.Vrel)[:,iB,ir]
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'TnInd_[-]'] = self.TnInd[:,iB,ir]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'TnInd_[-]'] = sel(self.TnInd)[:,iB,ir]
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'AxInd_[-]'] = self.AxInd[:,iB,ir]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'AxInd_[-]'] = sel(self.AxInd)[:,iB,ir]
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Phi_[deg]'] = self.phi[:,iB,ir]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Phi_[deg]'] = sel(self.phi)[:,iB,ir]
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Vindx_[m/s]'] = self.Vind_s[:,iB,ir,0]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Vindx_[m/s]'] = sel(self.Vind_s)[:,iB,ir,0]
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Vindy_[m/s]'] = self.Vind_s[:,iB,ir,1]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Vindy_[m/s]'] = sel(self.Vind_s)[:,iB,ir,1]
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Alpha_[deg]'] = self.alpha[:,iB,ir]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Alpha_[deg]'] = sel(self.alpha)[:,iB,ir]
         # AeroDyn "n-t", is almost like xa but y is switched
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Fn_[N/m]'] = self.F_a[:,iB,ir,0]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Fn_[N/m]'] = sel(self.F_a)[:,iB,ir,0]
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Ft_[N/m]'] =-self.F_a[:,iB,ir,1]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Ft_[N/m]'] =-sel(self.F_a)[:,iB,ir,1]
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Cl_[-]'] = self.Cl[:,iB,ir]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Cl_[-]'] = sel(self.Cl)[:,iB,ir]
             for ir in np.arange(len(self.r)):
-                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Cd_[-]'] = self.Cd[:,iB,ir]
+                df['AB'+str(iB+1)+'N{:03d}'.format(ir+1)+'Cd_[-]'] = sel(self.Cd)[:,iB,ir]
         return df
 
     def toDataFrameRadial(self, it=-1):
@@ -383,8 +683,20 @@ class AeroBEM:
             ):
         """ 
         xBEM0: BEM states at t-1
+
+        NOTE: if xd0 was returned by `getInitStates` or by a previous call to `timeStep`, the
+              states at t are written in place in the other slot of the state buffer, so that
+              only the two last states are valid. Use copy.deepcopy to keep states for later.
+
+        NOTE: ensemble of cases: all inputs may have an extra leading dimension nCases
+              (e.g. pos_gl: nCases x nB x nr x 3, R_r2g: nCases x 3 x 3, R_ntr2g: nCases x nB x 3 x 3, psi: nCases)
+              in which case the states are obtained with `getInitStates(nCases)` and the storage with 
+              `timeStepInit(..., nCases)`. The cases are independent and advanced together.
         """
-        xd1   = copy.deepcopy(xd0)
+        perf = self.perf
+        if perf is not None:
+            perf.tic()
+        xd1   = self._nextStates(xd0)
         xd1.t = t
         xd1.it = xd0.it+1 # Increase time step 
         # Safety
@@ -393,212 +705,318 @@ class AeroBEM:
                 raise Exception('timeStep method expects to be called on regular intervals')
 
         # Time step storage for vectorization
-        nB, nr, _ = pos_gl.shape
+        nB, nr = pos_gl.shape[-3:-1]
         p = self # alias
-        ### Loop on blades
+        w = self._getWorkspace(pos_gl.shape[:-1]) # preallocated work arrays
+        # Stacked "polar grid to global" orientations ([nCases x] nB x 3 x 3)
+        R_p2g = w.R_p2g
+        R_p2g[...] = R_ntr2g
         # --------------------------------------------------------------------------------
         # --- Step 0: geometry 
         # --------------------------------------------------------------------------------
         # --- Compute rotor radius, hub radius, and section radii
-        r = np.zeros((nB,nr))
-        Rs=[0]*nB
-        for iB in np.arange(nB):
-            R_p2g = R_ntr2g[iB]
-            # radial position (in polar grid) of first and last node taken
-            Rs[iB] = (R_p2g.T).dot(pos_gl[iB,-1,:]-origin_pos_gl)[2]
-            rhub = (R_p2g.T).dot(pos_gl[iB,0,:]-origin_pos_gl)[2]
-            # loop on elements
-            for ie in np.arange(nr):
-                r[iB,ie] = (R_p2g.T).dot(pos_gl[iB,ie,:]-origin_pos_gl)[2] # radial position in polar grid
-        R = np.max(Rs)
+        # radial position (in polar grid) of all nodes
+        r = w.r
+        np.subtract(pos_gl, np.asarray(origin_pos_gl)[...,None,None,:], out=w.tmp3)
+        # r = (pos_gl-origin_pos_gl) . z_hat, summed as np.einsum, the hub loss is sensitive to the round-off of r-rhub
+        np.multiply(w.tmp3[...,0], R_p2g[...,0,2][...,None], out=r)
+        r += np.multiply(w.tmp3[...,1], R_p2g[...,1,2][...,None], out=w.tmp)
+        r += np.multiply(w.tmp3[...,2], R_p2g[...,2,2][...,None], out=w.tmp)
+        # radial position (in polar grid) of first and last node taken
+        rhub = r[...,-1,0]
+        R = np.max(r[...,:,-1], axis=-1, out=w.R)
+        rhub_, R_ = np.asarray(rhub)[...,None,None], np.asarray(R)[...,None,None] # broadcastable to nodes
         # --- Rotor speed for power
-        omega_r = R_r2g.T.dot(omega_gl) # rotational speed in rotor coordinate system
-        Omega = omega_r[0] # rotation speed of shaft (along x)
+        omega_r = _rotate(R_r2g, omega_gl, out=w.omega_r, inverse=True) # rotational speed in rotor coordinate system
+        Omega = omega_r[...,0] # rotation speed of shaft (along x)
+
+        # Aliases to work arrays
+        Vrel_a, Vrel_p, Vstr_p, Vwnd_p = w.Vrel_a, w.Vrel_p, w.Vstr_p, w.Vwnd_p
+        Vflw_p, Vflw_g, Vrel_norm, Re  = w.Vflw_p, w.Vflw_g, w.Vrel_norm, w.Re
+        phi_p, F, alpha, V0, sigma     = w.phi_p, w.F, w.alpha, w.V0, w.sigma
+        C_a, C_g, C_p, C_p_noDrag      = w.C_a, w.C_g, w.C_p, w.C_p_noDrag
+        C_xa, C_ya = C_a[...,0], C_a[...,1]
 
         if firstCallEquilibrium:
             nit=50
         else:
             nit=1
+        if perf is not None:
+            perf.toc('geometry')
+            perf.count('iterations', nit)
         for iterations in np.arange(nit):
             # --------------------------------------------------------------------------------
             # --- Step 1: velocity components
             # --------------------------------------------------------------------------------
-            Vrel_a  = np.zeros((nB,nr,3))
-            Vrel_p  = np.zeros((nB,nr,3))
-            Vstr_p  = np.zeros((nB,nr,3))
-            Vwnd_p  = np.zeros((nB,nr,3))
-            for iB in np.arange(nB):
-                R_p2g = R_ntr2g[iB]
-                for ie in np.arange(nr):
-                    # Velocity in global
-                    Vwnd_g = Vwnd_gl[iB,ie]
-                    # NOTE: inductions from previous time step, in polar grid (more realistic than global)
-                    #Vind_g = xd0.Vind_g[iB,ie] # dynamic inductions at previous time step
-                    Vind_g = (R_p2g).dot(xd0.Vind_p[iB,ie]) # dynamic inductions at previous time step
-                    Vstr_g = Vstr_gl[iB,ie]
-                    Vrel_g = Vwnd_g+Vind_g-Vstr_g
-                    # Airfoil coordinates
-                    Vrel_a[iB,ie] = (R_a2g[iB,ie].T).dot(Vrel_g)
-                    # Polar coordinates
-                    Vstr_p[iB,ie] = (R_p2g.T).dot(Vstr_g) # Structural velocity in polar coordinates
-                    Vrel_p[iB,ie] = (R_p2g.T).dot(Vrel_g)
-                    Vwnd_p[iB,ie] = (R_p2g.T).dot(Vwnd_g) # Wind Velocity in polar coordinates
-            Vflw_p  = Vwnd_p-Vstr_p # Relative flow velocity, including wind and structural motion
-            Vflw_g  = Vwnd_gl-Vstr_gl # Relative flow velocity, including wind and structural motion
+            # NOTE: inductions from previous time step, in polar grid (more realistic than global)
+            #Vind_g = xd0.Vind_g # dynamic inductions at previous time step
+            _rotate(R_p2g, xd0.Vind_p, out=w.Vind_g) # dynamic inductions at previous time step
+            np.add(Vwnd_gl, w.Vind_g, out=w.Vrel_g)
+            w.Vrel_g -= Vstr_gl
+            # Airfoil coordinates
+            _rotate(R_a2g, w.Vrel_g, out=Vrel_a, inverse=True)
+            # Polar coordinates
+            _rotate(R_p2g, Vstr_gl , out=Vstr_p, inverse=True) # Structural velocity in polar coordinates
+            _rotate(R_p2g, w.Vrel_g, out=Vrel_p, inverse=True)
+            _rotate(R_p2g, Vwnd_gl , out=Vwnd_p, inverse=True) # Wind Velocity in polar coordinates
+            np.subtract(Vwnd_p , Vstr_p , out=Vflw_p) # Relative flow velocity, including wind and structural motion
+            np.subtract(Vwnd_gl, Vstr_gl, out=Vflw_g) # Relative flow velocity, including wind and structural motion
 
             # Velocity norm and Reynolds
-            Vrel_norm = sqrt(Vrel_a[:,:,0]**2 + Vrel_a[:,:,1]**2)
-            Re        = Vrel_norm*p.chord/p.kinVisc/10**6 # Reynolds in million
+            np.hypot(Vrel_a[...,0], Vrel_a[...,1], out=Vrel_norm)
+            np.multiply(Vrel_norm, p.chord, out=Re)
+            Re /= p.kinVisc*10**6 # Reynolds in million
+            if perf is not None:
+                perf.toc('velocity')
             # --------------------------------------------------------------------------------
             # --- Step 2: Flow Angle and tip loss
             # --------------------------------------------------------------------------------
-            phi_p = np.arctan2(Vrel_p[:,:,0],-Vrel_p[:,:,1])  # NOTE: using polar grid for phi
+            np.negative(Vrel_p[...,1], out=w.tmp)
+            np.arctan2(Vrel_p[...,0], w.tmp, out=phi_p)  # NOTE: using polar grid for phi
+            np.sin(phi_p, out=w.sinphi)
             # --- Tip loss
-            F = np.ones((nB,nr))
+            F.fill(1.)
             if (p.bTipLoss): #Glauert tip correction
-                b=sin(phi_p)>0.01
-                F[b] = 2./pi*arccos(exp(-(nB *(R-r[b]))/(2*r[b]*sin(phi_p[b]))))
-                b2=abs(r-R)<1e-3
-                F[b2]=0.001
+                # F = 2/pi*arccos(exp(-(nB *(R-r))/(2*r*sin(phi_p)))) where sin(phi)>0.01
+                b = np.greater(w.sinphi, 0.01, out=w.b)
+                np.subtract(R_, r, out=w.tmp)
+                w.tmp *= -nB
+                np.multiply(r, w.sinphi, out=w.tmp2)
+                w.tmp2 *= 2
+                np.divide(w.tmp, w.tmp2, out=w.tmp, where=b)
+                np.exp   (w.tmp, out=w.tmp, where=b)
+                np.arccos(w.tmp, out=w.tmp, where=b)
+                np.multiply(w.tmp, 2./pi, out=F, where=b)
+                np.subtract(r, R_, out=w.tmp)
+                b2 = np.less(np.abs(w.tmp, out=w.tmp), 1e-3, out=w.b)
+                np.copyto(F, 0.001, where=b2)
             # --- Hub loss
             if (p.bHubLoss): #Glauert hub loss correction
-                F = F* 2./pi*arccos(exp(-nB/2. *(r-rhub)/ (rhub*np.sin(phi_p))))
+                # F = F* 2./pi*arccos(exp(-nB/2. *(r-rhub)/ (rhub*np.sin(phi_p))))
+                np.subtract(r, rhub_, out=w.tmp)
+                w.tmp *= -nB/2.
+                np.multiply(w.sinphi, rhub_, out=w.tmp2)
+                w.tmp /= w.tmp2
+                np.exp   (w.tmp, out=w.tmp)
+                np.arccos(w.tmp, out=w.tmp)
+                F *= 2./pi
+                F *= w.tmp
             #F[F<=1e-3]=0.5
+            if perf is not None:
+                perf.toc('tiploss')
             # --------------------------------------------------------------------------------
             # --- Step 3: Angle of attack
             # --------------------------------------------------------------------------------
-            alpha = np.arctan2(Vrel_a[:,:,0],Vrel_a[:,:,1])        # angle of attack [rad]
+            np.arctan2(Vrel_a[...,0], Vrel_a[...,1], out=alpha)        # angle of attack [rad]
             # --------------------------------------------------------------------------------
             # --- Step 4: Aerodynamic Coefficients
             # --------------------------------------------------------------------------------
-            ClCdCm = np.array([p.fPolars[ie](alpha[iB,ie]) for iB in np.arange(nB) for ie in np.arange(nr)]).reshape((nB,nr,3))
-            Cl=ClCdCm[:,:,0]
-            Cd=ClCdCm[:,:,1]
+            if p.bPolarTable:
+                ClCdCm = p.polarTable(alpha)
+            else:
+                ClCdCm = p.packedPolars(alpha, out=w.ClCdCm)
+            Cl=ClCdCm[...,0]
+            Cd=ClCdCm[...,1]
+            Cl_qs, Cd_qs = Cl, Cd
+            if perf is not None:
+                perf.toc('polars')
+            # --------------------------------------------------------------------------------
+            # --- Step 4b: Dynamic stall, states integrated for all nodes
+            # --------------------------------------------------------------------------------
+            if p.bDynaStall:
+                ds = p.dsParams
+                if firstCallEquilibrium:
+                    # Steady states
+                    if p.DynaStallMod=='MHH':
+                        xd0.x_ds[...] = dynstall_mhh_discrete_steady(alpha, ds)
+                    else:
+                        xd0.x_ds[...,0] = dynstall_oye_discrete_steady(alpha, ds)
+                    np.copyto(xd0.alpha_ds, alpha)
+                    np.copyto(xd0.U_ds, Vrel_norm)
+                alpha_dot = np.subtract(alpha, xd0.alpha_ds, out=w.tmp2)
+                alpha_dot /= dt
+                if p.DynaStallMod=='MHH':
+                    dynstall_mhh_discrete_step(xd0.x_ds, dt, alpha, alpha_dot, Vrel_norm, xd0.U_ds, ds, out=xd1.x_ds)
+                    Cl, Cd, _ = dynstall_mhh_discrete_outputs(xd1.x_ds, alpha, alpha_dot, Vrel_norm, ds)
+                else:
+                    dynstall_oye_discrete_step(xd0.x_ds[...,0], dt, alpha, Vrel_norm, ds, out=xd1.x_ds[...,0])
+                    Cl, Cd, _ = dynstall_oye_discrete_outputs(xd1.x_ds[...,0], alpha, ds)
+                np.copyto(xd1.alpha_ds, alpha)
+                np.copyto(xd1.U_ds, Vrel_norm)
+                if perf is not None:
+                    perf.toc('dynstall')
             # Project to airfoil coordinates
-            C_xa       ,C_ya        = Cl*cos(alpha)+ Cd*sin(alpha  )   ,  -Cl*sin(alpha)+ Cd*cos(alpha)
-            C_xa_noDrag,C_ya_noDrag = Cl*cos(alpha)                    ,  -Cl*sin(alpha)
+            # C_xa       ,C_ya        = Cl*cos(alpha)+ Cd*sin(alpha  )   ,  -Cl*sin(alpha)+ Cd*cos(alpha)
+            # C_xa_noDrag,C_ya_noDrag = Cl*cos(alpha)                    ,  -Cl*sin(alpha)
+            np.cos(alpha, out=w.cosa)
+            np.sin(alpha, out=w.sina)
+            np.multiply(Cl, w.cosa, out=C_xa)
+            C_xa += np.multiply(Cd, w.sina, out=w.tmp)
+            np.multiply(Cd, w.cosa, out=C_ya)
+            C_ya -= np.multiply(Cl, w.sina, out=w.tmp)
             # Project to polar coordinates
-            C_p        = np.zeros((nB,nr,3))
-            C_g        = np.zeros((nB,nr,3))
-            C_p_noDrag = np.zeros((nB,nr,3))
-            for iB in np.arange(nB):
-                R_p2g = R_ntr2g[iB]
-                for ie in np.arange(nr):
-                    C_g        [iB,ie]=R_a2g[iB,ie].dot(np.array([C_xa       [iB,ie], C_ya       [iB,ie], 0]))
-                    C_p        [iB,ie]=(R_p2g.T).dot(C_g[iB,ie])
-                    C_p_noDrag [iB,ie]=(R_p2g.T).dot(R_a2g[iB,ie]).dot(np.array([C_xa_noDrag[iB,ie], C_ya_noDrag[iB,ie], 0]))
+            _rotate(R_a2g, C_a, out=C_g)
+            _rotate(R_p2g, C_g, out=C_p, inverse=True)
+            if not (p.bAIDrag and p.bTIDrag):
+                C_a_noDrag = w.C_a_noDrag
+                np.multiply(Cl, w.cosa, out=C_a_noDrag[...,0])
+                np.multiply(Cl, w.sina, out=C_a_noDrag[...,1])
+                np.negative(C_a_noDrag[...,1], out=C_a_noDrag[...,1])
+                _rotate(R_a2g, C_a_noDrag, out=w.tmp3)
+                _rotate(R_p2g, w.tmp3, out=C_p_noDrag, inverse=True)
             # Cn and Ct 
             if (p.bAIDrag):
-                cnForAI = C_p[:,:,0]
+                cnForAI = C_p[...,0]
             else:
-                cnForAI = C_p_noDrag[:,:,0]
+                cnForAI = C_p_noDrag[...,0]
             if (p.bTIDrag):
-                ctForTI = C_p[:,:,1]
+                ctForTI = C_p[...,1]
             else:
-                ctForTI = C_p_noDrag[:,:,1]
+                ctForTI = C_p_noDrag[...,1]
             # L = 0.5 * p.rho * Vrel_norm**2 * p.chord[ie]*Cl
             # --------------------------------------------------------------------------------
             # --- Step 5: Quasi-steady induction
             # --------------------------------------------------------------------------------
             # NOTE: all is done in polar grid
             #lambda_r = Vstr_p[:,:,1]/Vwnd_p[:,:,0] # "omega r/ U0n" defined in polar grid # TODO TODO TODO
-            lambda_r = -Vflw_p[:,:,1]/Vflw_p[:,:,0] # "omega r/ U0n" defined in polar grid # TODO TODO TODO
+            #lambda_r = -Vflw_p[:,:,1]/Vflw_p[:,:,0] # "omega r/ U0n" defined in polar grid # TODO TODO TODO
+            lambda_r = np.divide(Vflw_p[...,1], Vflw_p[...,0], out=w.lambda_r)
+            np.negative(lambda_r, out=lambda_r)
             #lambda_r = Vflw_p[:,:,1]/Vflw_p[:,:,0] # "omega r/ U0n" defined in polar grid # TODO TODO TODO
             #V0       = np.sqrt(Vwnd_p[:,:,0]**2 + Vwnd_p[:,:,1]**2) # TODO think about that # TODO TODO TOD
-            V0       = np.sqrt(Vflw_p[:,:,0]**2 + Vwnd_p[:,:,1]**2) # TODO think about that
-            sigma    = p.chord*p.nB/(2*pi*r)
+            #V0       = np.sqrt(Vflw_p[:,:,0]**2 + Vwnd_p[:,:,1]**2) # TODO think about that
+            np.hypot(Vflw_p[...,0], Vwnd_p[...,1], out=V0) # TODO think about that
+            #sigma    = p.chord*p.nB/(2*pi*r)
+            np.multiply(p.chord, p.nB, out=sigma)
+            sigma /= np.multiply(r, 2*pi, out=w.tmp)
             #a,aprime,CT = fInductionCoefficients(a_last,Vrel_in4,Un,Ut,V0_in3,V0_in4,nnW_in4,omega,chord(e),F,Ftip,CnForAI,CtForTI,lambda_r,sigma(e),phi,Algo)
             if p.WakeMod==0:
-                a      = V0*0
-                aprime = V0*0
+                a      = w.a0
+                aprime = w.a0
             else:
                 a,aprime,CT = _fInductionCoefficients(Vrel_norm, V0, F, cnForAI, ctForTI, lambda_r, sigma, phi_p, 
-                        bSwirl=p.bSwirl, CTcorrection=p.CTcorrection, swirlMethod=p.swirlMethod,
-                        relaxation=p.relaxation, a_last=xd0.a
+                        bSwirl=p.bSwirl, CTcorrection=p.CTcorrection, swirlMethod=p.swirlMethod, bCTTable=p.bCTTable,
+                        relaxation=p.relaxation, a_last=xd0.a, out=(w.a, w.aprime, w.Ct), work=(w.tmp, w.tmp2, w.b, w.b2)
                 )
 
-            if np.any(np.isnan(a)):
+            if np.isnan(np.sum(a)):
                 print('>> BEM crashing')
+                if perf is not None:
+                    perf.count('nanInductions')
 
             # Storing last values, for relaxation
-            xd1.a=a.copy()
+            np.copyto(xd1.a, a)
             # Quasi steady inductions, polar and global coordinates
-            xd1.Vind_qs_p = np.zeros((nB,nr,3))
-            for iB in np.arange(nB):
-                R_p2g = R_ntr2g[iB]
-                for ie in np.arange(nr):
-                    # NOTE: Vind is negative along n and t!
-                    xd1.Vind_qs_p[iB,ie] = np.array([-a[iB,ie]*Vflw_p[iB,ie,0],  aprime[iB,ie]*Vflw_p[iB,ie,1], 0])
-                    xd1.Vind_qs_g[iB,ie] = R_p2g.dot(xd1.Vind_qs_p[iB,ie]) # global
+            # NOTE: Vind is negative along n and t!
+            np.multiply(a, Vflw_p[...,0], out=xd1.Vind_qs_p[...,0])
+            np.negative(xd1.Vind_qs_p[...,0], out=xd1.Vind_qs_p[...,0])
+            np.multiply(aprime, Vflw_p[...,1], out=xd1.Vind_qs_p[...,1])
+            xd1.Vind_qs_p[...,2] = 0
+            _rotate(R_p2g, xd1.Vind_qs_p, out=xd1.Vind_qs_g) # global
 
             if firstCallEquilibrium:
                 # We update the previous states induction
-                xd0.a      = a.copy()
-                xd0.Vind_g = xd1.Vind_qs_g.copy()
-                xd0.Vind_p = xd1.Vind_qs_p.copy()
+                np.copyto(xd0.a     , a)
+                np.copyto(xd0.Vind_g, xd1.Vind_qs_g)
+                np.copyto(xd0.Vind_p, xd1.Vind_qs_p)
+            if perf is not None:
+                perf.toc('induction')
         if firstCallEquilibrium:
             # Initialize dynamic wake variables
-            xd0.Vind_qs_p  = xd1.Vind_qs_p.copy()
-            xd1.Vind_qs_p  = xd1.Vind_qs_p.copy()
-            xd0.Vind_int_p = xd1.Vind_qs_p.copy()
-            xd0.Vind_dyn_p = xd1.Vind_qs_p.copy()
+            np.copyto(xd0.Vind_qs_p , xd1.Vind_qs_p)
+            np.copyto(xd0.Vind_int_p, xd1.Vind_qs_p)
+            np.copyto(xd0.Vind_dyn_p, xd1.Vind_qs_p)
         # --------------------------------------------------------------------------------
         # --- Dynamic wake model, in polar coordinates (for "constant" structural velocity)
         # --------------------------------------------------------------------------------
         if (p.bDynaWake):
-            a_avg = min([np.mean(a),0.5])
-            V_avg = max([np.mean(V0),0.001])
-            tau1 = 1.1 / (1 - 1.3 *a_avg)*R/V_avg
-            tau1=4
-            tau2 = (0.39 - 0.26 * (r/R)**2) * tau1
-            tau2 = np.tile(tau2[:,:,None],3)
-            # Oye's dynamic inflow model, discrete time integration
-            H              = xd1.Vind_qs_p + 0.6 * tau1 * (xd1.Vind_qs_p - xd0.Vind_qs_p) /dt
-            xd1.Vind_int_p = H + (xd0.Vind_int_p - H) * exp(-dt/tau1) # intermediate velocity
-            xd1.Vind_dyn_p = xd1.Vind_int_p + (xd0.Vind_dyn_p - xd1.Vind_int_p) * exp(-dt/tau2)
+            # Time constant, per case
+            if p.tau1Mod=='constant':
+                tau1 = w.tau1
+                tau1.fill(p.tau1_const)
+            elif p.tau1Mod=='oye':
+                a_avg = np.mean(a, axis=(-2,-1))
+                V_avg = np.maximum(np.mean(V0, axis=(-2,-1)),0.001)
+                tau1  = tau1_oye(a_avg, R/V_avg)
+            elif p.tau1Mod=='dbemt':
+                a_avg  = np.mean(a, axis=(-2,-1))
+                Un_avg = np.mean(Vflw_p[...,0], axis=(-2,-1))
+                tau1   = tau1_dbemt(a_avg, R, Un_avg)
+            else:
+                raise NotImplementedError('tau1Mod {}'.format(p.tau1Mod))
+            if p.bDynaWakeExact:
+                # Oye's dynamic inflow model, exact discrete time integration (linear quasi-steady inputs)
+                dyninflow_oye_discrete_step(xd0.Vind_int_p, xd0.Vind_dyn_p, xd0.Vind_qs_p, xd1.Vind_qs_p, dt, 
+                        tau1[...,None,None], np.divide(r, R_, out=w.tmp), out=(xd1.Vind_int_p, xd1.Vind_dyn_p))
+            else:
+                tau1 = tau1[...,None,None]
+                #tau2 = (0.39 - 0.26 * (r/R)**2) * tau1
+                tau2 = np.divide(r, R_, out=w.tmp)
+                np.square(tau2, out=tau2)
+                tau2 *= -0.26
+                tau2 += 0.39
+                tau2 *= tau1
+                # Oye's dynamic inflow model, discrete time integration
+                # H              = xd1.Vind_qs_p + 0.6 * tau1 * (xd1.Vind_qs_p - xd0.Vind_qs_p) /dt
+                # xd1.Vind_int_p = H + (xd0.Vind_int_p - H) * exp(-dt/tau1) # intermediate velocity
+                # xd1.Vind_dyn_p = xd1.Vind_int_p + (xd0.Vind_dyn_p - xd1.Vind_int_p) * exp(-dt/tau2)
+                H = np.subtract(xd1.Vind_qs_p, xd0.Vind_qs_p, out=w.tmp3)
+                H *= np.multiply(0.6, tau1, out=w.c1[...,None,None])[...,None]
+                H /= dt
+                H += xd1.Vind_qs_p
+                np.subtract(xd0.Vind_int_p, H, out=xd1.Vind_int_p)
+                xd1.Vind_int_p *= np.exp(np.divide(-dt, tau1, out=w.c1[...,None,None]), out=w.c1[...,None,None])[...,None]
+                xd1.Vind_int_p += H # intermediate velocity
+                expTau2 = np.divide(-dt, tau2, out=w.tmp)
+                np.exp(expTau2, out=expTau2)
+                np.subtract(xd0.Vind_dyn_p, xd1.Vind_int_p, out=xd1.Vind_dyn_p)
+                xd1.Vind_dyn_p *= expTau2[...,None]
+                xd1.Vind_dyn_p += xd1.Vind_int_p
             # In global
-            for iB in np.arange(nB):
-                R_p2g = R_ntr2g[iB]
-                for ie in np.arange(nr):
-                    xd1.Vind_dyn_g[iB,ie] = R_p2g.dot(xd1.Vind_dyn_p[iB,ie]) # global
+            _rotate(R_p2g, xd1.Vind_dyn_p, out=xd1.Vind_dyn_g) # global
         else:
-            xd1.Vind_dyn_g = xd1.Vind_qs_g.copy()
-            xd1.Vind_dyn_p = xd1.Vind_qs_p.copy()
+            np.copyto(xd1.Vind_dyn_g, xd1.Vind_qs_g)
+            np.copyto(xd1.Vind_dyn_p, xd1.Vind_qs_p)
+        if perf is not None:
+            perf.toc('dynwake')
 
         # --------------------------------------------------------------------------------}
         # --- Disk averaged quantities
         # --------------------------------------------------------------------------------{
         # Average wind in global, and rotor coord
-        Vwnd_avg_g = np.mean(np.mean(Vwnd_gl[:,:,:],axis=0),axis=0)
-        Vwnd_avg_r = (R_r2g.T).dot(Vwnd_avg_g)
+        Vwnd_avg_g = np.mean(Vwnd_gl, axis=(-3,-2), out=w.Vwnd_avg_g)
+        Vwnd_avg_r = _rotate(R_r2g, Vwnd_avg_g, out=w.Vwnd_avg_r, inverse=True)
         # Average relative wind (Wnd-Str)
-        Vflw_avg_g = np.mean(np.mean(Vflw_g[:,:,:],axis=0),axis=0)
-        x_hat_disk = R_r2g[:,0]
+        Vflw_avg_g = np.mean(Vflw_g, axis=(-3,-2), out=w.Vflw_avg_g)
+        x_hat_disk = R_r2g[...,:,0]
         # Coordinate system with "y" in the cross wind direction for skew model
-        V_dot_x  = np.dot(Vflw_avg_g, x_hat_disk)
-        V_ytmp   = V_dot_x * x_hat_disk - Vflw_avg_g
-        V_ynorm  = sqrt(V_ytmp[0]**2+V_ytmp[1]**2+V_ytmp[2]**2)
-        if abs(V_ynorm)<1e-8:
-            y_hat_disk = R_r2g[:,1]
-            z_hat_disk = R_r2g[:,2]
-        else:
-            y_hat_disk = V_ytmp / V_ynorm
-            z_hat_disk = np.cross(Vflw_avg_g, x_hat_disk ) / V_ynorm
+        # V_ytmp   = (Vflw_avg_g . x_hat_disk) x_hat_disk - Vflw_avg_g
+        # y_hat_disk, z_hat_disk = V_ytmp/|V_ytmp|, Vflw_avg_g x x_hat_disk/|V_ytmp|  (rotor y and z if no skew)
+        V_dot_x  = _dot(Vflw_avg_g, x_hat_disk, out=w.c1)
+        V_ytmp   = np.multiply(V_dot_x[...,None], x_hat_disk, out=w.y_hat_disk)
+        V_ytmp  -= Vflw_avg_g
+        V_ynorm  = np.sqrt(_dot(V_ytmp, V_ytmp, out=w.c2), out=w.c2)
+        bNoSkew  = np.less(V_ynorm, 1e-8, out=w.cb)[...,None]
+        np.copyto(V_ynorm, 1, where=bNoSkew[...,0])
+        y_hat_disk  = V_ytmp
+        y_hat_disk /= V_ynorm[...,None]
+        np.copyto(y_hat_disk, R_r2g[...,:,1], where=bNoSkew)
+        z_hat_disk  = _cross(Vflw_avg_g, x_hat_disk, out=w.z_hat_disk, tmp=w.c3)
+        z_hat_disk /= V_ynorm[...,None]
+        np.copyto(z_hat_disk, R_r2g[...,:,2], where=bNoSkew)
         # Fake "Azimuth angle" used for skew model
-        SkewAzimuth=np.zeros(nB)
-        for iB in np.arange(nB):
-            z_hat = R_ntr2g[iB][:,2]
-            tmp_sz_y = -1.0*np.dot(z_hat,y_hat_disk)
-            tmp_sz   =      np.dot(z_hat,z_hat_disk)
-            if np.abs(tmp_sz_y)<1e-8 and np.abs(tmp_sz)<1e-8:
-                SkewAzimuth[iB]=0
-            else:
-                SkewAzimuth[iB] = arctan2( tmp_sz_y, tmp_sz )
+        z_hat = R_p2g[...,:,2] # [nCases x] nB x 3
+        tmp_sz_y = np.negative(np.matmul(z_hat, y_hat_disk[...,None], out=w.sz_y[...,None])[...,0], out=w.sz_y)
+        tmp_sz   =             np.matmul(z_hat, z_hat_disk[...,None], out=w.sz  [...,None])[...,0]
+        SkewAzimuth = np.arctan2( tmp_sz_y, tmp_sz, out=w.SkewAzimuth)
+        b = np.less(np.abs(tmp_sz_y, out=w.sz_tmp), 1e-8, out=w.sz_b)
+        b &= np.less(np.abs(tmp_sz, out=w.sz_tmp), 1e-8, out=w.sz_b2)
+        np.copyto(SkewAzimuth, 0, where=b)
         # Skew angle without induction
-        Vw_r = (R_r2g.T).dot(Vflw_avg_g)
-        Vw_rn     = Vw_r[0] # normal to disk
-        Vw_r_norm = sqrt(Vw_r[0]**2+Vw_r[1]**2+Vw_r[2]**2)
-        chi0      = np.arccos(Vw_rn / Vw_r_norm)
+        Vw_r = _rotate(R_r2g, Vflw_avg_g, out=w.Vw_r, inverse=True)
+        Vw_rn     = Vw_r[...,0] # normal to disk
+        Vw_r_norm = np.sqrt(_dot(Vw_r, Vw_r, out=w.c2), out=w.c2)
+        chi0      = np.arccos(np.divide(Vw_rn, Vw_r_norm, out=w.chi0), out=w.chi0)
 
         # --------------------------------------------------------------------------------
         # ---  Yaw model, repartition of the induced velocity
@@ -608,107 +1026,125 @@ class AeroBEM:
            #xd1.Vind_p = xd1.Vind_dyn_p.copy()
            #psi0 = np.arctan( Vwnd_avg_g[2]/Vwnd_avg_r[1])  # TODO
            # Sections that are about 0.7%R
-           Ir= np.logical_and(r[0]>=0.5*R, r[0] <=0.8*R)
-           if len(Ir)==0:
-               Ir=r[0]>0
-           Vind_avg_g = np.mean(np.mean(xd1.Vind_dyn_g[:,Ir,:],axis=0),axis=0)
-           Vind_avg_r = (R_r2g.T).dot(Vind_avg_g)
+           # Ir = r0>=0.5*R and r0<=0.8*R, or r0>0 if no section is in this range
+           r0 = r[...,0,:]
+           Ir = np.greater_equal(r0, np.multiply(0.5, R_[...,0], out=w.c3[...,None]), out=w.Ir_b)
+           Ir&= np.less_equal   (r0, np.multiply(0.8, R_[...,0], out=w.c3[...,None]), out=w.Ir_b2)
+           bAny = np.any(Ir, axis=-1, keepdims=True, out=w.cb[...,None])
+           np.copyto(Ir, np.greater(r0, 0, out=w.Ir_b2), where=np.logical_not(bAny, out=bAny))
+           np.copyto(w.Ir, Ir)
+           Ir = w.Ir
+           # Vind_avg_g = sum(Vind_dyn_g*Ir) / (nB*sum(Ir))
+           Vind_avg_g = np.sum(np.matmul(Ir[...,None,None,:], xd1.Vind_dyn_g, out=w.Vind_b), axis=(-3,-2), out=w.Vind_avg_g)
+           Vind_avg_g /= np.multiply(nB, np.sum(Ir, axis=-1, out=w.c3), out=w.c3)[...,None]
+           Vind_avg_r = _rotate(R_r2g, Vind_avg_g, out=w.Vind_avg_r, inverse=True)
            # Skew angle with induction
-           V_r      = Vwnd_avg_r + Vind_avg_r
-           V_rn     = V_r[0] # normal to disk
-           V_r_norm = sqrt(V_r[0]**2+V_r[1]**2+V_r[2]**2)
-           chi = np.arccos(V_rn/V_r_norm)
+           V_r      = np.add(Vwnd_avg_r, Vind_avg_r, out=w.V_r)
+           V_rn     = V_r[...,0] # normal to disk
+           V_r_norm = np.sqrt(_dot(V_r, V_r, out=w.c3), out=w.c3)
+           chi = np.arccos(np.divide(V_rn, V_r_norm, out=w.chi), out=w.chi)
            #print('chi0',chi0*180/pi,'chi',chi*180/pi,'psi0',psi0*180/np.pi)
-           if np.abs(chi)>pi/2:
+           if np.any(np.greater(chi, pi/2, out=w.cb)):
                print('>>> chi too large')
            yawCorrFactor = 15*np.pi/32 # close to 3/2
-           for iB in np.arange(nB):
-               R_p2g = R_ntr2g[iB]
-               for ie in np.arange(nr):
-                   xd1.Vind_p[iB,ie] = xd1.Vind_dyn_p[iB,ie]
-                   xd1.Vind_p[iB,ie,0] = xd1.Vind_dyn_p[iB,ie,0] * (1 + yawCorrFactor*r[iB,ie]/R * np.tan(chi/2)*np.sin(SkewAzimuth[iB])) #* np.cos(psiB0[iB]+psi - psi0))
-                   xd1.Vind_g[iB,ie] = R_p2g.dot(xd1.Vind_p[iB,ie]) # global
-                   # AeroDyn:
-                   #chi = (0.6_ReKi*a + 1.0_ReKi)*chi0
-                   #a = a * (1.0 +  yawCorrFactor * yawCorr_tan * (tipRatio) * sin(azimuth))
+           # Vind_p_n = Vind_dyn_p_n * (1 + yawCorrFactor*r/R * np.tan(chi/2)*np.sin(SkewAzimuth)) #* np.cos(psiB0[iB]+psi - psi0))
+           fYaw = np.multiply(r, yawCorrFactor, out=w.tmp)
+           fYaw /= R_
+           fYaw *= np.tan(np.divide(chi, 2, out=w.c3), out=w.c3)[...,None,None]
+           fYaw *= np.sin(SkewAzimuth, out=w.sz_tmp)[...,None]
+           fYaw += 1
+           np.copyto(xd1.Vind_p, xd1.Vind_dyn_p)
+           xd1.Vind_p[...,0] *= fYaw
+           _rotate(R_p2g, xd1.Vind_p, out=xd1.Vind_g) # global
+           # AeroDyn:
+           #chi = (0.6_ReKi*a + 1.0_ReKi)*chi0
+           #a = a * (1.0 +  yawCorrFactor * yawCorr_tan * (tipRatio) * sin(azimuth))
 
 
         else:
-           xd1.Vind_g = xd1.Vind_dyn_g.copy()
-           xd1.Vind_p = xd1.Vind_dyn_p.copy()
+           np.copyto(xd1.Vind_g, xd1.Vind_dyn_g)
+           np.copyto(xd1.Vind_p, xd1.Vind_dyn_p)
+        if perf is not None:
+            perf.toc('skew')
         # --------------------------------------------------------------------------------
         # --- Step 6: Outputs
         # --------------------------------------------------------------------------------
-        it = xd1.it # time step
+        if p.outputSink is None:
+            it = xd1.it # time step
+        else:
+            it = 0 # storage for one time step only, recorded by the output sink
         # --- Coefficients
+        self.Cl_qs[it] = Cl_qs
+        self.Cd_qs[it] = Cd_qs
         self.Cl[it]   = Cl
         self.Cd[it]   = Cd
-        self.cn[it]   = C_p[:,:,0]
-        self.ct[it]   = C_p[:,:,1]
+        self.cn[it]   = C_p[...,0]
+        self.ct[it]   = C_p[...,1]
         # C_g also available
         # --- Loads
-        q_dyn = 0.5 * p.rho * Vrel_norm**2 * p.chord # dynamic pressure
-        self.L[it]    = q_dyn * Cl
-        self.D[it]    = q_dyn * Cd
-        self.Fn[it]   = q_dyn * C_p[:,:,0]
-        self.Ft[it]   = q_dyn * C_p[:,:,1]
-        self.F_a[it,:,:,0] = q_dyn * C_xa
-        self.F_a[it,:,:,1] = q_dyn * C_ya
+        q_dyn = np.square(Vrel_norm, out=w.q_dyn)
+        q_dyn *= 0.5 * p.rho
+        q_dyn *= p.chord # dynamic pressure
+        np.multiply(q_dyn, Cl         , out=self.L[it])
+        np.multiply(q_dyn, Cd         , out=self.D[it])
+        np.multiply(q_dyn, C_p[...,0] , out=self.Fn[it])
+        np.multiply(q_dyn, C_p[...,1] , out=self.Ft[it])
+        np.multiply(q_dyn, C_xa       , out=self.F_a[it][...,0])
+        np.multiply(q_dyn, C_ya       , out=self.F_a[it][...,1])
         # --- Velocities
-        a_dyn      =-xd1.Vind_p[:,:,0]/Vflw_p[:,:,0] 
-        aprime_dyn = xd1.Vind_p[:,:,1]/Vflw_p[:,:,1]
-        self.AxInd[it] = a_dyn      
-        self.TnInd[it] = aprime_dyn 
+        # a_dyn      =-xd1.Vind_p[...,0]/Vflw_p[...,0] 
+        # aprime_dyn = xd1.Vind_p[...,1]/Vflw_p[...,1]
+        np.divide(xd1.Vind_p[...,0], Vflw_p[...,0], out=self.AxInd[it])
+        np.negative(self.AxInd[it], out=self.AxInd[it])
+        np.divide(xd1.Vind_p[...,1], Vflw_p[...,1], out=self.TnInd[it])
         self.Vrel[it]  = Vrel_norm
         # polar system (missing Vind)
-        self.Vrel_p[it]  = Vrel_p[:,:,:] # NOTE: Vrel is using previous inductions..
-        self.Vstr_p[it]  = Vstr_p[:,:,:]
-        self.Vwnd_p[it]  = Vwnd_p[:,:,:]
-        self.Vflw_p[it]  = Vflw_p[:,:,:]
-        self.Vind_qs_p[it] = xd1.Vind_qs_p[:,:,:]
-        self.RtVAvg[it]  = (R_r2g.T).dot(Vflw_avg_g) # in Hub/rotor coordinate
-        self.SkewAzimuth[it]  = SkewAzimuth*180/pi
-        self.chi0[it]  = chi0*180/pi
+        self.Vrel_p[it]  = Vrel_p # NOTE: Vrel is using previous inductions..
+        self.Vstr_p[it]  = Vstr_p
+        self.Vwnd_p[it]  = Vwnd_p
+        self.Vflw_p[it]  = Vflw_p
+        self.Vind_qs_p[it] = xd1.Vind_qs_p
+        self.RtVAvg[it]  = Vw_r # in Hub/rotor coordinate
+        np.multiply(SkewAzimuth, 180, out=self.SkewAzimuth[it,...])
+        self.SkewAzimuth[it,...] /= pi
+        np.multiply(chi0, 180, out=self.chi0[it,...])
+        self.chi0[it,...] /= pi
         # airfoil system
-        self.Vrel_xa[it] = Vrel_a[:,:,0]
-        self.Vrel_ya[it] = Vrel_a[:,:,1]
-        self.Vrel_za[it] = Vrel_a[:,:,2]
+        self.Vrel_xa[it] = Vrel_a[...,0]
+        self.Vrel_ya[it] = Vrel_a[...,1]
+        self.Vrel_za[it] = Vrel_a[...,2]
         # --- Misc
-        self.alpha[it] = alpha*180./pi
-        self.phi[it]   = phi_p*180./pi
-        self.Gamma[it]  = 0.5*Re*Cl*p.kinVisc*10**6 # Circulation [m^2/s]
-        self.psi[it]  = psi*180/pi
-        self.RtArea[it]  = pi*R**2
-
-        for iB in np.arange(nB):
-            R_p2g = R_ntr2g[iB]
-            for ie in np.arange(nr):
-                Vind_g = xd1.Vind_g[iB,ie] # dynamic inductions at current time step
-                Vind_s = (R_s2g[iB,ie].T).dot(Vind_g) # Induced velocity in section coordinates
-                #Vind_a = (R_a2g[iB,ie].T).dot(Vind_g) # Induced velocity in airfoil coordinates
-                Vind_p = (R_p2g       .T).dot(Vind_g) # Induced velocity in polar coordinates
-                self.Vind_p[it,iB,ie,:] =Vind_p
-                self.Vind_s[it,iB,ie,:] =Vind_s
-                ## Wind
-                Vwnd_g = Vwnd_gl[iB,ie]
-                Vwnd_s = (R_s2g[iB,ie].T).dot(Vwnd_g) # Wind Velocity in section coordinates
-                #Vwnd_a = (R_a2g[iB,ie].T).dot(Vwnd_gl) # Wind Velocity in airfoil coordinates
-                self.Vwnd_s[it,iB,ie,:]=Vwnd_s
-                ## Structural velocity
-                Vstr_g = Vstr_gl[iB,ie]
-                #Vstr_a = (R_a2g[iB,ie].T).dot(Vstr_g) # Structural velocity in airfoil coordinates
-                self.Vstr_s[it,iB,ie,:]=(R_s2g[iB,ie].T).dot(Vstr_g)
-                # --- Loads
-                F_g = q_dyn[iB,ie] * C_g[iB,ie]
-                self.F_s[it,iB,ie] = (R_s2g[iB,ie].T).dot(F_g)
+        np.multiply(alpha, 180./pi, out=self.alpha[it])
+        np.multiply(phi_p, 180./pi, out=self.phi[it])
+        np.multiply(Re   , Cl     , out=self.Gamma[it])
+        self.Gamma[it] *= 0.5*p.kinVisc*10**6 # Circulation [m^2/s]
+        np.multiply(psi, 180, out=self.psi[it,...])
+        self.psi[it,...] /= pi
+        np.square(R, out=self.RtArea[it,...])
+        self.RtArea[it,...] *= pi
+
+        # Induced velocity in section and polar coordinates (dynamic inductions at current time step)
+        _rotate(R_s2g, xd1.Vind_g, out=self.Vind_s[it], inverse=True)
+        _rotate(R_p2g, xd1.Vind_g, out=self.Vind_p[it], inverse=True)
+        # Wind and structural velocity in section coordinates
+        _rotate(R_s2g, Vwnd_gl, out=self.Vwnd_s[it], inverse=True)
+        _rotate(R_s2g, Vstr_gl, out=self.Vstr_s[it], inverse=True)
+        # --- Loads
+        F_g = np.multiply(q_dyn[...,None], C_g, out=w.tmp3)
+        _rotate(R_s2g, F_g, out=self.F_s[it], inverse=True)
 
 
         # Blade integrated loads
-        self.BladeThrust[it,:] = np.trapz(self.Fn[it,:]  , r) # Normal to rotor plane
-        self.BladeTorque[it,:] = np.trapz(self.Ft[it,:]*r, r) # About shaft 
-        self.Thrust[it] = np.sum(self.BladeThrust[it,:])    # Normal to rotor plane
-        self.Torque[it] = np.sum(self.BladeTorque[it,:])
-        self.Power[it]  = Omega*self.Torque[it]
+        np.subtract(r[...,1:], r[...,:-1], out=w.dr)
+        _trapz(self.Fn[it], w.dr, w.dF, out=self.BladeThrust[it]) # Normal to rotor plane
+        _trapz(np.multiply(self.Ft[it], r, out=w.tmp), w.dr, w.dF, out=self.BladeTorque[it]) # About shaft 
+        np.sum(self.BladeThrust[it], axis=-1, out=self.Thrust[it,...])    # Normal to rotor plane
+        np.sum(self.BladeTorque[it], axis=-1, out=self.Torque[it,...])
+        np.multiply(Omega, self.Torque[it,...], out=self.Power[it,...])
+        if p.outputSink is not None:
+            p.outputSink.record(p, xd1.it, t)
+        if perf is not None:
+            perf.toc('outputs')
             # TODO TODO
             #self.BladeEdge   = np.zeros((nt,nB))
             #self.BladeFlap   = np.zeros((nt,nB))
@@ -728,7 +1164,7 @@ class AeroBEM:
                 #  RES.Edge = sum(RES.BladeEdge)
         return xd1
 
-    def simulationConstantRPM(self, time, RPM, windSpeed=None, windExponent=None, windRefH=None, windFunction=None, cone=0, tilt=0, hubHeight=None, firstCallEquilibrium=True):
+    def simulationConstantRPM(self, time, RPM, windSpeed=None, windExponent=None, windRefH=None, windFunction=None, cone=0, tilt=0, hubHeight=None, firstCallEquilibrium=True, outputSink=None, precomputeMotion=False, motionBlockSize=1000):
         """ 
         wrapper function to perform a simple simulation at constant RPM
        
@@ -745,8 +1181,14 @@ class AeroBEM:
         - tilt: override tilt values, in degrees, OpenFAST convention
         - hubHeight: if provided, override the hubheight that is computed based on OverHang, Twr2Shaft and Tilt
         - firstCallEquilibrium: if true, the inductions are set to the equilibrium values at t=0 (otherwise,0)
+        - outputSink: if provided, BEMOutputSink used to record a selection of the outputs (see BEMOutputSink)
+                      The sink is only used for this simulation (a sink set previously is replaced).
+        - precomputeMotion: if True, the kinematics of the nodes are precomputed by blocks of `motionBlockSize` 
+                    time steps (see PrescribedRotorMotion.updateBlock), faster, but uses more memory. 
+                    Otherwise, the kinematics are updated at each time step.
 
         """
+        self.outputSink = outputSink # None: all the outputs are stored, for all time steps
         # --- Define motion
         motion = PrescribedRotorMotion()
         motion.init_from_BEM(self, tilt=tilt, cone=cone, psi0=0)
@@ -768,7 +1210,10 @@ class AeroBEM:
         xdBEM = self.getInitStates()
         self.timeStepInit(time[0],time[-1],dt) 
         for it,t in enumerate(self.time):
-            motion.update(t)
+            if precomputeMotion:
+                motion.updateBlock(self.time, it, motionBlockSize)
+            else:
+                motion.update(t)
             u,v,w = windFunction(motion.pos_gl[:,:,0], motion.pos_gl[:,:,1], motion.pos_gl[:,:,2], t)  
             Vwnd_g = np.moveaxis(np.array([u,v,w]),0,-1) # nB x nr x 3
             xdBEM = self.timeStep(t, dt, xdBEM, motion.psi, motion.psi_B0,
@@ -780,9 +1225,247 @@ class AeroBEM:
                     )
             #if np.mod(t,1)<dt/2:
             #    print(t)
+        if self.outputSink is not None:
+            self.outputSink.finalize()
         df = self.toDataFrame()
         return df
 
+    def simulationEnsemble(self, time, RPM, pitch=0, windSpeed=None, windExponent=None, windRefH=None, windFunction=None, cone=0, tilt=0, hubHeight=None, firstCallEquilibrium=True, outputSink=None, precomputeMotion=False, motionBlockSize=1000):
+        """ 
+        Perform nCases independent simulations at constant RPM, advanced together in one 
+        vectorized time step (see timeStep). 
+        Inputs are similar to `simulationConstantRPM`, but can be given per case:
+
+        INPUTS:
+          - RPM      : scalar or array (nCases), rotational speed [rpm]
+          - pitch    : scalar, array (nCases), array (nt x nCases) or function pitch(t) returning an array (nCases)
+                       pitch schedule [deg], OpenFAST convention
+          - windSpeed: scalar or array (nCases), wind speed (at hub height) along x
+          - windFunction: function f(x,y,z,t)=u,v,w, or list of nCases functions (one wind field per case)
+          - cone, tilt: scalar or array (nCases), in degrees, OpenFAST convention
+          - windExponent, windRefH, hubHeight, firstCallEquilibrium, outputSink, precomputeMotion, motionBlockSize: 
+                       see simulationConstantRPM
+
+        OUTPUTS:
+          - list of nCases dataframes (or dataframe from the output sink if provided).
+            The time series are stored with shape (nt x nCases x ...), e.g. self.Thrust[:, iCase]
+        """
+        self.outputSink = outputSink # None: all the outputs are stored, for all time steps
+        nt = len(time)
+        # --- Number of cases, from all the inputs that can be given per case
+        inputs = [RPM, windSpeed, cone, tilt]
+        if not callable(pitch):
+            inputs += [pitch if np.ndim(pitch)<2 else pitch[0]]
+        if isinstance(windFunction, (list, tuple)):
+            inputs += [windFunction]
+        nCases = max([len(v) for v in inputs if np.ndim(v)>0 or isinstance(v, (list, tuple))]+[1])
+        perCase = lambda v: np.broadcast_to(v, nCases) if v is not None else [None]*nCases
+        RPM, windSpeed, cone, tilt = perCase(RPM), perCase(windSpeed), perCase(cone), perCase(tilt)
+        if not callable(pitch):
+            pitch = np.broadcast_to(pitch, (nt,nCases))
+        if isinstance(windFunction, (list, tuple)):
+            windFunction = list(windFunction)
+        else:
+            windFunction = [windFunction]*nCases
+
+        # --- Define motions and wind functions of each case
+        motions=[]
+        for ic in np.arange(nCases):
+            motion = PrescribedRotorMotion()
+            motion.init_from_BEM(self, tilt=tilt[ic], cone=cone[ic], psi0=0)
+            motion.setType('constantRPM', RPM=RPM[ic])
+            if hubHeight is not None:
+                motion.origin_pos_gl0=np.array([0,0,hubHeight])
+            motions.append(motion)
+            if windFunction[ic] is None:
+                U0 = windSpeed[ic]
+                if windExponent is None:
+                    windFunction[ic] = lambda x,y,z,t,U0=U0 : (np.ones(x.shape)*U0, np.zeros(x.shape), np.zeros(y.shape))
+                else:
+                    if windRefH is None:
+                        raise Exception('Hub height needs to be provided')
+                    windFunction[ic] = lambda x,y,z,t,U0=U0 : (np.ones(x.shape)*U0*(z/windRefH)**windExponent, np.zeros(x.shape), np.zeros(x.shape))
+
+        # --- Stacked kinematics of all cases
+        nB, nr = self.nB, len(self.r)
+        psi           = np.zeros(nCases)
+        origin_pos_gl = np.zeros((nCases,3))
+        omega_gl      = np.zeros((nCases,3))
+        R_b2g         = np.zeros((nCases,3,3))
+        R_ntr2g       = np.zeros((nCases,nB,3,3))
+        pos_gl        = np.zeros((nCases,nB,nr,3))
+        vel_gl        = np.zeros((nCases,nB,nr,3))
+        R_s2g         = np.zeros((nCases,nB,nr,3,3))
+        R_a2g         = np.zeros((nCases,nB,nr,3,3))
+        Vwnd_g        = np.zeros((nCases,nB,nr,3))
+
+        # --- Perform time loop
+        dt=time[1]-time[0]
+        xdBEM = self.getInitStates(nCases)
+        self.timeStepInit(time[0],time[-1],dt, nCases) 
+        for it,t in enumerate(self.time):
+            pitch_t = np.broadcast_to(pitch(t) if callable(pitch) else pitch[it], nCases)*np.pi/180
+            for ic, motion in enumerate(motions):
+                if precomputeMotion:
+                    motion.updateBlock(self.time, it, motionBlockSize)
+                else:
+                    motion.update(t)
+                psi[ic]           = motion.psi
+                origin_pos_gl[ic] = motion.origin_pos_gl
+                omega_gl[ic]      = motion.omega_gl
+                R_b2g[ic]         = motion.R_b2g
+                R_ntr2g[ic]       = motion.R_ntr2g
+                pos_gl[ic]        = motion.pos_gl
+                vel_gl[ic]        = motion.vel_gl
+                R_s2g[ic]         = motion.R_s2g
+                # Pitch, rotation of the airfoil coordinate system about the blade axis (like twist)
+                np.matmul(motion.R_a2g, R_z(-pitch_t[ic]), out=R_a2g[ic])
+                u,v,w = windFunction[ic](pos_gl[ic,:,:,0], pos_gl[ic,:,:,1], pos_gl[ic,:,:,2], t)  
+                Vwnd_g[ic,:,:,0], Vwnd_g[ic,:,:,1], Vwnd_g[ic,:,:,2] = u, v, w
+            xdBEM = self.timeStep(t, dt, xdBEM, psi, motions[0].psi_B0,
+                    origin_pos_gl, omega_gl, R_b2g, 
+                    R_ntr2g, [m.R_bld2b for m in motions],
+                    pos_gl, vel_gl, R_s2g, R_a2g,
+                    Vwnd_g,
+                    firstCallEquilibrium= it==0 and firstCallEquilibrium
+                    )
+        if self.outputSink is not None:
+            self.outputSink.finalize()
+        return self.toDataFrame()
+
+# --------------------------------------------------------------------------------}
+# --- Output sink, to record a selection of outputs while the simulation runs
+# --------------------------------------------------------------------------------{
+class BEMOutputSink():
+    """ 
+    Records a selection of the AeroBEM outputs at each time step, such that the memory used
+    does not scale with the length of the simulation (when `folder` is provided).
+
+    INPUTS:
+      - channels      : list of time series outputs (attributes of AeroBEM), e.g. ['Thrust','Torque','Power']
+                        Default: ['Thrust','Torque','Power']
+      - radialChannels: list of radial outputs (attributes of AeroBEM of shape nB x nr x ..., or nCases x nB x nr x ...), 
+                        e.g. ['alpha','AxInd','F_s']
+      - nodes         : indices of the radial nodes recorded (default: all nodes)
+      - radialEvery   : radial outputs are recorded every `radialEvery` time steps
+      - chunkSize     : number of time steps kept in memory before a chunk is flushed
+      - folder        : if provided, each chunk is written to disk as a npz file and released from memory
+                        Otherwise the chunks are kept in memory.
+      - prefix        : prefix of the chunk files
+
+    Example:
+        sink = BEMOutputSink(channels=['Thrust','Power'], radialChannels=['AxInd'], nodes=[5,10], radialEvery=10, folder='_out')
+        df = BEM.simulationConstantRPM(time, RPM, windSpeed=10, outputSink=sink)
+        rad = sink.getRadial() # dictionary of radial time series 
+    """
+    def __init__(self, channels=None, radialChannels=None, nodes=None, radialEvery=1, chunkSize=1000, folder=None, prefix='BEM'):
+        if channels is None:
+            channels=['Thrust','Torque','Power']
+        if radialChannels is None:
+            radialChannels=[]
+        self.channels       = list(channels)
+        self.radialChannels = list(radialChannels)
+        self.nodes          = nodes
+        self.radialEvery    = int(radialEvery)
+        self.chunkSize      = int(chunkSize)
+        self.folder         = folder
+        self.prefix         = prefix
+        self.reset()
+
+    def reset(self):
+        """ Reset the recorded data, and remove the chunk files of a previous run """
+        self._buf    = {'ts':None, 'rad':None} # chunk buffers
+        self._k      = {'ts':0, 'rad':0}       # number of records in current buffer
+        self._chunks = {'ts':[], 'rad':[]}     # flushed chunks (in memory), or file names
+        if self.folder is not None:
+            import glob
+            import os
+            os.makedirs(self.folder, exist_ok=True)
+            for f in glob.glob(os.path.join(self.folder, self.prefix+'_*_chunk*.npz')):
+                os.remove(f)
+
+    def _allocate(self, kind, values):
+        n = self.chunkSize if kind=='ts' else int(np.ceil(self.chunkSize/self.radialEvery))
+        self._buf[kind] = {k:np.zeros((n,)+np.shape(v)) for k,v in values.items()}
+
+    def _store(self, kind, values):
+        if self._buf[kind] is None:
+            self._allocate(kind, values)
+        buf = self._buf[kind]
+        k = self._k[kind]
+        for key,v in values.items():
+            buf[key][k] = v
+        self._k[kind] = k+1
+        if self._k[kind] == len(buf['Time']):
+            self._flush(kind)
+
+    def _flush(self, kind):
+        k = self._k[kind]
+        if k==0:
+            return
+        chunk = {key:v[:k].copy() for key,v in self._buf[kind].items()}
+        if self.folder is not None:
+            import os
+            filename = os.path.join(self.folder, '{}_{}_chunk{:05d}.npz'.format(self.prefix, kind, len(self._chunks[kind])))
+            np.savez(filename, **chunk)
+            self._chunks[kind].append(filename)
+        else:
+            self._chunks[kind].append(chunk)
+        self._k[kind] = 0
+
+    def record(self, BEM, it, t):
+        """ Record the outputs of the current time step (stored at index 0 of the BEM storage)"""
+        values = {'Time':t}
+        for c in self.channels:
+            values[c] = getattr(BEM, c)[0]
+        self._store('ts', values)
+        if len(self.radialChannels)>0 and np.mod(it, self.radialEvery)==0:
+            values = {'Time':t}
+            iAxis = 1 if BEM.nCases is None else 2 # radial axis of (nB x nr x ...) or (nCases x nB x nr x ...)
+            for c in self.radialChannels:
+                v = getattr(BEM, c)[0]
+                if self.nodes is not None:
+                    v = np.take(v, self.nodes, axis=iAxis)
+                values[c] = v
+            self._store('rad', values)
+
+    def finalize(self):
+        """ Flush the data remaining in the buffers """
+        self._flush('ts')
+        self._flush('rad')
+
+    def _load(self, kind):
+        chunks = self._chunks[kind]
+        if self.folder is not None:
+            chunks = [dict(np.load(f)) for f in chunks]
+        if self._k[kind]>0: # data not flushed yet
+            chunks = chunks + [{key:v[:self._k[kind]] for key,v in self._buf[kind].items()}]
+        if len(chunks)==0:
+            return {}
+        return {key:np.concatenate([c[key] for c in chunks]) for key in chunks[0].keys()}
+
+    def getTimeSeries(self):
+        """ Returns a dictionary with the time series channels, of shape (nt x ...)"""
+        return self._load('ts')
+
+    def getRadial(self):
+        """ Returns a dictionary with the radial channels, of shape (ntRad x nB x nNodes x ...), 
+        or (ntRad x nCases x nB x nNodes x ...) in ensemble mode"""
+        return self._load('rad')
+
+    def toDataFrame(self):
+        """ Export the time series channels to a pandas dataframe, multidimensional channels are flattened """
+        d = self.getTimeSeries()
+        df = pd.DataFrame()
+        for k,v in d.items():
+            if v.ndim==1:
+                df[k] = v
+            else:
+                v = v.reshape((v.shape[0],-1))
+                for j in np.arange(v.shape[1]):
+                    df[k+'_'+str(j+1)] = v[:,j]
+        return df
+
 # --------------------------------------------------------------------------------}
 # --- Helper class to prescribe a motion
 # --------------------------------------------------------------------------------{
@@ -808,6 +1491,10 @@ class PrescribedRotorMotion():
         # Blades 
         self.R_bld2b=None # rotation matrix from blade to body
 
+        # Precomputed kinematics for a full time vector, see precompute
+        self.kin = None
+        self._itBlock = None # index of the first time step of the precomputed block, see updateBlock
+
     def init_from_inputs(self,  nB, r, twist, rotorOrigin, tilt, cone, psi0=0):
         self.nB   =  nB
         self.cone = cone*np.pi/180
@@ -865,6 +1552,10 @@ class PrescribedRotorMotion():
         self.pos0    = np.zeros((self.nB,nr,3))   # position of nodes at t= 0 in body coordinates 
         self.R_s02b  = np.zeros((self.nB,nr,3,3)) # Orientation section to body at t=0
         self.R_a02b  = np.zeros((self.nB,nr,3,3)) # Orientation airfoil to body at t=0
+        self._allocateKin()
+
+    def _allocateKin(self):
+        nr = len(self.r)
         self.pos_gl = np.zeros((self.nB,nr,3))   # position of all nodes
         self.vel_gl = np.zeros((self.nB,nr,3))   # linear velocities
         self.R_s2g  = np.zeros((self.nB,nr,3,3)) # Orientation section to global
@@ -885,17 +1576,122 @@ class PrescribedRotorMotion():
         self.omega_gl      = omega_gl
         self.R_b2g         = R_b2g
 
-        # Update of positions
+        # Update of positions, all nodes at once
         for iB in np.arange(self.nB):
             self.R_ntr2g[iB] = R_b2g.dot(self.R_ntr2b[iB])
-            for ir in np.arange(len(self.r)):
-                s_OP =  R_b2g.dot(self.pos0[iB,ir,:])
-                self.pos_gl[iB,ir,:] = P_gl   + s_OP
-                self.vel_gl[iB,ir,:] = vel_gl + np.cross(omega_gl, s_OP)
-                self.R_s2g[iB,ir,:,:] = R_b2g.dot(self.R_s02b[iB,ir,:])
-                self.R_a2g[iB,ir,:,:] = R_b2g.dot(self.R_a02b[iB,ir,:])
+        s_OP = np.einsum('ij,bnj->bni', R_b2g, self.pos0)
+        np.add(P_gl, s_OP, out=self.pos_gl)
+        np.add(vel_gl, np.cross(omega_gl, s_OP), out=self.vel_gl)
+        np.matmul(R_b2g, self.R_s02b, out=self.R_s2g)
+        np.matmul(R_b2g, self.R_a02b, out=self.R_a2g)
+
+    def bodyKinematics(self, time):
+        """ 
+        Kinematics of the body origin for an array of times, vectorized version of `update`
+        OUTPUTS:
+          - psi  : azimuth [rad], array (nt)
+          - pos, vel, ome: position, velocity and rotational velocity of the origin in global, arrays (nt x 3)
+          - R_b2g: orientation from body to global, array (nt x 3 x 3)
+        """
+        time  = np.atleast_1d(np.asarray(time, dtype=float))
+        zeros = np.zeros(len(time))
+        psi, x, xdot, omegapsi = zeros, zeros, zeros, 0
+        if self.sType not in ['constantRPM', 'x-oscillation', 'constantRPM x-oscillation']:
+            raise NotImplementedError(self.sType)
+        if self.sType in ['constantRPM', 'constantRPM x-oscillation']:
+            omegapsi = self.opts['RPM']*2.*np.pi/(60.)
+            psi = time*omegapsi
+        if self.sType in ['x-oscillation', 'constantRPM x-oscillation']:
+            omega = self.opts['frequency']*2.*np.pi
+            A = self.opts['amplitude']
+            x    = A*np.sin(omega*time)
+            xdot = A*omega*np.cos(omega*time)
+        pos = np.asarray(self.origin_pos_gl0, dtype=float) + np.column_stack((x, zeros, zeros))
+        vel = np.column_stack((xdot, zeros, zeros))
+        ome = np.tile(self.R_b2g0.dot(np.array([omegapsi,0,0])), (len(time),1))
+        # R_b2g = R_b2g0 . R_x(psi)
+        R_x_psi = np.zeros((len(time),3,3))
+        R_x_psi[:,0,0] = 1
+        R_x_psi[:,1,1], R_x_psi[:,1,2] = np.cos(psi), -np.sin(psi)
+        R_x_psi[:,2,1], R_x_psi[:,2,2] = np.sin(psi),  np.cos(psi)
+        R_b2g = np.matmul(np.asarray(self.R_b2g0), R_x_psi)
+        return psi, pos, vel, ome, R_b2g
+
+    def precompute(self, time, folder=None, chunkSize=1000):
+        """ 
+        Compute the kinematics of all nodes for a full time vector at once.
+        The arrays are stored in the dictionary `self.kin`, with time as first dimension,
+        e.g. self.kin['pos_gl'] is (nt x nB x nr x 3). 
+        After this call, `update(t)` (for t in time) and `updateIndex(it)` only point the 
+        attributes of the class to the precomputed arrays.
+
+        INPUTS:
+          - time: array of times
+          - folder: if provided, the node arrays are memory-mapped files (.npy) in this folder
+          - chunkSize: number of time steps computed at once (to limit the size of the temporary arrays)
+        """
+        time = np.asarray(time, dtype=float)
+        nt, nB, nr = len(time), self.nB, len(self.r)
+        psi, pos, vel, ome, R_b2g = self.bodyKinematics(time)
+        kin = {'time':time, 'psi':psi, 'origin_pos_gl':pos, 'origin_vel_gl':vel, 'omega_gl':ome, 'R_b2g':R_b2g}
+        shapes = {'R_ntr2g':(nt,nB,3,3), 'pos_gl':(nt,nB,nr,3), 'vel_gl':(nt,nB,nr,3), 'R_s2g':(nt,nB,nr,3,3), 'R_a2g':(nt,nB,nr,3,3)}
+        for k, shp in shapes.items():
+            if folder is None:
+                kin[k] = np.zeros(shp)
+            else:
+                kin[k] = np.lib.format.open_memmap(os.path.join(folder, 'motion_{}.npy'.format(k)), mode='w+', dtype=float, shape=shp)
+        R_ntr2b = np.asarray(self.R_ntr2b)
+        for i0 in np.arange(0, nt, chunkSize):
+            I = slice(i0, np.minimum(i0+chunkSize, nt))
+            R = R_b2g[I]
+            s_OP = np.einsum('tij,bnj->tbni', R, self.pos0)
+            np.add(pos[I,None,None,:], s_OP, out=kin['pos_gl'][I])
+            np.add(vel[I,None,None,:], np.cross(ome[I,None,None,:], s_OP), out=kin['vel_gl'][I])
+            np.matmul(R[:,None,:,:]     , R_ntr2b   , out=kin['R_ntr2g'][I])
+            np.matmul(R[:,None,None,:,:], self.R_s02b, out=kin['R_s2g'][I])
+            np.matmul(R[:,None,None,:,:], self.R_a02b, out=kin['R_a2g'][I])
+        self.kin = kin
+        self._itBlock = None
+        return kin
+
+    def updateIndex(self, it):
+        """ Set the kinematics to the precomputed values at time index it (see precompute) """
+        kin = self.kin
+        self.psi           = kin['psi'][it]
+        self.origin_pos_gl = kin['origin_pos_gl'][it]
+        self.origin_vel_gl = kin['origin_vel_gl'][it]
+        self.omega_gl      = kin['omega_gl'][it]
+        self.R_b2g         = kin['R_b2g'][it]
+        self.R_ntr2g       = kin['R_ntr2g'][it]
+        self.pos_gl        = kin['pos_gl'][it]
+        self.vel_gl        = kin['vel_gl'][it]
+        self.R_s2g         = kin['R_s2g'][it]
+        self.R_a2g         = kin['R_a2g'][it]
+
+    def updateBlock(self, time, it, blockSize=1000):
+        """ 
+        Set the kinematics at the time index `it` of the time vector `time`. 
+        The kinematics are precomputed (see precompute) for blocks of `blockSize` time steps, 
+        starting at `it` when it is outside of the current block, such that the memory used 
+        does not scale with the length of the time vector.
+        """
+        i0 = self._itBlock
+        if self.kin is None or i0 is None or it<i0 or it>=i0+len(self.kin['time']):
+            self.precompute(time[it:it+blockSize], chunkSize=blockSize)
+            self._itBlock = i0 = it
+        self.updateIndex(it-i0)
 
     def update(self, t):
+        if self.kin is not None:
+            # Using precomputed kinematics if t is one of the precomputed times
+            time = self.kin['time']
+            it = np.minimum(np.searchsorted(time, t), len(time)-1)
+            if np.abs(time[it]-t)<1e-10:
+                return self.updateIndex(it)
+            if it>0 and np.abs(time[it-1]-t)<1e-10:
+                return self.updateIndex(it-1)
+            # Otherwise, standard update, on new arrays (the current ones are views of self.kin)
+            self._allocateKin()
         if self.sType=='constantRPM':
             omega = self.opts['RPM']*2.*np.pi/(60.)
             psi = t*omega
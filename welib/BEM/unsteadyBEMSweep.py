@@ -0,0 +1,238 @@
+"""
+Parametric sweeps of unsteady BEM simulations (see AeroBEM.simulationConstantRPM), over a matrix
+of wind speeds, rotational speeds, yaw angles and turbulence seeds.
+
+The cases are distributed over a process pool. The results of each case are written to a file
+in a results directory, named after a hash of the inputs of the case. The hash includes the content of
+all the input files read by AeroBEM (see fastInputFiles). Cases for which the result
+file exists are skipped, such that an interrupted sweep resumes where it stopped.
+The sweep ends with a summary table (statistics of the channels, one row per case), merged from
+the result files.
+
+Example:
+
+    cases = sweepCases(WS=[6,8,10], RPM=[8,10], yaw=[0,20], seed=[1,2], TI=0.1)
+    time  = np.arange(0,60,0.1)
+    dfSum = runSweep('Main.fst', cases, time, outDir='_sweep', nCores=4, options={'bDynaStall':True})
+
+"""
+import os
+import json
+import hashlib
+import itertools
+import numpy as np
+import pandas as pd
+
+__all__ = ['sweepCases', 'caseHash', 'fastInputFiles', 'runSweep', 'sweepSummary']
+
+CASE_INPUTS = ['WS', 'RPM', 'yaw', 'seed', 'TI', 'L']
+
+
+def sweepCases(WS, RPM, yaw=0, seed=None, TI=0, L=340.2):
+    """
+    Returns the matrix of cases (all combinations of the inputs), as a dataframe.
+
+    INPUTS:
+      - WS  : wind speeds at hub height [m/s], scalar or list
+      - RPM : rotational speeds [rpm], scalar or list
+      - yaw : yaw angles [deg], scalar or list.
+      - seed: turbulence seeds, scalar or list. None for a steady wind.
+      - TI  : turbulence intensity [-], scalar or list
+      - L   : turbulence length scale [m] of the Kaimal spectrum, scalar or list
+    """
+    values = [np.atleast_1d(np.asarray(v, dtype=object)).tolist() for v in [WS, RPM, yaw, seed, TI, L]]
+    return pd.DataFrame(list(itertools.product(*values)), columns=CASE_INPUTS)
+
+
+def caseHash(case, time, FASTFileName, options=None, simKwargs=None, channels=None, inputFiles=None):
+    """ Hash of the inputs of a case: case values, time vector, content of the input files used by 
+    AeroBEM.init_from_FAST (main, ElastoDyn, AeroDyn, AeroDyn blade and airfoil files), BEM options, 
+    simulation keyword arguments and stored channels.
+    inputFiles: list of input files, see fastInputFiles (computed if not provided)"""
+    if inputFiles is None:
+        inputFiles = fastInputFiles(FASTFileName)
+    h = hashlib.md5()
+    h.update(json.dumps({k:_jsonValue(case[k]) for k in CASE_INPUTS}, sort_keys=True).encode())
+    h.update(np.ascontiguousarray(time, dtype=float).tobytes())
+    for filename in inputFiles:
+        with open(filename, 'rb') as f:
+            h.update(f.read())
+    for d in [options, simKwargs]:
+        h.update(json.dumps(_jsonValue(d or {}), sort_keys=True).encode())
+    h.update(repr(channels).encode())
+    return h.hexdigest()
+
+
+def fastInputFiles(FASTFileName):
+    """ List of the input files read by AeroBEM.init_from_FAST: main file, ElastoDyn, AeroDyn, 
+    AeroDyn blade and airfoil files """
+    from welib.weio.fast_input_deck import FASTInputDeck
+    F = FASTInputDeck(FASTFileName, readlist=['AD','ED','ADbld','AF'])
+    files = [FASTFileName]
+    for k in ['ElastoDyn', 'AeroDyn15', 'AeroDynBlade']:
+        if F.fst_vt[k] is not None:
+            files.append(F.fst_vt[k].filename)
+    files += [af.filename for af in F.fst_vt['af_data'] if af is not None]
+    return files
+
+
+def _jsonValue(v):
+    """ Value that can be written to json (numpy scalars and arrays, NaN, nested lists and dictionaries).
+    Other objects are replaced by their representation."""
+    if v is None:
+        return None
+    if isinstance(v, dict):
+        return {str(k):_jsonValue(x) for k,x in v.items()}
+    if isinstance(v, np.ndarray):
+        v = v.tolist()
+    if isinstance(v, (list, tuple)):
+        return [_jsonValue(x) for x in v]
+    if isinstance(v, (np.generic,)):
+        v = v.item()
+    if isinstance(v, float) and np.isnan(v):
+        return None
+    if isinstance(v, (bool, int, float, str)):
+        return v
+    return repr(v)
+
+
+def _windFunction(case, time, windExponent=None, windRefH=None):
+    """ Wind function f(x,y,z,t)=u,v,w of a case.
+    The yaw misalignment is modelled by rotating the wind direction: the wind vector is U (cos yaw, -sin yaw, 0),
+    which corresponds to a positive rotation of the nacelle about the vertical axis.
+    With a seed, the wind speed U(t) is a Kaimal time series at a point (uniform over the rotor)."""
+    from welib.wind.windsim import pointTSKaimal
+    WS, yaw, seed, TI = case['WS'], case['yaw'], case['seed'], case['TI']
+    cy, sy = np.cos(yaw*np.pi/180), np.sin(yaw*np.pi/180)
+    bTurb = seed is not None and not (isinstance(seed, float) and np.isnan(seed)) and TI>0
+    if bTurb:
+        np.random.seed(int(seed))
+        dt = time[1]-time[0]
+        t, u, _, _ = pointTSKaimal(time[-1]-time[0]+dt, dt, WS, TI*WS, case['L'])
+        t = t + time[0]
+        U = lambda t_ : np.interp(t_, t, u)
+    else:
+        U = lambda t_ : WS
+    def windFunction(x, y, z, t_):
+        Ut = U(t_)*np.ones(x.shape)
+        if windExponent is not None:
+            Ut = Ut*(z/windRefH)**windExponent
+        return Ut*cy, -Ut*sy, np.zeros(x.shape)
+    return windFunction
+
+
+def _runSweepCase(args):
+    """ Runs one case and writes the results. Top level function, such that it can be sent to a process pool. """
+    from welib.BEM.unsteadyBEM import AeroBEM
+    FASTFileName, case, time, options, simKwargs, channels, key, outDir = args
+    simKwargs = dict(simKwargs or {})
+    BEM = AeroBEM()
+    BEM.init_from_FAST(FASTFileName)
+    for k,v in (options or {}).items():
+        if not hasattr(BEM, k):
+            raise Exception('Unknown AeroBEM option: {}'.format(k))
+        setattr(BEM, k, v)
+    windFunction = _windFunction(case, time, simKwargs.pop('windExponent', None), simKwargs.get('windRefH', None))
+    simKwargs.pop('windRefH', None)
+    df = BEM.simulationConstantRPM(time, case['RPM'], windFunction=windFunction, **simKwargs)
+    if channels is None:
+        channels = [c for c in df.columns if not c.startswith('AB')] # rotor level channels
+    df = df[channels]
+    # --- Writing inputs, then results (the existence of the result file marks the case as done)
+    base = os.path.join(outDir, key)
+    with open(base+'.json', 'w') as f:
+        json.dump({k:_jsonValue(case[k]) for k in CASE_INPUTS}, f)
+    df.to_csv(base+'.csv.tmp', index=False)
+    os.replace(base+'.csv.tmp', base+'.csv')
+    return key
+
+
+def runSweep(FASTFileName, cases, time, outDir, nCores=None, options=None, channels=None,
+        tTransient=0, reRun=False, verbose=True, **kwargs):
+    """
+    Runs the unsteady BEM for all the cases, distributed over a process pool.
+
+    INPUTS:
+      - FASTFileName: OpenFAST input file, used to initialize AeroBEM (see AeroBEM.init_from_FAST)
+      - cases  : dataframe of cases, with columns WS, RPM, yaw, seed, TI, L (see sweepCases)
+      - time   : time vector of the simulations [s]
+      - outDir : results directory. Each case is written to `<hash>.csv` (time series) and `<hash>.json` (inputs),
+                 where hash is the hash of the inputs of the case (see caseHash)
+      - nCores : number of processes (default: number of cpus). If 1, the cases are run in the current process.
+      - options: dictionary of AeroBEM options (attributes), e.g. {'bDynaStall':True, 'bDynaWake':False}
+      - channels: list of channels stored in the result files. Default: rotor level channels.
+      - tTransient: time before which the time series are not used in the summary [s]
+      - reRun  : if True, the cases are run even if their result file exists
+      - kwargs : keyword arguments of simulationConstantRPM (e.g. cone, tilt, hubHeight, windExponent, windRefH)
+    OUTPUTS:
+      - dfSum: summary dataframe, see sweepSummary. It is also written to `outDir/summary.csv`
+    """
+    if not os.path.exists(outDir):
+        os.makedirs(outDir)
+    time = np.asarray(time, dtype=float)
+    cases = cases.reset_index(drop=True)
+    inputFiles = fastInputFiles(FASTFileName)
+    keys = [caseHash(case, time, FASTFileName, options, kwargs, channels, inputFiles) for _,case in cases.iterrows()]
+    todo = [i for i,key in enumerate(keys) if reRun or not os.path.exists(os.path.join(outDir, key+'.csv'))]
+    if verbose:
+        print('[INFO] Sweep: {} cases, {} to run, {} existing'.format(len(keys), len(todo), len(keys)-len(todo)))
+    args = [(FASTFileName, cases.loc[i].to_dict(), time, options, kwargs, channels, keys[i], outDir) for i in todo]
+    failed = []
+    if nCores is None:
+        nCores = os.cpu_count()
+    nCores = int(max(1, min(nCores, len(args))))
+    if nCores==1:
+        for a in args:
+            try:
+                _runSweepCase(a)
+            except Exception as e:
+                failed.append((a[-2], repr(e)))
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=nCores) as executor:
+            futures = {executor.submit(_runSweepCase, a): a[-2] for a in args}
+            for fut in as_completed(futures):
+                try:
+                    fut.result()
+                except Exception as e:
+                    failed.append((futures[fut], repr(e)))
+    for key, err in failed:
+        print('[WARN] Sweep: case {} failed: {}'.format(key, err))
+    dfSum = sweepSummary(outDir, keys=keys, tTransient=tTransient)
+    dfSum.to_csv(os.path.join(outDir, 'summary.csv'), index=False)
+    return dfSum
+
+
+def sweepSummary(outDir, keys=None, tTransient=0, stats=('mean','std','min','max')):
+    """
+    Merged summary of the results of a sweep: one row per case, with the inputs of the case,
+    its hash, and the statistics of each channel, e.g. `RtAeroPwr_[W]_mean`.
+
+    INPUTS:
+      - outDir: results directory
+      - keys  : list of case hashes. Default: all the cases of the directory.
+                Cases without result file have NaN statistics.
+      - tTransient: time before which the time series are not used [s]
+      - stats : statistics computed for each channel
+    """
+    if keys is None:
+        keys = sorted([f[:-4] for f in os.listdir(outDir) if f.endswith('.csv') and f!='summary.csv'])
+    rows = []
+    for key in keys:
+        base = os.path.join(outDir, key)
+        row = {'hash':key}
+        if os.path.exists(base+'.json'):
+            with open(base+'.json') as f:
+                row.update(json.load(f))
+        if os.path.exists(base+'.csv'):
+            df = pd.read_csv(base+'.csv')
+            df = df[df['Time_[s]']>=tTransient]
+            for c in df.columns:
+                if c in ['Time_[s]', 'Azimuth_[deg]'] or c.find('Azimuth')>=0:
+                    continue
+                for s in stats:
+                    row[c+'_'+s] = getattr(df[c], s)()
+        rows.append(row)
+    dfSum = pd.DataFrame(rows)
+    cols = [c for c in ['hash']+CASE_INPUTS if c in dfSum.columns]
+    return dfSum[cols + [c for c in dfSum.columns if c not in cols]]
@@ -1,5 +1,6 @@
 import numpy as np
 from .Polar import Polar as Pol
+from .PolarTable import PolarTable
 
 
 # --------------------------------------------------------------------------------}
@@ -205,3 +206,266 @@ def dynstall_oye_output(t,fs,u,p):
     Clinv   = p['Clinv'](alpha)
     Cl      = fs*Clinv+(1-fs)*Clfs               
     return Cl
+
+
+
+# --------------------------------------------------------------------------------}
+# --- Discrete and vectorized models, for a set of stations (e.g. all the nodes of a rotor)
+# --------------------------------------------------------------------------------{
+# The states are stored as arrays of shape (..., nStations, nStates), the inputs as arrays
+# of shape (..., nStations). The inputs are assumed constant over a time step, so that the
+# state equations are linear with constant coefficients and are integrated exactly:
+#      x(t+dt) = x_eq + (x(t) - x_eq) exp(-dt/T)
+# The time constants (Tf, Tp for MHH, tau for Oye) are in units of c/U, where U is the 
+# instantaneous relative velocity at the station.
+
+def _dynstall_table(polars, params, kCl_fs='Cl_fs'):
+    """ Packed table (see PolarTable) with columns Cl, Cd, Cm, F_st, Cl_fs for all stations """
+    data = []
+    for P, p in zip(polars, params):
+        alpha = P.alpha
+        f_st  = np.clip(np.nan_to_num(p['F_st'](alpha), nan=0), 0, 1) # NOTE: nan for polars without slope (e.g. cylinders)
+        cl_fs = np.nan_to_num(p[kCl_fs](alpha))
+        cm    = P.cm_interp(alpha) if P.cm.ndim>0 else alpha*0
+        data.append(np.column_stack((alpha, P.cl_interp(alpha), P.cd_interp(alpha), cm, f_st, cl_fs)))
+    return PolarTable(data, radians=True)
+
+def _dynstall_params(polars, fParams):
+    """ Calls fParams for each polar, only once for polars that are repeated """
+    params = {}
+    for P in polars:
+        if id(P) not in params:
+            params[id(P)] = fParams(P)
+    return [params[id(P)] for P in polars]
+
+def dynstall_mhh_param_table(polars, chord, **kwargs):
+    """ 
+    Parameters of the MHH model for a set of stations, using `dynstall_mhh_param_from_polar` for each station.
+    The time constants Tf and Tp are in units of c/U (tau_chord=1).
+
+    INPUTS:
+      - polars: list of nStations `Polar` objects, in radians
+      - chord: chord of each station, array (nStations)
+      - kwargs: keyword arguments passed to `dynstall_mhh_param_from_polar` (e.g. Jones, FAST, A1, Tf)
+    OUTPUTS:
+      - p: dictionary with arrays of size nStations (alpha0, Cla, chord, Tf, Tp, Cd0), the constants
+           A1, A2, b1, b2 and `table`, a PolarTable with columns Cl, Cd, Cm, F_st, Cl_fs
+    """
+    kwargs.setdefault('tau_chord', 1)
+    params = _dynstall_params(polars, lambda P: dynstall_mhh_param_from_polar(P, 1, **kwargs))
+    p = dict()
+    p['alpha0'] = np.array([pp['alpha0'] for pp in params])
+    p['Cla']    = np.array([pp['Cla']    for pp in params])
+    p['chord']  = np.asarray(chord)
+    p['Tf']     = np.array([pp['Tf']     for pp in params])
+    p['Tp']     = np.array([pp['Tp']     for pp in params])
+    for k in ['A1','A2','b1','b2']:
+        p[k] = params[0][k]
+    p['table']  = _dynstall_table(polars, params)
+    p['Cd0']    = p['table'].coeff(p['alpha0'], 1)
+    return p
+
+def dynstall_mhh_discrete_steady(alpha_34, p):
+    """ Steady states of the MHH model, array of shape alpha_34.shape+(4,), see dynstall_mhh_steady """
+    x = np.zeros(np.shape(alpha_34)+(4,))
+    x[...,0] = p['A1']*alpha_34
+    x[...,1] = p['A2']*alpha_34
+    x[...,2] = p['Cla']*(alpha_34-p['alpha0'])
+    x[...,3] = p['table'].coeff(alpha_34, 3)
+    return x
+
+def dynstall_mhh_discrete_step(x, dt, alpha_34, alpha_dot, U, U_prev, p, out=None):
+    """ 
+    Discrete time integration of the MHH states over one time step, for all stations at once
+    (see dynstall_mhh_dxdt for the state equations)
+
+    INPUTS:
+      - x: states at t, array of shape (..., nStations, 4)
+      - dt: time step
+      - alpha_34, alpha_dot, U: inputs at t+dt, arrays of shape (..., nStations)
+      - U_prev: relative velocity at t, used to estimate U_dot
+      - p: parameters, see dynstall_mhh_param_table
+      - out: array where the states at t+dt are written (can be x)
+    OUTPUTS:
+      - states at t+dt
+    """
+    if out is None:
+        out = np.empty(x.shape)
+    c      = p['chord']
+    alpha0 = p['alpha0']
+    Cla    = p['Cla']
+    Tu     = c/(2*U)                                         # Eq. 23
+    U_dot  = (U-U_prev)/dt
+    # Downwash memory terms, dx/dt = -k x + b A/Tu alpha_34
+    for j, (A, b) in enumerate([(p['A1'], p['b1']), (p['A2'], p['b2'])]):
+        kdt  = (b + c * U_dot/(2*U**2))/Tu * dt
+        bOK  = np.abs(kdt)>1e-12
+        kdt_ = np.where(bOK, kdt, 1)
+        g    = np.where(bOK, -np.expm1(-kdt_)/kdt_, 1) # (1-exp(-k dt))/(k dt), limit 1 for k->0
+        out[...,j] = x[...,j]*np.exp(-kdt) + b * A / Tu * alpha_34 * dt * g
+    # Lagged lift coefficient
+    alphaE = alpha_34*(1-p['A1']-p['A2']) + out[...,0] + out[...,1] # Eq. 12
+    Clp    = Cla * (alphaE-alpha0) + np.pi * Tu * alpha_dot           # Eq. 13
+    Tp     = p['Tp']*c/U
+    out[...,2] = Clp + (x[...,2]-Clp)*np.exp(-dt/Tp)
+    # Separation point
+    alphaF = np.divide(out[...,2], Cla, out=np.zeros(U.shape), where=Cla!=0) + alpha0 # p. 13
+    fs_aF  = p['table'].coeff(alphaF, 3)
+    Tf     = p['Tf']*c/U
+    out[...,3] = fs_aF + (x[...,3]-fs_aF)*np.exp(-dt/Tf)
+    np.clip(out[...,3], 0, 1, out=out[...,3])
+    return out
+
+def dynstall_mhh_discrete_outputs(x, alpha_34, alpha_dot, U, p, alpha=None):
+    """ 
+    Outputs of the MHH model for all stations at once, see dynstall_mhh_outputs
+    INPUTS:
+      - x: states, array of shape (..., nStations, 4)
+      - alpha_34, alpha_dot, U: inputs, arrays of shape (..., nStations)
+      - alpha: angle of attack (default: alpha_34)
+    OUTPUTS:
+      - Cl_dyn, Cd_dyn, Cm_dyn: arrays of shape (..., nStations)
+    """
+    if alpha is None:
+        alpha = alpha_34
+    alpha0 = p['alpha0']
+    Tu     = p['chord']/(2*U)                                        # Eq. 23
+    alphaE = alpha_34*(1-p['A1']-p['A2']) + x[...,0] + x[...,1]      # Eq. 12
+    C      = p['table'](alphaE)  # Cl, Cd, Cm, F_st, Cl_fs at alphaE
+    faE    = C[...,3]
+    x4     = np.clip(x[...,3], 0, 1)
+    DeltaCdfpp = (np.sqrt(faE)-np.sqrt(x4))/2 - (faE-x4)/4
+    # Cl_dyn = Cla (alphaE-alpha0) x4 + Cl_fs(alphaE) (1-x4) + pi Tu alpha_dot, written as a deviation 
+    # from the steady polar (Cl_st = Cla (alphaE-alpha0) F_st + Cl_fs (1-F_st)), which is then recovered
+    # exactly in steady state, despite the interpolation of F_st and Cl_fs.
+    Cl_dyn = C[...,0] + (x4-faE)*(p['Cla'] * (alphaE-alpha0) - C[...,4]) + np.pi*Tu*alpha_dot
+    Cd_dyn = C[...,1] + (alpha-alphaE)*Cl_dyn + (C[...,1]-p['Cd0'])*DeltaCdfpp
+    Cm_dyn = C[...,2] - np.pi/2*Tu*alpha_dot
+    return Cl_dyn, Cd_dyn, Cm_dyn
+
+def dynstall_oye_param_table(polars, chord, tau=None):
+    """ 
+    Parameters of the Oye model for a set of stations, using `dynstall_oye_param_from_polar` for each station.
+    The time constant tau is in units of c/U (tau_chord=1).
+
+    INPUTS:
+      - polars: list of nStations `Polar` objects, in radians
+      - chord: chord of each station, array (nStations)
+      - tau: time constant in units of c/U. Default: see dynstall_oye_param_from_polar
+    OUTPUTS:
+      - p: dictionary with arrays of size nStations (alpha0, Cla, chord, tau) and `table`, 
+           a PolarTable with columns Cl, Cd, Cm, F_st, Cl_fs
+    """
+    def fParams(P):
+        pp = dynstall_oye_param_from_polar(P, tau=tau, tau_chord=1)
+        pp['Clinv'](0) # Ensures that the linear slope and alpha0 are computed
+        return pp
+    params = _dynstall_params(polars, fParams)
+    p = dict()
+    p['alpha0'] = np.array([P._alpha0       for P in polars])
+    p['Cla']    = np.array([P._linear_slope for P in polars])
+    p['chord']  = np.asarray(chord)
+    p['tau']    = np.array([pp['tau'] for pp in params])
+    p['table']  = _dynstall_table(polars, params, kCl_fs='Clfs')
+    return p
+
+def dynstall_oye_discrete_steady(alpha, p):
+    """ Steady separation function of the Oye model """
+    return p['table'].coeff(alpha, 3)
+
+def dynstall_oye_discrete_step(fs, dt, alpha, U, p, out=None):
+    """ 
+    Discrete time integration of the Oye separation function over one time step, for all stations at once
+    (see dynstall_oye_dxdt)
+    INPUTS:
+      - fs: separation function at t, array of shape (..., nStations)
+      - alpha, U: angle of attack and relative velocity at t+dt, arrays of shape (..., nStations)
+    """
+    f_st = p['table'].coeff(alpha, 3)
+    tau  = p['tau']*p['chord']/U
+    return np.add(f_st, (fs-f_st)*np.exp(-dt/tau), out=out)
+
+def dynstall_oye_discrete_outputs(fs, alpha, p):
+    """ Outputs of the Oye model for all stations at once, returns Cl_dyn, Cd, Cm (see dynstall_oye_output) """
+    C     = p['table'](alpha)
+    Clinv = p['Cla']*(alpha-p['alpha0'])
+    # Cl = fs Clinv + (1-fs) Clfs, written as a deviation from the steady polar (see dynstall_mhh_discrete_outputs)
+    Cl    = C[...,0] + (fs-C[...,3])*(Clinv-C[...,4])
+    return Cl, C[...,1], C[...,2]
+
+
+# --------------------------------------------------------------------------------}
+# --- Batch simulations, for a set of sections and time histories of the inputs
+# --------------------------------------------------------------------------------{
+def _dynstall_sim_inputs(time, alpha, U):
+    """ Inputs as arrays of shape (nt x nSections), contiguous for each time step """
+    time  = np.asarray(time, dtype=float)
+    alpha = np.atleast_2d(np.asarray(alpha, dtype=float))
+    U     = np.broadcast_to(np.asarray(U, dtype=float), alpha.shape)
+    if alpha.shape[-1]!=len(time):
+        raise Exception('Inputs should be arrays of shape (nSections x nt), with nt={}'.format(len(time)))
+    return time, np.ascontiguousarray(alpha.T), np.ascontiguousarray(U.T)
+
+def dynstall_mhh_discrete_sim(time, alpha, U, p, alpha_34=None, alpha_dot=None, x0=None, states=False):
+    """ 
+    Time integration of the MHH model for a set of sections, with the discrete (exponential) scheme
+    of dynstall_mhh_discrete_step applied to all sections simultaneously.
+
+    INPUTS:
+      - time : time vector (nt), not necessarily uniform
+      - alpha: angle of attack [rad], array (nSections x nt)
+      - U    : relative velocity [m/s], array broadcastable to (nSections x nt)
+      - p    : parameters for the nSections sections, see dynstall_mhh_param_table
+      - alpha_34: angle of attack at 3/4 chord, array (nSections x nt) (default: alpha)
+      - alpha_dot: rate of change of alpha_34, array (nSections x nt) (default: finite differences)
+      - x0   : initial states, array (nSections x 4) (default: steady states)
+      - states: if True, the states are returned
+    OUTPUTS:
+      - Cl, Cd, Cm: dynamic coefficients, arrays (nSections x nt)
+      - x : (if states) states, array (nSections x nt x 4)
+    """
+    time, alpha, U = _dynstall_sim_inputs(time, alpha, U)
+    if alpha_34 is None:
+        alpha_34 = alpha
+    else:
+        alpha_34 = np.ascontiguousarray(np.broadcast_to(alpha_34, alpha.T.shape).T)
+    if alpha_dot is None:
+        alpha_dot = np.gradient(alpha_34, time, axis=0) if len(time)>1 else np.zeros(alpha.shape)
+    else:
+        alpha_dot = np.ascontiguousarray(np.broadcast_to(alpha_dot, alpha.T.shape).T)
+    x = np.zeros(alpha.shape+(4,))
+    x[0] = dynstall_mhh_discrete_steady(alpha_34[0], p) if x0 is None else x0
+    for it in np.arange(1, len(time)):
+        dynstall_mhh_discrete_step(x[it-1], time[it]-time[it-1], alpha_34[it], alpha_dot[it], U[it], U[it-1], p, out=x[it])
+    Cl, Cd, Cm = dynstall_mhh_discrete_outputs(x, alpha_34, alpha_dot, U, p, alpha=alpha)
+    out = (Cl.T, Cd.T, Cm.T)
+    if states:
+        out += (np.swapaxes(x, 0, 1),)
+    return out
+
+def dynstall_oye_discrete_sim(time, alpha, U, p, fs0=None, states=False):
+    """ 
+    Time integration of the Oye model for a set of sections, with the discrete (exponential) scheme
+    of dynstall_oye_discrete_step applied to all sections simultaneously.
+
+    INPUTS:
+      - time : time vector (nt), not necessarily uniform
+      - alpha: angle of attack [rad], array (nSections x nt)
+      - U    : relative velocity [m/s], array broadcastable to (nSections x nt)
+      - p    : parameters for the nSections sections, see dynstall_oye_param_table
+      - fs0  : initial separation function, array (nSections) (default: steady value)
+      - states: if True, the separation function is returned
+    OUTPUTS:
+      - Cl, Cd, Cm: dynamic coefficients, arrays (nSections x nt)
+      - fs : (if states) separation function, array (nSections x nt)
+    """
+    time, alpha, U = _dynstall_sim_inputs(time, alpha, U)
+    fs = np.zeros(alpha.shape)
+    fs[0] = dynstall_oye_discrete_steady(alpha[0], p) if fs0 is None else fs0
+    for it in np.arange(1, len(time)):
+        dynstall_oye_discrete_step(fs[it-1], time[it]-time[it-1], alpha[it], U[it], p, out=fs[it])
+    Cl, Cd, Cm = dynstall_oye_discrete_outputs(fs, alpha, p)
+    out = (Cl.T, Cd.T, Cm.T)
+    if states:
+        out += (fs.T,)
+    return out
@@ -5,6 +5,8 @@ import os
   - Polar: class to represent a polar (computes steady/unsteady parameters, corrections etc.)
   - blend: function to blend two polars
   - thicknessinterp_from_one_set: interpolate polars at different thickeness based on one set of polars 
+  - unsteadyParamsBatch: unsteady parameters of a set of polars, vectorized on a shared alpha grid
+  - bladePolarTable: 3D correction and extrapolation of the polars of all blade stations at once
 """
 
 
@@ -1432,6 +1434,384 @@ def _intersections(x1,y1,x2,y2):
     return xy0[:,0],xy0[:,1]
 
 
+# --------------------------------------------------------------------------------}
+# --- Batch processing of polars, on a shared grid of angle of attack
+# --------------------------------------------------------------------------------{
+def _polars_to_grid(polars, alpha=None):
+    """ Resamples a list of polars (Polar objects, or arrays with columns alpha [deg], cl, cd, cm) 
+    on a shared grid of angles of attack [deg].
+    The default grid is the union of the alpha values of all polars, within the range common to all polars,
+    so that each polar is represented exactly (linear interpolation).
+    Returns alpha (nA), and the arrays cl, cd, cm of shape (nP x nA)
+    """
+    A, C = [], []
+    for p in polars:
+        if isinstance(p, Polar):
+            a = np.asarray(p.alpha, dtype=float)
+            if p._radians:
+                a = np.degrees(a)
+            A.append(a)
+            C.append(np.column_stack((p.cl, p.cd, p.cm)))
+        else:
+            p = np.asarray(p, dtype=float)
+            A.append(p[:,0])
+            C.append(p[:,1:4])
+    if alpha is None:
+        amin = np.max([a[0]  for a in A])
+        amax = np.min([a[-1] for a in A])
+        alpha = np.unique(np.concatenate(A))
+        alpha = alpha[(alpha>=amin) & (alpha<=amax)]
+    alpha = np.asarray(alpha, dtype=float)
+    M = np.zeros((3, len(polars), len(alpha)))
+    for i, (a, c) in enumerate(zip(A, C)):
+        for j in range(3):
+            M[j,i,:] = np.interp(alpha, a, c[:,j])
+    return alpha, M[0], M[1], M[2]
+
+def _interp_rows(xi, x, Y):
+    """ Interpolates each row of Y (nP x nA), defined at x (nA), at the values xi (nP) """
+    i = np.clip(np.searchsorted(x, xi, side='right')-1, 0, len(x)-2)
+    rows = np.arange(Y.shape[0])
+    w = np.clip((xi - x[i])/(x[i+1]-x[i]), 0, 1)
+    return Y[rows,i]*(1-w) + Y[rows,i+1]*w
+
+def _window_mask(x, lo, hi):
+    """ Mask (nP x nA) of the points within the windows [lo,hi] (nP), where the windows are 
+    first extended to the grid points, as done by _alpha_window_in_bounds """
+    im = np.clip(np.searchsorted(x, lo, side='right')-1, 0, len(x)-1)
+    ip = np.clip(np.searchsorted(x, hi, side='left')   , 0, len(x)-1)
+    return (x>=x[im][:,None]) & (x<=x[ip][:,None])
+
+def _zero_crossings_rows(x, Y, mask, direction=None):
+    """ Zero crossings of each row of Y, restricted to the points in mask, see _zero_crossings 
+    Returns the arrays (nP x nA-1) of crossing locations, and the boolean array of valid crossings
+    (at most one crossing per interval [x_k, x_k+1[, sorted by increasing x) """
+    Y0, Y1 = Y[:,:-1], Y[:,1:]
+    m = mask[:,:-1] & mask[:,1:]
+    bStrict = (Y0*Y1<0) & m
+    with np.errstate(divide='ignore', invalid='ignore'):
+        xc = np.where(bStrict, x[:-1] - Y0*(x[1:]-x[:-1])/(Y1-Y0), x[:-1])
+    # Points exactly equal to 0 where the neighbors change sign
+    bZero = np.zeros(Y0.shape, dtype=bool)
+    bZero[:,1:] = (Y[:,1:-1]==0) & (Y[:,:-2]*Y[:,2:]<0) & m[:,1:] & m[:,:-1]
+    b = bStrict | bZero
+    if direction=='up':
+        b &= Y1>Y0
+    elif direction=='down':
+        b &= Y1<Y0
+    return xc, b
+
+def _nth_true(b, n):
+    """ Index of the n-th True value (n>=1) of each row, and flag if it exists"""
+    cs = np.cumsum(b, axis=1)
+    n  = np.broadcast_to(n, cs.shape[:1])
+    return np.argmax(cs>=n[:,None], axis=1), cs[:,-1]>=n
+
+
+def unsteadyParamsBatch(polars, alpha=None, fullySeparated=False):
+    """ 
+    Computes the unsteady aerodynamic parameters of a set of polars, with array operations
+    on a shared grid of angles of attack, instead of one polar at a time (see Polar.unsteadyParams).
+
+    Same algorithms as the single polar methods, with the following differences:
+      - the lift slope is found with the method 'max' (as used by `cl_fully_separated` and `compute_params`),
+        instead of the default 'optim' of cl_linear_slope
+      - NaN values are returned where the single polar methods would raise an exception
+        (e.g. no zero crossing or no stall point)
+      - for polars with different alpha ranges, the fine resampling done for the slope search 
+        is based on the common alpha range
+
+    INPUTS:
+      - polars: list of Polar objects, or of arrays with columns alpha [deg], cl, cd, cm
+      - alpha : shared grid of angles of attack [deg]. Default: union of the alpha values of all polars 
+                (within the range common to all polars), which represents each polar exactly.
+      - fullySeparated: if True, the fully separated lift, separation function and inviscid lift
+                        are returned on the shared grid
+    OUTPUTS:
+      - df: DataFrame with one row per polar, and the columns:
+           alpha0, alpha1, alpha2 [deg], cnSlope [1/rad], Cn1, Cn2, Cd0, Cm0 (as returned by unsteadyParams)
+           alpha0cn [deg], Cl_max, alpha_Cl_max [deg], clSlope [1/deg]
+           valid: False if cn_f does not intersect cn 3 times, in which case alpha1 and alpha2 are 
+                  +/- the first intersection (as done by unsteadyParams, with a warning)
+      - (if fullySeparated) dictionary with alpha (nA) [deg], cl, cl_fs, f_st, cl_inv (nP x nA)
+    """
+    import pandas as pd
+    alpha, cl, cd, cm = _polars_to_grid(polars, alpha)
+    nP, nA = cl.shape
+    cl = cl.copy()
+    cl[np.abs(cl)<1e-10]=0
+    cn = cl*np.cos(alpha*np.pi/180) + cd*np.sin(alpha*np.pi/180)
+    bConst = np.all(cl==cl[:,[0]], axis=1) | (nA==1)
+    one = np.ones(nP)
+
+    # --- Zero lift and zero cn, zero up-crossing in [-20,20], second crossing used if several
+    def alpha0_rows(C):
+        xc, b = _zero_crossings_rows(alpha, C, _window_mask(alpha, -20*one, 20*one), direction='up')
+        n = np.sum(b, axis=1)
+        i, _ = _nth_true(b, np.where(n>1, 2, 1))
+        a0 = np.where(n>0, xc[np.arange(nP), i], np.nan)
+        a0[bConst] = np.where(C[bConst,0]==0, 0, np.nan)
+        return a0
+    alpha0   = alpha0_rows(cl)
+    alpha0cn = alpha0_rows(cn)
+    cd0 = _interp_rows(alpha0, alpha, cd)
+    cm0 = _interp_rows(alpha0, alpha, cm)
+
+    # --- cn "inflection" points: first "hat" above alpha0, last "vee" below alpha0
+    dC = np.diff(cn, axis=1)
+    bHat = (dC[:,1:]<0) & (dC[:,:-1]>0) & (alpha[1:-1]>alpha0[:,None])
+    bVee = (dC[:,1:]>0) & (dC[:,:-1]<0) & (alpha[1:-1]<alpha0[:,None])
+    iHat, bHatOK = _nth_true(bHat, 1)
+    iVee = nA-3-np.argmax(bVee[:,::-1], axis=1)
+    bVeeOK = np.any(bVee, axis=1)
+    rows = np.arange(nP)
+    cn1 = np.where(bHatOK, cn[rows, np.minimum(iHat+1,nA-1)], np.nan)
+    cn2 = np.where(bVeeOK, cn[rows, np.minimum(iVee+1,nA-1)], np.nan)
+
+    # --- Fine resampling (as done by _find_slope with a window)
+    xf = np.linspace(alpha[0], alpha[-1], max(721, nA))
+    i_f = np.clip(np.searchsorted(alpha, xf, side='right')-1, 0, nA-2)
+    w_f = (xf-alpha[i_f])/(alpha[i_f+1]-alpha[i_f])
+    fine = lambda C: C[:,i_f]*(1-w_f) + C[:,i_f+1]*w_f
+
+    # --- cn slope: least square fit in the window alpha0cn+[-5,10]
+    cnf = fine(cn)
+    W   = ((xf>=alpha0cn[:,None]-5) & (xf<=alpha0cn[:,None]+10)).astype(float)
+    S, Sx, Sy = np.sum(W, axis=1), np.sum(W*xf, axis=1), np.sum(W*cnf, axis=1)
+    Sxx, Sxy  = np.sum(W*xf**2, axis=1), np.sum(W*xf*cnf, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cnSlope = (S*Sxy-Sx*Sy)/(S*Sxx-Sx**2)
+
+    # --- Points where f=0.7, intersections of cn with cnSlope*(alpha-alpha0cn)*((1+sqrt(0.7))/2)**2
+    cn_f = cnSlope[:,None]*(alpha-alpha0cn[:,None])*((1+np.sqrt(0.7))/2)**2
+    xc, b = _zero_crossings_rows(alpha, cn_f-cn, np.ones((nP,nA), dtype=bool))
+    n = np.sum(b, axis=1)
+    i1, _ = _nth_true(b, 1)
+    i3, _ = _nth_true(b, 3)
+    a_first = np.where(n>0, xc[rows,i1], np.nan)
+    alpha1 = np.where(n==3, xc[rows,i3], np.abs(a_first))
+    alpha2 = np.where(n==3, a_first, -np.abs(a_first))
+    valid = (n==3) | bConst
+    if np.any(~valid):
+        print('[WARN] Polar, unsteady params: cn_f does not intersect cn 3 times for polars {}.'.format(np.where(~valid)[0]))
+
+    # --- Cl max in window [-40,40]
+    Wm = _window_mask(alpha, -40*one, 40*one)
+    iMax = np.argmax(np.where(Wm, cl, -np.inf), axis=1)
+    cl_max, alpha_cl_max = cl[rows,iMax], alpha[iMax]
+
+    # --- Cl slope, method 'max' in the window alpha0+[-5,20], or the full range if cl does not change sign
+    clf = fine(cl)
+    bFull = (np.min(cl, axis=1)>0) | (np.max(cl, axis=1)<0)
+    Wl  = _window_mask(alpha, np.where(bFull, alpha[0], alpha0-5), np.where(bFull, alpha[-1], alpha0+20))
+    lo  = np.min(np.where(Wl, alpha, np.inf), axis=1)
+    hi  = np.max(np.where(Wl, alpha,-np.inf), axis=1)
+    Wf  = (xf>=lo[:,None]) & (xf<=hi[:,None])
+    # yi = np.interp(alpha0, x, y) on the windowed fine grid (clipped at the window bounds)
+    xi  = np.clip(alpha0, lo, hi)
+    yi  = _interp_rows(xi, xf, clf)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sl = np.where(Wf & (xf!=alpha0[:,None]), (clf-yi[:,None])/(xf-alpha0[:,None]), -np.inf)
+    clSlope = np.max(sl, axis=1)
+    clSlope[bConst] = 0
+    cnSlope[bConst] = 0
+
+    # --- Outputs
+    alpha1[bConst] = 0; alpha2[bConst] = 0; cn1[bConst] = 0; cn2[bConst] = 0
+    df = pd.DataFrame()
+    df['alpha0']       = alpha0
+    df['alpha1']       = alpha1
+    df['alpha2']       = alpha2
+    df['cnSlope']      = cnSlope*180/np.pi
+    df['Cn1']          = cn1
+    df['Cn2']          = cn2
+    df['Cd0']          = cd0
+    df['Cm0']          = cm0
+    df['alpha0cn']     = alpha0cn
+    df['Cl_max']       = cl_max
+    df['alpha_Cl_max'] = alpha_cl_max
+    df['clSlope']      = clSlope
+    df['valid']        = valid
+    if not fullySeparated:
+        return df
+
+    # --- Fully separated lift, see Polar.cl_fully_separated
+    cla, a0 = clSlope[:,None], alpha0[:,None]
+    cl_inv  = cla*(alpha-a0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cl_ratio = cl/cl_inv
+        cl_ratio[cl_ratio<0] = 0
+        f_st = (2*np.sqrt(cl_ratio)-1)**2
+        f_st[f_st<1e-15] = 0
+        cl_fs = np.where(f_st<1, (cl-cl_inv*f_st)/(1.-f_st), cl/2.0)
+    # Outside region, use steady data
+    iHig = np.argmin(np.where(alpha<a0, np.inf, np.nan_to_num(f_st, nan=np.inf)), axis=1)
+    iLow = np.argmin(np.where(alpha>a0, np.inf, np.nan_to_num(f_st, nan=np.inf)), axis=1)
+    idx  = np.arange(nA)
+    bSteady = (idx<=iLow[:,None]) | ((idx>iHig[:,None]) & (idx<nA-1))
+    cl_fs = np.where(bSteady, cl, cl_fs)
+    cl_fs[bConst] = cl[bConst]
+    # Ensuring everything is in harmony 
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f_st = (cl-cl_fs)/(cl_inv-cl_fs)
+        f_st[f_st<1e-15] = 0
+    return df, {'alpha':alpha, 'cl':cl, 'cl_fs':cl_fs, 'f_st':f_st, 'cl_inv':cl_inv}
+
+
+def bladePolarTable(polars, r_over_R, chord_over_r, tsr, cdmax=None, AR=None, correction3D=True, extrapolate=True, 
+        alpha_max_corr=30, alpha_linear_min=-5, alpha_linear_max=5, cdmin=0.001, nalpha=15, alpha=None, asArrays=False, **kwargs):
+    """ 
+    Applies the 3D rotational correction (see Polar.correction3D) and the extrapolation to +/-180 deg 
+    (see Polar.extrapolate) to the polars of all the stations of a blade at once, with array operations 
+    on a shared grid of angles of attack.
+
+    INPUTS:
+      - polars      : list of nStations polars, Polar objects or arrays with columns alpha [deg], cl, cd, cm
+      - r_over_R    : local radial position / rotor radius, array (nStations)
+      - chord_over_r: local chord / local radial position, array (nStations)
+      - tsr         : tip-speed ratio, scalar or array (nStations)
+      - cdmax       : maximum drag coefficient, scalar or array (nStations), needed if AR is None and extrapolate is True
+      - AR          : aspect ratio, if provided cdmax = 1.11 + 0.018*AR
+      - correction3D, extrapolate: flags to apply the 3D correction and the extrapolation
+      - alpha_max_corr, alpha_linear_min, alpha_linear_max: see Polar.correction3D [deg]
+      - cdmin, nalpha: see Polar.extrapolate
+      - alpha       : shared grid of angles of attack [deg], default: union of the alpha values of all polars
+                      within the range common to all polars (see unsteadyParamsBatch)
+      - asArrays    : if True, returns alpha (nAlpha) [deg], and cl, cd, cm (nStations x nAlpha)
+      - kwargs      : keyword arguments passed to PolarTable (e.g. dalpha [deg], default: smallest spacing of the
+                      shared grid before extrapolation)
+    OUTPUTS:
+      - tab: PolarTable for the nStations stations, to be used by the BEM solvers
+    """
+    alpha_, cl, cd, cm = _polars_to_grid(polars, alpha)
+    nP, nA = cl.shape
+    if 'dalpha' not in kwargs and nA>1:
+        kwargs['dalpha'] = max(np.min(np.diff(alpha_)), 0.01) # the extrapolated segments may have smaller spacings
+    rows = np.arange(nP)
+    r_over_R     = np.broadcast_to(np.asarray(r_over_R    , dtype=float), (nP,))
+    chord_over_r = np.broadcast_to(np.asarray(chord_over_r, dtype=float), (nP,))
+    tsr          = np.broadcast_to(np.asarray(tsr         , dtype=float), (nP,))
+    a = np.radians(alpha_)
+
+    # --- 3D correction, Du-Selig for lift and Eggers for drag
+    if correction3D:
+        # Linear fit using the original points of each polar in the linear region
+        own = np.zeros((nP, nA), dtype=bool)
+        for i, p in enumerate(polars):
+            pa = np.asarray(p.alpha if isinstance(p, Polar) else np.asarray(p)[:,0], dtype=float)
+            if isinstance(p, Polar) and p._radians:
+                pa = np.degrees(pa)
+            own[i] = np.isin(alpha_, pa)
+        W = (own & (a>=np.radians(alpha_linear_min)) & (a<=np.radians(alpha_linear_max))).astype(float)
+        S, Sx, Sy = np.sum(W, axis=1), np.sum(W*a, axis=1), np.sum(W*cl, axis=1)
+        Sxx, Sxy  = np.sum(W*a**2, axis=1), np.sum(W*a*cl, axis=1)
+        m      = (S*Sxy-Sx*Sy)/(S*Sxx-Sx**2)
+        alpha0 = -(Sy-m*Sx)/S/m
+        lam    = tsr/(1+tsr**2)**0.5  # modified tip speed ratio
+        expon  = 1/lam/r_over_R
+        fcl    = 1.0/m*(1.6*chord_over_r/0.1267*(1-chord_over_r**expon)/(1+chord_over_r**expon)-1)
+        amc    = np.radians(alpha_max_corr)
+        adj    = np.where(a<=amc, 1.0, ((np.pi/2-a)/(np.pi/2-amc))**2)
+        cl_3d  = cl + fcl[:,None]*(m[:,None]*(a-alpha0[:,None])-cl)*adj
+        cd     = cd + (cl_3d-cl)*(np.sin(a) - 0.12*np.cos(a))/(np.cos(a) + 0.12*np.sin(a))
+        cl     = cl_3d
+
+    # --- Extrapolation, Viterna
+    if extrapolate:
+        if cdmin < 0:
+            raise Exception('cdmin cannot be < 0')
+        alpha_high, alpha_low = a[-1], a[0]
+        if alpha_high > np.pi/2:
+            raise Exception('alpha[-1] > pi/2')
+        if alpha_low < -np.pi/2:
+            raise Exception('alpha[0] < -pi/2')
+        if AR is not None:
+            cdmax = 1.11 + 0.018*np.asarray(AR)
+        if cdmax is None:
+            raise Exception('Provide `cdmax` or `AR` for the extrapolation')
+        cl_adj = 0.7
+        cdmax = np.maximum(np.max(cd, axis=1), cdmax)[:,None]
+        cl_high, cd_high, cm_high = cl[:,-1:], cd[:,-1:], cm[:,-1:]
+        cl_low , cd_low           = cl[:,:1] , cd[:,:1]
+        sa, ca = np.sin(alpha_high), np.cos(alpha_high)
+        A = (cl_high - cdmax*sa*ca)*sa/ca**2
+        B = (cd_high - cdmax*sa*sa)/ca
+        def viterna(al, adj):
+            al = np.maximum(al, 0.0001)
+            return (cdmax/2*np.sin(2*al) + A*np.cos(al)**2/np.sin(al))*adj, cdmax*np.sin(al)**2 + B*np.cos(al)
+        alpha1 = np.linspace(alpha_high, np.pi/2, nalpha)[1:]
+        cl1, cd1 = viterna(alpha1, 1.0)
+        alpha2 = np.linspace(np.pi/2, np.pi-alpha_high, nalpha)[1:]
+        cl2, cd2 = viterna(np.pi-alpha2, -cl_adj)
+        alpha3 = np.linspace(np.pi-alpha_high, np.pi, nalpha)[1:]
+        _  , cd3 = viterna(np.pi-alpha3, 1.0)
+        cl3 = (alpha3-np.pi)/alpha_high*cl_high*cl_adj  # linear variation
+        if alpha_low <= -alpha_high:
+            alpha4 = np.zeros(0)
+            cl4, cd4 = np.zeros((nP,0)), np.zeros((nP,0))
+            alpha5max = alpha_low
+        else:
+            alpha4 = np.linspace(-alpha_high, alpha_low, nalpha)[1:-2]
+            cl4 = -cl_high*cl_adj + (alpha4+alpha_high)/(alpha_low+alpha_high)*(cl_low+cl_high*cl_adj)
+            cd4 = cd_low + (alpha4-alpha_low)/(-alpha_high-alpha_low)*(cd_high-cd_low)
+            alpha5max = -alpha_high
+        alpha5 = np.linspace(-np.pi/2, alpha5max, nalpha)[1:]
+        cl5, cd5 = viterna(-alpha5, -cl_adj)
+        alpha6 = np.linspace(-np.pi+alpha_high, -np.pi/2, nalpha)[1:]
+        cl6, cd6 = viterna(alpha6+np.pi, cl_adj)
+        alpha7 = np.linspace(-np.pi, -np.pi+alpha_high, nalpha)
+        _  , cd7 = viterna(alpha7+np.pi, 1.0)
+        cl7 = (alpha7+np.pi)/alpha_high*cl_high*cl_adj  # linear variation
+        a_ext  = np.concatenate((alpha7, alpha6, alpha5, alpha4, a, alpha1, alpha2, alpha3))
+        cl_ext = np.concatenate((cl7, cl6, cl5, cl4, cl, cl1, cl2, cl3), axis=1)
+        cd_ext = np.concatenate((cd7, cd6, cd5, cd4, cd, cd1, cd2, cd3), axis=1)
+        cd_ext = np.maximum(cd_ext, cdmin)
+        a_ext_deg = np.degrees(a_ext)
+
+        # --- Moment coefficient, see Polar.__CMCoeff and Polar.__getCM
+        cm1_alpha = np.floor(alpha_[0] / 10.0) * 10.0
+        cm2_alpha = np.ceil(alpha_[-1] / 10.0) * 10.0
+        alpha_cm1 = np.linspace(-180.0, cm1_alpha, abs(int((-180.0-cm1_alpha)/10.0 - 1)))
+        alpha_cm2 = np.linspace(cm2_alpha, 180.0, int((180.0-cm2_alpha)/10.0 + 1))
+        alpha_cm  = np.concatenate((alpha_cm1, alpha_, alpha_cm2))
+        cm_cm     = np.concatenate((np.zeros((nP,len(alpha_cm1))), cm, np.zeros((nP,len(alpha_cm2)))), axis=1)
+        # Zero lift moment, first zero up crossing of cl for |alpha|<20, or extrapolation from the first two points
+        bZ = (np.abs(alpha_[:-1])<20) & (cl[:,:-1]<=0) & (cl[:,1:]>=0)
+        iZ, bFound = _nth_true(bZ, 1)
+        iZ = np.where(bFound, iZ, 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pz  = -cl[rows,iZ] / (cl[rows,iZ+1] - cl[rows,iZ])
+        cm0 = (cm[rows,iZ] + pz * (cm[rows,iZ+1] - cm[rows,iZ]))[:,None]
+        XM     = (-cm_high + cm0) / (cl_high * np.cos(alpha_high) + cd_high * np.sin(alpha_high))
+        cmCoef = (XM - 0.25) / np.tan((alpha_high - np.pi/2))
+        # Cl and Cd at the cm alpha values (interpolation on the shared extended grid)
+        i  = np.clip(np.searchsorted(a_ext_deg, alpha_cm, side='right')-1, 0, len(a_ext)-2)
+        w  = np.clip((alpha_cm-a_ext_deg[i])/(a_ext_deg[i+1]-a_ext_deg[i]), 0, 1)
+        cl_cm = cl_ext[:,i]*(1-w) + cl_ext[:,i+1]*w
+        cd_cm = cd_ext[:,i]*(1-w) + cd_ext[:,i+1]*w
+        ar  = np.radians(np.abs(alpha_cm))
+        sgn = np.sign(alpha_cm)
+        x   = cmCoef * np.tan(ar - np.pi/2) + 0.25
+        with np.errstate(invalid='ignore'):
+            cm_new = sgn*(cm0 - x * (sgn*cl_cm * np.cos(ar) + cd_cm * np.sin(ar)))
+        cm_new = np.where(np.abs(alpha_cm)<0.01, cm0, cm_new)
+        tab180 = {165:-0.4, 170:-0.5, 175:-0.25, 180:0, -165:0.35, -170:0.4, -175:0.2, -180:0}
+        bTip = (alpha_cm<=-165) | (alpha_cm>=165)
+        cm_new[:,bTip] = [tab180.get(v, 0) for v in alpha_cm[bTip]]
+        bOut = (alpha_cm<alpha_[0]) | (alpha_cm>alpha_[-1])
+        bCm  = np.count_nonzero(cm, axis=1)>0
+        cm_cm = np.where(bOut[None,:] & bCm[:,None], cm_new, cm_cm)
+        i  = np.clip(np.searchsorted(alpha_cm, a_ext_deg, side='right')-1, 0, len(alpha_cm)-2)
+        w  = np.clip((a_ext_deg-alpha_cm[i])/(alpha_cm[i+1]-alpha_cm[i]), 0, 1)
+        cm = cm_cm[:,i]*(1-w) + cm_cm[:,i+1]*w
+        alpha_, cl, cd = a_ext_deg, cl_ext, cd_ext
+
+    if asArrays:
+        return alpha_, cl, cd, cm
+    from welib.airfoils.PolarTable import PolarTable
+    return PolarTable([np.column_stack((alpha_, cl[i], cd[i], cm[i])) for i in rows], **kwargs)
+
+
 if __name__ == '__main__':
     pass
 
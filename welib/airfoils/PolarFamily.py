@@ -0,0 +1,175 @@
+"""
+Family of polars, function of thickness and Reynolds number, resampled once on a shared grid
+of angle of attack and stored in one array of shape (nThickness x nRe x nAlpha x nCoeff).
+
+The polars at given thicknesses and Reynolds numbers (e.g. for all the stations of a blade) are
+obtained with a vectorized bilinear interpolation, instead of blending the polars one station
+at a time (see `thicknessinterp_from_one_set` and `blend` in Polar.py).
+The unsteady parameters and the fully separated quantities (f_st, cl_fs, cl_inv) of the
+interpolated polars are memoized, such that repeated queries (e.g. in design loops) are not recomputed.
+
+Example:
+
+    fam = PolarFamily(polars, thickness=[18,21,25,30,35,40,100])  # polars: one per thickness
+    polars = fam.polars(t_stations)                 # list of arrays alpha [deg], cl, cd, cm
+    tab    = fam.polarTable(t_stations)             # PolarTable for the BEM codes
+    sep    = fam.separated(t_stations)              # dictionary with f_st, cl_fs, cl_inv (nStations x nAlpha)
+    df     = fam.unsteadyParams(t_stations)         # unsteady parameters, one row per station
+
+"""
+import numpy as np
+from welib.airfoils.Polar import _polars_to_grid, unsteadyParamsBatch
+
+__all__ = ['PolarFamily']
+
+class PolarFamily(object):
+    """
+    Family of polars on a shared angle of attack grid, function of thickness and Reynolds number.
+
+    Attributes:
+      - alpha    : shared angle of attack grid [deg], shape (nAlpha)
+      - thickness: thicknesses of the family, sorted, shape (nThickness)
+      - Re       : Reynolds numbers of the family, sorted, shape (nRe)
+      - data     : cl, cd, cm, shape (nThickness x nRe x nAlpha x 3)
+
+    NOTE:
+      - interpolation is linear in thickness and Reynolds number. Beyond the range of the family,
+        the nearest values are used (as done by thicknessinterp_from_one_set)
+    """
+    def __init__(self, polars, thickness, Re=None, alpha=None, maxCache=64):
+        """
+        INPUTS:
+          - polars   : list of nThickness polars (if Re is None), or of nThickness lists of nRe polars.
+                       Polars are Polar objects or arrays with columns alpha [deg], cl, cd, cm
+          - thickness: thicknesses of the polars (any unit, the same as the one used for the queries)
+          - Re       : Reynolds numbers of the polars, or None for a family function of thickness only
+          - alpha    : shared grid of angles of attack [deg]. Default: union of the alpha values
+                       of all polars, within the range common to all polars.
+          - maxCache : maximum number of queries for which the derived quantities are memoized
+        """
+        thickness = np.atleast_1d(np.asarray(thickness, dtype=float))
+        if Re is None:
+            polars = [[p] for p in polars]
+            Re = [np.nan]
+        Re = np.atleast_1d(np.asarray(Re, dtype=float))
+        nt, nRe = len(thickness), len(Re)
+        if len(polars)!=nt or any([len(pp)!=nRe for pp in polars]):
+            raise Exception('Polars should be a list of {} thicknesses x {} Reynolds numbers'.format(nt, nRe))
+        alpha, cl, cd, cm = _polars_to_grid([p for pp in polars for p in pp], alpha)
+        data = np.stack((cl, cd, cm), axis=-1).reshape((nt, nRe, len(alpha), 3))
+        # Sorting
+        It = np.argsort(thickness)
+        IR = np.argsort(Re) if nRe>1 else np.arange(nRe)
+        self.alpha     = alpha
+        self.thickness = thickness[It]
+        self.Re        = Re[IR]
+        self.data      = data[It][:,IR]
+        self.maxCache  = maxCache
+        self._cache    = {}
+
+    @property
+    def nThickness(self):
+        return self.data.shape[0]
+
+    @property
+    def nRe(self):
+        return self.data.shape[1]
+
+    @property
+    def nAlpha(self):
+        return self.data.shape[2]
+
+    def __repr__(self):
+        s ='<{} object>\n'.format(type(self).__name__)
+        s+=' - nThickness: {}, nRe: {}, nAlpha: {}\n'.format(self.nThickness, self.nRe, self.nAlpha)
+        s+=' - thickness: {}\n'.format(self.thickness)
+        s+=' - Re       : {}\n'.format(self.Re)
+        s+=' - alpha: [{:.3f} ; {:.3f}] deg\n'.format(self.alpha[0], self.alpha[-1])
+        s+=' - memoized queries: {}\n'.format(len(self._cache))
+        return s
+
+    @staticmethod
+    def _weights(x, xp):
+        """ Lower indices and weights for linear interpolation of x in xp, nearest value beyond the range"""
+        if len(xp)==1:
+            return np.zeros(x.shape, dtype=int), np.zeros(x.shape)
+        i = np.clip(np.searchsorted(xp, x, side='right')-1, 0, len(xp)-2)
+        w = np.clip((x-xp[i])/(xp[i+1]-xp[i]), 0, 1)
+        return i, w
+
+    def _inputs(self, thickness, Re):
+        thickness = np.atleast_1d(np.asarray(thickness, dtype=float))
+        if Re is None:
+            Re = np.full(thickness.shape, self.Re[0])
+        Re = np.broadcast_to(np.asarray(Re, dtype=float), thickness.shape)
+        return thickness, Re
+
+    def coeffs(self, thickness, Re=None, alpha=None):
+        """
+        Returns the coefficients cl, cd, cm of the interpolated polars
+
+        INPUTS:
+          - thickness: thicknesses of the stations, array (nStations)
+          - Re       : Reynolds numbers of the stations, scalar or array (nStations). Ignored for a family
+                       function of thickness only.
+          - alpha    : angle of attack [deg], array of shape (..., nStations), or None for the shared grid
+        OUTPUTS:
+          - C: array of shape (nStations x nAlpha x 3) if alpha is None, or alpha.shape + (3,)
+        """
+        thickness, Re = self._inputs(thickness, Re)
+        it, wt = self._weights(thickness, self.thickness)
+        jt = np.minimum(it+1, self.nThickness-1)
+        if self.nRe>1:
+            iR, wR = self._weights(Re, self.Re)
+        else:
+            iR, wR = np.zeros(thickness.shape, dtype=int), np.zeros(thickness.shape)
+        jR = np.minimum(iR+1, self.nRe-1)
+        wt, wR = wt[:,None,None], wR[:,None,None]
+        D = self.data
+        C = (1-wt)*((1-wR)*D[it,iR] + wR*D[it,jR]) + wt*((1-wR)*D[jt,iR] + wR*D[jt,jR])
+        if alpha is None:
+            return C
+        alpha = np.asarray(alpha, dtype=float)
+        a = np.clip(alpha, self.alpha[0], self.alpha[-1])
+        i = np.clip(np.searchsorted(self.alpha, a, side='right')-1, 0, self.nAlpha-2)
+        w = ((a-self.alpha[i])/(self.alpha[i+1]-self.alpha[i]))[...,None]
+        s = np.broadcast_to(np.arange(len(thickness)), alpha.shape)
+        return C[s,i]*(1-w) + C[s,i+1]*w
+
+    def polars(self, thickness, Re=None):
+        """ Returns the list of interpolated polars, arrays with columns alpha [deg], cl, cd, cm """
+        C = self.coeffs(thickness, Re)
+        return [np.column_stack((self.alpha, c)) for c in C]
+
+    def polarTable(self, thickness, Re=None, **kwargs):
+        """ Returns a PolarTable for the stations, kwargs are passed to PolarTable """
+        from welib.airfoils.PolarTable import PolarTable
+        return PolarTable(self.polars(thickness, Re), **kwargs)
+
+    def _derived(self, thickness, Re):
+        """ Unsteady parameters and fully separated quantities of the interpolated polars, memoized """
+        thickness, Re = self._inputs(thickness, Re)
+        key = (thickness.tobytes(), np.ascontiguousarray(Re).tobytes())
+        if key not in self._cache:
+            if len(self._cache)>=self.maxCache:
+                self._cache.pop(next(iter(self._cache))) # removing the oldest query
+            self._cache[key] = unsteadyParamsBatch(self.polars(thickness, Re), alpha=self.alpha, fullySeparated=True)
+        return self._cache[key]
+
+    def unsteadyParams(self, thickness, Re=None):
+        """ Returns the unsteady parameters of the interpolated polars (DataFrame), see unsteadyParamsBatch """
+        return self._derived(thickness, Re)[0]
+
+    def separated(self, thickness, Re=None):
+        """ Returns a dictionary with the separation function f_st, the fully separated lift cl_fs and
+        the inviscid lift cl_inv of the interpolated polars, arrays of shape (nStations x nAlpha) """
+        return self._derived(thickness, Re)[1]
+
+    def f_st(self, thickness, Re=None):
+        return self.separated(thickness, Re)['f_st']
+
+    def cl_fs(self, thickness, Re=None):
+        return self.separated(thickness, Re)['cl_fs']
+
+    def cl_inv(self, thickness, Re=None):
+        return self.separated(thickness, Re)['cl_inv']
@@ -0,0 +1,280 @@
+"""
+Packed polar table: polars of all the radial stations of a blade, resampled on a
+shared uniform grid of angle of attack, and stored in one array of shape (nStations x nAlpha x nCoeff).
+
+The lookup of the coefficients is done with index arithmetic on the uniform grid,
+for all the stations at once (instead of one interpolant function per station).
+
+Example:
+
+    tab = PolarTable(polars)         # polars: list of arrays with columns alpha [deg], Cl, Cd, Cm
+    ClCdCm = tab(alpha)              # alpha [rad], array of shape (..., nStations)
+    ClCdCm = tab(alpha, stations=I)  # alpha [rad], station indices I, arrays of same shape
+
+Packed polars: polars of all the radial stations, concatenated on their own angle of attack grids,
+with a lookup that gives the same values as the linear interpolation of each polar (scipy interp1d),
+and that writes in preallocated arrays (no allocation when the same shape is looked up repeatedly).
+
+    pp = PackedPolars(polars)
+    pp(alpha, out=ClCdCm)            # alpha [rad], array of shape (..., nStations), out: (..., nStations, nCoeff)
+
+"""
+import numpy as np
+
+__all__ = ['PolarTable', 'PackedPolars']
+
+class PolarTable(object):
+    """
+    Packed polar table for a set of stations, on a uniform grid of angle of attack.
+
+    Attributes:
+      - alpha : shared uniform angle of attack grid [rad], shape (nAlpha)
+      - data  : coefficients, shape (nStations x nAlpha x nCoeff), e.g. nCoeff=3 for Cl, Cd, Cm
+
+    NOTE:
+      - the linear interpolation on the uniform grid reproduces the linear interpolation of the
+        original polars with an error that is of the order of `dalpha` times the jump of slope
+        at the original data points (kinks that do not fall on the uniform grid).
+      - angles of attack outside of the grid are clipped to the grid bounds.
+    """
+    def __init__(self, polars, dalpha=None, alpha_min=None, alpha_max=None, radians=False):
+        """
+        INPUTS:
+          - polars: list of nStations arrays of shape (n_i x (1+nCoeff)), first column is alpha
+                    The number of coefficients needs to be the same for all polars.
+          - dalpha: spacing of the uniform grid, in the same unit as the polar alpha.
+                    Default: smallest spacing found in the polars (bounded to 0.01deg)
+          - alpha_min, alpha_max: bounds of the grid, in the same unit as the polar alpha.
+                    Default: range common to all polars.
+          - radians: True if the alpha column of the polars is in radians, False for degrees
+        """
+        polars = [np.asarray(p) for p in polars]
+        nCoeff = polars[0].shape[1]-1
+        for p in polars:
+            if p.shape[1]-1 != nCoeff:
+                raise Exception('All polars should have the same number of columns')
+        if alpha_min is None:
+            alpha_min = np.max([p[0,0]  for p in polars])
+        if alpha_max is None:
+            alpha_max = np.min([p[-1,0] for p in polars])
+        if dalpha is None:
+            dalpha_min = 0.01 if not radians else 0.01*np.pi/180
+            dalpha = np.min([np.min(np.diff(p[:,0])) for p in polars if len(p)>1])
+            dalpha = max(dalpha, dalpha_min)
+        nAlpha = int(np.ceil((alpha_max-alpha_min)/dalpha - 1e-8))+1
+        alpha  = np.linspace(alpha_min, alpha_max, nAlpha)
+
+        # Resampling all polars on the shared grid
+        data = np.zeros((len(polars), nAlpha, nCoeff))
+        for i,p in enumerate(polars):
+            for j in np.arange(nCoeff):
+                data[i,:,j] = np.interp(alpha, p[:,0], p[:,j+1])
+
+        if not radians:
+            alpha = alpha*np.pi/180
+        self.alpha  = alpha
+        self.data   = data
+        self._a0    = alpha[0]
+        self._da    = (alpha[-1]-alpha[0])/(nAlpha-1)
+        # Slopes, precomputed, such that the lookup is C = data[i] + slope[i]*(alpha-alpha_i)
+        self._slope = np.zeros(data.shape)
+        self._slope[:,:-1,:] = np.diff(data, axis=1)/self._da
+
+    @property
+    def nStations(self):
+        return self.data.shape[0]
+
+    @property
+    def nAlpha(self):
+        return self.data.shape[1]
+
+    @property
+    def nCoeff(self):
+        return self.data.shape[2]
+
+    def __repr__(self):
+        s ='<{} object>\n'.format(type(self).__name__)
+        s+=' - nStations: {}, nAlpha: {}, nCoeff: {}\n'.format(self.nStations, self.nAlpha, self.nCoeff)
+        s+=' - alpha: [{:.3f} ; {:.3f}] deg, dalpha: {:.4f} deg\n'.format(self.alpha[0]*180/np.pi, self.alpha[-1]*180/np.pi, self._da*180/np.pi)
+        return s
+
+    def index(self, alpha):
+        """ Returns the index of the lower grid point, and the offset with respect to it [rad] """
+        x = (np.clip(alpha, self.alpha[0], self.alpha[-1]) - self._a0)/self._da
+        i = np.clip(x.astype(int), 0, self.nAlpha-2)
+        return i, (x-i)*self._da
+
+    def __call__(self, alpha, stations=None):
+        """
+        Returns the coefficients at the angles of attack `alpha`
+
+        INPUTS:
+          - alpha: angle of attack [rad]
+          - stations: station indices, array of same shape as alpha.
+                      If None, the stations are along the last dimension of alpha (size nStations).
+        OUTPUTS:
+          - C: array of shape alpha.shape + (nCoeff,)
+        """
+        alpha = np.asarray(alpha)
+        if stations is None:
+            stations = np.arange(self.nStations)
+            if alpha.ndim==0 or alpha.shape[-1]!=self.nStations:
+                raise Exception('Last dimension of alpha should be equal to the number of stations ({})'.format(self.nStations))
+        i, dx = self.index(alpha)
+        return self.data[stations, i] + self._slope[stations, i] * dx[...,None]
+
+    def coeff(self, alpha, j, stations=None):
+        """ Returns the coefficient number j (e.g. 0 for Cl) at the angles of attack `alpha`, see __call__"""
+        alpha = np.asarray(alpha)
+        if stations is None:
+            stations = np.arange(self.nStations)
+        i, dx = self.index(alpha)
+        return self.data[stations, i, j] + self._slope[stations, i, j] * dx
+
+
+class PackedPolars(object):
+    """
+    Polars of a set of stations, concatenated on their own grids of angle of attack.
+
+    The lookup is the linear interpolation of each polar (same values as scipy interp1d).
+    The interval of the angle of attack is found with uniform bins of each polar, finer than 
+    its smallest spacing, followed by a correction of at most a few points.
+
+    Attributes:
+      - x : angles of attack of all the polars [rad], shape (nPoints)
+      - y : coefficients of all the polars, shape (nPoints x nCoeff)
+
+    NOTE:
+      - angles of attack outside of the range of a polar raise a ValueError, as interp1d.
+    """
+    def __init__(self, polars, radians=False):
+        """
+        INPUTS:
+          - polars: list of nStations arrays of shape (n_i x (1+nCoeff)), first column is alpha
+                    The number of coefficients needs to be the same for all polars.
+          - radians: True if the alpha column of the polars is in radians, False for degrees
+        """
+        polars = [np.asarray(p, dtype=float) for p in polars]
+        nCoeff = polars[0].shape[1]-1
+        x, y, bins = [], [], []
+        off, boff = 0, 0
+        self._off   = np.zeros(len(polars), dtype=int) # index of the first point of each polar
+        self._n     = np.zeros(len(polars), dtype=int) # number of points of each polar
+        self._boff  = np.zeros(len(polars), dtype=int) # index of the first bin of each polar
+        self._nBins = np.zeros(len(polars), dtype=int)
+        self._x0    = np.zeros(len(polars))
+        self._x1    = np.zeros(len(polars))
+        self._h     = np.zeros(len(polars))
+        for i,p in enumerate(polars):
+            if p.shape[1]-1 != nCoeff:
+                raise Exception('All polars should have the same number of columns')
+            if len(p)<2:
+                raise Exception('Polars should have at least two points')
+            p = p[np.argsort(p[:,0], kind='mergesort')]
+            xi = p[:,0] if radians else p[:,0]*np.pi/180
+            dx = np.diff(xi)
+            h  = max(np.min(dx), 1e-5*(xi[-1]-xi[0]))
+            nBins = int(np.ceil((xi[-1]-xi[0])/h))+1
+            # Number of points below the start of each bin
+            bins.append(off + np.searchsorted(xi, xi[0]+h*np.arange(nBins)))
+            self._off[i], self._n[i], self._boff[i], self._nBins[i] = off, len(xi), boff, nBins
+            self._x0[i], self._x1[i], self._h[i] = xi[0], xi[-1], h
+            x.append(xi)
+            y.append(p[:,1:])
+            off  += len(xi)
+            boff += nBins
+        self.x = np.concatenate(x)
+        self.y = np.concatenate(y)
+        self._bins = np.concatenate(bins)
+        # Slopes of each interval, computed as interp1d. Zero at the last point of each polar (unused)
+        self._slope = np.zeros(self.y.shape)
+        self._slope[:-1] = (self.y[1:]-self.y[:-1]) / (self.x[1:]-self.x[:-1])[:,None]
+        self._slope[self._off[1:]-1] = 0
+        self._binMax = self._nBins-1          # last bin of each polar
+        self._loMax  = self._off+self._n-2    # last interval of each polar
+        self._work = None
+
+    @property
+    def nStations(self):
+        return len(self._off)
+
+    @property
+    def nCoeff(self):
+        return self.y.shape[1]
+
+    def __repr__(self):
+        s ='<{} object>\n'.format(type(self).__name__)
+        s+=' - nStations: {}, nCoeff: {}, nPoints: {}\n'.format(self.nStations, self.nCoeff, len(self.x))
+        return s
+
+    def _getWork(self, shape):
+        if self._work is None or self._work[0].shape!=shape:
+            self._work = (np.zeros(shape), np.zeros(shape, dtype=int), np.zeros(shape, dtype=int), 
+                          np.zeros(shape, dtype=bool), np.zeros(shape, dtype=bool), np.zeros(shape+(self.nCoeff,)))
+        return self._work
+
+    def index(self, alpha):
+        """ Returns the index (in x) of the lower point of the interval of each angle of attack, 
+        as interp1d (interval on the left of a grid point, except for the first point of a polar).
+        The stations are along the last dimension of alpha. The returned array is a work array.
+        """
+        alpha = np.asarray(alpha)
+        if alpha.ndim==0 or alpha.shape[-1]!=self.nStations:
+            raise Exception('Last dimension of alpha should be equal to the number of stations ({})'.format(self.nStations))
+        t, c, ci, b, b2, _ = self._getWork(alpha.shape)
+        if np.any(np.less(alpha, self._x0, out=b)):
+            raise ValueError('A value of alpha is below the range of the polars.')
+        if np.any(np.greater(alpha, self._x1, out=b)):
+            raise ValueError('A value of alpha is above the range of the polars.')
+        # Bin of each angle of attack
+        np.subtract(alpha, self._x0, out=t)
+        t /= self._h
+        np.floor(t, out=t)
+        np.copyto(t, 0., where=np.isnan(t, out=b))
+        np.copyto(c, t, casting='unsafe')
+        np.clip(c, 0, self._binMax, out=c)
+        c += self._boff
+        # Number of points below alpha (as searchsorted), from the number of points below the bin.
+        # The bins are finer than the spacing, the corrections are of one point, unless round-off 
+        np.take(self._bins, c, out=c, mode='clip')
+        while True:
+            np.subtract(c, 1, out=ci)
+            np.take(self.x, ci, out=t, mode='clip')
+            np.greater_equal(t, alpha, out=b)
+            b &= np.greater(c, self._off, out=b2)
+            if not np.any(b):
+                break
+            c -= b
+        while True:
+            np.take(self.x, c, out=t, mode='clip')
+            np.less(t, alpha, out=b)
+            if not np.any(b):
+                break
+            c += b
+        # Lower point of the interval
+        c -= 1
+        np.clip(c, self._off, self._loMax, out=c)
+        return c
+
+    def __call__(self, alpha, out=None):
+        """
+        Returns the coefficients at the angles of attack `alpha`
+
+        INPUTS:
+          - alpha: angle of attack [rad], the stations are along the last dimension (size nStations)
+          - out  : optional output array of shape alpha.shape + (nCoeff,)
+        OUTPUTS:
+          - C: array of shape alpha.shape + (nCoeff,)
+        """
+        alpha = np.asarray(alpha)
+        if out is None:
+            out = np.zeros(alpha.shape+(self.nCoeff,))
+        lo = self.index(alpha)
+        dx = self._work[0]
+        # C = slope*(alpha-x_lo) + y_lo
+        np.take(self.x, lo, out=dx, mode='clip')
+        np.subtract(alpha, dx, out=dx)
+        np.take(self._slope, lo, axis=0, out=out, mode='clip')
+        out *= dx[...,None]
+        out += np.take(self.y, lo, axis=0, out=self._work[5], mode='clip')
+        return out
@@ -1,2 +1,3 @@
 from .Polar import *
 from .DynamicStall import *
+from .PolarTable import *
@@ -153,6 +153,109 @@ class TestDynamicStall(unittest.TestCase):
         #plt.legend()
         #plt.show()
 
+    def test_discrete_vectorized(self):
+        # Discrete MHH/Oye models for a set of stations, compared to the time integration of the ODE
+        P=Polar.fromfile(os.path.join(MyDir,'../data/FFA-W3-241-Re12M.dat'),compute_params=True,to_radians=True)
+        U0, chord = 10, 0.1591
+        alpha1  = P._alpha0 
+        alpha2  = alpha1+12*np.pi/180
+        tau_t   = np.linspace(0,60,601)
+        vt      = chord * tau_t / (2*U0)
+        dt      = vt[1]-vt[0]
+        np.seterr(under='ignore')
+        p = dynstall_mhh_param_from_polar(P, chord, tau_chord=chord/U0, Jones=True)
+        u=dict()
+        u['U']         = lambda t: U0
+        u['U_dot']     = lambda t: 0 
+        u['alpha']     = lambda t: alpha1 if t<=0 else alpha2 
+        u['alpha_dot'] = lambda t: 0
+        u['alpha_34']  = u['alpha']
+        sol = solve_ivp(lambda t,x: dynstall_mhh_dxdt(t,x,u,p), t_span=[0, max(vt)], y0=dynstall_mhh_steady(0,u,p), t_eval=vt, rtol=1e-8, atol=1e-10)
+        Cl_ref = np.array([dynstall_mhh_outputs(t,sol.y[:,it],u,p)[0] for it,t in enumerate(vt)])
+
+        # Two stations with the same polar
+        pt = dynstall_mhh_param_table([P,P], [chord,chord], Jones=True)
+        U  = np.array([U0,U0])
+        a2 = np.array([alpha2,alpha2])
+        x  = dynstall_mhh_discrete_steady(np.array([alpha1,alpha1]), pt)
+        Cl = np.zeros((len(vt),2))
+        Cl[0] = P.cl_interp(alpha1)
+        for it in np.arange(1,len(vt)):
+            x = dynstall_mhh_discrete_step(x, dt, a2, 0*a2, U, U, pt, out=x)
+            Cl[it] = dynstall_mhh_discrete_outputs(x, a2, 0*a2, U, pt)[0]
+        np.testing.assert_allclose(Cl[:,0], Cl_ref, atol=2e-3)
+        np.testing.assert_equal(Cl[:,0], Cl[:,1])
+
+        # Steady states reproduce the steady polar
+        alpha = np.linspace(-0.5,0.5,11)[:,None]*np.ones(2)
+        x = dynstall_mhh_discrete_steady(alpha, pt)
+        np.testing.assert_allclose(dynstall_mhh_discrete_outputs(x, alpha, 0, U0, pt)[0], P.cl_interp(alpha), atol=1e-10)
+        po = dynstall_oye_param_table([P,P], [chord,chord])
+        fs = dynstall_oye_discrete_steady(alpha, po)
+        np.testing.assert_allclose(dynstall_oye_discrete_outputs(fs, alpha, po)[0], P.cl_interp(alpha), atol=1e-10)
+        # Oye, exponential relaxation towards the steady separation function
+        fs1 = dynstall_oye_discrete_step(fs, 0.01, alpha+0.1, U0, po)
+        fs_st = dynstall_oye_discrete_steady(alpha+0.1, po)
+        tau = po['tau']*chord/U0
+        np.testing.assert_allclose(fs1, fs_st+(fs-fs_st)*np.exp(-0.01/tau))
+
+    def test_discrete_sim(self):
+        # Batch simulation of several sections with pitching motions, compared to the ODE of each section.
+        # The ODE uses the same tabulated separation function, and the outputs of both are computed with
+        # the discrete output functions, such that the differences are only due to the time discretization.
+        # The inputs are constant over a time step: the error is first order in dt.
+        P=Polar.fromfile(os.path.join(MyDir,'../data/FFA-W3-241-Re12M.dat'),compute_params=True,to_radians=True)
+        np.seterr(under='ignore')
+        chord = np.array([0.1591, 0.3, 0.5])
+        U0    = np.array([10, 20, 15])
+        om    = np.array([6, 3, 12])
+        amp   = np.array([8, 10, 4])*np.pi/180
+        a_m   = np.array([10, 5, 15])*np.pi/180
+        pm = dynstall_mhh_param_table([P]*3, chord, FAST=True)
+        po = dynstall_oye_param_table([P]*3, chord)
+        fAlpha    = lambda t: a_m[:,None] + amp[:,None]*np.sin(om[:,None]*t)
+        fAlphaDot = lambda t: amp[:,None]*om[:,None]*np.cos(om[:,None]*t)
+        # --- Reference, ODE of each section
+        tRef = np.linspace(0, 2, 101)
+        x_ref  = np.zeros((3, len(tRef), 4))
+        fs_ref = np.zeros((3, len(tRef)))
+        for i in range(3):
+            u=dict()
+            u['U']         = lambda t: U0[i]
+            u['U_dot']     = lambda t: 0 
+            u['alpha']     = lambda t: a_m[i] + amp[i]*np.sin(om[i]*t)
+            u['alpha_dot'] = lambda t: amp[i]*om[i]*np.cos(om[i]*t)
+            u['alpha_34']  = u['alpha']
+            # MHH
+            p = dynstall_mhh_param_from_polar(P, chord[i], tau_chord=chord[i]/U0[i], FAST=True)
+            p['F_st'] = lambda a: pm['table'].coeff(a, 3, stations=i)
+            sol = solve_ivp(lambda t,x: dynstall_mhh_dxdt(t,x,u,p), t_span=[0, tRef[-1]], y0=dynstall_mhh_steady(0,u,p), t_eval=tRef, rtol=1e-10, atol=1e-12)
+            x_ref[i] = sol.y.T
+            # Oye
+            p = dynstall_oye_param_from_polar(P, tau_chord=chord[i]/U0[i])
+            p['F_st'] = lambda a: po['table'].coeff(a, 3, stations=i)
+            sol = solve_ivp(lambda t,x: dynstall_oye_dxdt(t,x,u,p), t_span=[0, tRef[-1]], y0=[p['F_st'](a_m[i])], t_eval=tRef, rtol=1e-10, atol=1e-12)
+            fs_ref[i] = sol.y[0]
+        U = np.broadcast_to(U0, (len(tRef),3))
+        Cl_m_ref = dynstall_mhh_discrete_outputs(np.swapaxes(x_ref,0,1), fAlpha(tRef).T, fAlphaDot(tRef).T, U, pm)[0].T
+        Cl_o_ref = dynstall_oye_discrete_outputs(fs_ref.T, fAlpha(tRef).T, po)[0].T
+        # --- Discrete simulations, with time step refinement
+        err_m, err_o = [], []
+        for n in [501, 1001, 2001]:
+            time = np.linspace(0, 2, n)
+            k = (n-1)//(len(tRef)-1)
+            Cl_m, Cd_m, Cm_m, x = dynstall_mhh_discrete_sim(time, fAlpha(time), U0[:,None], pm, alpha_dot=fAlphaDot(time), states=True)
+            Cl_o, Cd_o, Cm_o, fs = dynstall_oye_discrete_sim(time, fAlpha(time), U0[:,None], po, states=True)
+            err_m.append(np.max(np.abs(Cl_m[:,::k]-Cl_m_ref)))
+            err_o.append(np.max(np.abs(Cl_o[:,::k]-Cl_o_ref)))
+        self.assertEqual(Cl_m.shape, (3, len(time)))
+        self.assertEqual(x.shape, (3, len(time), 4))
+        self.assertEqual(fs.shape, (3, len(time)))
+        for err in [err_m, err_o]:
+            ratio = np.array(err[:-1])/np.array(err[1:])
+            self.assertTrue(np.all((ratio>1.8) & (ratio<2.2)), ratio) # first order convergence
+        self.assertLess(err_m[-1], 4.5e-3) # dt=1e-3
+        self.assertLess(err_o[-1], 2e-3)
 
 
 if __name__ == '__main__':
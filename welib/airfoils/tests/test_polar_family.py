@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+import os
+MyDir=os.path.dirname(__file__)
+from welib.airfoils.Polar import * 
+from welib.airfoils.PolarFamily import * 
+
+# --------------------------------------------------------------------------------}
+# ---  
+# --------------------------------------------------------------------------------{
+class TestPolarFamily(unittest.TestCase):
+    def setUp(self):
+        AFDir = os.path.join(MyDir,'../../../data/NREL5MW/data/Airfoils/')
+        names = ['NACA64_A17','DU21_A17','DU25_A17','DU30_A17','DU35_A17','DU40_A17']
+        P = [Polar.fromfile(os.path.join(AFDir,n+'.dat')) for n in names]
+        self.polars    = [np.column_stack((p.alpha,p.cl,p.cd,p.cm)) for p in P]
+        self.thickness = np.array([18,21,25,30,35,40])
+
+    def test_thickness(self):
+        # --- Same as blending the polars one station at a time
+        fam = PolarFamily(self.polars[::-1], self.thickness[::-1])
+        self.assertEqual(fam.data.shape, (6, 1, fam.nAlpha, 3))
+        t = np.array([15, 19, 22.5, 27, 39, 45])
+        polarList = np.empty(len(self.polars), dtype=object)
+        polarList[:] = self.polars
+        ref = thicknessinterp_from_one_set(t, polarList, self.thickness)
+        pol = fam.polars(t)
+        for p, pr in zip(pol, ref):
+            np.testing.assert_allclose(p[:,1:], np.column_stack([np.interp(p[:,0], pr[:,0], pr[:,j]) for j in [1,2,3]]), atol=1e-12)
+        # --- Query at given angles of attack, per station
+        alpha = np.array([[0, 5, 10, -5, 20, 3], [1, 2, 3, 4, 5, 6]])
+        C = fam.coeffs(t, alpha=alpha)
+        self.assertEqual(C.shape, (2, 6, 3))
+        np.testing.assert_allclose(C[1,2,0], np.interp(3, pol[2][:,0], pol[2][:,1]))
+        # --- PolarTable
+        tab = fam.polarTable(t)
+        np.testing.assert_allclose(tab(alpha*np.pi/180)[...,0], C[...,0], atol=5e-3)
+
+    def test_Re(self):
+        # --- Family function of thickness and Reynolds number
+        P2 = [[p, p*np.array([1,1.1,0.9,1])] for p in self.polars]
+        fam = PolarFamily(P2, self.thickness, Re=[3,6])
+        self.assertEqual(fam.data.shape, (6, 2, fam.nAlpha, 3))
+        C = fam.coeffs([21, 21, 21, 50], Re=[3, 4.5, 6, 10])
+        np.testing.assert_allclose(C[1], (C[0]+C[2])/2)
+        np.testing.assert_allclose(C[2,:,0], C[0,:,0]*1.1)
+        np.testing.assert_allclose(C[2,:,1], C[0,:,1]*0.9)
+        np.testing.assert_allclose(C[3], fam.data[-1,-1])
+
+    def test_separated(self):
+        # --- Memoized derived quantities, same as unsteadyParamsBatch on the interpolated polars
+        fam = PolarFamily(self.polars, self.thickness)
+        t = np.array([19, 24, 33])
+        sep = fam.separated(t)
+        self.assertEqual(sep['f_st'].shape, (3, fam.nAlpha))
+        self.assertIs(fam.separated(t), sep)
+        self.assertIs(fam.cl_fs(t), sep['cl_fs'])
+        df, ref = unsteadyParamsBatch(fam.polars(t), fullySeparated=True)
+        np.testing.assert_allclose(fam.unsteadyParams(t).drop(columns='valid').values, df.drop(columns='valid').values)
+        np.testing.assert_equal(fam.unsteadyParams(t)['valid'].values, df['valid'].values)
+        np.testing.assert_allclose(sep['cl_inv'], ref['cl_inv'])
+        # Single polar, same as the Polar methods
+        p = fam.polars([21])[0]
+        P = Polar(np.nan, p[:,0], p[:,1], p[:,2], p[:,3])
+        cl_fs, f_st = P.cl_fully_separated()
+        np.testing.assert_allclose(fam.cl_fs([21])[0], cl_fs, atol=1e-10)
+        np.testing.assert_allclose(fam.f_st([21])[0], f_st, atol=1e-10)
+
+if __name__ == '__main__':
+    unittest.main()
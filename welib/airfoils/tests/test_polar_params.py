@@ -146,6 +146,33 @@ class TestPolarParams(unittest.TestCase):
         #ax.set_ylim([-3,2.0])
         #plt.show()
 
+    def test_batch(self):
+        # Batch parameters should match the parameters computed one polar at a time
+        files = ['63-235.csv','FFA-W3-241-Re12M.dat','DU21_A17.csv']
+        for f in files:
+            P = Polar.fromfile(os.path.join(MyDir,'../data/'+f))
+            df, fs = unsteadyParamsBatch([P], fullySeparated=True)
+            np.testing.assert_allclose(df.iloc[0,:8].values.astype(float), P.unsteadyParams(), atol=1e-10)
+            np.testing.assert_almost_equal(df['clSlope'].values[0], P.cl_linear_slope(method='max')[0])
+            np.testing.assert_almost_equal(df['Cl_max'].values[0], P.cl_max()[0])
+            cl_fs, f_st = P.cl_fully_separated()
+            I = (P.alpha>=fs['alpha'][0]) & (P.alpha<=fs['alpha'][-1])
+            np.testing.assert_allclose(np.interp(P.alpha[I], fs['alpha'], fs['cl_fs'][0]), cl_fs[I], atol=1e-10)
+        # Several polars, shared grid (union of alpha values, common range)
+        P = [Polar.fromfile(os.path.join(MyDir,'../data/'+f)) for f in files] + [self.PCyl]
+        df = unsteadyParamsBatch(P)
+        self.assertEqual(len(df), 4)
+        for i in range(3):
+            np.testing.assert_allclose(df.iloc[i,:8].values.astype(float), P[i].unsteadyParams(), atol=5e-3)
+        np.testing.assert_allclose(df.iloc[3,:8].values.astype(float), self.PCyl.unsteadyParams())
+        self.assertTrue(df['valid'].all())
+        # Polar without stall, cn_f intersects cn once, the row is flagged
+        alpha = np.linspace(-30, 30, 61)
+        PLin = Polar(np.nan, alpha, 0.1*alpha, 0.01+0*alpha, 0*alpha)
+        df = unsteadyParamsBatch(P[:1]+[PLin])
+        np.testing.assert_equal(df['valid'].values, [True, False])
+        self.assertEqual(df['valid'].dtype, bool)
+
     def test_linear_region(self):
 
         P=self.PCyl
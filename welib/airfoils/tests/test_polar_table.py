@@ -0,0 +1,88 @@
+import unittest
+import numpy as np
+import os
+from scipy.interpolate import interp1d
+MyDir=os.path.dirname(__file__)
+from welib.airfoils.Polar import * 
+from welib.airfoils.PolarTable import * 
+
+# --------------------------------------------------------------------------------}
+# ---  
+# --------------------------------------------------------------------------------{
+class TestPolarTable(unittest.TestCase):
+
+    def test_lookup(self):
+        # --- Table lookup vs interpolation of each polar
+        P1=Polar.fromfile(os.path.join(MyDir,'../data/FFA-W3-241-Re12M.dat'))
+        P2=Polar.fromfile(os.path.join(MyDir,'../data/DU21_A17.csv'))
+        polars=[np.column_stack((P.alpha,P.cl,P.cd,P.cm)) for P in [P1,P2,P1]]
+        tab = PolarTable(polars)
+        self.assertEqual(tab.data.shape, (3, tab.nAlpha, 3))
+        alpha = np.linspace(-np.pi, np.pi, 1001)
+        alpha = np.column_stack([alpha]*3)
+        C = tab(alpha)
+        self.assertEqual(C.shape, (1001,3,3))
+        for i,p in enumerate(polars):
+            Cref = interp1d(p[:,0]*np.pi/180, p[:,1:], axis=0)(alpha[:,i])
+            np.testing.assert_allclose(C[:,i,:], Cref, atol=5e-3)
+        # Values at grid points are exact
+        np.testing.assert_allclose(tab(tab.alpha[:,None], stations=np.zeros((tab.nAlpha,1),dtype=int))[:,0,:], tab.data[0], atol=1e-12)
+
+        # --- Explicit station indices, and single coefficient
+        I = np.array([[0,1],[2,2]])
+        a = np.array([[0.1,0.2],[-0.1,0.3]])
+        C = tab(a, stations=I)
+        np.testing.assert_allclose(C[1,1], tab(np.array([0.,0.,0.3]))[2])
+        np.testing.assert_allclose(tab.coeff(a, 0, stations=I), C[...,0])
+
+    def test_packed(self):
+        # --- Packed polars give the same values as the interpolation of each polar
+        P1=Polar.fromfile(os.path.join(MyDir,'../data/FFA-W3-241-Re12M.dat'))
+        P2=Polar.fromfile(os.path.join(MyDir,'../data/DU21_A17.csv'))
+        polars=[np.column_stack((P.alpha,P.cl,P.cd,P.cm)) for P in [P1,P2,P1]]
+        pp = PackedPolars(polars)
+        alpha = np.random.default_rng(0).uniform(-np.pi, np.pi, (1001,3))
+        alpha[:len(polars[1]),1] = polars[1][:,0]*np.pi/180 # grid points
+        C = np.zeros(alpha.shape+(3,))
+        pp(alpha, out=C)
+        for i,p in enumerate(polars):
+            Cref = interp1d(p[:,0]*np.pi/180, p[:,1:], axis=0)(alpha[:,i])
+            np.testing.assert_array_equal(C[:,i,:], Cref)
+        np.testing.assert_array_equal(pp(alpha[:2]), C[:2])
+        # Out of range
+        with self.assertRaises(ValueError):
+            pp(np.array([0, 0, 4]))
+
+    def test_linear(self):
+        # --- Piecewise linear polar with kinks on the grid is reproduced exactly
+        alpha = np.array([-180,-10,0,10,180])
+        pol   = np.column_stack((alpha, 2*np.pi*alpha*np.pi/180, alpha**2/1000, alpha*0))
+        tab = PolarTable([pol], dalpha=1)
+        a = np.linspace(-15,15,37)*np.pi/180
+        C = tab(a[:,None])[:,0,:]
+        np.testing.assert_allclose(C[:,0], 2*np.pi*a, atol=1e-12)
+        np.testing.assert_allclose(C[:,1], np.interp(a*180/np.pi, alpha, alpha**2/1000), atol=1e-12)
+
+    def test_blade(self):
+        # --- 3D correction and extrapolation of all stations vs one polar at a time
+        P1=Polar.fromfile(os.path.join(MyDir,'../data/63-235.csv'))
+        P2=Polar.fromfile(os.path.join(MyDir,'../data/DU21_A17.csv'))
+        alpha = np.arange(-20,25.5,0.5)
+        polars=[np.column_stack([alpha]+[np.interp(alpha, P.alpha, c) for c in [P.cl,P.cd,P.cm]]) for P in [P1,P2]]
+        r_R, c_r, tsr = np.array([0.3,0.6]), np.array([0.25,0.1]), 7
+        a, cl, cd, cm = bladePolarTable(polars, r_R, c_r, tsr, cdmax=1.3, asArrays=True)
+        for i,p in enumerate(polars):
+            P = Polar(None, alpha=p[:,0], cl=p[:,1], cd=p[:,2], cm=p[:,3], compute_params=False, radians=False)
+            P = P.correction3D(r_R[i], c_r[i], tsr).extrapolate(1.3)
+            np.testing.assert_allclose(a    , P.alpha, atol=1e-10)
+            np.testing.assert_allclose(cl[i], P.cl, atol=1e-10)
+            np.testing.assert_allclose(cd[i], P.cd, atol=1e-10)
+            np.testing.assert_allclose(cm[i], P.cm, atol=1e-10)
+        # Packed table for the BEM codes
+        tab = bladePolarTable(polars, r_R, c_r, tsr, cdmax=1.3)
+        self.assertEqual(tab.data.shape, (2, 721, 3))
+        np.testing.assert_allclose(tab.alpha[[0,-1]], [-np.pi, np.pi])
+        np.testing.assert_allclose(tab(np.array([0.1,0.1]))[:,0], [np.interp(0.1, a*np.pi/180, c) for c in cl], atol=1e-10)
+
+if __name__ == '__main__':
+    unittest.main()
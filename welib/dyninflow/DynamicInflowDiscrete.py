@@ -0,0 +1,118 @@
+"""
+Oye's dynamic inflow model, discrete and vectorized
+
+The model acts on the quasi-steady induced velocity W_qs, via an intermediate velocity W_int:
+
+    tau1 dW_int/dt + W_int = W_qs + k tau1 dW_qs/dt
+    tau2 dW/dt     + W     = W_int
+
+with k=0.6, tau1 = 1.1/(1-1.3 min(a,0.5)) R/U0, and tau2 = (0.39-0.26(r/R)^2) tau1.
+
+The discrete update is exact when W_qs varies linearly over the time step, and tau1 is constant
+over the time step (see e.g. AeroDyn DBEMT theory, Eq. 1.21 and 1.25).
+It is done for arrays of arbitrary shape, e.g. (nB x nr x 3) or (nCases x nB x nr x 3).
+
+Example:
+
+    W_int, W = W_qs0.copy(), W_qs0.copy() # steady state
+    for it in range(nt):
+        tau1 = tau1_oye(a_avg[it], R/U0[it])
+        dyninflow_oye_discrete_step(W_int, W, W_qs[it], W_qs[it+1], dt, tau1[...,None,None], r/R, out=(W_int, W))
+
+"""
+import numpy as np
+
+__all__ = ['tau1_oye', 'tau1_dbemt', 'tau2_oye', 'dyninflow_oye_discrete_step', 'dyninflow_oye_sim']
+
+
+def tau1_oye(a_bar, R_U0):
+    """ Time constant tau1 of Oye's model, a_bar: mean axial induction, R_U0: R/U0
+    Inputs are scalar or arrays"""
+    return 1.1/( 1-1.3*np.minimum(a_bar,0.5) ) * R_U0
+
+def tau1_dbemt(a_disk, R, Un_disk, tau1_max=100):
+    """ Time constant tau1, as computed by AeroDyn's DBEMT, with the disk averaged
+    normal velocity (including the structural velocity), bounded to `tau1_max` [s]
+    Inputs are scalar or arrays"""
+    Un_disk = np.maximum(Un_disk, 0.1)
+    return np.minimum(tau1_oye(a_disk, R/Un_disk), tau1_max)
+
+def tau2_oye(r_bar, tau1):
+    """ Time constant tau2 of Oye's model, r_bar = r/R """
+    return (0.39-0.26*r_bar**2)*tau1
+
+
+def dyninflow_oye_discrete_step(W_int, W, W_qs_prev, W_qs, dt, tau1, r_bar, k=0.6, out=None):
+    """
+    Exact discrete update of Oye's dynamic inflow model over one time step, assuming
+    a linear variation of the quasi-steady induced velocity over the time step.
+
+    INPUTS:
+      - W_int, W : intermediate and dynamic induced velocities at t, arrays of shape (..., nc), e.g. (nB x nr x 3)
+      - W_qs_prev, W_qs : quasi-steady induced velocities at t and t+dt, same shape as W
+      - dt       : time step
+      - tau1     : time constant [s], scalar or array broadcastable to W.shape[:-1], e.g. (nCases x 1 x 1)
+      - r_bar    : r/R, scalar or array broadcastable to W.shape[:-1], e.g. (nr)
+      - k        : coefficient of the quasi-steady derivative
+      - out      : tuple (W_int_new, W_new) of arrays of same shape as W, can be (W_int, W) for an in place update
+    OUTPUTS:
+      - W_int_new, W_new: intermediate and dynamic induced velocities at t+dt
+    """
+    tau1  = np.asarray(tau1, dtype=float)[...,None]
+    k_tau = (0.39-0.26*np.asarray(r_bar, dtype=float)**2)[...,None] # tau2/tau1
+    tau2  = k_tau*tau1
+    e1 = np.exp(-dt/tau1)
+    e2 = np.exp(-dt/tau2)
+    # Linear quasi-steady input: W_qs(t') = A - k tau1 B + B t', with forcing of first equation A + B t'
+    B  = np.subtract(W_qs, W_qs_prev)
+    B /= dt
+    A  = W_qs_prev + k*tau1*B
+    C1 = W_int - A + B*tau1        # Homogeneous part of the intermediate velocity
+    C1 /= (1-k_tau)
+    # C2 = W - C1/(1-k_tau) - A + B(tau1+tau2)
+    C2 = np.subtract(W, C1)
+    C2 -= A
+    C2 += B*(tau1+tau2)
+    if out is None:
+        out = (np.empty(np.shape(W)), np.empty(np.shape(W)))
+    W_int_new, W_new = out
+    # W_new = C2 e2 + A + B(dt-tau1-tau2) + C1/(1-k_tau) e1, with W_int_new = C1 e1 + A + B (dt-tau1)
+    np.multiply(C2, e2, out=W_new)
+    W_new += A
+    W_new += B*(dt-tau1-tau2)
+    C1 *= e1
+    W_new += C1
+    C1 *= (1-k_tau)
+    np.add(A, B*(dt-tau1), out=W_int_new)
+    W_int_new += C1
+    return W_int_new, W_new
+
+
+def dyninflow_oye_sim(time, W_qs, tau1, r_bar, k=0.6, W0=None, W_int0=None):
+    """
+    Time integration of Oye's dynamic inflow model for a full time history of quasi-steady
+    induced velocities, for fast parametric studies.
+
+    INPUTS:
+      - time : array of times (nt), not necessarily uniform
+      - W_qs : quasi-steady induced velocities, array (nt x ... x nc)
+      - tau1 : time constant, scalar, array broadcastable to W_qs.shape[1:-1],
+               or array (nt x ...) of time constants per time step (used from t to t+dt)
+      - r_bar: r/R, scalar or array broadcastable to W_qs.shape[1:-1]
+      - W0, W_int0: initial values of the dynamic and intermediate velocities (default: W_qs[0], steady state)
+    OUTPUTS:
+      - W, W_int: dynamic and intermediate induced velocities, arrays of same shape as W_qs
+    """
+    time  = np.asarray(time, dtype=float)
+    W_qs  = np.asarray(W_qs, dtype=float)
+    tau1  = np.asarray(tau1, dtype=float)
+    bTau1Time = tau1.ndim>0 and tau1.shape[0]==len(time) and tau1.ndim==W_qs.ndim-1
+    W     = np.zeros(W_qs.shape)
+    W_int = np.zeros(W_qs.shape)
+    W[0]     = W_qs[0] if W0     is None else W0
+    W_int[0] = W_qs[0] if W_int0 is None else W_int0
+    for it in np.arange(len(time)-1):
+        dt = time[it+1]-time[it]
+        tau1_t = tau1[it] if bTau1Time else tau1
+        dyninflow_oye_discrete_step(W_int[it], W[it], W_qs[it], W_qs[it+1], dt, tau1_t, r_bar, k=k, out=(W_int[it+1], W[it+1]))
+    return W, W_int
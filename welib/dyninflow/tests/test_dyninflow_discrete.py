@@ -0,0 +1,48 @@
+import unittest
+import numpy as np
+from welib.dyninflow.DynamicInflowDiscrete import *
+
+class Test(unittest.TestCase):
+
+    def test_steady(self):
+        # Constant quasi-steady inputs are an equilibrium
+        W_qs = np.random.RandomState(0).rand(3,10,3)
+        W_int, W = dyninflow_oye_discrete_step(W_qs, W_qs, W_qs, W_qs, 0.1, 5, np.linspace(0.1,1,10))
+        np.testing.assert_allclose(W_int, W_qs, rtol=1e-12)
+        np.testing.assert_allclose(W    , W_qs, rtol=1e-12)
+
+    def test_exact(self):
+        # The discretization is exact for linear inputs: independent of the time step
+        r_bar = np.array([0.2, 0.5, 0.9])
+        tau1  = 4
+        def sim(dt):
+            time = np.arange(0, 10+dt/2, dt)
+            W_qs = np.zeros((len(time),3,2))
+            W_qs[:,:,0] = 0.3 + 0.02*time[:,None]
+            W_qs[:,:,1] = 0.1 - 0.01*time[:,None]
+            W, W_int = dyninflow_oye_sim(time, W_qs, tau1, r_bar, W0=np.zeros((3,2)), W_int0=np.zeros((3,2)))
+            return W[-1], W_int[-1]
+        W1, W_int1 = sim(1.0)
+        W2, W_int2 = sim(0.01)
+        np.testing.assert_allclose(W1    , W2    , rtol=1e-10)
+        np.testing.assert_allclose(W_int1, W_int2, rtol=1e-10)
+
+    def test_ode(self):
+        # Comparison with the second order ODE, for a sinusoidal input
+        from scipy.integrate import solve_ivp
+        tau1, r_bar, k = 5., 0.5, 0.6
+        tau2 = tau2_oye(r_bar, tau1)
+        f    = lambda t: 0.3+0.1*np.sin(0.7*t)
+        fdot = lambda t: 0.07*np.cos(0.7*t)
+        time = np.arange(0, 30.01, 0.05)
+        W, W_int = dyninflow_oye_sim(time, f(time)[:,None], tau1, r_bar, k=k)
+        system = lambda t,x: [x[1], 1/(tau1*tau2)*(-x[0]-(tau1+tau2)*x[1]+f(t))+k/tau2*fdot(t)]
+        sol = solve_ivp(system, [0, time[-1]], [f(0), 0], t_eval=time, rtol=1e-10, atol=1e-12)
+        np.testing.assert_allclose(W[:,0], sol.y[0], atol=1e-5)
+
+    def test_tau1(self):
+        np.testing.assert_allclose(tau1_oye(np.array([0, 0.2, 0.8]), 10), [11, 11/0.74, 11/0.35])
+        np.testing.assert_allclose(tau1_dbemt(0.2, 60, np.array([10, 0.0])), [6.6/0.74, 100])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -67,3 +67,82 @@ class Timer(object):
         else:
             s=self.ref_str()
             print(s+'Elapsed: {:6s}'.format(pretty_time(time.time() - self.tstart)))
+
+
+class PerfCounters(object):
+    """ Cumulative phase timers, call counts, counters and histograms, used to instrument solvers.
+    The solvers hold a reference to a PerfCounters object, or None when the instrumentation
+    is disabled (in which case the cost is one test per phase).
+
+    usage:
+
+        perf = PerfCounters()
+        perf.tic()
+        cmd1
+        perf.toc('phase1')          # time since last tic/toc added to 'phase1'
+        cmd2
+        perf.toc('phase2')
+        perf.count('nonConverged')  # counter
+        perf.hist('nIt', nIt)       # histogram of integer values (e.g. number of iterations)
+        print(perf)
+        report = perf.report()      # dictionary with 'phases' (DataFrame), 'counters' and 'histograms'
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.times    = {}
+        self.calls    = {}
+        self.counters = {}
+        self.hists    = {}
+        self._t = time.perf_counter()
+
+    def tic(self):
+        self._t = time.perf_counter()
+
+    def toc(self, phase):
+        t = time.perf_counter()
+        self.times[phase] = self.times.get(phase, 0.) + (t - self._t)
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+        self._t = t
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def hist(self, name, values):
+        """ Adds integer values (>=0) to the histogram `name`, h[i]: number of occurences of i """
+        h = np.bincount(np.asarray(values, dtype=int).ravel())
+        h0 = self.hists.get(name, np.zeros(0, dtype=int))
+        if len(h0)<len(h):
+            h0 = np.concatenate((h0, np.zeros(len(h)-len(h0), dtype=int)))
+        h0[:len(h)] += h
+        self.hists[name] = h0
+
+    def report(self):
+        """ Returns a dictionary with:
+          - 'phases': DataFrame with cumulative time, calls, time per call and fraction of time, per phase
+          - 'counters': dictionary of counters
+          - 'histograms': dictionary of histograms (arrays, h[i]: number of occurences of i)
+        """
+        import pandas as pd
+        phases = list(self.times.keys())
+        times  = np.array([self.times[k] for k in phases])
+        calls  = np.array([self.calls[k] for k in phases])
+        ttot   = max(np.sum(times), 1e-16)
+        df = pd.DataFrame(index=phases, dtype=float)
+        df['Time_[s]']        = times
+        df['Calls_[-]']       = calls
+        df['TimePerCall_[s]'] = times/np.maximum(calls, 1)
+        df['Fraction_[%]']    = times/ttot*100
+        return {'phases': df, 'counters': dict(self.counters), 'histograms': {k:v.copy() for k,v in self.hists.items()}}
+
+    def __repr__(self):
+        s='<{} object>\n'.format(type(self).__name__)
+        for k in self.times.keys():
+            s+=' - {:15s}: {:6s} ({:9d} calls) {:5.1f}%\n'.format(k, pretty_time(self.times[k]), self.calls[k], self.times[k]/max(sum(self.times.values()),1e-16)*100)
+        for k,v in self.counters.items():
+            s+=' - {:15s}: {}\n'.format(k, v)
+        for k,v in self.hists.items():
+            I = np.nonzero(v)[0]
+            s+=' - {:15s}: {}\n'.format(k, ', '.join(['{}:{}'.format(i,v[i]) for i in I]))
+        return s
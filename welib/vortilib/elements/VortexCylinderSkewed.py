@@ -35,94 +35,92 @@ def polar_components(u_x,u_y,vpsi):
 # --------------------------------------------------------------------------------}
 # --- Core functions, polar coordinates inputs
 # --------------------------------------------------------------------------------{
-def svc_tang_u_polar(vr,vpsi,vz,gamma_t=-1,R=1,m=0,ntheta=180,polar_out=False):
+def _theta_quadrature(ntheta, theta0, psi, quad='trapz'):
+    """ Quadrature weights over [theta0, theta0+2pi], and trigonometric functions of the quadrature points
+      - 'trapz': trapezoidal rule on ntheta equidistant points (both ends included, as np.trapz)
+      - 'gauss': Gauss-Legendre rule with ntheta points
+    theta0 and psi are scalars or arrays (n x 1), the functions are then of shape (n x ntheta).
+    The angle additions are used instead of evaluating cos and sin on the 2D arrays.
+    OUTPUTS:
+      - weights, cos(theta), sin(theta), cos(theta-psi), sin(theta-psi)
+    """
+    if quad=='trapz':
+        phi     = np.linspace(0, 2*np.pi, ntheta)
+        weights = np.full(ntheta, 2*np.pi/(ntheta-1))
+        weights[[0,-1]] /= 2
+    elif quad=='gauss':
+        x, w = np.polynomial.legendre.leggauss(ntheta)
+        phi     = np.pi*(x+1)
+        weights = np.pi*w
+    else:
+        raise NotImplementedError('Quadrature {}'.format(quad))
+    cphi, sphi = np.cos(phi), np.sin(phi)
+    c0 , s0  = np.cos(theta0), np.sin(theta0)
+    cd0, sd0 = np.cos(theta0-psi), np.sin(theta0-psi)
+    return weights, c0*cphi - s0*sphi, s0*cphi + c0*sphi, cd0*cphi - sd0*sphi, sd0*cphi + cd0*sphi
+
+def _theta_closest(r, psi, z, m):
+    """ Angle theta of the point of the cylinder closest to the control points (cross section at z for z>0).
+    The Gauss-Legendre nodes are clustered at the ends of the interval, which is therefore started at
+    this angle, where the integrands are peaked for points close to the vortex sheet. """
+    zp = np.maximum(z, 0)
+    return np.arctan2(r*np.sin(psi), r*np.cos(psi) - m*zp)
+
+def _chunks(n, ntheta, nMax):
+    """ Blocks of control points such that the integrand arrays have at most nMax elements"""
+    nBlock = int(max(1, nMax//ntheta))
+    return [slice(i, min(i+nBlock, n)) for i in range(0, n, nBlock)]
+
+def svc_tang_u_polar(vr,vpsi,vz,gamma_t=-1,R=1,m=0,ntheta=180,polar_out=False,quad='trapz',nMax=1000000):
     """ Induced velocity from a skewed semi infinite cylinder of tangential vorticity.
     Takes polar coordinates as inputs, returns velocity either in Cartesian (default) or polar.
     The cylinder axis is defined by x=m.z, m=tan(chi). The rotor is in the plane z=0.
-    The algorithm loops over the control points and performs the integration over theta
+    The integration over theta is performed for blocks of control points at once (2D arrays of
+    at most nMax elements).
     INPUTS:
-       vr,vpsi,vz : flat list of control points in polar coordinates
+       vr,vpsi,vz : control points in polar coordinates, may be of any shape
        gamma_t    : tangential vorticity of the vortex sheet (circulation per unit of length oriented along psi). (for WT rotating positively along psi , gamma psi is negative)
        R          : radius of cylinder
        m =tan(chi): tangent of wake skew angle
        ntheta    : number of points used for integration
+       quad      : quadrature, 'trapz' (trapezoidal rule) or 'gauss' (Gauss-Legendre, starting at the point of
+                   the cylinder closest to the control point, typically accurate with fewer points, e.g. ntheta=60)
+       nMax      : maximum number of elements of the integrand arrays
     Reference: [1,2]"""
     EPSILON_AXIS=1e-7; # relative threshold for using axis formula
-    vtheta = np.pi/2 + np.linspace(0, 2*np.pi, ntheta)
     # Flattening
-    shape_in=vr.shape
+    shape_in=np.asarray(vr).shape
     vr   = np.asarray(vr).ravel()
     vpsi = np.asarray(vpsi).ravel()
     vz   = np.asarray(vz).ravel()
-    # Constants of theta
     c   = 1 + m**2
-    bz  = R * m * np.cos(vtheta)
+    u1  = np.zeros(vr.shape)
+    u2  = np.zeros(vr.shape)
     u_z = np.zeros(vr.shape)
-    if polar_out:
-        u_r   = np.zeros(vr.shape)
-        u_psi = np.zeros(vr.shape)
-        # ---- Loop on all control points to find velocity
-        for i,(r,psi,z) in enumerate(zip(vr,vpsi,vz)):
-            # Functions of theta in the integrand
-            a = R**2 + r** 2 + z**2 - 2*R*r*np.cos(vtheta - psi)
-            b = 2 * m * R * np.cos(vtheta) - 2 * m * r * np.cos(psi) - 2 * z
-            ap, bp = R * z * np.sin(vtheta - psi), -R * np.sin(vtheta - psi)
-            ar, br = R * z * np.cos(vtheta - psi), -R * np.cos(vtheta - psi)
-            az = R * (R - r * np.cos(vtheta - psi))
-            D = 2*gamma_t/(4*np.pi)/(np.multiply(np.sqrt(a),(2 * np.sqrt(a * c)+ b)))
-            # Integrations
-            u_r[i]    = np.trapz((ar * np.sqrt(c)+ np.multiply(br,np.sqrt(a)))*D, vtheta)
-            u_psi[i]  = np.trapz((ap * np.sqrt(c)+ np.multiply(bp,np.sqrt(a)))*D, vtheta)
-            u_z[i]    = np.trapz((az * np.sqrt(c)+ np.multiply(bz,np.sqrt(a)))*D, vtheta)
-        # Reshaping to desired shape
-        u_r   =  u_r.reshape(shape_in)   
-        u_psi =  u_psi.reshape(shape_in)   
-        u_z   =  u_z.reshape(shape_in)   
-        return u_r,u_psi,u_z
-    else:
-#         print('>>>>>> HACK')
-#         bx, by = -R * np.cos(vtheta), -R * np.sin(vtheta)
-#         u_x   = np.zeros(vr.shape)
-#         u_y   = np.zeros(vr.shape)
-#         # ---- Loop on all control points to find velocity
-#         for i,(r,psi,z) in enumerate(zip(vr,vpsi,vz)):
-#             # Functions of theta in the integrand
-#             a = R**2 + r** 2 + z**2 - 2*R*r*np.cos(vtheta - psi)
-#             b = 2 * m * R * np.cos(vtheta) - 2 * m * r * np.cos(psi) - 2 * z
-#             ax, ay = R * z * np.cos(vtheta),  R * z * np.sin(vtheta)
-#             az = R * (R - r * np.cos(vtheta - psi))
-#             #D = 2*gamma_t/(4*np.pi)/(np.multiply(np.sqrt(a),(2 * np.sqrt(a * c)+ b)))
-#             D = -4*gamma_t/(np.sqrt(c)*4*np.pi)/(4*a*c-b**2)
-#             # Integrations
-#             u_x[i]    = np.trapz((b*bx-2*ax*c)*D, vtheta)
-#             u_y[i]    = np.trapz((b*by-2*ay*c)*D, vtheta)
-#             u_z[i]    = np.trapz((b*bz-2*az*c)*D, vtheta)
-
-
-        bx, by = -R * np.cos(vtheta), -R * np.sin(vtheta)
-        u_x   = np.zeros(vr.shape)
-        u_y   = np.zeros(vr.shape)
-        # ---- Loop on all control points to find velocity
-        for i,(r,psi,z) in enumerate(zip(vr,vpsi,vz)):
-            # Functions of theta in the integrand
-            a = R**2 + r** 2 + z**2 - 2*R*r*np.cos(vtheta - psi)
-            b = 2 * m * R * np.cos(vtheta) - 2 * m * r * np.cos(psi) - 2 * z
-            ax, ay = R * z * np.cos(vtheta),  R * z * np.sin(vtheta)
-            az = R * (R - r * np.cos(vtheta - psi))
-            D = 2*gamma_t/(4*np.pi)/(np.multiply(np.sqrt(a),(2 * np.sqrt(a * c)+ b)))
-            # Integrations
-            u_x[i]    = np.trapz((ax * np.sqrt(c)+ np.multiply(bx,np.sqrt(a)))*D, vtheta)
-            u_y[i]    = np.trapz((ay * np.sqrt(c)+ np.multiply(by,np.sqrt(a)))*D, vtheta)
-            u_z[i]    = np.trapz((az * np.sqrt(c)+ np.multiply(bz,np.sqrt(a)))*D, vtheta)
-
-        # Reshaping to desired shape
-        u_x   =  u_x.reshape(shape_in)   
-        u_y   =  u_y.reshape(shape_in)   
-        u_z   =  u_z.reshape(shape_in)   
-        return u_x,u_y,u_z
+    # ---- Loop on blocks of control points, theta along the second dimension
+    for I in _chunks(len(vr), ntheta, nMax):
+        r, psi, z = vr[I,None], vpsi[I,None], vz[I,None]
+        theta0 = _theta_closest(r, psi, z, m) if quad=='gauss' else np.pi/2
+        w, ct, st, cp, sp = _theta_quadrature(ntheta, theta0, psi, quad)
+        # Functions of theta in the integrand
+        a = R**2 + r** 2 + z**2 - 2*R*r*cp
+        b = 2 * m * R * ct - 2 * m * r * np.cos(psi) - 2 * z
+        az = R * (R - r * cp)
+        sqa = np.sqrt(a)
+        D = 2*gamma_t/(4*np.pi)/(sqa*(2 * np.sqrt(a * c)+ b))
+        # Integrations
+        if polar_out:
+            u1[I]  = np.dot(R * cp * (z * np.sqrt(c) - sqa)*D, w)
+            u2[I]  = np.dot(R * sp * (z * np.sqrt(c) - sqa)*D, w)
+        else:
+            u1[I]  = np.dot(R * ct * (z * np.sqrt(c) - sqa)*D, w)
+            u2[I]  = np.dot(R * st * (z * np.sqrt(c) - sqa)*D, w)
+        u_z[I] = np.dot((az * np.sqrt(c) + R * m * ct * sqa)*D, w)
+    # Reshaping to desired shape
+    return u1.reshape(shape_in), u2.reshape(shape_in), u_z.reshape(shape_in) # ux,uy,uz OR ur,upsi,uz
 
 
-def svc_longi_u_polar(vr,vpsi,vz,gamma_l=-1,R=1,m=0,ntheta=180,polar_out=False):
+def svc_longi_u_polar(vr,vpsi,vz,gamma_l=-1,R=1,m=0,ntheta=180,polar_out=False,quad='trapz',nMax=1000000):
     """ Raw function, not intended to be exported. 
     Induced velocity from a skewed semi infinite cylinder of longitudinal vorticity.
     Takes polar coordinates as inputs, returns velocity either in Cartesian (default) or polar.
@@ -133,45 +131,33 @@ def svc_longi_u_polar(vr,vpsi,vz,gamma_l=-1,R=1,m=0,ntheta=180,polar_out=False):
        R          : radius of cylinder
        m =tan(chi): tangent of wake skew angle
        ntheta    : number of points used for integration
+       quad, nMax: see svc_tang_u_polar
     Reference: [1,2]"""
     EPSILON_AXIS=1e-7; # relative threshold for using axis formula
-    vtheta = np.linspace(0,2 * np.pi,ntheta) + np.pi / ntheta
     # Flattening, and dimensionless!
-    shape_in=vr.shape
+    shape_in=np.asarray(vr).shape
     vr   = np.asarray(vr/R).ravel()
     vpsi = np.asarray(vpsi).ravel()
     vz   = np.asarray(vz/R).ravel()
+    u1  = np.zeros(vr.shape)
+    u2  = np.zeros(vr.shape)
     u_z = np.zeros(vr.shape)
-    if polar_out:
-        u_r = np.zeros(vr.shape)
-        u_psi = np.zeros(vr.shape)
-        for i,(r,psi,z) in enumerate(zip(vr,vpsi,vz)):
-            Den1 = np.sqrt(1 + r**2 + z**2 - 2*r* np.cos(vtheta - psi))
-            Den2 = - z + m * np.cos(vtheta) + np.sqrt(1 + m ** 2) * np.sqrt(1 + r ** 2 + z ** 2 - 2 * r * np.cos(vtheta - psi)) - m * r * np.cos(psi)
-            DenInv = gamma_l/(4*np.pi)/np.multiply(Den1,Den2)
-            u_r[i]   = np.trapz((  - m*z*np.sin(psi) + np.sin(vtheta-psi))*DenInv,vtheta)
-            u_psi[i] = np.trapz((r - m*z*np.cos(psi) - np.cos(vtheta-psi))*DenInv,vtheta)
-            u_z[i]   = np.trapz(m * (-np.sin(vtheta) + r*np.sin(psi))     *DenInv,vtheta)
-        # Reshaping to input shape
-        u_r   =  u_psi.reshape(shape_in) 
-        u_psi =  u_psi.reshape(shape_in) 
-        u_z   =  u_z.reshape(shape_in)   
-        return (u_r,u_psi,u_z)
-    else:
-        u_x = np.zeros(vr.shape)
-        u_y = np.zeros(vr.shape)
-        for i,(r,psi,z) in enumerate(zip(vr,vpsi,vz)):
-            Den1 = np.sqrt(1 + r**2 + z**2 - 2*r* np.cos(vtheta - psi))
-            Den2 = - z + m * np.cos(vtheta) + np.sqrt(1 + m ** 2) * np.sqrt(1 + r ** 2 + z ** 2 - 2 * r * np.cos(vtheta - psi)) - m * r * np.cos(psi)
-            DenInv = gamma_l/(4*np.pi)/np.multiply(Den1,Den2)
-            u_x[i]   = np.trapz(        (np.sin(vtheta) - r*np.sin(psi))  *DenInv,vtheta)
-            u_y[i]   = np.trapz((- m*z - np.cos(vtheta) + r*np.cos(psi))  *DenInv,vtheta)
-            u_z[i]   = np.trapz(m * (-np.sin(vtheta) + r*np.sin(psi))     *DenInv,vtheta)
-        # Reshaping to input shape
-        u_x   =  u_x.reshape(shape_in)   
-        u_y   =  u_y.reshape(shape_in)   
-        u_z   =  u_z.reshape(shape_in)   
-        return (u_x,u_y,u_z)
+    for I in _chunks(len(vr), ntheta, nMax):
+        r, psi, z = vr[I,None], vpsi[I,None], vz[I,None]
+        theta0 = _theta_closest(r, psi, z, m) if quad=='gauss' else np.pi/ntheta
+        w, ct, st, cp, sp = _theta_quadrature(ntheta, theta0, psi, quad)
+        Den1 = np.sqrt(1 + r**2 + z**2 - 2*r* cp)
+        Den2 = - z + m * ct + np.sqrt(1 + m ** 2) * Den1 - m * r * np.cos(psi)
+        DenInv = gamma_l/(4*np.pi)/(Den1*Den2)
+        if polar_out:
+            u1[I] = np.dot((  - m*z*np.sin(psi) + sp)*DenInv, w)
+            u2[I] = np.dot((r - m*z*np.cos(psi) - cp)*DenInv, w)
+        else:
+            u1[I] = np.dot(        (st - r*np.sin(psi))  *DenInv, w)
+            u2[I] = np.dot((- m*z - ct + r*np.cos(psi))  *DenInv, w)
+        u_z[I] = np.dot(m * (-st + r*np.sin(psi))     *DenInv, w)
+    # Reshaping to input shape
+    return u1.reshape(shape_in), u2.reshape(shape_in), u_z.reshape(shape_in) # ux,uy,uz OR ur,upsi,uz
 
 def svc_root_u_polar(vr,vpsi,vz,Gamma_r=-1,m=0,polar_out=False):
     """
@@ -231,14 +217,14 @@ def svc_root_u_polar(vr,vpsi,vz,Gamma_r=-1,m=0,polar_out=False):
         u_y   =  u_y.reshape(shape_in)   
     return (u_x,u_y,u_z)
 
-def svc_u_polar(vr,vpsi,vz,gamma_t,gamma_l,Gamma_r,R=1,m=0,ntheta=180,polar_out=False):
+def svc_u_polar(vr,vpsi,vz,gamma_t,gamma_l,Gamma_r,R=1,m=0,ntheta=180,polar_out=False,quad='trapz'):
     """ Induced velocities from a skewed semi infinite cylinder with:
        - tangential vorticity gamma_t
        - longitudinal vorticity gamma_l
        - a root vortex, Gamma_r
     """
-    u1 ,u2 ,u3  = svc_longi_u_polar(vr,vpsi,vz,gamma_l,R=R,m=m,ntheta=ntheta,polar_out=False)
-    u1t,u2t,u3t = svc_tang_u_polar (vr,vpsi,vz,gamma_t,R=R,m=m,ntheta=ntheta,polar_out=False)
+    u1 ,u2 ,u3  = svc_longi_u_polar(vr,vpsi,vz,gamma_l,R=R,m=m,ntheta=ntheta,polar_out=False,quad=quad)
+    u1t,u2t,u3t = svc_tang_u_polar (vr,vpsi,vz,gamma_t,R=R,m=m,ntheta=ntheta,polar_out=False,quad=quad)
     u1 += u1t
     u2 += u2t
     u3 += u3t
@@ -251,7 +237,7 @@ def svc_u_polar(vr,vpsi,vz,gamma_t,gamma_l,Gamma_r,R=1,m=0,ntheta=180,polar_out=
 # --------------------------------------------------------------------------------}
 # --- Main functions with Cartesian inputs
 # --------------------------------------------------------------------------------{
-def svc_longi_u(Xcp,Ycp,Zcp,gamma_l=-1,R=1,m=0,ntheta=180,polar_out=False):
+def svc_longi_u(Xcp,Ycp,Zcp,gamma_l=-1,R=1,m=0,ntheta=180,polar_out=False,quad='trapz',nMax=1000000):
     """ Induced velocity from a skewed semi infinite cylinder of longitudinal vorticity.
     The cylinder axis is defined by x=m.z, m=tan(chi). The rotor is in the plane z=0.
     INPUTS:
@@ -260,12 +246,13 @@ def svc_longi_u(Xcp,Ycp,Zcp,gamma_l=-1,R=1,m=0,ntheta=180,polar_out=False):
        R          : radius of cylinder
        m =tan(chi): tangent of wake skew angle
        ntheta     : number of points used for integration
+       quad, nMax : quadrature and block size, see svc_tang_u_polar
     Reference: [1,2]"""
     vr, vpsi = np.sqrt(Xcp**2+Ycp**2), np.arctan2(Ycp,Xcp) # polar coords
-    u1,u2,u3=svc_longi_u_polar(vr,vpsi,Zcp,gamma_l,R,m,ntheta,polar_out=polar_out)
+    u1,u2,u3=svc_longi_u_polar(vr,vpsi,Zcp,gamma_l,R,m,ntheta,polar_out=polar_out,quad=quad,nMax=nMax)
     return u1,u2,u3 # ux,uy,uz OR ur,upsi,uz
 
-def svc_tang_u(Xcp,Ycp,Zcp,gamma_t=-1,R=1,m=0,ntheta=180,polar_out=False):
+def svc_tang_u(Xcp,Ycp,Zcp,gamma_t=-1,R=1,m=0,ntheta=180,polar_out=False,quad='trapz',nMax=1000000):
     """ Induced velocity from a skewed semi infinite cylinder of tangential vorticity.
     The cylinder axis is defined by x=m.z, m=tan(chi). The rotor is in the plane z=0.
     INPUTS:
@@ -274,9 +261,10 @@ def svc_tang_u(Xcp,Ycp,Zcp,gamma_t=-1,R=1,m=0,ntheta=180,polar_out=False):
        R          : radius of cylinder
        m =tan(chi): tangent of wake skew angle
        ntheta     : number of points used for integration
+       quad, nMax : quadrature and block size, see svc_tang_u_polar
     Reference: [1,2]"""
     vr, vpsi = np.sqrt(Xcp**2+Ycp**2), np.arctan2(Ycp,Xcp) # polar coords
-    u1,u2,u3 = svc_tang_u_polar(vr,vpsi,Zcp,gamma_t,R,m,ntheta,polar_out=polar_out)
+    u1,u2,u3 = svc_tang_u_polar(vr,vpsi,Zcp,gamma_t,R,m,ntheta,polar_out=polar_out,quad=quad,nMax=nMax)
     return u1,u2,u3 # ux,uy,uz OR ur,upsi,uz
 
 def svc_root_u(Xcp,Ycp,Zcp,Gamma_r=-1,m=0,polar_out=False):
@@ -292,7 +280,7 @@ def svc_root_u(Xcp,Ycp,Zcp,Gamma_r=-1,m=0,polar_out=False):
     u1,u2,u3 = svc_root_u_polar(vr,vpsi,Zcp,Gamma_r,m,polar_out=polar_out)
     return u1,u2,u3 # ux,uy,uz OR ur,upsi,uz
 
-def svcs_tang_u(Xcp,Ycp,Zcp,gamma_t,R,m,Xcyl,Ycyl,Zcyl,ntheta=180, Ground=False):
+def svcs_tang_u(Xcp,Ycp,Zcp,gamma_t,R,m,Xcyl,Ycyl,Zcyl,ntheta=180, Ground=False, quad='trapz', nMax=1000000):
     """ 
     Computes the velocity field for nCyl*nr cylinders, extending along z:
         nCyl: number of main cylinders
@@ -304,6 +292,7 @@ def svcs_tang_u(Xcp,Ycp,Zcp,gamma_t,R,m,Xcyl,Ycyl,Zcyl,ntheta=180, Ground=False)
         m      : array of size (nCyl,nr), 
         Xcyl,Ycyl,Zcyl: array of size nCyl) giving the center of the rotor
         Ground: boolean, True if ground effect is to be accounted for
+        quad, nMax: quadrature and block size, see svc_tang_u_polar
     All inputs (except Ground) should be numpy arrays
     """ 
     Xcp=np.asarray(Xcp)
@@ -328,14 +317,14 @@ def svcs_tang_u(Xcp,Ycp,Zcp,gamma_t,R,m,Xcyl,Ycyl,Zcyl,ntheta=180, Ground=False)
                 else:
                     print('m',end='')
                 if np.abs(gamma_t[i,j]) > 0:
-                    ux1,uy1,uz1 = svc_tang_u(Xcp0,Y,Zcp0,gamma_t[i,j],R[i,j],m[i,j],ntheta=ntheta,polar_out=False)
+                    ux1,uy1,uz1 = svc_tang_u(Xcp0,Y,Zcp0,gamma_t[i,j],R[i,j],m[i,j],ntheta=ntheta,polar_out=False,quad=quad,nMax=nMax)
                     ux = ux + ux1
                     uy = uy + uy1
                     uz = uz + uz1
     print('')
     return ux,uy,uz
 
-def svcs_longi_u(Xcp,Ycp,Zcp,gamma_l,R,m,Xcyl,Ycyl,Zcyl,ntheta=180,Ground=False):
+def svcs_longi_u(Xcp,Ycp,Zcp,gamma_l,R,m,Xcyl,Ycyl,Zcyl,ntheta=180,Ground=False,quad='trapz',nMax=1000000):
     """ See svcs_tang_u """ 
     Xcp=np.asarray(Xcp)
     Ycp=np.asarray(Ycp)
@@ -359,7 +348,7 @@ def svcs_longi_u(Xcp,Ycp,Zcp,gamma_l,R,m,Xcyl,Ycyl,Zcyl,ntheta=180,Ground=False)
                 else:
                     print('m',end='')
                 if np.abs(gamma_l[i,j]) > 0:
-                    ux1,uy1,uz1 = svc_longi_u(Xcp0,Ycp0,Zcp0,gamma_l[i,j],R[i,j],m[i,j],ntheta=ntheta,polar_out=False)
+                    ux1,uy1,uz1 = svc_longi_u(Xcp0,Y,Zcp0,gamma_l[i,j],R[i,j],m[i,j],ntheta=ntheta,polar_out=False,quad=quad,nMax=nMax)
                     ux = ux + ux1
                     uy = uy + uy1
                     uz = uz + uz1
@@ -601,6 +590,27 @@ class TestSkewedCylinder(unittest.TestCase):
         #print('uzeta',u_zeta)
         #print('uxi',u_xi)
 
+    def test_SVC_quadrature(self):
+        # --- Blocks, Gauss-Legendre quadrature and polar outputs
+        gamma_t, gamma_l, R, m = -5, -2, 10, np.tan(30*np.pi/180)
+        x, y, z = np.meshgrid(np.linspace(-3*R,3*R,13), np.linspace(-2*R,2*R,7), [-R, 0, R/2, 3*R])
+        vr, vpsi = np.sqrt(x**2+y**2), np.arctan2(y,x)
+        # Points away from the vortex sheet for the comparison of quadratures
+        b = np.abs(np.sqrt((x-m*np.maximum(z,0))**2+y**2)-R) > 0.2*R
+        for fU in [svc_tang_u_polar, svc_longi_u_polar]:
+            gamma = gamma_t if fU==svc_tang_u_polar else gamma_l
+            U  = fU(vr, vpsi, z, gamma, R, m, ntheta=180)
+            U2 = fU(vr, vpsi, z, gamma, R, m, ntheta=180, nMax=500)
+            U3 = fU(vr, vpsi, z, gamma, R, m, ntheta=60, quad='gauss')
+            for u, u2, u3 in zip(U, U2, U3):
+                self.assertEqual(u.shape, x.shape)
+                np.testing.assert_allclose(u2, u, rtol=1e-12, atol=1e-12)
+                np.testing.assert_allclose(u3[b], u[b], atol=1e-5*np.abs(gamma))
+            u_r, u_psi, u_z = fU(vr, vpsi, z, gamma, R, m, ntheta=180, polar_out=True)
+            u_r2, u_psi2 = polar_components(U[0], U[1], vpsi)
+            np.testing.assert_allclose(u_r  , u_r2  , atol=1e-12)
+            np.testing.assert_allclose(u_psi, u_psi2, atol=1e-12)
+
 #     def test_singularities(self):
 #         # TODO!
 # 
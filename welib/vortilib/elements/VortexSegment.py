@@ -110,6 +110,9 @@ def vs_u(Xcp, Ycp, Zcp, Pa, Pb, Gamma, RegFunction=0, RegParam=0, nt=None, RegPa
     Xcp = Xcp.ravel()
     Ycp = np.asarray(Ycp).ravel()
     Zcp = np.asarray(Zcp).ravel()
+    if nt is None:
+        u = vss_u(np.column_stack((Xcp,Ycp,Zcp)), Pa, Pb, Gamma, RegFunction, RegParam)
+        return u[:,0].reshape(shape_in), u[:,1].reshape(shape_in), u[:,2].reshape(shape_in)
     ux  = np.zeros(Xcp.shape)
     uy  = np.zeros(Xcp.shape)
     uz  = np.zeros(Xcp.shape)
@@ -126,6 +129,73 @@ def vs_u(Xcp, Ycp, Zcp, Pa, Pb, Gamma, RegFunction=0, RegParam=0, nt=None, RegPa
     return ux,uy,uz
 
 
+def vss_u(CPs, Pa, Pb, Gamma, RegFunction=0, RegParam=0, nMax=1000000):
+    """ Induced velocity from several vortex segments on several control points (summed over the segments)
+    Vectorized version of vs_u_raw, the interactions are computed by blocks of control points
+    and segments, such that the size of the temporary arrays is bounded by nMax elements.
+
+    INPUTS:
+      - CPs  : nCP x 3, control points
+      - Pa   : nSeg x 3, start points of the segments
+      - Pb   : nSeg x 3, end points of the segments
+      - Gamma: circulation of the segments, scalar or array (nSeg)
+      - RegFunction: Regularization function, scalar or array (nSeg):
+                 0: None
+                 1: Rankine
+                 2: Lamb-Oseen
+                 3: Vatistas
+                 4: Denominator offset
+      - RegParam: regularization parameter, scalar or array (nSeg)
+      - nMax : maximum number of control point/segment interactions per block
+    OUTPUTS:
+        u: (nCP x 3) velocity
+    """
+    CPs = np.asarray(CPs, dtype=float).reshape(-1,3)
+    Pa  = np.asarray(Pa , dtype=float).reshape(-1,3)
+    Pb  = np.asarray(Pb , dtype=float).reshape(-1,3)
+    nCP, nSeg = CPs.shape[0], Pa.shape[0]
+    Gamma       = np.broadcast_to(np.asarray(Gamma, dtype=float), (nSeg,))
+    RegFunction = np.broadcast_to(np.asarray(RegFunction, dtype=int), (nSeg,))
+    RegParam    = np.broadcast_to(np.asarray(RegParam, dtype=float), (nSeg,))
+    if np.any((RegFunction<0) | (RegFunction>4)):
+        raise NotImplementedError('Regularization for segments {}'.format(np.unique(RegFunction)))
+    # Segment quantities
+    r0      = Pb-Pa
+    norm2_r0 = np.sum(r0**2, axis=1)
+    RegFunction = np.where(RegParam>0, RegFunction, 0) # No regularization for a zero core size
+    bReg    = RegFunction>0
+    RegParam2_inv = np.where(bReg, 1/np.where(bReg, RegParam, 1)**2, 0)
+    u = np.zeros((nCP,3))
+    nBlockSeg = int(min(nSeg, max(1, nMax)))
+    nBlockCP  = int(max(1, nMax//max(nBlockSeg,1)))
+    for j0 in range(0, nSeg, nBlockSeg):
+        J = slice(j0, j0+nBlockSeg)
+        G, RF, RP = Gamma[J], RegFunction[J], RegParam[J]
+        n2r0, R2inv = norm2_r0[J], RegParam2_inv[J]
+        for i0 in range(0, nCP, nBlockCP):
+            I = slice(i0, i0+nBlockCP)
+            DPa = CPs[I,None,:]-Pa[None,J,:] # nCP x nSeg x 3
+            DPb = CPs[I,None,:]-Pb[None,J,:]
+            norm_a = np.sqrt(np.sum(DPa**2, axis=2))
+            norm_b = np.sqrt(np.sum(DPb**2, axis=2))
+            denominator = norm_a * norm_b * (norm_a * norm_b + np.sum(DPa*DPb, axis=2))
+            crossprod   = np.cross(DPa, DPb)
+            bValid = (denominator >= 1e-17) & (norm_a >= 1e-08) & (norm_b >= 1e-08)
+            Kv = np.ones(denominator.shape)
+            if np.any(bReg):
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    h2   = np.sum(crossprod**2, axis=2)/n2r0 # Orthogonal distance (r1 x r2)/r0
+                    eps2 = h2*R2inv
+                    Kv = np.select([RF==1, RF==2, RF==3],
+                            [np.minimum(eps2, 1.0), 1.0 - np.exp(-1.25643 * eps2), eps2 / np.sqrt(1 + eps2**2)], 1.0)
+                    Kv[np.isnan(Kv)] = 0 # Degenerated segments, h2=0/0
+                denominator = denominator + np.where(RF==4, RP**2*n2r0, 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                Kv = np.where(bValid, G * Kv / (4.0 * np.pi) * (norm_a + norm_b) / denominator, 0)
+            u[I,:] += np.einsum('ij,ijk->ik', Kv, crossprod)
+    return u
+
+
 
 # --------------------------------------------------------------------------------}
 # --- TESTS
@@ -135,6 +205,7 @@ class TestVortexSegment(unittest.TestCase):
         import warnings
 #         warnings.filterwarnings('error')
         # --- One vortex segment
+        z0 = 1
         Pa = np.array([[ 0, 0, -z0]])
         Pb = np.array([[ 0, 0,  z0]])
         # --- test, 0 on singularity
@@ -145,6 +216,32 @@ class TestVortexSegment(unittest.TestCase):
         U  = vs_u_raw(Pb, Pa, Pb, Gamma = 1, RegFunction = 0, RegParam = 0)
         np.testing.assert_equal(U, np.zeros((1,3)))
 
+    def test_VSS_vectorized(self):
+        # --- Several segments on several points, vs loop on vs_u_raw, with blocks
+        np.random.seed(0)
+        CPs = np.random.randn(20,3)
+        Pa  = np.random.randn(15,3)
+        Pb  = Pa + 0.5*np.random.randn(15,3)
+        CPs[0] = Pa[0]                 # on an extremity
+        CPs[1] = (Pa[1]+Pb[1])/2       # on a segment
+        Gamma    = np.random.randn(15)
+        RegParam = np.random.uniform(0.1, 0.5, 15)
+        for RegFunction in range(5):
+            U = vss_u(CPs, Pa, Pb, Gamma, RegFunction, RegParam, nMax=37)
+            U_ref = np.zeros(CPs.shape)
+            for i in range(len(CPs)):
+                for j in range(len(Pa)):
+                    U_ref[i] += vs_u_raw(CPs[i], Pa[j], Pb[j], Gamma[j], RegFunction, RegParam[j]).ravel()
+            np.testing.assert_allclose(U, U_ref, atol=1e-13)
+        # Regularization function per segment
+        RegFunction = np.arange(15)%5
+        U = vss_u(CPs, Pa, Pb, Gamma, RegFunction, RegParam)
+        U_ref = np.sum([vss_u(CPs, Pa[RegFunction==k], Pb[RegFunction==k], Gamma[RegFunction==k], k, RegParam[RegFunction==k]) for k in range(5)], axis=0)
+        np.testing.assert_allclose(U, U_ref, atol=1e-13)
+        # vs_u, one segment
+        ux, uy, uz = vs_u(CPs[:,0], CPs[:,1], CPs[:,2], Pa[2], Pb[2], Gamma[2], 2, RegParam[2])
+        np.testing.assert_allclose(np.column_stack((ux,uy,uz)), vss_u(CPs, Pa[2], Pb[2], Gamma[2], 2, RegParam[2]))
+
 if __name__ == "__main__":
     unittest.main()
 
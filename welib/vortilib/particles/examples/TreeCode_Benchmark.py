@@ -0,0 +1,30 @@
+"""
+Error versus computational time of the tree code (Barnes-Hut), compared to the direct sum,
+for 3D vortex particles and 2D point vortices.
+"""
+import numpy as np
+import matplotlib.pyplot as plt
+from welib.vortilib.particles.treecode import treecode_benchmark
+
+N = 20000 # Number of particles
+df3 = treecode_benchmark(N=N, nDim=3, thetas=[0.2, 0.3, 0.5, 0.7], orders=[0,1])
+df2 = treecode_benchmark(N=N, nDim=2, thetas=[0.2, 0.3, 0.5, 0.7], orders=[2,4,8])
+print(df3)
+print(df2)
+
+fig,axes = plt.subplots(1, 2, sharey=False, figsize=(10.4,4.0))
+fig.subplots_adjust(left=0.08, right=0.98, top=0.92, bottom=0.12, hspace=0.20, wspace=0.25)
+for ax, df, title in zip(axes, [df3, df2], ['3D vortex particles', '2D point vortices']):
+    for order in np.unique(df['order']):
+        d = df[df['order']==order]
+        ax.loglog(d['time_tree'], d['error_max'], 'o-', label='Tree, order {}'.format(order))
+    ax.axvline(df['time_direct'].values[0], color='k', ls='--', label='Direct sum')
+    ax.set_xlabel('Time [s]')
+    ax.set_ylabel('Max relative error [-]')
+    ax.set_title(title + ', N={}'.format(N))
+    ax.legend()
+
+if __name__ == '__main__':
+    plt.show()
+if __name__ == '__test__':
+    pass
@@ -428,42 +428,155 @@ def interp_m2p_lambda3_2d(Part,nPart,mesh,nval,v1,v2,n1,n2,bRegular = None):
 
 
 # --------------------------------------------------------------------------------}
-# --- High level functions 
+# --- Vectorized projections, 1D/2D/3D
 # --------------------------------------------------------------------------------{
-def interp_p2m(Part,nPart,n,v_p,nDim,v1,v2=None, v3=None, kernel='mp4', bRegular=None): 
-    nVal = v_p.shape[1]
+def fCoordGrid(x, v, bRegular=True):
+    """ Vectorized version of fCoordRegularGrid, for regular or rectilinear grids.
+    Returns the index of the grid point to the left of x (from 0 to n-1), and the normalized distance to it.
+    For rectilinear grids, the distance is normalized by the local cell size. """
+    x = np.asarray(x, dtype=float)
+    v = np.asarray(v, dtype=float)
+    if bRegular:
+        C  = (x - v[0]) / (v[1] - v[0])
+        ic = np.floor(C).astype(int)
+        dc = C - ic
+    else:
+        ic = np.clip(np.searchsorted(v, x, side='right') - 1, 0, len(v)-2)
+        dc = (x - v[ic]) / (v[ic+1] - v[ic])
+        ic[x<v[0]] = -1
+    return ic, dc
+
+def interp_coeff_vect(ic, dc, nx, kernel='mp4'):
+    """ Vectorized version of interp_coeff_mp4 and interp_coeff_lambda3.
+    INPUTS:
+      - ic, dc: index of left grid point (from 0 to n-1) and normalized distance, arrays (nPart)
+      - nx: number of grid points
+    OUTPUTS:
+      - a: kernel coefficients, (nPart x 4)
+      - i: indices of the 4 grid points, (nPart x 4)
+    As for the scalar functions, the coefficients are zero (and the indices 0) when the stencil is not
+    fully inside the grid. """
+    ic = np.asarray(ic)
+    dc = np.asarray(dc, dtype=float)
+    d  = np.column_stack((dc + 1.0, dc, 1.0 - dc, 2.0 - dc)) # Normalized distances to the 4 cells
     if kernel=='mp4':
-        if nDim==2:
-            MeshValues = interp_p2m_mp4_2d(Part,nPart,v_p,nVal,v1,v2,n[0],n[1],bRegular)
-        else:
-            raise NotImplementedError('3d')
+        a = np.where(d<1, 1.0 - 2.5 * d ** 2 + 1.5 * d ** 3, 0.5 * (2.0 - d) ** 2 * (1.0 - d))
     elif kernel=='lambda3':
-        if nDim==2:
-            raise NotImplementedError('p2m lambda3')
-            MeshValues = interp_p2m_lambda3_2d(Part,nPart,v_p,nVal,v1,v2,n[0],n[1],bRegular)
-        else:
-            raise NotImplementedError('3d')
+        a = np.where(d<1, 1.0 / 2.0 * (1 - d ** 2) * (2 - d), 1.0 / 6.0 * (1.0 - d) * (2.0 - d) * (3.0 - d))
     else:
         raise Exception('Unknown Interpolation kernel')
-    
-    return MeshValues
+    i = ic[:,None] + np.arange(-1,3)[None,:]
+    bOut = (ic < 1) | (ic > nx - 3)
+    a[bOut,:] = 0
+    i[bOut,:] = 0
+    return a, i
+
+def _stencils(Part, vs, kernel, bRegular):
+    """ Flat indices and weights of the tensor product stencils, (nPart x 4**nDim) """
+    n = tuple([len(v) for v in vs])
+    W = np.ones((Part.shape[0], 1))
+    I = np.zeros((Part.shape[0], 1), dtype=int)
+    for d, v in enumerate(vs):
+        ic, dc = fCoordGrid(Part[:,d], v, bRegular)
+        a, i = interp_coeff_vect(ic, dc, n[d], kernel)
+        W = (W[:,:,None] * a[:,None,:]).reshape(Part.shape[0], -1)
+        I = (I[:,:,None] * n[d] + i[:,None,:]).reshape(Part.shape[0], -1) # C-order flat index
+    return I, W
+
+def _gridVectors(v1, v2=None, v3=None):
+    vs = [np.asarray(v, dtype=float) for v in [v1, v2, v3] if v is not None and len(v)>0]
+    bRegular = all([np.sum(np.abs(np.diff(v,2))) < 1e-12 * np.max(np.abs(v)+1) for v in vs])
+    return vs, bRegular
+
+def _partArray(Part, nDim):
+    Part = np.asarray(Part, dtype=float)
+    if Part.ndim==1:
+        Part = Part.reshape(-1, 1)
+    if Part.shape[1]!=nDim:
+        raise Exception('Part has wrong size, expected (nPart x {})'.format(nDim))
+    return Part
+
+def interp_p2m_vect(Part, part_values, v1, v2=None, v3=None, kernel='mp4', bRegular=None, nMax=4000000):
+    """
+    Particle to mesh projection with the M4' or Lambda3 kernel, in 1D, 2D or 3D.
+    Vectorized: the stencil weights are computed for all particles (by blocks), and added to the grid
+    in one operation.
+
+    INPUTS:
+      - Part       : particle positions (nPart x nDim)
+      - part_values: particle values (nPart x nVal) or (nPart)
+      - v1,v2,v3   : grid vectors (v2 and v3 None for 1D and 2D), regular or rectilinear
+      - kernel     : 'mp4' or 'lambda3'
+      - bRegular   : True if the grid is regular. Default: determined from the grid vectors
+      - nMax       : maximum number of particle/grid point interactions computed at once
+    OUTPUTS:
+      - mesh: (nVal x n1 [x n2 [x n3]])
+    """
+    vs, bReg = _gridVectors(v1, v2, v3)
+    if bRegular is None:
+        bRegular = bReg
+    Part = _partArray(Part, len(vs))
+    part_values = np.asarray(part_values, dtype=float).reshape(Part.shape[0], -1)
+    n     = tuple([len(v) for v in vs])
+    nGrid = int(np.prod(n))
+    nVal  = part_values.shape[1]
+    mesh  = np.zeros((nVal, nGrid))
+    nBlock = int(max(1, nMax // 4**len(vs)))
+    for i0 in range(0, Part.shape[0], nBlock):
+        P = slice(i0, i0+nBlock)
+        I, W = _stencils(Part[P], vs, kernel, bRegular)
+        # Scatter-add of all the stencils at once
+        I = I.ravel()
+        for k in range(nVal):
+            mesh[k] += np.bincount(I, weights=(W*part_values[P,k][:,None]).ravel(), minlength=nGrid)
+    return mesh.reshape((nVal,)+n)
+
+def interp_m2p_vect(Part, mesh, v1, v2=None, v3=None, kernel='mp4', bRegular=None, nMax=4000000):
+    """
+    Mesh to particle interpolation with the M4' or Lambda3 kernel, in 1D, 2D or 3D.
+    Vectorized: the grid values of the stencils of all particles are gathered at once (by blocks).
+
+    INPUTS:
+      - Part : particle positions (nPart x nDim)
+      - mesh : mesh values (nVal x n1 [x n2 [x n3]])
+      - v1,v2,v3, kernel, bRegular, nMax: see interp_p2m_vect
+    OUTPUTS:
+      - part_values: (nPart x nVal)
+    """
+    vs, bReg = _gridVectors(v1, v2, v3)
+    if bRegular is None:
+        bRegular = bReg
+    Part = _partArray(Part, len(vs))
+    n    = tuple([len(v) for v in vs])
+    mesh = np.asarray(mesh, dtype=float).reshape(-1, int(np.prod(n)))
+    part_values = np.zeros((Part.shape[0], mesh.shape[0]))
+    nBlock = int(max(1, nMax // 4**len(vs)))
+    for i0 in range(0, Part.shape[0], nBlock):
+        P = slice(i0, i0+nBlock)
+        I, W = _stencils(Part[P], vs, kernel, bRegular)
+        for k in range(mesh.shape[0]):
+            part_values[P,k] = np.einsum('ij,ij->i', mesh[k][I], W)
+    return part_values
+
+
+# --------------------------------------------------------------------------------}
+# --- High level functions 
+# --------------------------------------------------------------------------------{
+def interp_p2m(Part,nPart,n,v_p,nDim,v1,v2=None, v3=None, kernel='mp4', bRegular=None): 
+    """ Particle to mesh projection, see interp_p2m_vect. Returns the mesh values (nVal x n1 [x n2 [x n3]]) """
+    if kernel not in ['mp4','lambda3']:
+        raise Exception('Unknown Interpolation kernel')
+    vs = [v1, v2, v3][:nDim]
+    if np.any(np.asarray([len(v) for v in vs])!=np.asarray(n)[:nDim]):
+        raise Exception('Grid vectors and n are not consistent')
+    return interp_p2m_vect(np.asarray(Part)[:nPart], np.asarray(v_p)[:nPart], *vs, kernel=kernel, bRegular=bRegular)
 
 def interp_m2p(PartP,nPart,n,MeshValues,nDim,v1,v2=None,v3=None,kernel='mp4',bRegular=True):
-    nVal = MeshValues.shape[0]
-    if kernel=='mp4':
-        if nDim==2:
-            v_p = interp_m2p_mp4_2d(PartP,nPart,MeshValues,nVal,v1,v2,n[0],n[1],bRegular)
-        else:
-            raise NotImplementedError('3d')
-    elif kernel=='lambda3':
-        if nDim==2:
-            v_p = interp_m2p_lambda3_2d(PartP,nPart,MeshValues,nVal,v1,v2,n[0],n[1],bRegular)
-        else:
-            raise NotImplementedError('3d')
-    else:
+    """ Mesh to particle interpolation, see interp_m2p_vect. Returns the particle values (nPart x nVal) """
+    if kernel not in ['mp4','lambda3']:
         raise Exception('Unknown Interpolation kernel')
-    
-    return v_p
+    vs = [v1, v2, v3][:nDim]
+    return interp_m2p_vect(np.asarray(PartP)[:nPart], MeshValues, *vs, kernel=kernel, bRegular=bRegular)
 
 
 
@@ -474,11 +587,11 @@ def part2mesh(Part,mesh,kernel='mp4'):
     """ Project particles into a grid 
     NOTE: comes from fParticleProjection
     """
-    if mesh.nDim == 2:
+    if mesh.nDim in [1,2]:
         v_p = np.zeros((Part.nPart,2))
-        v_p[:,0] = Part.Intensity
+        v_p[:,0] = np.asarray(Part.Intensity).ravel()
         v_p[:,1] = Part.Volume
-    elif mesh.nDim == 2:
+    elif mesh.nDim == 3:
         v_p = np.zeros((Part.nPart,4))
         v_p[:,:3] = Part.Intensity
         v_p[:, 3] = Part.Volume
@@ -587,6 +700,43 @@ class TestProjection(unittest.TestCase):
         v_p= interp_m2p_lambda3_2d(Part,nPart,mesh,nVal,v1,v2,n1,n2,bRegular)
         np.testing.assert_almost_equal(v_p, v_p_ref)
 
+    def test_vect(self):
+        # --- Vectorized projections vs loops (2D), for both kernels
+        np.random.seed(0)
+        v1 = np.linspace(0,4,9)
+        v2 = np.linspace(-2,4,13)
+        v3 = np.linspace(-1,1,5)
+        Part = np.column_stack((np.random.uniform(-0.5,4.5,200), np.random.uniform(-2.5,4.5,200), np.random.uniform(-1,1,200)))
+        part_values = np.random.randn(200,2)
+        mesh = np.random.randn(2,9,13)
+        for kernel, fp2m, fm2p in [('mp4', interp_p2m_mp4_2d, interp_m2p_mp4_2d), ('lambda3', interp_p2m_lambda3_2d, interp_m2p_lambda3_2d)]:
+            M = interp_p2m_vect(Part[:,:2], part_values, v1, v2, kernel=kernel, nMax=1000)
+            np.testing.assert_almost_equal(M, fp2m(Part[:,:2],200,part_values,2,v1,v2,9,13,True))
+            # Rectilinear algorithm on a regular grid
+            np.testing.assert_almost_equal(interp_p2m_vect(Part[:,:2], part_values, v1, v2, kernel=kernel, bRegular=False), M)
+            v_p = interp_m2p_vect(Part[:,:2], mesh, v1, v2, kernel=kernel, nMax=1000)
+            np.testing.assert_almost_equal(v_p, fm2p(Part[:,:2],200,mesh,2,v1,v2,9,13,True))
+        # --- 1D, 2D, 3D: conservation, exact interpolation of linear fields, adjoint operators
+        for vs in [[v1], [v1,v2], [v1,v2,v3]]:
+            nDim = len(vs)
+            for kernel in ['mp4','lambda3']:
+                # Rectilinear grid
+                vs_r = [np.concatenate((v[:len(v)//2], v[len(v)//2]+np.cumsum(np.linspace(1,1.5,len(v)-len(v)//2))*(v[1]-v[0]))) for v in vs]
+                for vv in [vs, vs_r]:
+                    lo = np.array([v[1] for v in vv])
+                    hi = np.array([v[-3] for v in vv])
+                    P  = lo + np.random.rand(100, nDim)*(hi-lo)
+                    M  = interp_p2m_vect(P, part_values[:100], *vv, kernel=kernel)
+                    np.testing.assert_allclose(np.sum(M.reshape(2,-1), axis=1), np.sum(part_values[:100], axis=0))
+                    G = np.meshgrid(*vv, indexing='ij')
+                    F = np.array([1+0*G[0], sum([(d+1)*g for d,g in enumerate(G)])])
+                    v_p = interp_m2p_vect(P, F, *vv, kernel=kernel)
+                    np.testing.assert_allclose(v_p[:,0], 1)
+                    if vv is vs:
+                        np.testing.assert_allclose(v_p[:,1], np.dot(P, np.arange(1,nDim+1)))
+                    Mr = np.random.randn(*M.shape)
+                    np.testing.assert_allclose(np.sum(interp_m2p_vect(P, Mr, *vv, kernel=kernel)*part_values[:100]), np.sum(Mr*M))
+
     def test_m2p_p2m(self):
         # test mesh2p and then p2m should give the same
         # NOTE: still sound boundary effects
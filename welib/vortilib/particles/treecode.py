@@ -0,0 +1,552 @@
+"""
+Tree code (Barnes-Hut) for the velocity induced by vortex particles (3D) and vortex points (2D).
+
+The sources are sorted in an octree (3D) or quadtree (2D). Each cell stores a multipole expansion of
+its particles about the cell center. The interactions between a cell of control points and a cell of
+sources are evaluated with the expansion if the cells are well separated:
+        (r_T + r_S) < theta * d
+where r_T and r_S are the radii of the cells and d the distance between their centers. Otherwise the
+children of the source cell are visited, down to the leaves, for which the direct sum is used.
+The traversal and the evaluations are vectorized over all the pairs of cells (level by level),
+and are done by blocks of bounded size.
+
+Expansions:
+  - 3D: order 0 (monopole) or 1 (monopole and dipole).
+  - 2D: any order p (complex multipole expansion of the point vortices).
+
+The smoothing models are the ones of the direct kernels:
+  - 3D: RegFunction/RegParam, see VortexParticle.vp_u_raw
+  - 2D: SmoothModel/KernelOrder/SmoothParam, see VortexPoint.vps_u
+The smoothing is only applied in the near field (direct sum). A source cell is only approximated if
+it is further than `nSigma` smoothing parameters from the control points.
+
+Example:
+
+    U  = tree_vp_u(CPs, Pv, Alpha, RegFunction=1, RegParam=0.1, theta=0.5, order=1)  # (nCP x 3)
+    U2 = tree_vps_u(CPs, XV, Gammas, SmoothModel=2, KernelOrder=2, SmoothParam=0.1)  # (nCP x 2)
+    df = treecode_benchmark(N=20000, nDim=3)   # Error and time vs the direct sum
+
+"""
+import numpy as np
+import unittest
+
+_MINNORM3D = 1e-4  # See VortexParticle
+_MINR2_2D  = 1e-15 # See VortexPoint
+
+
+# --------------------------------------------------------------------------------}
+# --- Direct kernels, vectorized
+# --------------------------------------------------------------------------------{
+def _cross(a, b):
+    """ Cross product of arrays of vectors (n x 3), faster than np.cross for large n """
+    return np.column_stack((a[:,1]*b[:,2]-a[:,2]*b[:,1], a[:,2]*b[:,0]-a[:,0]*b[:,2], a[:,0]*b[:,1]-a[:,1]*b[:,0]))
+
+
+def _vp_kernel(DP, Alpha, RegFunction, RegParam):
+    """ Velocity from 3D particles, DP=CP-Pv (n x 3), Alpha (n x 3), RegParam (n) """
+    r = np.sqrt(np.sum(DP**2, axis=1))
+    C = _cross(Alpha, DP)
+    b = r >= _MINNORM3D
+    S = np.zeros(r.shape)
+    rb = r[b]
+    if RegFunction==0:
+        S[b] = 1./rb**3
+    elif RegFunction==1: # Exponential mollifier
+        S[b] = (1.-np.exp(-rb**3/RegParam[b]**3))/rb**3
+    elif RegFunction==2: # Compact support
+        S[b] = 1./np.sqrt(RegParam[b]**6+rb**6)
+    else:
+        raise Exception('Wrong regularization function for particles {}'.format(RegFunction))
+    return C*(S/(4*np.pi))[:,None]
+
+
+def _vps_kernelFunctions(SmoothModel, KernelOrder):
+    """ Returns the functions E(rho2) and Q(rho2) of the smooth models of vps_u (None for SmoothModel 0)"""
+    if SmoothModel==0 or KernelOrder==0:
+        return None, None
+    if SmoothModel==1:
+        fE = lambda rho2 : np.exp(- rho2)
+        Q = {2: lambda rho2 : 1,
+             4: lambda rho2 : 1 - rho2,
+             6: lambda rho2 : 1 - 2 * rho2 + rho2 ** 2 / 2,
+             8: lambda rho2 : 1 - 3 * rho2 + 3 * rho2 ** 2 / 2 - rho2 ** 3 / 6}
+        if KernelOrder not in Q.keys():
+            raise Exception('fKernel order not implemented for Majda model')
+    elif SmoothModel==2:
+        fE = lambda rho2 : np.exp(- rho2/2) # NOTE divided by 2
+        Q = {2: lambda rho2 : 1,
+             4: lambda rho2 : 1 - 1 / 2 * rho2,
+             6: lambda rho2 : 1 - rho2 + 1 / 8 * rho2 ** 2,
+             8: lambda rho2 : 1 - 3 / 2 * rho2 + 3 / 8 * rho2 ** 2 - 1 / 48 * rho2 ** 3,
+             10:lambda rho2 : 1 - 2 * rho2 + 3 / 4 * rho2 ** 2 - 1 / 12 * rho2 ** 3 + 1 / 384 * rho2 ** 4}
+        if KernelOrder not in Q.keys():
+            raise Exception('Kernel order not implemented for Gaussian2')
+        if KernelOrder==2:
+            fE = lambda rho2 : np.exp(- rho2) # NOTE not divided by 2
+    else:
+        raise Exception('Unknown smooth model')
+    return fE, Q[KernelOrder]
+
+
+def _vps_kernel(DP, Gammas, fE, fQ, SmoothParam):
+    """ Velocity from 2D point vortices, DP=CP-XV (n x 2), Gammas (n), SmoothParam (n) """
+    r2 = DP[:,0]**2 + DP[:,1]**2
+    b  = r2 >= _MINR2_2D
+    S  = np.zeros(r2.shape)
+    S[b] = Gammas[b]/(2*np.pi*r2[b])
+    if fE is not None:
+        rho2 = r2[b]/SmoothParam[b]**2
+        S[b] *= (1 - fQ(rho2)*fE(rho2))
+    return np.column_stack((-DP[:,1]*S, DP[:,0]*S))
+
+
+def _pairs_direct(CPs, P, nMax, fKernel):
+    """ Direct sum of a kernel over all pairs (control points, sources), by blocks of at most nMax pairs"""
+    nCP, nS = CPs.shape[0], P.shape[0]
+    U = np.zeros(CPs.shape)
+    nBlock = max(1, int(nMax//max(nS,1)))
+    for i0 in range(0, nCP, nBlock):
+        I = np.arange(i0, min(i0+nBlock, nCP))
+        iT = np.repeat(I, nS)
+        iS = np.tile(np.arange(nS), len(I))
+        u  = fKernel(CPs[iT]-P[iS], iS)
+        U[I] = u.reshape(len(I), nS, -1).sum(axis=1)
+    return U
+
+
+def _regParam(RegParam, n):
+    if RegParam is None:
+        RegParam = 0
+    return np.broadcast_to(np.asarray(RegParam, dtype=float), (n,))
+
+
+def direct_vp_u(CPs, Pv, Alpha, RegFunction=0, RegParam=0, nMax=1000000):
+    """
+    Induced velocity from N 3D vortex particles on several control points, direct sum.
+    Vectorized version of VortexParticle.vp_u, summed over the particles, by blocks of nMax interactions.
+
+    INPUTS:
+      - CPs  : nCP x 3, control points
+      - Pv   : N x 3, positions of the particles
+      - Alpha: N x 3, intensities of the particles
+      - RegFunction: 0: None, 1: Exponential, 2: Compact
+      - RegParam   : regularization parameter, scalar or array (N)
+    OUTPUTS:
+      - U: nCP x 3, velocity
+    """
+    CPs, Pv, Alpha = [np.asarray(v, dtype=float).reshape(-1,3) for v in (CPs, Pv, Alpha)]
+    RegParam = _regParam(RegParam, Pv.shape[0])
+    return _pairs_direct(CPs, Pv, nMax, lambda DP, iS: _vp_kernel(DP, Alpha[iS], RegFunction, RegParam[iS]))
+
+
+def direct_vps_u(CPs, XV, Gammas, SmoothModel=0, KernelOrder=2, SmoothParam=None, nMax=1000000):
+    """
+    Induced velocity from N 2D point vortices on several control points, direct sum.
+    Vectorized version of VortexPoint.vps_u, by blocks of nMax interactions.
+
+    INPUTS:
+      - CPs   : nCP x 2, control points
+      - XV    : N x 2, positions of the point vortices
+      - Gammas: N, circulations of the point vortices
+      - SmoothModel, KernelOrder: see vps_u
+      - SmoothParam: smoothing parameter, scalar or array (N)
+    OUTPUTS:
+      - U: nCP x 2, velocity
+    """
+    CPs, XV = [np.asarray(v, dtype=float).reshape(-1,2) for v in (CPs, XV)]
+    Gammas = np.broadcast_to(np.asarray(Gammas, dtype=float), (XV.shape[0],))
+    SmoothParam = _regParam(SmoothParam, XV.shape[0])
+    fE, fQ = _vps_kernelFunctions(SmoothModel, KernelOrder)
+    return _pairs_direct(CPs, XV, nMax, lambda DP, iS: _vps_kernel(DP, Gammas[iS], fE, fQ, SmoothParam[iS]))
+
+
+# --------------------------------------------------------------------------------}
+# --- Tree
+# --------------------------------------------------------------------------------{
+def _expand_ranges(starts, counts):
+    """ Concatenation of the ranges [start, start+count) """
+    counts = np.asarray(counts, dtype=int)
+    n = np.sum(counts)
+    offsets = np.repeat(np.cumsum(counts)-counts, counts)
+    return np.repeat(starts, counts) + np.arange(n) - offsets
+
+
+class Tree(object):
+    """
+    Octree (3D) or quadtree (2D) of points. The points are sorted such that the points of each
+    cell are contiguous: P[order][start[i]:start[i]+count[i]] are the points of cell i.
+
+    Attributes:
+      - order : permutation of the points
+      - center: centers of the cells (boxes), (nCells x nDim)
+      - radius: maximum distance between the center and the points of each cell (nCells)
+      - start, count: range of the points of each cell in the sorted points
+      - child0, nChild: range of the children of each cell (children are numbered consecutively). nChild=0 for leaves
+      - depth : depth of each cell
+    """
+    def __init__(self, P, leafSize=32, maxDepth=30):
+        P = np.asarray(P, dtype=float)
+        self.nDim = P.shape[1]
+        nCells = 1
+        center, halfSize, start, count, child0, nChild, depth = [], [], [], [], [], [], []
+        order = []
+        Pmin, Pmax = np.min(P, axis=0), np.max(P, axis=0)
+        c0 = (Pmin+Pmax)/2
+        h0 = max(np.max(Pmax-Pmin)/2, 1e-12)*(1+1e-10)
+        pows = 2**np.arange(self.nDim)
+        signs = np.array([[(k>>d)&1 for d in range(self.nDim)] for k in range(2**self.nDim)])*2-1
+
+        def newCell(c, h, d):
+            center.append(c); halfSize.append(h); depth.append(d)
+            start.append(0); count.append(0); child0.append(0); nChild.append(0)
+            return len(center)-1
+
+        def build(iCell, idx):
+            start[iCell] = len(order)
+            count[iCell] = len(idx)
+            if len(idx)<=leafSize or depth[iCell]>=maxDepth:
+                order.extend(idx)
+                return
+            c, h = center[iCell], halfSize[iCell]
+            code = np.dot(P[idx]>c, pows)
+            I = np.argsort(code, kind='stable')
+            idx, code = idx[I], code[I]
+            codes, iStart = np.unique(code, return_index=True)
+            iEnd = np.append(iStart[1:], len(idx))
+            children = [newCell(c+signs[k]*h/2, h/2, depth[iCell]+1) for k in codes]
+            child0[iCell], nChild[iCell] = children[0], len(children)
+            for iChild, i1, i2 in zip(children, iStart, iEnd):
+                build(iChild, idx[i1:i2])
+
+        newCell(c0, h0, 0)
+        build(0, np.arange(P.shape[0]))
+        self.order  = np.asarray(order, dtype=int)
+        self.center = np.asarray(center)
+        self.halfSize = np.asarray(halfSize)
+        self.start  = np.asarray(start, dtype=int)
+        self.count  = np.asarray(count, dtype=int)
+        self.child0 = np.asarray(child0, dtype=int)
+        self.nChild = np.asarray(nChild, dtype=int)
+        self.depth  = np.asarray(depth, dtype=int)
+        self.P      = P[self.order]
+        # Radius of the cells, using all (cell, point) pairs
+        self.pairCell, self.pairPoint = self.cellPoints()
+        dist = np.sqrt(np.sum((self.P[self.pairPoint]-self.center[self.pairCell])**2, axis=1))
+        self.radius = self.reduceCells(dist, np.maximum)
+
+    @property
+    def nCells(self):
+        return len(self.start)
+
+    @property
+    def isLeaf(self):
+        return self.nChild==0
+
+    def cellPoints(self):
+        """ All the (cell, sorted point) pairs, grouped by cells """
+        return np.repeat(np.arange(self.nCells), self.count), _expand_ranges(self.start, self.count)
+
+    def reduceCells(self, values, ufunc=np.add):
+        """ Reduction over the points of each cell of values defined on the (cell, point) pairs"""
+        return ufunc.reduceat(values, np.cumsum(self.count)-self.count, axis=0)
+
+    def __repr__(self):
+        s ='<{} object>\n'.format(type(self).__name__)
+        s+=' - nPoints: {}, nDim: {}\n'.format(len(self.order), self.nDim)
+        s+=' - nCells : {}, nLeaves: {}, maxDepth: {}\n'.format(self.nCells, np.sum(self.isLeaf), np.max(self.depth))
+        return s
+
+
+def _interactionLists(TT, TS, theta, sepMin=None):
+    """
+    Vectorized dual traversal: for all target leaves, list of source cells in the far field and
+    of source leaves in the near field.
+    INPUTS:
+      - TT: tree of the targets, TS: tree of the sources
+      - theta: opening angle
+      - sepMin: minimum separation between cells, for each source cell (e.g. based on the smoothing parameters)
+    OUTPUTS:
+      - (iT, iS) far: target leaves and source cells using the expansion
+      - (iT, iS) near: target leaves and source leaves using the direct sum
+    """
+    T = np.where(TT.isLeaf)[0]
+    S = np.zeros(T.shape, dtype=int)
+    far, near = [], []
+    while len(T)>0:
+        d  = np.sqrt(np.sum((TT.center[T]-TS.center[S])**2, axis=1))
+        rr = TT.radius[T] + TS.radius[S]
+        bFar = rr < theta*d
+        if sepMin is not None:
+            bFar &= (d-rr) > sepMin[S]
+        far.append((T[bFar], S[bFar]))
+        bLeaf = ~bFar & TS.isLeaf[S]
+        near.append((T[bLeaf], S[bLeaf]))
+        bOpen = ~bFar & ~bLeaf
+        T, S = T[bOpen], S[bOpen]
+        n = TS.nChild[S]
+        T = np.repeat(T, n)
+        S = _expand_ranges(TS.child0[S], n)
+    cat = lambda L: (np.concatenate([l[0] for l in L]), np.concatenate([l[1] for l in L]))
+    return cat(far), cat(near)
+
+
+def _pairBlocks(nPairs, nMax):
+    """ Blocks of pairs of cells, such that the cumulated number of interactions is at most about nMax """
+    if len(nPairs)==0:
+        return []
+    c = np.cumsum(nPairs)
+    bounds = np.searchsorted(c, np.arange(nMax, c[-1], nMax), side='left')
+    bounds = np.unique(np.concatenate(([0], bounds, [len(nPairs)])))
+    return [slice(i1, i2) for i1,i2 in zip(bounds[:-1], bounds[1:]) if i2>i1]
+
+
+def _evaluate(TT, TS, far, near, fFar, fNear, nOut, nMax):
+    """ Evaluation of the far and near interactions, accumulated on the sorted targets """
+    U = np.zeros((len(TT.order), nOut))
+    # --- Far field: targets of the target leaves x source cells
+    iTc, iSc = far
+    for J in _pairBlocks(TT.count[iTc], nMax):
+        nT = TT.count[iTc[J]]
+        iT = _expand_ranges(TT.start[iTc[J]], nT)
+        iS = np.repeat(iSc[J], nT)
+        u  = fFar(TT.P[iT], iS)
+        for j in range(nOut):
+            U[:,j] += np.bincount(iT, weights=u[:,j], minlength=U.shape[0])
+    # --- Near field: targets of the target leaves x sources of the source leaves
+    iTc, iSc = near
+    for J in _pairBlocks(TT.count[iTc]*TS.count[iSc], nMax):
+        nT, nS = TT.count[iTc[J]], TS.count[iSc[J]]
+        nTS = nT*nS
+        k  = np.arange(np.sum(nTS)) - np.repeat(np.cumsum(nTS)-nTS, nTS)
+        iT = np.repeat(TT.start[iTc[J]], nTS) + k // np.repeat(nS, nTS)
+        iS = np.repeat(TS.start[iSc[J]], nTS) + k %  np.repeat(nS, nTS)
+        u  = fNear(TT.P[iT]-TS.P[iS], iS)
+        for j in range(nOut):
+            U[:,j] += np.bincount(iT, weights=u[:,j], minlength=U.shape[0])
+    # --- Back to the original order of the targets
+    Uout = np.zeros(U.shape)
+    Uout[TT.order] = U
+    return Uout
+
+
+def _trees(CPs, P, leafSize):
+    TS = Tree(P, leafSize=leafSize)
+    if CPs is None or (CPs.shape==P.shape and np.array_equal(CPs, P)):
+        TT = TS
+    else:
+        TT = Tree(CPs, leafSize=leafSize)
+    return TT, TS
+
+
+# --------------------------------------------------------------------------------}
+# --- Tree codes
+# --------------------------------------------------------------------------------{
+def tree_vp_u(CPs, Pv, Alpha, RegFunction=0, RegParam=0, theta=0.5, order=1, leafSize=32, nDirect=2000,
+        nSigma=6, nMax=1000000):
+    """
+    Induced velocity from N 3D vortex particles on several control points, with a tree code (Barnes-Hut).
+
+    INPUTS:
+      - CPs  : nCP x 3, control points. If None, the particle positions are used.
+      - Pv   : N x 3, positions of the particles
+      - Alpha: N x 3, intensities of the particles
+      - RegFunction: 0: None, 1: Exponential, 2: Compact, see VortexParticle.vp_u_raw
+      - RegParam   : regularization parameter, scalar or array (N)
+      - theta  : opening angle. Smaller is more accurate. 0 corresponds to the direct sum.
+      - order  : expansion order 0 (monopole) or 1 (monopole and dipole)
+      - leafSize: maximum number of particles in the leaves of the trees
+      - nDirect: below this number of particles, the direct sum is used
+      - nSigma : cells are approximated if they are further than nSigma*RegParam from the control points
+      - nMax   : maximum number of interactions evaluated at once
+    OUTPUTS:
+      - U: nCP x 3, velocity
+    """
+    Pv, Alpha = [np.asarray(v, dtype=float).reshape(-1,3) for v in (Pv, Alpha)]
+    CPs = None if CPs is None else np.asarray(CPs, dtype=float).reshape(-1,3)
+    RegParam = _regParam(RegParam, Pv.shape[0])
+    if Pv.shape[0]<=nDirect or theta<=0:
+        return direct_vp_u(Pv if CPs is None else CPs, Pv, Alpha, RegFunction, RegParam, nMax=nMax)
+    if order not in [0,1]:
+        raise NotImplementedError('Expansion order {} for 3D particles'.format(order))
+    TT, TS = _trees(CPs, Pv, leafSize)
+    A  = Alpha[TS.order]
+    RP = RegParam[TS.order]
+    # --- Expansions about the cell centers
+    iC, iP = TS.pairCell, TS.pairPoint
+    M = TS.reduceCells(A[iP])
+    if order==1:
+        d = TS.P[iP]-TS.center[iC]
+        D = TS.reduceCells(A[iP][:,:,None]*d[:,None,:]) # D_lk = sum alpha_l d_k
+        w = np.column_stack((D[:,1,2]-D[:,2,1], D[:,2,0]-D[:,0,2], D[:,0,1]-D[:,1,0])) # sum alpha x d
+    sepMin = None
+    if RegFunction!=0:
+        sepMin = nSigma*TS.reduceCells(RP[iP], np.maximum)
+
+    def fFar(X, iS):
+        R  = X-TS.center[iS]
+        r2 = np.sum(R**2, axis=1)
+        r3_inv = 1/(r2*np.sqrt(r2))
+        u = _cross(M[iS], R)*r3_inv[:,None]
+        if order==1:
+            DR = np.einsum('ilk,ik->il', D[iS], R)
+            u += -w[iS]*r3_inv[:,None] + 3*_cross(DR, R)*(r3_inv/r2)[:,None]
+        return u/(4*np.pi)
+
+    fNear = lambda DP, iS: _vp_kernel(DP, A[iS], RegFunction, RP[iS])
+    far, near = _interactionLists(TT, TS, theta, sepMin)
+    return _evaluate(TT, TS, far, near, fFar, fNear, 3, nMax)
+
+
+def tree_vps_u(CPs, XV, Gammas, SmoothModel=0, KernelOrder=2, SmoothParam=None, theta=0.5, order=4,
+        leafSize=32, nDirect=2000, nSigma=6, nMax=1000000):
+    """
+    Induced velocity from N 2D point vortices on several control points, with a tree code (Barnes-Hut).
+
+    INPUTS:
+      - CPs   : nCP x 2, control points. If None, the vortex positions are used.
+      - XV    : N x 2, positions of the point vortices
+      - Gammas: N, circulations of the point vortices
+      - SmoothModel, KernelOrder: see VortexPoint.vps_u
+      - SmoothParam: smoothing parameter, scalar or array (N)
+      - theta  : opening angle. Smaller is more accurate. 0 corresponds to the direct sum.
+      - order  : order p of the multipole expansions (p+1 terms)
+      - leafSize, nDirect, nSigma, nMax: see tree_vp_u
+    OUTPUTS:
+      - U: nCP x 2, velocity
+    """
+    XV = np.asarray(XV, dtype=float).reshape(-1,2)
+    CPs = None if CPs is None else np.asarray(CPs, dtype=float).reshape(-1,2)
+    Gammas = np.broadcast_to(np.asarray(Gammas, dtype=float), (XV.shape[0],))
+    SmoothParam = _regParam(SmoothParam, XV.shape[0])
+    if XV.shape[0]<=nDirect or theta<=0:
+        return direct_vps_u(XV if CPs is None else CPs, XV, Gammas, SmoothModel, KernelOrder, SmoothParam, nMax=nMax)
+    fE, fQ = _vps_kernelFunctions(SmoothModel, KernelOrder)
+    TT, TS = _trees(CPs, XV, leafSize)
+    G  = Gammas[TS.order]
+    SP = SmoothParam[TS.order]
+    # --- Complex multipole expansions about the cell centers: a_k = sum Gamma (z-c)^k
+    iC, iP = TS.pairCell, TS.pairPoint
+    d = (TS.P[iP,0]-TS.center[iC,0]) + 1j*(TS.P[iP,1]-TS.center[iC,1])
+    a = TS.reduceCells(G[iP][:,None]*d[:,None]**np.arange(order+1)[None,:])
+    sepMin = None
+    if fE is not None:
+        sepMin = nSigma*TS.reduceCells(SP[iP], np.maximum)
+
+    def fFar(X, iS):
+        # u - i v = -i/(2 pi) sum_k a_k / (z-c)^(k+1)
+        zinv = 1/((X[:,0]-TS.center[iS,0]) + 1j*(X[:,1]-TS.center[iS,1]))
+        w = np.zeros(zinv.shape, dtype=complex)
+        for k in range(order, -1, -1): # Horner
+            w = (w + a[iS,k])*zinv
+        w = -1j*w/(2*np.pi)
+        return np.column_stack((w.real, -w.imag))
+
+    fNear = lambda DP, iS: _vps_kernel(DP, G[iS], fE, fQ, SP[iS])
+    far, near = _interactionLists(TT, TS, theta, sepMin)
+    return _evaluate(TT, TS, far, near, fFar, fNear, 2, nMax)
+
+
+def treecode_benchmark(N=20000, nDim=3, thetas=(0.3, 0.5, 0.7), orders=None, nCheck=500, seed=0, **kwargs):
+    """
+    Error and computational time of the tree code versus the direct sum, for N particles
+    randomly distributed in a unit sphere (3D) or disk (2D), with random intensities.
+    The errors are evaluated on nCheck particles, relative to the maximum velocity.
+
+    OUTPUTS:
+      - df: dataframe with columns theta, order, time_tree [s], time_direct [s] (extrapolated to N particles),
+            error_max, error_rms
+    """
+    import time
+    import pandas as pd
+    np.random.seed(seed)
+    P = np.random.normal(0, 1, (N, nDim))
+    P = P/np.sqrt(np.sum(P**2, axis=1))[:,None] * np.random.uniform(0, 1, N)[:,None]**(1/nDim)
+    if orders is None:
+        orders = [0,1] if nDim==3 else [2,4,8]
+    if nDim==3:
+        Alpha = np.random.normal(0, 1, (N,3))/N
+        fTree   = lambda theta, order: tree_vp_u(None, P, Alpha, theta=theta, order=order, **kwargs)
+        fDirect = lambda I: direct_vp_u(P[I], P, Alpha, **kwargs)
+    else:
+        Gammas = np.random.normal(0, 1, N)/N
+        fTree   = lambda theta, order: tree_vps_u(None, P, Gammas, theta=theta, order=order, **kwargs)
+        fDirect = lambda I: direct_vps_u(P[I], P, Gammas, **kwargs)
+    I = np.random.choice(N, min(nCheck,N), replace=False)
+    t0 = time.time()
+    U_ref = fDirect(I)
+    time_direct = (time.time()-t0)*N/len(I)
+    scale = np.max(np.sqrt(np.sum(U_ref**2, axis=1)))
+    rows = []
+    for order in orders:
+        for theta in thetas:
+            t0 = time.time()
+            U = fTree(theta, order)
+            t = time.time()-t0
+            err = np.sqrt(np.sum((U[I]-U_ref)**2, axis=1))/scale
+            rows.append({'N':N, 'theta':theta, 'order':order, 'time_tree':t, 'time_direct':time_direct,
+                'error_max':np.max(err), 'error_rms':np.sqrt(np.mean(err**2))})
+    return pd.DataFrame(rows)
+
+
+
+# --------------------------------------------------------------------------------}
+# --- TESTS
+# --------------------------------------------------------------------------------{
+class TestTreeCode(unittest.TestCase):
+    def test_direct(self):
+        # --- Vectorized direct sums vs loops on the original kernels
+        from welib.vortilib.elements.VortexParticle import vp_u
+        from welib.vortilib.elements.VortexPoint import vps_u
+        np.random.seed(0)
+        P  = np.random.randn(30,3)
+        A  = np.random.randn(30,3)
+        CP = np.random.randn(10,3)
+        CP[0] = P[0]
+        for RegFunction in [0,1,2]:
+            U_ref = np.sum([vp_u(CP, P[j], A[j], RegFunction, 0.3) for j in range(len(P))], axis=0)
+            np.testing.assert_allclose(direct_vp_u(CP, P, A, RegFunction, 0.3, nMax=50), U_ref, atol=1e-13)
+        G = np.random.randn(30)
+        for SmoothModel, KernelOrder in [(0,2), (1,4), (2,2), (2,6)]:
+            U_ref = vps_u(CP[:,:2], P[:,:2], G, SmoothModel, KernelOrder, 0.3*np.ones(30))
+            U = direct_vps_u(CP[:,:2], P[:,:2], G, SmoothModel, KernelOrder, 0.3, nMax=50)
+            np.testing.assert_allclose(U, U_ref, atol=1e-13)
+
+    def test_tree(self):
+        # --- Tree: cells contain their points
+        np.random.seed(1)
+        P = np.random.rand(3000,3)
+        T = Tree(P, leafSize=16)
+        iC, iP = T.cellPoints()
+        self.assertTrue(np.all(np.abs(T.P[iP]-T.center[iC]) <= T.halfSize[iC][:,None]*(1+1e-12)))
+        np.testing.assert_equal(np.sort(T.order), np.arange(3000))
+        self.assertTrue(np.all(T.count[T.isLeaf]<=16))
+
+    def test_treecode(self):
+        # --- Tree code vs direct sum, error decreases with theta and order
+        np.random.seed(2)
+        N = 2000
+        P = np.random.rand(N,3)
+        A = np.random.randn(N,3)/N
+        U_ref = direct_vp_u(P, P, A, RegFunction=1, RegParam=0.01)
+        scale = np.max(np.abs(U_ref))
+        errs = []
+        for theta, order in [(0.7,0), (0.5,1), (0.3,1)]:
+            U = tree_vp_u(None, P, A, RegFunction=1, RegParam=0.01, theta=theta, order=order, nDirect=100)
+            errs.append(np.max(np.abs(U-U_ref))/scale)
+        self.assertTrue(errs[0]>errs[1]>errs[2])
+        self.assertLess(errs[2], 1e-3)
+        # Separate control points
+        CP = np.random.rand(500,3)*2-0.5
+        U = tree_vp_u(CP, P, A, theta=0.3, nDirect=100)
+        np.testing.assert_allclose(U, direct_vp_u(CP, P, A), atol=1e-3*scale)
+        # --- 2D
+        G = np.random.randn(N)/N
+        U_ref = direct_vps_u(P[:,:2], P[:,:2], G, SmoothModel=2, KernelOrder=4, SmoothParam=0.005)
+        U = tree_vps_u(None, P[:,:2], G, SmoothModel=2, KernelOrder=4, SmoothParam=0.005, theta=0.5, order=8, nDirect=100)
+        self.assertLess(np.max(np.abs(U-U_ref))/np.max(np.abs(U_ref)), 1e-4)
+        # Fall back to the direct sum
+        U = tree_vps_u(None, P[:100,:2], G[:100], theta=0.5)
+        np.testing.assert_allclose(U, direct_vps_u(P[:100,:2], P[:100,:2], G[:100]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,356 @@
+"""
+Vortex-in-cell (VIC) solver: velocity from vorticity on a regular grid (welib.mesh.mesh.Mesh), with FFTs.
+
+The velocity is obtained from the Poisson equation of the streamfunction (2D) or vector potential (3D):
+      laplacian(psi) = - omega,    u = curl(psi)
+with the following boundary conditions:
+  - 'periodic': spectral solution, the domain is periodic with period n*dx in each direction
+                (the last grid point is not a repetition of the first one). The mean vorticity is discarded.
+  - 'free'    : free-space (unbounded) solution, using the zero-padding method of Hockney and Eastwood:
+                the discrete convolution of the vorticity with the Green's function (Biot-Savart kernel)
+                is computed with FFTs on a grid of doubled size.
+
+For particles, the vorticity is projected on the grid (see projection.interp_p2m_vect), the velocity
+is solved on the grid and interpolated back to the particles (see projection.interp_m2p_vect),
+such that the cost of a velocity evaluation is O(N + M log M) for N particles and M grid points.
+
+Example:
+
+    mesh = mesh_around_particles(Part.P, dx=0.05)            # Mesh with a margin around the particles
+    U    = vic_u(Part, mesh, bc='free')                      # (nPart x nDim) velocity at the particles
+    u    = vic_solve(mesh, omega, bc='periodic')             # (nDim x n1 x n2 [x n3]) velocity on the grid
+
+"""
+import numpy as np
+import unittest
+from welib.mesh.mesh import Mesh
+from welib.vortilib.particles.projection import interp_p2m_vect, interp_m2p_vect
+
+
+# --------------------------------------------------------------------------------}
+# --- Green's functions
+# --------------------------------------------------------------------------------{
+def _paddedOffsets(n, d):
+    """ Coordinates of the grid offsets on the padded grid of size 2n (wrapped order, as fftfreq).
+    The offset n does not contribute to the convolution on the original grid. """
+    m = np.concatenate((np.arange(n), [n], np.arange(-n+1, 0)))
+    return m*d
+
+def _paddedCoords(n, dx):
+    X = np.meshgrid(*[_paddedOffsets(ni, di) for ni, di in zip(n, dx)], indexing='ij')
+    r2 = sum([x**2 for x in X])
+    return X, r2
+
+def green_laplace(n, dx):
+    """
+    Green's function G of the Laplace operator (laplacian(G)=delta), on the padded grid of size 2n.
+        2D: G =  ln(r)/(2 pi),   3D: G = -1/(4 pi r)
+    The value at r=0 is the average of G over a disk (2D) or sphere (3D) of the volume of a cell.
+    """
+    X, r2 = _paddedCoords(n, dx)
+    dV = np.prod(dx)
+    r2[r2==0] = np.inf
+    if len(n)==2:
+        G = np.log(r2)/(4*np.pi)
+        a = np.sqrt(dV/np.pi)
+        G.flat[0] = (np.log(a) - 0.5)/(2*np.pi)
+    elif len(n)==3:
+        G = -1/(4*np.pi*np.sqrt(r2))
+        a = (3*dV/(4*np.pi))**(1/3)
+        G.flat[0] = -3/(8*np.pi*a)
+    else:
+        raise NotImplementedError('Green function in {}D'.format(len(n)))
+    return G
+
+def kernel_biotsavart(n, dx):
+    """
+    Components of the Biot-Savart kernel K on the padded grid of size 2n, zero at r=0.
+        2D: K = (-y, x)/(2 pi r^2),  u = K * omega
+        3D: K = r/(4 pi r^3),        u = (omega x K) *  (convolution with each component)
+    """
+    X, r2 = _paddedCoords(n, dx)
+    r2[r2==0] = np.inf
+    if len(n)==2:
+        return [-X[1]/(2*np.pi*r2), X[0]/(2*np.pi*r2)]
+    elif len(n)==3:
+        r3 = r2*np.sqrt(r2)
+        return [x/(4*np.pi*r3) for x in X]
+    else:
+        raise NotImplementedError('Biot-Savart kernel in {}D'.format(len(n)))
+
+
+# --------------------------------------------------------------------------------}
+# --- FFT solvers on arrays
+# --------------------------------------------------------------------------------{
+def _convolve_free(fhat_list, G, n, dV):
+    """ Discrete convolution on the padded grid, returns the result on the original grid """
+    Ghat = np.fft.rfftn(G)
+    S = tuple([slice(0, ni) for ni in n])
+    return [np.fft.irfftn(Ghat*fh, s=G.shape)[S]*dV for fh in fhat_list]
+
+def _wavenumbers(n, dx):
+    K = np.meshgrid(*[2*np.pi*np.fft.fftfreq(ni, di) for ni, di in zip(n, dx)], indexing='ij')
+    k2 = sum([k**2 for k in K])
+    return K, k2
+
+def poisson_fft(f, dx, bc='free'):
+    """
+    Solves laplacian(psi) = f on a regular 2D or 3D grid, with FFTs.
+
+    INPUTS:
+      - f : source term, array (n1 x n2 [x n3])
+      - dx: grid spacings, array (nDim)
+      - bc: 'periodic' or 'free', see module documentation
+    OUTPUTS:
+      - psi: array of the shape of f
+    """
+    f  = np.asarray(f, dtype=float)
+    n  = f.shape
+    dx = np.broadcast_to(np.asarray(dx, dtype=float), (len(n),))
+    if bc=='periodic':
+        K, k2 = _wavenumbers(n, dx)
+        fhat = np.fft.fftn(f)
+        k2.flat[0] = 1
+        psihat = -fhat/k2
+        psihat.flat[0] = 0
+        return np.real(np.fft.ifftn(psihat))
+    elif bc=='free':
+        G = green_laplace(n, dx)
+        fhat = np.fft.rfftn(f, s=G.shape)
+        return _convolve_free([fhat], G, n, np.prod(dx))[0]
+    else:
+        raise NotImplementedError('Boundary condition {}'.format(bc))
+
+def velocity_fft(omega, dx, bc='free'):
+    """
+    Velocity induced by a vorticity field on a regular 2D or 3D grid, with FFTs.
+
+    INPUTS:
+      - omega: vorticity, array (n1 x n2) in 2D, or (3 x n1 x n2 x n3) in 3D
+      - dx   : grid spacings, array (nDim)
+      - bc   : 'periodic' or 'free', see module documentation
+    OUTPUTS:
+      - u: velocity, array (nDim x n1 x n2 [x n3])
+    """
+    omega = np.asarray(omega, dtype=float)
+    if omega.ndim==2:
+        nDim, n = 2, omega.shape
+        omega = omega[None,:,:]
+    elif omega.ndim==4 and omega.shape[0]==3:
+        nDim, n = 3, omega.shape[1:]
+    else:
+        raise Exception('Vorticity should be of shape (n1 x n2) or (3 x n1 x n2 x n3)')
+    dx = np.broadcast_to(np.asarray(dx, dtype=float), (nDim,))
+    if bc=='periodic':
+        K, k2 = _wavenumbers(n, dx)
+        k2.flat[0] = 1
+        psihat = [np.fft.fftn(w)/k2 for w in omega] # laplacian(psi) = -omega
+        for p in psihat:
+            p.flat[0] = 0
+        if nDim==2:
+            uhat = [1j*K[1]*psihat[0], -1j*K[0]*psihat[0]]
+        else:
+            uhat = [1j*(K[1]*psihat[2]-K[2]*psihat[1]), 1j*(K[2]*psihat[0]-K[0]*psihat[2]), 1j*(K[0]*psihat[1]-K[1]*psihat[0])]
+        return np.array([np.real(np.fft.ifftn(uh)) for uh in uhat])
+    elif bc=='free':
+        Ks = kernel_biotsavart(n, dx)
+        s  = Ks[0].shape
+        what = [np.fft.rfftn(w, s=s) for w in omega]
+        Khat = [np.fft.rfftn(k) for k in Ks]
+        if nDim==2:
+            uhat = [Khat[0]*what[0], Khat[1]*what[0]]
+        else:
+            uhat = [what[1]*Khat[2]-what[2]*Khat[1], what[2]*Khat[0]-what[0]*Khat[2], what[0]*Khat[1]-what[1]*Khat[0]]
+        S = tuple([slice(0, ni) for ni in n])
+        return np.array([np.fft.irfftn(uh, s=s)[S]*np.prod(dx) for uh in uhat])
+    else:
+        raise NotImplementedError('Boundary condition {}'.format(bc))
+
+
+# --------------------------------------------------------------------------------}
+# --- Interface with meshes and particles
+# --------------------------------------------------------------------------------{
+def _meshInfo(mesh):
+    if mesh.nDim not in [2,3]:
+        raise NotImplementedError('VIC solver in {}D'.format(mesh.nDim))
+    if not mesh.bRegular:
+        raise Exception('The VIC solver requires a regular mesh')
+    vs = [np.asarray(v, dtype=float) for v in [mesh.v1, mesh.v2, mesh.v3][:mesh.nDim]]
+    return vs, np.asarray(mesh.dCell, dtype=float)
+
+def vic_solve(mesh, omega=None, bc='free'):
+    """
+    Velocity from the vorticity on a regular mesh, see velocity_fft.
+
+    INPUTS:
+      - mesh : regular 2D or 3D Mesh
+      - omega: vorticity on the mesh, (n1 x n2) or (1 x n1 x n2) in 2D, (3 x n1 x n2 x n3) in 3D.
+               Default: the first nVal components of mesh.values (nVal=1 in 2D, 3 in 3D)
+      - bc   : 'periodic' or 'free'
+    OUTPUTS:
+      - u: velocity on the mesh, (nDim x n1 x n2 [x n3])
+    """
+    vs, dx = _meshInfo(mesh)
+    if omega is None:
+        omega = mesh.values
+    omega = np.asarray(omega, dtype=float)
+    if mesh.nDim==2:
+        omega = omega.reshape(omega.shape[-2:]) if omega.ndim==2 else omega[0]
+    else:
+        omega = omega[:3]
+    return velocity_fft(omega, dx, bc=bc)
+
+def mesh_around_particles(P, dx, margin=3, bc='free', periodicMargin=1.5):
+    """ Regular mesh containing the particles P (nPart x nDim), with a margin of `margin` cells,
+    such that the interpolation stencils of all the particles are inside the mesh.
+    For bc='periodic', the margin is at least `periodicMargin` times the extent of the particles
+    in each direction, such that the periodic images of the particles are far from them.
+    dx: grid spacing, scalar or array (nDim)"""
+    if bc not in ['free', 'periodic']:
+        raise NotImplementedError('Boundary condition {}'.format(bc))
+    P  = np.asarray(P, dtype=float)
+    nDim = P.shape[1]
+    dx = np.broadcast_to(np.asarray(dx, dtype=float), (nDim,))
+    vs = []
+    for d in range(nDim):
+        pmin, pmax = np.min(P[:,d]), np.max(P[:,d])
+        m  = margin*dx[d]
+        if bc=='periodic':
+            m = max(m, periodicMargin*(pmax-pmin))
+        x0 = pmin - m
+        n  = int(np.ceil((pmax + m - x0)/dx[d])) + 1
+        vs.append(x0 + np.arange(n)*dx[d])
+    return Mesh(*vs)
+
+def vic_u(Part, mesh=None, bc='free', kernel='mp4', dx=None, returnMesh=False):
+    """
+    Velocity induced by vortex particles at the particle locations, with the vortex-in-cell method:
+      - projection of the particle intensities on the mesh (P2M), omega = intensities/cell volume
+      - solution of the Poisson equation with FFTs, see velocity_fft
+      - interpolation of the mesh velocity to the particles (M2P)
+
+    INPUTS:
+      - Part  : Particles object (P and Intensity: circulation in 2D, vorticity*volume in 3D)
+      - mesh  : regular Mesh. The interpolation stencils (2 cells around each particle) should be inside the
+                mesh, particles outside of it do not contribute and get a zero velocity.
+                If None, a mesh is created around the particles, with grid spacing dx (see mesh_around_particles,
+                the mesh is enlarged for periodic boundary conditions)
+      - bc    : 'periodic' or 'free'
+      - kernel: interpolation kernel, 'mp4' or 'lambda3'
+    OUTPUTS:
+      - U: velocity at the particles, (nPart x nDim)
+      - mesh (if returnMesh): mesh, with the vorticity and velocity in mesh.values (omega, u)
+    """
+    P = np.asarray(Part.P, dtype=float)[:Part.nPart]
+    if mesh is None:
+        if dx is None:
+            raise Exception('Provide a mesh or a grid spacing dx')
+        mesh = mesh_around_particles(P, dx, bc=bc)
+    vs, dxs = _meshInfo(mesh)
+    if P.shape[1]!=mesh.nDim:
+        raise Exception('Particles and mesh do not have the same dimension')
+    Intensity = np.asarray(Part.Intensity, dtype=float).reshape(P.shape[0], -1)
+    omega = interp_p2m_vect(P, Intensity, *vs, kernel=kernel, bRegular=True)/np.prod(dxs)
+    u = vic_solve(mesh, omega, bc=bc)
+    U = interp_m2p_vect(P, u, *vs, kernel=kernel, bRegular=True)
+    if returnMesh:
+        mesh.values = np.concatenate((omega, u), axis=0)
+        return U, mesh
+    return U
+
+
+
+# --------------------------------------------------------------------------------}
+# --- TESTS
+# --------------------------------------------------------------------------------{
+class TestVIC(unittest.TestCase):
+    def test_periodic(self):
+        # --- 2D: psi = sin(x) cos(2y), omega = -laplacian(psi) = 5 psi
+        n = (32, 24)
+        L = 2*np.pi
+        dx = np.array([L/n[0], L/n[1]])
+        X, Y = np.meshgrid(np.arange(n[0])*dx[0], np.arange(n[1])*dx[1], indexing='ij')
+        psi = np.sin(X)*np.cos(2*Y)
+        np.testing.assert_allclose(poisson_fft(-5*psi, dx, bc='periodic'), psi, atol=1e-12)
+        u = velocity_fft(5*psi, dx, bc='periodic')
+        np.testing.assert_allclose(u[0], -2*np.sin(X)*np.sin(2*Y), atol=1e-12)
+        np.testing.assert_allclose(u[1], -np.cos(X)*np.cos(2*Y), atol=1e-12)
+        # --- 3D: A = (sin y, sin z, sin x), omega = A, u = curl(A) = (-cos z, -cos x, -cos y)
+        n = (16, 12, 8)
+        dx = np.array([L/ni for ni in n])
+        X, Y, Z = np.meshgrid(*[np.arange(ni)*di for ni,di in zip(n,dx)], indexing='ij')
+        u = velocity_fft(np.array([np.sin(Y), np.sin(Z), np.sin(X)]), dx, bc='periodic')
+        np.testing.assert_allclose(u[0], -np.cos(Z), atol=1e-12)
+        np.testing.assert_allclose(u[1], -np.cos(X), atol=1e-12)
+        np.testing.assert_allclose(u[2], -np.cos(Y), atol=1e-12)
+
+    def test_free(self):
+        from welib.vortilib.particles.treecode import direct_vps_u, direct_vp_u
+        # --- Free space: identical to the direct sum over the grid points
+        np.random.seed(0)
+        dx = np.array([0.1, 0.15])
+        n  = (12, 10)
+        omega = np.random.randn(*n)
+        X, Y = np.meshgrid(np.arange(n[0])*dx[0], np.arange(n[1])*dx[1], indexing='ij')
+        P = np.column_stack((X.ravel(), Y.ravel()))
+        u = velocity_fft(omega, dx, bc='free')
+        U = direct_vps_u(P, P, omega.ravel()*np.prod(dx))
+        np.testing.assert_allclose(u[0].ravel(), U[:,0], atol=1e-12)
+        np.testing.assert_allclose(u[1].ravel(), U[:,1], atol=1e-12)
+        # 3D
+        dx = np.array([0.1, 0.15, 0.2])
+        n  = (6, 5, 4)
+        omega = np.random.randn(3, *n)
+        X = np.meshgrid(*[np.arange(ni)*di for ni,di in zip(n,dx)], indexing='ij')
+        P = np.column_stack([x.ravel() for x in X])
+        u = velocity_fft(omega, dx, bc='free')
+        U = direct_vp_u(P, P, omega.reshape(3,-1).T*np.prod(dx))
+        for i in range(3):
+            np.testing.assert_allclose(u[i].ravel(), U[:,i], atol=1e-12)
+        # Poisson: 2D Gaussian, psi(r) = -Gamma/(4pi) (ln(r^2) + E1(r^2/s^2)), compared up to a constant
+        from scipy.special import exp1
+        s, G0 = 0.3, 1
+        v = np.linspace(-1.5, 1.5, 61)
+        X, Y = np.meshgrid(v, v, indexing='ij')
+        r2 = X**2+Y**2
+        omega = G0/(np.pi*s**2)*np.exp(-r2/s**2)
+        psi = poisson_fft(-omega, v[1]-v[0], bc='free')
+        psi_ref = np.zeros(r2.shape)
+        b = r2>0
+        psi_ref[b] = -G0/(4*np.pi)*(np.log(r2[b]) + exp1(r2[b]/s**2))
+        psi_ref[~b] = -G0/(4*np.pi)*(np.log(s**2) - np.euler_gamma) # limit at r=0
+        d = psi-psi_ref
+        self.assertLess(np.max(np.abs(d-np.mean(d)))/np.max(np.abs(psi_ref)), 2e-3) # second order in dx
+
+    def test_vic_particles(self):
+        from welib.vortilib.particles.particles import Particles
+        # --- Lamb-Oseen vortex discretized with particles
+        s, G0, h = 0.3, 1, 0.05
+        v = np.arange(-1, 1+h/2, h)
+        X, Y = np.meshgrid(v, v, indexing='ij')
+        Part = Particles(X.size, 2)
+        Part.setP(np.column_stack((X.ravel(), Y.ravel())))
+        r2 = np.sum(Part.P**2, axis=1)
+        Part.setIntensity(G0/(np.pi*s**2)*np.exp(-r2/s**2)*h**2)
+        Part.setVolume(np.ones(Part.nPart)*h**2)
+        U, mesh = vic_u(Part, dx=h, bc='free', returnMesh=True)
+        r2[r2==0] = 1
+        Ut = G0/(2*np.pi*r2)*(1-np.exp(-r2/s**2))
+        U_ref = np.column_stack((-Part.P[:,1]*Ut, Part.P[:,0]*Ut))
+        self.assertLess(np.max(np.abs(U-U_ref)), 0.01*np.max(np.abs(U_ref)))
+        self.assertEqual(mesh.values.shape[0], 3)
+        # Mesh given by the user, periodic (vortex far from the boundaries), lambda3
+        mesh = Mesh(np.arange(-4,4,h), np.arange(-4,4,h))
+        U2 = vic_u(Part, mesh, bc='periodic', kernel='lambda3')
+        self.assertLess(np.max(np.abs(U2-U_ref)), 0.05*np.max(np.abs(U_ref)))
+        # Mesh created for periodic boundary conditions, enlarged to keep the images far
+        U3, mesh = vic_u(Part, dx=h, bc='periodic', returnMesh=True)
+        np.testing.assert_allclose([mesh.v1[0], mesh.v1[-1]], [-4, 4], atol=h)
+        self.assertLess(np.max(np.abs(U3-U_ref)), 0.05*np.max(np.abs(U_ref)))
+        meshFree = mesh_around_particles(Part.P, h, bc='free')
+        self.assertLess(len(meshFree.v1), len(mesh.v1))
+        with self.assertRaises(NotImplementedError):
+            mesh_around_particles(Part.P, h, bc='wall')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,5 @@
+import os
+import hashlib
 import numpy as np
 import pandas as pd
 import scipy.interpolate as si
@@ -56,6 +58,108 @@ def Taero(WS, Pitch, Omega, R, rho_air, fCT):
     return T
 
 
+# --------------------------------------------------------------------------------}
+# --- Generation of CP, CT, CQ tables with the steady BEM 
+# --------------------------------------------------------------------------------{
+def _CPCT_BEM_worker(args):
+    """ Evaluates the BEM for a subset of pitch values and all the tip speed ratios.
+    Top level function, such that it can be sent to a process pool. """
+    from welib.BEM.steadyBEM import SteadyBEMBatch
+    Pitch, Lambda, WS, rotor, kwargs = args
+    nB, cone, r, chord, twist, polars, rho, KinVisc = rotor
+    Omega = Lambda*WS/r[-1] *60/(2*np.pi) # [rpm]
+    BEM = SteadyBEMBatch(Omega[:,None], Pitch[None,:], WS, 0, 0, nB, cone, r, chord, twist, polars,
+            rho=rho, KinVisc=KinVisc, **kwargs)
+    return BEM.CP, BEM.CT, BEM.CQ  # nLambda x nPitch
+
+
+def _CPCT_hash(rotor, Lambda, Pitch, WS, kwargs):
+    """ Hash of the blade geometry, polars, environment, grid and BEM options """
+    from welib.airfoils.PolarTable import PolarTable
+    nB, cone, r, chord, twist, polars, rho, KinVisc = rotor
+    h = hashlib.md5()
+    for v in (r, chord, twist, Lambda, Pitch, [nB, cone, rho, KinVisc, WS]):
+        h.update(np.ascontiguousarray(v, dtype=float).tobytes())
+    if isinstance(polars, PolarTable):
+        polars = [polars.alpha, polars.data]
+    for p in polars:
+        p = np.ascontiguousarray(p, dtype=float)
+        h.update(str(p.shape).encode())
+        h.update(p.tobytes())
+    h.update(repr(sorted(kwargs.items())).encode())
+    return h.hexdigest()
+
+
+def CPCT_LambdaPitch_BEM(nB, cone, r, chord, twist, polars, rho=1.225, KinVisc=15.68*10**-6,
+        Lambda=np.linspace(0.5,15,30), Pitch=np.linspace(-5,30,36), WS=10, 
+        nCores=None, cacheDir=None, reRun=False, **kwargs):
+    """ Computes CP, CT and CQ as function of tip speed ratio (lambda) and pitch using the steady BEM.
+    Alternative to welib.fast.case_gen.CPCT_LambdaPitch, without running OpenFAST.
+
+    The rotor definition is the one returned by FASTFile2SteadyBEM or FLEX2SteadyBEM, e.g.:
+        rotor = FASTFile2SteadyBEM(fstFile)
+        MCP, MCT, MCQ, Lambda, Pitch, MaxVal = CPCT_LambdaPitch_BEM(*rotor, cacheDir='_cache')
+
+    INPUTS:
+      - nB, cone, r, chord, twist, polars, rho, KinVisc: rotor definition, see SteadyBEM
+      - Lambda: tip speed ratios [-]
+      - Pitch : pitch angles [deg]
+      - WS    : wind speed used for all the operating points [m/s]
+      - nCores: number of processes used to evaluate the pitch values (default: number of cpus). 
+                If 1, the grid is evaluated in the current process.
+      - cacheDir: directory where the tables are stored. The file name is a hash of the blade
+                geometry, polars, grid and BEM options. If the file exists, the tables are read from it.
+      - reRun : if True, the tables are recomputed even if present in the cache
+      - kwargs: options passed to SteadyBEMBatch (e.g. bTipLoss, bAIDrag, nItMax)
+    OUTPUTS:
+      - MCP, MCT, MCQ: arrays of shape (nLambda x nPitch), same convention as load_files
+      - Lambda, Pitch: grid
+      - MaxVal: dictionary with CP_max, lambda_opt, pitch_opt
+    """
+    Lambda = np.asarray(Lambda, dtype=float)
+    Pitch  = np.asarray(Pitch , dtype=float)
+    rotor  = (nB, cone, np.asarray(r, dtype=float), np.asarray(chord, dtype=float), np.asarray(twist, dtype=float), polars, rho, KinVisc)
+
+    # --- Cache
+    cacheFile = None
+    if cacheDir is not None:
+        key = _CPCT_hash(rotor, Lambda, Pitch, WS, kwargs)
+        cacheFile = os.path.join(cacheDir, 'CPCT_{}.npz'.format(key))
+    if cacheFile is not None and os.path.exists(cacheFile) and not reRun:
+        d = np.load(cacheFile)
+        MCP, MCT, MCQ = d['CP'], d['CT'], d['CQ']
+    else:
+        # --- Evaluating chunks of pitch values
+        if nCores is None:
+            nCores = os.cpu_count()
+        nCores = int(max(1, min(nCores, len(Pitch))))
+        chunks = [(P, Lambda, WS, rotor, kwargs) for P in np.array_split(Pitch, min(2*nCores, len(Pitch)))]
+        if nCores==1:
+            results = [_CPCT_BEM_worker(c) for c in chunks]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=nCores) as executor:
+                results = list(executor.map(_CPCT_BEM_worker, chunks))
+        MCP, MCT, MCQ = [np.column_stack([res[j] for res in results]) for j in range(3)]
+        if cacheFile is not None:
+            if not os.path.exists(cacheDir):
+                os.makedirs(cacheDir)
+            np.savez(cacheFile, CP=MCP, CT=MCT, CQ=MCQ, Lambda=Lambda, Pitch=Pitch)
+
+    #  --- CP max
+    i,j = np.unravel_index(MCP.argmax(), MCP.shape)
+    MaxVal={'CP_max':MCP[i,j],'lambda_opt':Lambda[i],'pitch_opt':Pitch[j]}
+    return MCP, MCT, MCQ, Lambda, Pitch, MaxVal
+
+
+def writeCPCT(base, Lambda, Pitch, CP, CT=None, CQ=None, suffix=''):
+    """ Writes the tables in the format read by TabulatedWSEstimator.load_files(base=base, suffix=suffix) """
+    pd.DataFrame(np.asarray(Lambda)).to_csv(base+'_Lambda'+suffix+'.csv', header=False, index=False)
+    pd.DataFrame(np.asarray(Pitch) ).to_csv(base+'_Pitch'+suffix+'.csv' , header=False, index=False)
+    for M, name in zip((CP, CT, CQ), ('CP','CT','CQ')):
+        if M is not None:
+            pd.DataFrame(M).to_csv(base+'_'+name+suffix+'.csv', header=False, index=False)
+
 
 class TabulatedWSEstimator():
 
@@ -104,6 +208,25 @@ class TabulatedWSEstimator():
 
         self.computeWeights()
 
+    def load_BEM(self, nB, cone, r, chord, twist, polars, rho=None, KinVisc=15.68*10**-6, **kwargs):
+        """ Generates the CP and CT tables with the steady BEM instead of reading them from files
+        The rotor definition is the one returned by FASTFile2SteadyBEM or FLEX2SteadyBEM, e.g.:
+            wse.load_BEM(*FASTFile2SteadyBEM(fstFile), cacheDir='_cache')
+        kwargs are passed to CPCT_LambdaPitch_BEM (e.g. Lambda, Pitch, nCores, cacheDir)
+        """
+        if rho is None:
+            rho = self.rho_air
+        if self.R is None:
+            self.R = r[-1]
+        MCP, MCT, MCQ, self.LAMBDA, self.PITCH, _ = CPCT_LambdaPitch_BEM(nB, cone, r, chord, twist, polars, rho=rho, KinVisc=KinVisc, **kwargs)
+        self.CP = MCP
+        self.CP[self.CP<=0]=0
+        self.CT = MCT
+        self.CT[self.CT<=0]=0
+        self.CQ = MCQ
+        self.Oper=None
+        self.computeWeights()
+
     def computeWeights(self):
         self.fCP = interp2d_pairs(self.PITCH,self.LAMBDA,self.CP,kind='cubic')
         if self.CT is not None:
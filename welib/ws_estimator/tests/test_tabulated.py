@@ -0,0 +1,45 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+from welib.BEM.steadyBEM import FASTFile2SteadyBEM, SteadyBEM
+from welib.ws_estimator.tabulated import CPCT_LambdaPitch_BEM, writeCPCT, TabulatedWSEstimator
+
+MyDir=os.path.dirname(__file__)
+
+class Test(unittest.TestCase):
+    def test_CPCT_BEM(self):
+        rotor = FASTFile2SteadyBEM(os.path.join(MyDir,'../../../data/NREL5MW/Main_Onshore_OF2.fst'))
+        nB,cone,r,chord,twist,polars,rho,KinVisc = rotor
+        Lambda = np.linspace(4,10,4)
+        Pitch  = np.linspace(-2,6,5)
+        cacheDir = tempfile.mkdtemp()
+        try:
+            # --- Process pool, and cache
+            MCP, MCT, MCQ, _, _, MaxVal = CPCT_LambdaPitch_BEM(*rotor, Lambda=Lambda, Pitch=Pitch, nCores=2, cacheDir=cacheDir)
+            np.testing.assert_equal(MCP.shape, (len(Lambda),len(Pitch)))
+            np.testing.assert_almost_equal(MaxVal['CP_max'], 0.4938, 3)
+            np.testing.assert_equal(len(os.listdir(cacheDir)), 1)
+            MCP2, MCT2, _, _, _, _ = CPCT_LambdaPitch_BEM(*rotor, Lambda=Lambda, Pitch=Pitch, nCores=1, cacheDir=cacheDir)
+            np.testing.assert_equal(MCP2, MCP)
+            # --- Same as one BEM call
+            i, j, WS = 2, 3, 10
+            BEM = SteadyBEM(Lambda[i]*WS/r[-1]*60/(2*np.pi), Pitch[j], WS, 0, 0, nB,cone,r,chord,twist,polars, rho=rho, KinVisc=KinVisc)
+            np.testing.assert_almost_equal(MCP[i,j], BEM.CP, 5)
+            np.testing.assert_almost_equal(MCT[i,j], BEM.CT, 5)
+            np.testing.assert_almost_equal(MCQ[i,j], BEM.CQ, 5)
+            # --- Estimator, from files, or directly
+            base = os.path.join(cacheDir, 'NREL5MW')
+            writeCPCT(base, Lambda, Pitch, MCP, MCT, MCQ)
+            wse1 = TabulatedWSEstimator(R=r[-1], rho_air=rho)
+            wse1.load_files(base+'_Lambda.csv', base+'_Pitch.csv', base+'_CP.csv', base+'_CT.csv')
+            wse2 = TabulatedWSEstimator(rho_air=rho)
+            wse2.load_BEM(*rotor, Lambda=Lambda, Pitch=Pitch, cacheDir=cacheDir)
+            np.testing.assert_almost_equal(wse1.CP, wse2.CP)
+            np.testing.assert_almost_equal(wse2.R, r[-1])
+        finally:
+            shutil.rmtree(cacheDir)
+
+if __name__ == '__main__':
+    unittest.main()